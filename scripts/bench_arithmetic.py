@@ -0,0 +1,90 @@
+# scripts/bench_arithmetic.py
+"""算术指令微基准：比较宽值拆分为两个32位半值与完整值保存在低位寄存器两种表示
+
+用法: python scripts/bench_arithmetic.py [迭代次数]
+"""
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.dalvik.vm import DalvikVM
+from src.core.dalvik.registers import WIDE_HIGH, LONG_MIN, LONG_MAX, int64
+from tests.bytecode_helpers import assemble, make_method, new_parser, double_bits, i12x, i21s, i21t, i22b, i23x, \
+    i51l, i11x
+
+
+def split_halves_kernel(iterations: int) -> float:
+    """旧表示：每次运算都要拼接和拆分高低32位"""
+    regs = [0, 0, 3, 0, 0x5A5A, 0]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        value1 = (regs[1] << 32) | regs[0]
+        value2 = (regs[3] << 32) | regs[2]
+        result = value1 + value2
+        regs[0] = result & 0xFFFFFFFF
+        regs[1] = result >> 32
+        value1 = (regs[1] << 32) | regs[0]
+        value2 = (regs[5] << 32) | regs[4]
+        result = value1 ^ value2
+        regs[0] = result & 0xFFFFFFFF
+        regs[1] = result >> 32
+    return time.perf_counter() - start
+
+
+def native_width_kernel(iterations: int) -> float:
+    """新表示：完整值保存在低位寄存器，只在越界时回绕"""
+    regs = [0, WIDE_HIGH, 3, WIDE_HIGH, 0x5A5A, WIDE_HIGH]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = regs[0] + regs[2]
+        regs[0] = result if LONG_MIN <= result <= LONG_MAX else int64(result)
+        regs[1] = WIDE_HIGH
+        regs[0] = regs[0] ^ regs[4]
+        regs[1] = WIDE_HIGH
+    return time.perf_counter() - start
+
+
+def interpreter_loop(iterations: int) -> float:
+    """解释器执行 long/double 混合循环"""
+    vm = DalvikVM()
+    parser = new_parser()
+    units = assemble(
+        i21s(0x16, 0, 0),                    # const-wide/16 v0, 0
+        i21s(0x16, 2, 7),                    # const-wide/16 v2, 7
+        i51l(0x18, 4, double_bits(1.0)),     # const-wide v4, 1.0
+        i51l(0x18, 6, double_bits(1.0001)),  # const-wide v6, 1.0001
+        i23x(0x9B, 0, 0, 2),                 # add-long v0, v0, v2
+        i23x(0x9D, 0, 0, 2),                 # mul-long v0, v0, v2
+        i23x(0xAD, 4, 4, 6),                 # mul-double v4, v4, v6
+        i23x(0x31, 8, 0, 2),                 # cmp-long v8, v0, v2
+        i12x(0x8A, 9, 4),                    # double-to-int v9, v4
+        i22b(0xD8, 10, 10, -1),              # add-int/lit8 v10, v10, -1
+        i21t(0x39, 10, -11),                 # if-nez v10, loop
+        i11x(0x10, 0),                       # return-wide v0
+    )
+    method = make_method(parser, units, 11, 1)
+    start = time.perf_counter()
+    vm.interpreter.interpret(method, {}, parser, [iterations])
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    old = split_halves_kernel(iterations)
+    new = native_width_kernel(iterations)
+    print(f"拆分半值表示:   {old:.3f}s  ({iterations * 2 / old / 1e6:.2f} M ops/s)")
+    print(f"完整宽值表示:   {new:.3f}s  ({iterations * 2 / new / 1e6:.2f} M ops/s)")
+    print(f"加速比:         {old / new:.2f}x")
+
+    loop_iterations = iterations // 10
+    elapsed = interpreter_loop(loop_iterations)
+    executed = loop_iterations * 7
+    print(f"解释器循环:     {elapsed:.3f}s  ({executed / elapsed / 1e6:.2f} M insns/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# scripts/bench_gc.py
+"""标记吞吐量基准：深对象图（单链表）与宽对象图（一个引用数组持有全部对象）
+
+比较递归标记到 set 的旧实现与显式工作栈 + 标记位图的实现，旧实现在深对象图上超出递归深度。
+用法: python scripts/bench_gc.py [对象数]
+"""
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.dalvik.vm import DalvikVM
+
+
+def build(shape: str, count: int) -> DalvikVM:
+    """创建虚拟机并分配 count 个对象，全部从一个寄存器可达"""
+    vm = DalvikVM()
+    vm.gc.nursery_size = vm.gc.heap_size = 1 << 60
+    heap = vm.heap
+    nodes = [vm._create_object('LNode;') for _ in range(count)]
+    if shape == 'deep':
+        for node, successor in zip(nodes, nodes[1:]):
+            heap[node]['fields']['next'] = successor
+        root = nodes[0]
+    else:
+        root = vm._create_array('[LNode;', count)
+        heap[root]['data'][:] = nodes
+    vm.interpreter.registers = [root]
+    return vm
+
+
+def recursive_mark(vm: DalvikVM) -> int:
+    """旧实现：每个引用递归一次，标记集合是 set"""
+    heap = vm.heap
+    marked = set()
+
+    def mark(object_id):
+        if object_id in marked:
+            return
+        marked.add(object_id)
+        obj = heap[object_id]
+        for value in obj['fields'].values():
+            if isinstance(value, int) and value in heap:
+                mark(value)
+        data = obj.get('data')
+        if isinstance(data, list):
+            for element in data:
+                if isinstance(element, int) and element in heap:
+                    mark(element)
+
+    for value in vm.interpreter.registers:
+        mark(value)
+    return len(marked)
+
+
+def bitmap_mark(vm: DalvikVM) -> int:
+    """新实现：显式工作栈，标记位图以对象ID为下标"""
+    return sum(vm.gc._mark(vm.gc.allocated))
+
+
+def measure(mark, vm: DalvikVM, count: int) -> str:
+    start = time.perf_counter()
+    try:
+        marked = mark(vm)
+    except RecursionError:
+        return "RecursionError"
+    elapsed = time.perf_counter() - start
+    assert marked >= count
+    return f"{elapsed * 1000:8.2f} ms  {count / elapsed / 1e6:6.2f} M对象/s"
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for shape in ('deep', 'wide'):
+        vm = build(shape, count)
+        print(f"{shape} ({count} 个对象)")
+        print(f"  递归 + set:       {measure(recursive_mark, vm, count)}")
+        print(f"  工作栈 + 位图:    {measure(bitmap_mark, vm, count)}")
+        start = time.perf_counter()
+        vm.gc.collect()
+        print(f"  完整回收（全部存活）: {(time.perf_counter() - start) * 1000:8.2f} ms")
+        vm.interpreter.registers = []
+        start = time.perf_counter()
+        vm.gc.collect()
+        print(f"  完整回收（全部回收）: {(time.perf_counter() - start) * 1000:8.2f} ms")
@@ -0,0 +1,36 @@
+# scripts/dex2py.py
+"""提前编译整个 DEX：把全部可编译方法写成 Python 包（默认）或 marshal bundle
+
+用法: python scripts/dex2py.py classes.dex 输出路径 [--bundle] [-j 进程数]
+运行时用 DalvikVM.load_aot(输出路径, parser) 或设置 vm.aot_image 加载
+"""
+import argparse
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.dalvik.dex2py import BUNDLE, PACKAGE, compile_dex
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="DEX 提前编译为 Python 代码")
+    parser.add_argument('dex', help="DEX 文件")
+    parser.add_argument('output', help="输出的包目录或 bundle 文件")
+    parser.add_argument('--bundle', action='store_true', help="输出单个 marshal bundle 而不是 Python 包")
+    parser.add_argument('-j', '--processes', type=int, default=None, help="编译进程数，默认使用全部CPU")
+    args = parser.parse_args()
+
+    with open(args.dex, 'rb') as f:
+        dex_data = f.read()
+    report = compile_dex(dex_data, args.output, BUNDLE if args.bundle else PACKAGE, args.processes)
+    print(f"{report['compiled']}/{report['methods']} 个方法 -> {report['output']} "
+          f"({report['seconds']:.2f}s, {report['processes']} 个进程)")
+    for method, error in sorted(report['failed'].items()):
+        print(f"  解释执行 {method}: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
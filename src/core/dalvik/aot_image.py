@@ -0,0 +1,118 @@
+# src/core/dalvik/aot_image.py
+import importlib
+import importlib.util
+import hashlib
+import inspect
+import logging
+import marshal
+import os
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+
+from .code_cache import StaleEntry, bind_entry, dex_signature, methods_by_signature, python_tag
+from .jit_codegen import COMPILER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# AOT镜像的格式与加载（编译见 dex2py.py）
+#
+# 镜像保存一个 DEX 中全部可编译方法的基线版本，有两种格式：
+#   包     目录，__init__.py 记录 IMAGE_VERSION、DEX_SIGNATURE、COMPILER_VERSION 和
+#          METHODS（方法签名 -> (模块名, 函数名)），每个类一个模块，模块中是生成的函数源码以及
+#          RELOCATIONS、ASSUMPTIONS（函数名 -> 重定位表/假设）。导入时由 Python 缓存字节码
+#   bundle 单个 marshal 文件，内容与代码缓存条目相同（代码对象、源码、重定位表、假设），
+#          另记录 Python 版本，版本不同时整个文件失效
+# 加载时按签名找到方法，用与代码缓存相同的重定位过程绑定为当前进程中的函数并安装为基线版本。
+# 镜像中没有的方法（未通过校验或含暂不支持的指令）照常解释执行和JIT编译
+
+IMAGE_VERSION = 1
+PACKAGE_INIT = '__init__.py'
+
+
+class ImageMismatch(Exception):
+    """镜像不是为当前 DEX 或当前编译器生成的"""
+
+
+def load_image(vm, dex_parser, path: str) -> Dict[str, Any]:
+    """加载 path 处的镜像（目录为包，文件为 bundle），返回安装统计"""
+    report = {'installed': 0, 'skipped': 0, 'error': None}
+    try:
+        entries = _package_entries(path, dex_parser) if os.path.isdir(path) else _bundle_entries(path, dex_parser)
+        methods = methods_by_signature(dex_parser)
+        for signature, payload in entries:
+            method = methods.get(signature)
+            if method is None:
+                report['skipped'] += 1
+                continue
+            code = dex_parser.code_items[method['code_off']]
+            try:
+                function = bind_entry(vm, method, code, dex_parser, payload)
+            except StaleEntry as e:
+                logger.debug(f"AOT版本暂不可用: {signature}: {e}")
+                report['skipped'] += 1
+                continue
+            if vm.jit.install_precompiled(code, function):
+                report['installed'] += 1
+            else:
+                report['skipped'] += 1
+    except ImageMismatch as e:
+        report['error'] = str(e)
+        logger.warning(f"AOT镜像不可用: {path}: {e}")
+    except (OSError, EOFError, ValueError, TypeError, KeyError, ImportError, SyntaxError) as e:
+        report['error'] = str(e)
+        logger.warning(f"AOT镜像损坏: {path}: {e}")
+    else:
+        logger.info(f"加载AOT镜像 {path}: {report['installed']} 个方法")
+    return report
+
+
+def _check_header(dex_parser, image_version: int, dex: str, compiler: int) -> None:
+    if image_version != IMAGE_VERSION:
+        raise ImageMismatch(f"镜像版本 {image_version}")
+    if dex != dex_signature(dex_parser):
+        raise ImageMismatch("DEX 签名不一致")
+    if compiler != COMPILER_VERSION:
+        raise ImageMismatch(f"编译器版本 {compiler}")
+
+
+def _bundle_entries(path: str, dex_parser) -> List[Tuple[str, Dict[str, Any]]]:
+    with open(path, 'rb') as f:
+        bundle = marshal.load(f)
+    _check_header(dex_parser, bundle['version'], bundle['dex'], bundle['compiler'])
+    if bundle['python'] != python_tag():
+        raise ImageMismatch(f"Python 版本 {bundle['python']}")
+    return list(bundle['methods'].items())
+
+
+def _package_entries(path: str, dex_parser) -> List[Tuple[str, Dict[str, Any]]]:
+    package = _import_package(path)
+    _check_header(dex_parser, package.IMAGE_VERSION, package.DEX_SIGNATURE, package.COMPILER_VERSION)
+    entries = []
+    for signature, (module_name, function_name) in package.METHODS.items():
+        module = importlib.import_module(f"{package.__name__}.{module_name}")
+        function = getattr(module, function_name)
+        entries.append((signature, {'code': function.__code__, 'source': inspect.getsource(function),
+                                    'relocations': module.RELOCATIONS[function_name],
+                                    'assumptions': module.ASSUMPTIONS[function_name]}))
+    return entries
+
+
+def _import_package(path: str):
+    """按路径导入包，包名由路径决定，同一路径只导入一次"""
+    path = os.path.realpath(path)
+    name = f"_dex2py_{hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]}"
+    package: Optional[Any] = sys.modules.get(name)
+    if package is not None:
+        return package
+    spec = importlib.util.spec_from_file_location(name, os.path.join(path, PACKAGE_INIT),
+                                                  submodule_search_locations=[path])
+    if spec is None:
+        raise ImportError(f"{path} 不是 Python 包")
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[name] = package
+    try:
+        spec.loader.exec_module(package)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return package
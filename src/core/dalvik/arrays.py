@@ -0,0 +1,80 @@
+# src/core/dalvik/arrays.py
+import sys
+import logging
+from array import array
+from typing import Any, List, Optional, Union
+
+from .class_linker import align_object_size
+
+try:
+    import numpy
+except ImportError:  # NumPy 为可选依赖，仅用于批量运算视图
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+# 基本类型数组的元素描述符 -> array.array 类型码
+# 每个元素按Java类型宽度存放在连续缓冲区中
+PRIMITIVE_TYPECODES = {
+    'Z': 'B',  # boolean, 1字节
+    'B': 'b',  # byte, 1字节
+    'C': 'H',  # char, 2字节无符号
+    'S': 'h',  # short, 2字节
+    'I': 'i',  # int, 4字节
+    'F': 'f',  # float, 4字节
+    'J': 'q',  # long, 8字节
+    'D': 'd',  # double, 8字节
+}
+
+NUMPY_DTYPES = {'B': 'uint8', 'b': 'int8', 'H': 'uint16', 'h': 'int16',
+                'i': 'int32', 'f': 'float32', 'q': 'int64', 'd': 'float64'}
+
+ArrayStorage = Union[array, List[Any]]
+
+ARRAY_HEADER_SIZE = 12  # 对象头加4字节长度；引用数组的元素按压缩引用计4字节
+
+
+def element_typecode(array_type: str) -> Optional[str]:
+    """返回数组类型的元素类型码，引用类型数组返回None"""
+    return PRIMITIVE_TYPECODES.get(array_type[1:])
+
+
+def new_storage(array_type: str, length: int) -> ArrayStorage:
+    """按数组类型创建零初始化的存储"""
+    typecode = element_typecode(array_type)
+    if typecode is None:
+        return [0] * length
+    storage = array(typecode)
+    storage.frombytes(bytes(storage.itemsize * length))
+    return storage
+
+
+def storage_size(storage: ArrayStorage) -> int:
+    """数组元素占用的字节数"""
+    if isinstance(storage, array):
+        return storage.itemsize * len(storage)
+    return 4 * len(storage)
+
+
+def array_size(storage: ArrayStorage) -> int:
+    """数组对象的字节数：数组头加元素，按对象对齐"""
+    return align_object_size(ARRAY_HEADER_SIZE + storage_size(storage))
+
+
+def fill_from_bytes(storage: array, raw: bytes, element_width: int) -> None:
+    """把小端序原始字节整体复制到数组缓冲区开头"""
+    if storage.itemsize != element_width:
+        raise TypeError(f"元素宽度不匹配: {storage.itemsize} != {element_width}")
+    if sys.byteorder == 'little':
+        memoryview(storage).cast('B')[:len(raw)] = raw
+    else:
+        chunk = array(storage.typecode, raw)
+        chunk.byteswap()
+        storage[:len(chunk)] = chunk
+
+
+def as_numpy(storage: ArrayStorage):
+    """返回与数组共享缓冲区的NumPy视图（未安装NumPy或引用数组时返回None）"""
+    if numpy is None or not isinstance(storage, array):
+        return None
+    return numpy.frombuffer(storage, dtype=NUMPY_DTYPES[storage.typecode])
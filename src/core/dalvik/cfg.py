@@ -0,0 +1,282 @@
+# src/core/dalvik/cfg.py
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from .opcodes import CAN_THROW, instruction_pcs, successors
+
+logger = logging.getLogger(__name__)
+
+# 控制流图
+#
+# 由解码后的代码项构建基本块、支配树和循环嵌套，结果缓存在代码项的 'cfg' 中，
+# 校验器、GC根扫描和JIT等分析都基于同一份控制流图
+#
+# 基本块在以下位置切分：跳转目标、分支/返回/throw之后、异常处理器入口、try 范围边界。
+# 按 try 范围切分后，同一基本块内的指令被同一组处理器覆盖，
+# 异常边从块内任一可能抛出异常的指令出发，以块为单位记录
+
+
+class BasicBlock:
+    """基本块：[start, end) 范围内的指令"""
+    __slots__ = ('index', 'start', 'end', 'pcs', 'successors', 'predecessors', 'handlers',
+                 'idom', 'loop', 'loop_depth')
+
+    def __init__(self, index: int, start: int):
+        self.index = index
+        self.start = start
+        self.end = start
+        self.pcs: List[int] = []                # 块内指令的pc
+        self.successors: List[int] = []         # 正常后继块
+        self.predecessors: List[int] = []       # 前驱块（含异常边）
+        self.handlers: List[int] = []           # 异常处理器块
+        self.idom: Optional[int] = None         # 直接支配者，入口块与不可达块为 None
+        self.loop: Optional['Loop'] = None      # 所属的最内层循环
+        self.loop_depth = 0
+
+    @property
+    def last_pc(self) -> int:
+        return self.pcs[-1]
+
+    def __repr__(self) -> str:
+        return f"BasicBlock({self.index}, pc {self.start}-{self.end}, succ={self.successors})"
+
+
+class Loop:
+    """自然循环：header 支配循环体内所有块"""
+    __slots__ = ('header', 'blocks', 'back_edges', 'parent', 'children', 'depth')
+
+    def __init__(self, header: int):
+        self.header = header
+        self.blocks: Set[int] = {header}
+        self.back_edges: List[int] = []         # 回边的源块
+        self.parent: Optional['Loop'] = None
+        self.children: List['Loop'] = []
+        self.depth = 1
+
+    def __repr__(self) -> str:
+        return f"Loop(header={self.header}, blocks={sorted(self.blocks)}, depth={self.depth})"
+
+
+class ControlFlowGraph:
+    """方法的控制流图"""
+
+    def __init__(self, code: Dict[str, Any]):
+        self.code = code
+        self.blocks: List[BasicBlock] = []
+        self.block_of: Dict[int, int] = {}      # 指令pc -> 所在块
+        self.order: List[int] = []              # 可达块的逆后序
+        self.loops: List[Loop] = []             # 按深度从外到内排列
+        self.irreducible = False                # 存在不以支配者为目标的回边
+        self.try_ranges = self._handler_ranges()
+        self._build_blocks()
+        self._link_blocks()
+        self._compute_order()
+        self._compute_dominators()
+        self._find_loops()
+
+    # ---- 查询 ----
+
+    @property
+    def entry(self) -> BasicBlock:
+        return self.blocks[0]
+
+    def block_at(self, pc: int) -> BasicBlock:
+        """pc 所在的基本块"""
+        return self.blocks[self.block_of[pc]]
+
+    def reachable(self) -> List[BasicBlock]:
+        return [self.blocks[i] for i in self.order]
+
+    def unreachable_pcs(self) -> List[int]:
+        reachable = set(self.order)
+        return [pc for block in self.blocks if block.index not in reachable for pc in block.pcs]
+
+    def dominates(self, a: int, b: int) -> bool:
+        """块 a 是否支配块 b"""
+        while b is not None:
+            if a == b:
+                return True
+            b = self.blocks[b].idom
+        return False
+
+    def handler_pcs(self, pc: int) -> List[int]:
+        """覆盖 pc 的异常处理器入口"""
+        return [self.blocks[h].start for h in self.block_at(pc).handlers]
+
+    def back_edge(self, source: int, target: int) -> bool:
+        """source 块到 target 块的边是否为循环回边"""
+        loop = self.blocks[target].loop
+        while loop is not None:
+            if loop.header == target:
+                return source in loop.back_edges
+            loop = loop.parent
+        return False
+
+    # ---- 构建 ----
+
+    def _handler_ranges(self) -> List[tuple]:
+        """(起始pc, 结束pc, 处理器入口pc列表)"""
+        ranges = []
+        for try_block in self.code.get('tries', []):
+            targets = [handler['addr'] for handler in try_block.get('handlers', [])]
+            if try_block.get('catch_all') is not None:
+                targets.append(try_block['catch_all'])
+            start = try_block['start_addr']
+            ranges.append((start, start + try_block['insn_count'], targets))
+        return ranges
+
+    def _build_blocks(self) -> None:
+        insns = self.code['insns']
+        pcs = instruction_pcs(insns)
+        if not pcs:
+            return
+        valid = set(pcs)
+
+        leaders = {pcs[0]}
+        for pc in pcs:
+            insn = insns[pc]
+            targets = successors(insn)
+            next_pc = pc + insn['width']
+            if targets != [next_pc]:
+                leaders.update(t for t in targets if t in valid)
+                leaders.add(next_pc)
+        for start, end, targets in self.try_ranges:
+            leaders.add(start)
+            leaders.add(end)
+            leaders.update(targets)
+        leaders &= valid
+
+        block = None
+        for pc in pcs:
+            if block is None or pc in leaders:
+                block = BasicBlock(len(self.blocks), pc)
+                self.blocks.append(block)
+            block.pcs.append(pc)
+            block.end = pc + insns[pc]['width']
+            self.block_of[pc] = block.index
+
+    def _link_blocks(self) -> None:
+        insns = self.code['insns']
+        for block in self.blocks:
+            for target in successors(insns[block.last_pc]):
+                index = self.block_of.get(target)
+                if index is None:
+                    # 跳转到指令中间或越过方法末尾，由校验器报告
+                    continue
+                if index not in block.successors:
+                    block.successors.append(index)
+
+            if any(insns[pc].get('quickened', insns[pc]['opcode']) in CAN_THROW for pc in block.pcs):
+                for start, end, targets in self.try_ranges:
+                    if start <= block.start < end:
+                        for target in targets:
+                            index = self.block_of.get(target)
+                            if index is not None and index not in block.handlers:
+                                block.handlers.append(index)
+
+            for index in block.successors + block.handlers:
+                predecessors = self.blocks[index].predecessors
+                if block.index not in predecessors:
+                    predecessors.append(block.index)
+
+    def _compute_order(self) -> None:
+        """深度优先求逆后序（迭代实现，避免深递归）"""
+        if not self.blocks:
+            return
+        visited = {0}
+        postorder = []
+        stack = [(0, iter(self._edges(0)))]
+        while stack:
+            index, edges = stack[-1]
+            for succ in edges:
+                if succ not in visited:
+                    visited.add(succ)
+                    stack.append((succ, iter(self._edges(succ))))
+                    break
+            else:
+                stack.pop()
+                postorder.append(index)
+        self.order = postorder[::-1]
+
+    def _edges(self, index: int) -> List[int]:
+        block = self.blocks[index]
+        return block.successors + block.handlers
+
+    def _compute_dominators(self) -> None:
+        """Cooper-Harvey-Kennedy 迭代算法"""
+        if not self.order:
+            return
+        rpo_number = {index: i for i, index in enumerate(self.order)}
+        idom: Dict[int, int] = {0: 0}
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while rpo_number[a] > rpo_number[b]:
+                    a = idom[a]
+                while rpo_number[b] > rpo_number[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for index in self.order[1:]:
+                new_idom = None
+                for pred in self.blocks[index].predecessors:
+                    if pred in idom:
+                        new_idom = pred if new_idom is None else intersect(pred, new_idom)
+                if idom.get(index) != new_idom:
+                    idom[index] = new_idom
+                    changed = True
+
+        for index, dominator in idom.items():
+            if index != 0:
+                self.blocks[index].idom = dominator
+
+    def _find_loops(self) -> None:
+        """由回边求自然循环，相同入口的循环合并，再按包含关系建立嵌套"""
+        rpo_number = {index: i for i, index in enumerate(self.order)}
+        loops: Dict[int, Loop] = {}
+        for index in self.order:
+            for succ in self._edges(index):
+                if rpo_number[succ] > rpo_number[index]:
+                    continue
+                if not self.dominates(succ, index):
+                    # 重入口（不可归约）循环：不建立循环结构
+                    self.irreducible = True
+                    continue
+                loop = loops.get(succ)
+                if loop is None:
+                    loop = loops[succ] = Loop(succ)
+                loop.back_edges.append(index)
+                worklist = [index]
+                while worklist:
+                    node = worklist.pop()
+                    if node not in loop.blocks:
+                        loop.blocks.add(node)
+                        worklist.extend(p for p in self.blocks[node].predecessors if p in rpo_number)
+
+        # 外层循环块数更多，按块数从大到小处理，内层循环的父循环是包含其入口的最小循环
+        ordered = sorted(loops.values(), key=lambda loop: len(loop.blocks), reverse=True)
+        for i, loop in enumerate(ordered):
+            for outer in reversed(ordered[:i]):
+                if loop.header in outer.blocks:
+                    loop.parent = outer
+                    loop.depth = outer.depth + 1
+                    outer.children.append(loop)
+                    break
+            for index in loop.blocks:
+                # 后处理的循环更内层
+                block = self.blocks[index]
+                block.loop = loop
+                block.loop_depth = loop.depth
+        self.loops = sorted(ordered, key=lambda loop: loop.depth)
+
+
+def get_cfg(code: Dict[str, Any]) -> ControlFlowGraph:
+    """获取代码项的控制流图，首次调用时构建并缓存"""
+    cfg = code.get('cfg')
+    if cfg is None:
+        cfg = code['cfg'] = ControlFlowGraph(code)
+        logger.debug(f"构建控制流图: {len(cfg.blocks)} 个基本块, {len(cfg.loops)} 个循环")
+    return cfg
@@ -0,0 +1,190 @@
+# src/core/dalvik/class_linker.py
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 类初始化状态
+UNINITIALIZED = 0
+INITIALIZING = 1
+INITIALIZED = 2
+ERROR = 3
+
+# 各基本类型字段的默认值，引用类型为 null(0)
+FIELD_DEFAULTS = {'Z': 0, 'B': 0, 'S': 0, 'C': 0, 'I': 0, 'J': 0, 'F': 0.0, 'D': 0.0}
+
+# 对象布局按 ART 的压缩引用估算：对象头 8 字节（类指针与锁字），基本类型字段按类型宽度，
+# 引用字段 4 字节，子类字段接在父类字段之后，对象大小按 8 字节对齐
+OBJECT_HEADER_SIZE = 8
+OBJECT_ALIGNMENT = 8
+FIELD_SIZES = {'Z': 1, 'B': 1, 'S': 2, 'C': 2, 'I': 4, 'F': 4, 'J': 8, 'D': 8}
+REFERENCE_SIZE = 4
+
+
+def align_object_size(size: int) -> int:
+    return (size + OBJECT_ALIGNMENT - 1) & -OBJECT_ALIGNMENT
+
+
+class RuntimeClass:
+    """运行时类：静态字段按槽位存放在列表中，解析后的指令直接按槽位读写"""
+    __slots__ = ('name', 'class_def', 'superclass', 'state', 'statics', 'static_slots', 'error', 'instance_size')
+
+    def __init__(self, name: str, class_def: Optional[Dict[str, Any]], superclass: Optional['RuntimeClass']):
+        self.name = name
+        self.class_def = class_def
+        self.superclass = superclass
+        self.state = UNINITIALIZED
+        self.statics: List[Any] = []
+        self.static_slots: Dict[str, int] = {}  # 字段名 -> 槽位
+        self.error: Optional[str] = None
+        # 实例字段末尾的偏移（未对齐），子类从这里继续排列字段
+        self.instance_size = superclass.instance_size if superclass is not None else OBJECT_HEADER_SIZE
+
+    def add_static(self, name: str, value: Any) -> int:
+        """登记静态字段，返回槽位"""
+        self.static_slots[name] = len(self.statics)
+        self.statics.append(value)
+        return self.static_slots[name]
+
+
+class ClassLinker:
+    """类链接与延迟初始化
+
+    类在首次主动使用（静态字段访问、静态方法调用、new-instance）时初始化：
+    先批量写入 encoded_array 中的静态初始值，再初始化父类，最后执行一次 <clinit>
+    """
+
+    def __init__(self, vm):
+        self.vm = vm
+        self.classes: Dict[str, RuntimeClass] = {}
+        self.load_times: Dict[str, float] = {}  # 有类定义的类 -> 加载时刻，按加载顺序（启动profile使用）
+
+    def get_class(self, dex_parser, class_name: str) -> RuntimeClass:
+        """获取运行时类，首次访问时按类定义分配静态字段槽位"""
+        runtime_class = self.classes.get(class_name)
+        if runtime_class is not None:
+            return runtime_class
+
+        class_def = dex_parser.class_by_name.get(class_name)
+        superclass = None
+        if class_def is not None and class_def['superclass_name'] in dex_parser.class_by_name:
+            superclass = self.get_class(dex_parser, class_def['superclass_name'])
+
+        runtime_class = RuntimeClass(class_name, class_def, superclass)
+        if class_def is None:
+            # 框架类没有字节码，不需要初始化
+            runtime_class.state = INITIALIZED
+        else:
+            for field in class_def.get('static_fields', []):
+                field_ref = dex_parser.field_ids[field['field_idx']]
+                runtime_class.add_static(field_ref['name'], FIELD_DEFAULTS.get(field_ref['type_name'], 0))
+            for field in class_def.get('instance_fields', []):
+                type_name = dex_parser.field_ids[field['field_idx']]['type_name']
+                runtime_class.instance_size += FIELD_SIZES.get(type_name, REFERENCE_SIZE)
+            self.load_times[class_name] = time.perf_counter()
+        self.classes[class_name] = runtime_class
+        return runtime_class
+
+    def instance_size(self, class_name: str) -> int:
+        """类实例的字节数；尚未链接的类与框架类按只有对象头计算"""
+        runtime_class = self.classes.get(class_name)
+        size = runtime_class.instance_size if runtime_class is not None else OBJECT_HEADER_SIZE
+        return align_object_size(size)
+
+    def resolve_static_field(self, dex_parser, field_idx: int) -> Tuple[RuntimeClass, int]:
+        """解析静态字段引用，返回声明该字段的类和槽位"""
+        field_ref = dex_parser.field_ids[field_idx]
+        referenced = self.get_class(dex_parser, field_ref['class_name'])
+        name = field_ref['name']
+
+        runtime_class = referenced
+        while runtime_class is not None:
+            slot = runtime_class.static_slots.get(name)
+            if slot is not None:
+                return runtime_class, slot
+            runtime_class = runtime_class.superclass
+
+        # 类定义中找不到（如框架类的静态字段），在引用的类上分配槽位
+        return referenced, referenced.add_static(name, FIELD_DEFAULTS.get(field_ref['type_name'], 0))
+
+    def peek_static_field(self, dex_parser, field_idx: int) -> Optional[Tuple[RuntimeClass, int]]:
+        """只查找已创建的运行时类中的静态字段，不创建类也不分配槽位（供JIT编译线程使用）"""
+        field_ref = dex_parser.field_ids[field_idx]
+        runtime_class = self.classes.get(field_ref['class_name'])
+        while runtime_class is not None:
+            slot = runtime_class.static_slots.get(field_ref['name'])
+            if slot is not None:
+                return runtime_class, slot
+            runtime_class = runtime_class.superclass
+        return None
+
+    def ensure_initialized(self, dex_parser, class_name: str) -> Optional[str]:
+        """确保类已初始化，失败时返回Java异常字符串"""
+        runtime_class = self.classes.get(class_name)
+        if runtime_class is not None and runtime_class.state == INITIALIZED:
+            return None
+        return self.initialize(self.get_class(dex_parser, class_name), dex_parser)
+
+    def initialize(self, runtime_class: RuntimeClass, dex_parser) -> Optional[str]:
+        """初始化类，失败时返回Java异常字符串"""
+        state = runtime_class.state
+        if state == INITIALIZED or state == INITIALIZING:
+            # 初始化过程中的递归访问（如 <clinit> 读写本类静态字段）直接放行
+            return None
+        if state == ERROR:
+            return f"NoClassDefFoundError: {runtime_class.name}"
+
+        runtime_class.state = INITIALIZING
+        logger.debug(f"初始化类: {runtime_class.name}")
+
+        self._apply_static_values(runtime_class, dex_parser)
+
+        if runtime_class.superclass is not None:
+            error = self.initialize(runtime_class.superclass, dex_parser)
+            if error is not None:
+                return self._fail(runtime_class, error)
+
+        clinit = self._find_clinit(runtime_class, dex_parser)
+        if clinit is not None:
+            interpreter = self.vm.interpreter
+            interpreter.invoke_method(clinit, dex_parser, [])
+            if interpreter.exception is not None:
+                error = interpreter.exception
+                interpreter.exception = None
+                return self._fail(runtime_class, f"ExceptionInInitializerError: {error}")
+
+        runtime_class.state = INITIALIZED
+        return None
+
+    def _fail(self, runtime_class: RuntimeClass, error: str) -> str:
+        runtime_class.state = ERROR
+        runtime_class.error = error
+        logger.error(f"类初始化失败: {runtime_class.name}: {error}")
+        return error
+
+    def _apply_static_values(self, runtime_class: RuntimeClass, dex_parser) -> None:
+        """把 encoded_array 中的初始值按字段顺序批量写入静态槽位"""
+        values = runtime_class.class_def.get('static_values', [])
+        if not values:
+            return
+        converted = [self._resolve_constant(value) for value in values]
+        runtime_class.statics[:len(converted)] = converted
+
+    def _resolve_constant(self, value: Any) -> Any:
+        if type(value) is not tuple:
+            return value
+        kind, payload = value
+        if kind == 'string':
+            return self.vm.strings.intern(payload)
+        if kind == 'type':
+            return payload
+        logger.warning(f"暂不支持的静态初始值类型: {kind}")
+        return 0
+
+    def _find_clinit(self, runtime_class: RuntimeClass, dex_parser) -> Optional[Dict[str, Any]]:
+        for entry in runtime_class.class_def.get('direct_methods', []):
+            method = dex_parser.method_ids[entry['method_idx']]
+            if method['name'] == '<clinit>':
+                return method
+        return None
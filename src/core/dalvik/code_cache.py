@@ -0,0 +1,245 @@
+# src/core/dalvik/code_cache.py
+import hashlib
+import importlib.util
+import json
+import logging
+import marshal
+import os
+import sys
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from .class_linker import INITIALIZED
+from .intrinsics import method_signature
+from .jit_codegen import COMPILER_VERSION, bind_function, new_profile
+
+logger = logging.getLogger(__name__)
+
+# 持久化代码缓存
+#
+# 生成函数的代码对象用 marshal 序列化，与重定位表和假设一起保存在缓存目录中，每个方法一个文件，
+# index.json 记录键到文件的映射。键由 DEX 签名、方法标识、编译器版本和 Python 版本组成，
+# 任一变化都会使旧条目失效。
+#
+# 生成代码引用的运行时对象（方法、代码项、字符串、静态字段列表、profile 计数器等）不能序列化，
+# 翻译时为每个常量记录重定位项，加载时在当前进程中重新解析：
+#   ('method',) ('class_def',) ('code',)      当前方法、类定义和代码项
+#   ('profile',) ('branch', pc) ('receivers', pc)  代码项上的 profile 及其计数器
+#   ('value', v)                              可直接序列化的值（switch 表、非有限浮点数）
+#   ('insn', pc)                              代码项中的指令（fill-array-data）
+#   ('string', string_idx)                    驻留后的字符串
+#   ('statics', field_idx, class_name, slot)  已初始化类的静态字段列表，槽位必须一致
+#   ('intrinsic', method_idx) ('method_ref', method_idx) ('override', method_idx, receiver_class)
+# 假设为 ('initialized', class_name)：翻译时已初始化、因而省略了初始化检查的类。
+# 加载时假设不成立（类尚未初始化）则本次不加载，方法在后续调用时重试，直至达到编译阈值正常编译
+
+INDEX_FILE = 'index.json'
+INDEX_VERSION = 1
+
+
+class StaleEntry(Exception):
+    """缓存条目的假设在当前进程中不成立"""
+
+
+def dex_signature(dex_parser) -> str:
+    """DEX 文件的 SHA-1 签名，头部没有签名时对文件内容计算"""
+    signature = dex_parser.header.get('signature')
+    if not signature:
+        signature = hashlib.sha1(dex_parser.dex_data).digest()
+    return signature.hex()
+
+
+def methods_by_signature(dex_parser) -> Dict[str, Dict[str, Any]]:
+    """DEX 中有字节码的方法，按签名索引"""
+    code_items = dex_parser.code_items
+    return {method_signature(method): method for method in dex_parser.method_ids
+            if method.get('code_off') and method['code_off'] in code_items}
+
+
+def python_tag() -> str:
+    """Python 实现与字节码版本，marshal 格式和代码对象随之变化"""
+    return f"{sys.implementation.cache_tag}-{importlib.util.MAGIC_NUMBER.hex()}"
+
+
+def bind_entry(vm, method: Dict[str, Any], code: Dict[str, Any], dex_parser, payload: Dict[str, Any]) -> Callable:
+    """检查假设、解析重定位项，把保存的代码对象绑定为当前进程中的函数（代码缓存与AOT镜像共用）"""
+    classes = vm.classes.classes
+    for kind, class_name in payload['assumptions']:
+        runtime_class = classes.get(class_name)
+        if runtime_class is None or runtime_class.state != INITIALIZED:
+            raise StaleEntry(f"类 {class_name} 尚未初始化")
+    constants = {name: relocate(vm, method, code, dex_parser, relocation)
+                 for name, relocation in payload['relocations'].items()}
+    function = bind_function(vm, dex_parser, payload['code'], constants)
+    function.source = payload['source']
+    return function
+
+
+def relocate(vm, method: Dict[str, Any], code: Dict[str, Any], dex_parser, relocation: Tuple) -> Any:
+    """在当前进程中重新得到重定位项对应的对象"""
+    kind = relocation[0]
+    if kind == 'method':
+        return method
+    if kind == 'class_def':
+        return dex_parser.class_by_name.get(method['class_name'], {})
+    if kind == 'code':
+        return code
+    if kind in ('profile', 'branch', 'receivers'):
+        profile = code.get('profile')
+        if profile is None:
+            profile = code['profile'] = new_profile()
+        if kind == 'profile':
+            return profile
+        if kind == 'branch':
+            return profile['branches'].setdefault(relocation[1], [0, 0])
+        return profile['receivers'].setdefault(relocation[1], {})
+    if kind == 'value':
+        return relocation[1]
+    if kind == 'insn':
+        return code['insns'][relocation[1]]
+    if kind == 'string':
+        return vm.strings.intern(dex_parser.string_ids[relocation[1]])
+    if kind == 'statics':
+        _, field_idx, class_name, slot = relocation
+        resolved = vm.classes.peek_static_field(dex_parser, field_idx)
+        if resolved is None or resolved[0].name != class_name or resolved[1] != slot:
+            raise StaleEntry(f"静态字段 {field_idx} 尚未解析到 {class_name}[{slot}]")
+        if resolved[0].state != INITIALIZED:
+            raise StaleEntry(f"类 {class_name} 尚未初始化")
+        return resolved[0].statics
+    if kind == 'intrinsic':
+        intrinsic = vm.intrinsics.lookup(dex_parser.method_ids[relocation[1]])
+        if intrinsic is None:
+            raise ValueError(f"内建函数 {relocation[1]} 不存在")
+        return intrinsic
+    if kind == 'method_ref':
+        return dex_parser.method_ids[relocation[1]]
+    if kind == 'override':
+        return vm.interpreter.resolve_override(dex_parser.method_ids[relocation[1]], relocation[2], dex_parser)
+    raise ValueError(f"未知的重定位项 {kind}")
+
+
+class CodeCache:
+    """JIT编译结果的磁盘缓存"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None  # 首次使用时读取
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'errors': 0}
+
+    def key(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser) -> str:
+        """方法的缓存键，保存在代码项上"""
+        key = code.get('cache_key')
+        if key is None:
+            key = code['cache_key'] = (f"{dex_signature(dex_parser)}:{method_signature(method)}"
+                                       f"@{method.get('code_off', 0):x}:jit{COMPILER_VERSION}:{python_tag()}")
+        return key
+
+    @property
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._read_index()
+        return self._index
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"代码缓存索引无法读取，忽略: {e}")
+            return {}
+        if data.get('version') != INDEX_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    # ---- 加载 ----
+
+    def load(self, vm, method: Dict[str, Any], code: Dict[str, Any], dex_parser) -> Optional[Tuple[Callable, int]]:
+        """加载方法的缓存版本，返回 (函数, 层级)。
+
+        没有条目时返回 None 并在代码项上记录 'cached' 为 False，之后不再查找；
+        假设暂不成立时返回 None，下次调用重试
+        """
+        key = self.key(method, code, dex_parser)
+        entry = self.index.get(key)
+        if entry is None:
+            code['cached'] = False
+            self.stats['misses'] += 1
+            return None
+        try:
+            with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+                payload = marshal.load(f)
+            if payload['key'] != key:
+                raise ValueError("键不匹配")
+            function = bind_entry(vm, method, code, dex_parser, payload)
+        except StaleEntry as e:
+            self.stats['stale'] += 1
+            logger.debug(f"缓存条目暂不可用: {method_signature(method)}: {e}")
+            return None
+        except (OSError, EOFError, ValueError, TypeError, KeyError, IndexError) as e:
+            logger.warning(f"缓存条目损坏，丢弃: {method_signature(method)}: {e}")
+            code['cached'] = False
+            self.stats['errors'] += 1
+            self.discard(key)
+            return None
+        code['cached'] = True
+        self.stats['hits'] += 1
+        return function, payload['tier']
+
+    # ---- 保存 ----
+
+    def store(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser, function: Callable, tier: int) -> bool:
+        """保存编译结果，覆盖方法原有的条目。返回是否保存成功"""
+        key = self.key(method, code, dex_parser)
+        payload = {'key': key, 'tier': tier, 'code': function.__code__, 'source': function.source,
+                   'relocations': function.relocations, 'assumptions': function.assumptions}
+        try:
+            data = marshal.dumps(payload)
+        except ValueError as e:
+            logger.debug(f"编译结果无法序列化: {method_signature(method)}: {e}")
+            return False
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.marshal'
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                self._write(name, data)
+                index = self._index if self._index is not None else self._read_index()
+                index[key] = {'file': name, 'method': method_signature(method), 'tier': tier, 'size': len(data)}
+                self._index = index
+                self._write_index()
+        except OSError as e:
+            logger.warning(f"代码缓存写入失败: {e}")
+            self.stats['errors'] += 1
+            return False
+        self.stats['stores'] += 1
+        return True
+
+    def discard(self, key: str) -> None:
+        """删除条目"""
+        with self._lock:
+            entry = self._index.pop(key, None) if self._index is not None else None
+            if entry is None:
+                return
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+                self._write_index()
+            except OSError:
+                pass
+
+    def _write(self, name: str, data: bytes) -> None:
+        """先写临时文件再替换，其他进程不会读到写了一半的文件"""
+        path = os.path.join(self.directory, name)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    def _write_index(self) -> None:
+        data = json.dumps({'version': INDEX_VERSION, 'entries': self._index}, indent=1, sort_keys=True)
+        self._write(INDEX_FILE, data.encode('utf-8'))
@@ -0,0 +1,104 @@
+# src/core/dalvik/code_space.py
+import logging
+import marshal
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable
+
+from .jit_codegen import BASELINE
+
+logger = logging.getLogger(__name__)
+
+# 编译代码的内存预算
+#
+# 每个持有编译版本的代码项按其全部函数（当前版本、基线版本、OSR版本）的代码对象大小计费，
+# 总量超过预算时用时钟算法（二次机会）逐出：代码项按安装顺序排成环，方法查找命中时置访问位，
+# 指针扫过带访问位的代码项时清除访问位并移到环尾，扫到没有访问位的代码项时逐出。
+# 被逐出的方法回到解释执行，调用和回边计数清零，重新变热后再编译。
+# AOT镜像中的基线版本（'aot'）不计费也不会被逐出，逐出时方法回到它而不是解释执行。
+# 正在执行的编译函数仍由调用帧引用，逐出只影响之后的调用
+
+
+def function_size(function: Callable) -> int:
+    """编译函数的字节数：序列化后的代码对象大小，第一次计算后保存在函数上"""
+    size = getattr(function, 'size', None)
+    if size is None:
+        size = function.size = len(marshal.dumps(function.__code__))
+    return size
+
+
+def resident_size(code: Dict[str, Any]) -> int:
+    """代码项上全部编译函数的字节数，同一函数只计一次"""
+    functions = {id(f): f for f in (code.get('jit'), code.get('baseline')) if f}
+    for entry in code.get('osr', {}).values():
+        if entry:
+            functions[id(entry)] = entry
+    functions.pop(id(code.get('aot')), None)
+    return sum(function_size(f) for f in functions.values())
+
+
+class CodeSpace:
+    """已安装的编译代码：按字节预算保存，超出预算时把冷方法逐出回解释执行"""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.size = 0
+        self._ring: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()  # 方法ID -> 代码项，时钟环
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'evicted_bytes': 0}
+
+    def charge(self, code: Dict[str, Any]) -> None:
+        """代码项安装或替换编译版本后重新计费，必要时逐出其他方法"""
+        with self._lock:
+            size = resident_size(code)
+            self.size += size - code.get('code_size', 0)
+            code['code_size'] = size
+            method_id = code['method_id']
+            if size:
+                self._ring[method_id] = code
+                code['referenced'] = True
+            else:
+                self._ring.pop(method_id, None)
+            if self.size > self.budget:
+                self._evict(method_id)
+
+    def _evict(self, keep: int) -> None:
+        """时钟指针从环首开始扫描，直到总量不超过预算；不逐出刚安装的方法"""
+        ring = self._ring
+        while self.size > self.budget and len(ring) > 1:
+            method_id, code = ring.popitem(last=False)
+            if method_id == keep or code.get('referenced'):
+                code['referenced'] = False
+                ring[method_id] = code
+                continue
+            self._discard(code)
+
+    def _discard(self, code: Dict[str, Any]) -> None:
+        size = code.pop('code_size', 0)
+        self.size -= size
+        self.stats['evictions'] += 1
+        self.stats['evicted_bytes'] += size
+        logger.debug(f"逐出方法 {code['method_id']} 的编译代码 ({size} 字节)")
+        # 最后移除 'jit'，执行线程看到的要么是完整的旧状态，要么已回到解释执行
+        for key in ('osr', 'baseline', 'tier', 'backedges'):
+            code.pop(key, None)
+        code['invocations'] = 0
+        aot = code.get('aot')
+        if aot is not None:
+            code['baseline'] = aot
+            code['tier'] = BASELINE
+            code['jit'] = aot
+            return
+        code.pop('jit', None)
+
+    def clear(self) -> None:
+        """逐出全部编译代码"""
+        with self._lock:
+            while self._ring:
+                self._discard(self._ring.popitem(last=False)[1])
+
+    def report(self) -> Dict[str, Any]:
+        """当前大小、预算、方法数、命中率与逐出统计"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {'size': self.size, 'budget': self.budget, 'methods': len(self._ring),
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0, **self.stats}
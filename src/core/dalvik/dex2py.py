@@ -0,0 +1,156 @@
+# src/core/dalvik/dex2py.py
+import copy
+import logging
+import marshal
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Union
+
+from .aot_image import IMAGE_VERSION, PACKAGE_INIT
+from .code_cache import dex_signature, methods_by_signature, python_tag
+from .dex_parser import DEXParser
+from .jit_codegen import BASELINE, COMPILER_VERSION, MethodTranslator, UnsupportedMethod
+from .vm import DalvikVM
+
+logger = logging.getLogger(__name__)
+
+# dex2py：整个 DEX 的提前编译
+#
+# 用 JIT 的代码生成器把每个通过校验的方法翻译为基线版本，写成可导入的 Python 包或 marshal bundle
+# （格式见 aot_image.py），DalvikVM 启动时加载镜像，方法第一次调用就执行编译版本。
+# 方法按签名分块，由多个进程并行校验和翻译：每个工作进程解析一次 DEX、创建自己的虚拟机，
+# 返回生成的源码、重定位表和序列化的代码对象。工作进程中没有初始化任何类，
+# 生成代码保留全部类初始化检查，因而没有假设，镜像在任何时刻都可以加载。
+# 未通过校验或含暂不支持指令的方法不写入镜像，运行时由解释器执行
+
+PACKAGE = 'package'
+BUNDLE = 'bundle'
+
+_worker: Dict[str, Any] = {}  # 工作进程中的解析器、虚拟机和方法表
+
+
+def compile_dex(source: Union[bytes, DEXParser], output: str, output_format: str = PACKAGE,
+                processes: Optional[int] = None) -> Dict[str, Any]:
+    """提前编译 source（DEX 数据或已解析的 DEX）中的全部方法，写入 output。
+
+    processes 为 None 时使用全部CPU，不大于 1 时在当前进程中编译。返回编译统计
+    """
+    start = time.perf_counter()
+    parser = source
+    if not isinstance(parser, DEXParser):
+        parser = DEXParser(source)
+        if not parser.parse():
+            raise ValueError("无法解析DEX文件")
+    methods = methods_by_signature(parser)
+    signatures = sorted(methods, key=lambda signature: methods[signature]['code_off'])
+    if processes is None:
+        processes = os.cpu_count() or 1
+    chunk_size = max(1, -(-len(signatures) // (max(processes, 1) * 4)))
+    chunks = [signatures[i:i + chunk_size] for i in range(0, len(signatures), chunk_size)]
+
+    if processes <= 1:
+        _init_worker(copy.deepcopy(parser))
+        results = [_compile_chunk(chunk) for chunk in chunks]
+    else:
+        # 有原始数据时只把字节传给工作进程，由其自行解析
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(parser.dex_data or parser,)) as pool:
+            results = list(pool.map(_compile_chunk, chunks))
+    entries = [entry for chunk in results for entry in chunk]
+    compiled = [entry for entry in entries if 'error' not in entry]
+
+    if output_format == PACKAGE:
+        _write_package(output, dex_signature(parser), compiled)
+    elif output_format == BUNDLE:
+        _write_bundle(output, dex_signature(parser), compiled)
+    else:
+        raise ValueError(f"未知的输出格式 {output_format}")
+    report = {'methods': len(entries), 'compiled': len(compiled),
+              'failed': {entry['method']: entry['error'] for entry in entries if 'error' in entry},
+              'processes': processes, 'seconds': time.perf_counter() - start, 'output': output}
+    logger.info(f"dex2py: {report['compiled']}/{report['methods']} 个方法 -> {output} "
+                f"({report['seconds']:.2f}s, {processes} 个进程)")
+    return report
+
+
+# ---- 工作进程 ----
+
+def _init_worker(source: Union[bytes, DEXParser]) -> None:
+    parser = source
+    if not isinstance(parser, DEXParser):
+        parser = DEXParser(source)
+        parser.parse()
+    _worker['parser'] = parser
+    _worker['vm'] = DalvikVM()
+    _worker['methods'] = methods_by_signature(parser)
+
+
+def _compile_chunk(signatures: List[str]) -> List[Dict[str, Any]]:
+    """校验并翻译一组方法；失败的方法记录原因"""
+    parser, vm, methods = _worker['parser'], _worker['vm'], _worker['methods']
+    entries = []
+    for signature in signatures:
+        method = methods[signature]
+        code = parser.code_items[method['code_off']]
+        verification = vm.verifier.verify_method(method, parser)
+        if not verification['verified']:
+            entries.append({'method': signature, 'error': f"未通过校验: {verification['error']}"})
+            continue
+        try:
+            function = MethodTranslator(vm, method, code, parser, tier=BASELINE).compile()
+        except UnsupportedMethod as e:
+            entries.append({'method': signature, 'error': str(e)})
+            continue
+        entries.append({'method': signature, 'class_name': method['class_name'], 'name': function.__name__,
+                        'source': function.source, 'relocations': function.relocations,
+                        'assumptions': function.assumptions, 'code': marshal.dumps(function.__code__)})
+    return entries
+
+
+# ---- 输出 ----
+
+def _write_bundle(output: str, signature: str, entries: List[Dict[str, Any]]) -> None:
+    bundle = {'version': IMAGE_VERSION, 'dex': signature, 'compiler': COMPILER_VERSION, 'python': python_tag(),
+              'methods': {entry['method']: {'code': marshal.loads(entry['code']), 'source': entry['source'],
+                                            'relocations': entry['relocations'],
+                                            'assumptions': entry['assumptions']}
+                          for entry in entries}}
+    temp = f"{output}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as f:
+        marshal.dump(bundle, f)
+    os.replace(temp, output)
+
+
+def _write_package(output: str, signature: str, entries: List[Dict[str, Any]]) -> None:
+    """每个类一个模块；先写到临时目录，完成后替换旧的包"""
+    temp = f"{output}.{os.getpid()}.tmp"
+    shutil.rmtree(temp, ignore_errors=True)
+    os.makedirs(temp)
+    classes: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        classes.setdefault(entry['class_name'], []).append(entry)
+
+    methods = {}
+    for index, (class_name, class_entries) in enumerate(sorted(classes.items())):
+        module_name = f"m{index:04d}"
+        lines = [f"# 由 dex2py 生成: {class_name}", "from math import inf, nan", "", ""]
+        for entry in class_entries:
+            lines.append(entry['source'])
+            lines.append("")
+            methods[entry['method']] = (module_name, entry['name'])
+        lines.append(f"RELOCATIONS = {({entry['name']: entry['relocations'] for entry in class_entries})!r}")
+        lines.append(f"ASSUMPTIONS = {({entry['name']: entry['assumptions'] for entry in class_entries})!r}")
+        with open(os.path.join(temp, f"{module_name}.py"), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    header = ["# 由 dex2py 生成，不要手工修改",
+              f"IMAGE_VERSION = {IMAGE_VERSION}",
+              f"DEX_SIGNATURE = {signature!r}",
+              f"COMPILER_VERSION = {COMPILER_VERSION}",
+              f"METHODS = {methods!r}"]
+    with open(os.path.join(temp, PACKAGE_INIT), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(header) + '\n')
+    shutil.rmtree(output, ignore_errors=True)
+    os.replace(temp, output)
@@ -2,9 +2,23 @@
 import struct
 import logging
 from typing import Dict, List, Any, Optional
+from .opcodes import decode_instructions
+from .strings import decode_mutf8
 
 logger = logging.getLogger(__name__)
 
+# encoded_value 类型
+ENCODED_SIGNED = (0x00, 0x02, 0x04, 0x06)  # byte, short, int, long
+ENCODED_CHAR = 0x03
+ENCODED_FLOAT = 0x10
+ENCODED_DOUBLE = 0x11
+ENCODED_INDEXED = {0x15: 'method_type', 0x16: 'method_handle', 0x17: 'string', 0x18: 'type',
+                   0x19: 'field', 0x1A: 'method', 0x1B: 'enum'}
+ENCODED_ARRAY = 0x1C
+ENCODED_ANNOTATION = 0x1D
+ENCODED_NULL = 0x1E
+ENCODED_BOOLEAN = 0x1F
+
 
 class DEXParser:
     """完整的DEX文件解析器"""
@@ -19,7 +33,9 @@ class DEXParser:
         self.method_ids = []
         self.class_defs = []
         self.code_items = {}
-        self.string_data = []
+        self.class_by_name = {}  # 类名 -> 类定义
+        self.vtable_cache = {}  # (接收者类, 方法名, 参数, 返回类型) -> 虚调用目标
+        self.verification = {}  # code_off -> 字节码校验结果
 
     def parse(self) -> bool:
         """解析整个DEX文件"""
@@ -81,13 +97,13 @@ class DEXParser:
             self.string_ids.append(string_data)
 
     def _read_utf8_string(self, offset: int) -> str:
-        """从指定偏移量读取UTF-8字符串"""
-        # 读取uleb128格式的字符串长度
+        """从指定偏移量读取MUTF-8字符串"""
+        # uleb128 为 UTF-16 代码单元数，不是字节数；数据以 0 字节结尾
         length, size = self._read_uleb128(offset)
 
-        # 读取字符串数据
-        string_data = self.dex_data[offset + size: offset + size + length]
-        return string_data.decode('utf-8', errors='replace')
+        start = offset + size
+        end = self.dex_data.index(b'\x00', start)
+        return decode_mutf8(self.dex_data[start:end])
 
     def _read_uleb128(self, offset: int) -> (int, int):
         """读取uleb128格式的整数，返回值和占用的字节数"""
@@ -215,6 +231,8 @@ class DEXParser:
                 superclass_name = self.type_ids[superclass_idx]
 
             # 解析类数据
+            static_fields = []
+            instance_fields = []
             direct_methods = []
             virtual_methods = []
             if class_data_off != 0:
@@ -233,66 +251,49 @@ class DEXParser:
                 virtual_methods_size, bytes_read = self._read_uleb128(pos)
                 pos += bytes_read
 
-                # 解析字段
+                # 解析字段，静态字段与实例字段的索引差值分别从0开始累加
                 # 格式: [uleb128] field_idx_diff, access_flags
-                fields = []
-                last_field_idx = 0
-                for _ in range(static_fields_size + instance_fields_size):
-                    field_idx_diff, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-                    access_flags, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-
-                    field_idx = last_field_idx + field_idx_diff
-                    last_field_idx = field_idx
-
-                    fields.append({
-                        'field_idx': field_idx,
-                        'access_flags': access_flags
-                    })
-
-                # 解析方法
-                # 格式: [uleb128] method_idx_diff, access_flags, code_off
-                last_method_idx = 0
-                for _ in range(direct_methods_size):
-                    method_idx_diff, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-                    access_flags, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-                    code_off, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-
-                    method_idx = last_method_idx + method_idx_diff
-                    last_method_idx = method_idx
-
-                    if method_idx < len(self.method_ids):
-                        self.method_ids[method_idx]['code_off'] = code_off
-                        direct_methods.append({
-                            'method_idx': method_idx,
-                            'access_flags': access_flags,
-                            'code_off': code_off
+                for fields, size in ((static_fields, static_fields_size), (instance_fields, instance_fields_size)):
+                    last_field_idx = 0
+                    for _ in range(size):
+                        field_idx_diff, bytes_read = self._read_uleb128(pos)
+                        pos += bytes_read
+                        field_access_flags, bytes_read = self._read_uleb128(pos)
+                        pos += bytes_read
+
+                        field_idx = last_field_idx + field_idx_diff
+                        last_field_idx = field_idx
+
+                        fields.append({
+                            'field_idx': field_idx,
+                            'access_flags': field_access_flags
                         })
 
-                for _ in range(virtual_methods_size):
-                    method_idx_diff, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-                    access_flags, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-                    code_off, bytes_read = self._read_uleb128(pos)
-                    pos += bytes_read
-
-                    method_idx = last_method_idx + method_idx_diff
-                    last_method_idx = method_idx
-
-                    if method_idx < len(self.method_ids):
-                        self.method_ids[method_idx]['code_off'] = code_off
-                        virtual_methods.append({
-                            'method_idx': method_idx,
-                            'access_flags': access_flags,
-                            'code_off': code_off
-                        })
-
-            self.class_defs.append({
+                # 解析方法，直接方法与虚方法的索引差值分别从0开始累加
+                # 格式: [uleb128] method_idx_diff, access_flags, code_off
+                for methods, size in ((direct_methods, direct_methods_size), (virtual_methods, virtual_methods_size)):
+                    last_method_idx = 0
+                    for _ in range(size):
+                        method_idx_diff, bytes_read = self._read_uleb128(pos)
+                        pos += bytes_read
+                        method_access_flags, bytes_read = self._read_uleb128(pos)
+                        pos += bytes_read
+                        code_off, bytes_read = self._read_uleb128(pos)
+                        pos += bytes_read
+
+                        method_idx = last_method_idx + method_idx_diff
+                        last_method_idx = method_idx
+
+                        if method_idx < len(self.method_ids):
+                            self.method_ids[method_idx]['code_off'] = code_off
+                            self.method_ids[method_idx]['access_flags'] = method_access_flags
+                            methods.append({
+                                'method_idx': method_idx,
+                                'access_flags': method_access_flags,
+                                'code_off': code_off
+                            })
+
+            class_def = {
                 'class_idx': class_idx,
                 'class_name': self.type_ids[class_idx],
                 'access_flags': access_flags,
@@ -300,9 +301,103 @@ class DEXParser:
                 'interfaces': interfaces,
                 'source_file': source_file,
                 'class_data_off': class_data_off,
+                'static_fields': static_fields,
+                'instance_fields': instance_fields,
                 'direct_methods': direct_methods,
-                'virtual_methods': virtual_methods
-            })
+                'virtual_methods': virtual_methods,
+                # 静态字段初始值（encoded_array），按 static_fields 顺序排列，缺少的尾部字段取默认值
+                'static_values': self._read_encoded_array(static_values_off)[0] if static_values_off else []
+            }
+            self.class_defs.append(class_def)
+            self.class_by_name[class_def['class_name']] = class_def
+
+    def _read_sleb128(self, offset: int) -> (int, int):
+        """读取sleb128格式的整数，返回值和占用的字节数"""
+        result, bytes_read = self._read_uleb128(offset)
+        bits = 7 * bytes_read
+        if result & (1 << (bits - 1)):
+            result -= 1 << bits
+        return result, bytes_read
+
+    def _read_catch_handler(self, offset: int) -> (List[Dict[str, Any]], Optional[int]):
+        """读取encoded_catch_handler，返回 [(异常类型, 处理器pc)] 和 catch-all 处理器pc"""
+        # size 为负数时，类型处理器之后还有一个 catch-all 处理器
+        size, bytes_read = self._read_sleb128(offset)
+        offset += bytes_read
+        handlers = []
+        for _ in range(abs(size)):
+            type_idx, bytes_read = self._read_uleb128(offset)
+            offset += bytes_read
+            addr, bytes_read = self._read_uleb128(offset)
+            offset += bytes_read
+            handlers.append({'type': self.type_ids[type_idx], 'addr': addr})
+        catch_all = None
+        if size <= 0:
+            catch_all, _ = self._read_uleb128(offset)
+        return handlers, catch_all
+
+    def _read_sized(self, offset: int, size: int, signed: bool) -> int:
+        return int.from_bytes(self.dex_data[offset: offset + size], 'little', signed=signed)
+
+    def _read_encoded_array(self, offset: int) -> (List[Any], int):
+        """读取encoded_array，返回值列表和结束偏移"""
+        size, bytes_read = self._read_uleb128(offset)
+        offset += bytes_read
+        values = []
+        for _ in range(size):
+            value, offset = self._read_encoded_value(offset)
+            values.append(value)
+        return values, offset
+
+    def _read_encoded_value(self, offset: int) -> (Any, int):
+        """读取encoded_value，返回值和结束偏移
+
+        基本类型直接转为Python值（float/double 为浮点数，boolean 为0/1，null 为0），
+        引用类常量返回 (种类, 值) 元组，如 ('string', 'abc')、('type', 'LFoo;')，由类加载时解析
+        """
+        header = self.dex_data[offset]
+        value_type = header & 0x1F
+        value_arg = header >> 5
+        offset += 1
+        size = value_arg + 1
+
+        if value_type in ENCODED_SIGNED:
+            return self._read_sized(offset, size, True), offset + size
+        if value_type == ENCODED_CHAR:
+            return self._read_sized(offset, size, False), offset + size
+        if value_type in (ENCODED_FLOAT, ENCODED_DOUBLE):
+            # 浮点数只存储高位字节，低位补0
+            width = 4 if value_type == ENCODED_FLOAT else 8
+            bits = self._read_sized(offset, size, False) << (8 * (width - size))
+            fmt = '<f' if width == 4 else '<d'
+            return struct.unpack(fmt, bits.to_bytes(width, 'little'))[0], offset + size
+        if value_type in ENCODED_INDEXED:
+            index = self._read_sized(offset, size, False)
+            kind = ENCODED_INDEXED[value_type]
+            if kind == 'string':
+                return (kind, self.string_ids[index]), offset + size
+            if kind == 'type':
+                return (kind, self.type_ids[index]), offset + size
+            return (kind, index), offset + size
+        if value_type == ENCODED_ARRAY:
+            values, offset = self._read_encoded_array(offset)
+            return ('array', values), offset
+        if value_type == ENCODED_ANNOTATION:
+            type_idx, bytes_read = self._read_uleb128(offset)
+            offset += bytes_read
+            size, bytes_read = self._read_uleb128(offset)
+            offset += bytes_read
+            elements = {}
+            for _ in range(size):
+                name_idx, bytes_read = self._read_uleb128(offset)
+                offset += bytes_read
+                elements[self.string_ids[name_idx]], offset = self._read_encoded_value(offset)
+            return ('annotation', (self.type_ids[type_idx], elements)), offset
+        if value_type == ENCODED_NULL:
+            return 0, offset
+        if value_type == ENCODED_BOOLEAN:
+            return value_arg, offset
+        raise ValueError(f"未知的encoded_value类型: 0x{value_type:02x}")
 
     def _parse_code_items(self) -> None:
         """解析方法代码项"""
@@ -328,46 +423,40 @@ class DEXParser:
                 opcode = insn & 0xFF
                 registers = (insn >> 8) & 0xFF
 
-                # 不同类型的指令有不同的长度和格式
-                # 这里只做简单处理，实际需要根据opcode解析完整指令
                 insns.append({
                     'opcode': opcode,
                     'registers': registers,
                     'offset': pos
                 })
 
-                # 大多数指令是2字节，但有些是4字节或更长
-                # 这里简化处理，假设所有指令都是2字节
                 pos += 2
 
+            # 按指令格式解码操作数，指令首个代码单元上附加解码结果
+            decode_instructions(insns)
+
             # 解析异常处理表
             tries = []
             if tries_size > 0:
-                # 异常处理表在指令之后
-                tries_pos = pos
+                # 异常处理表在指令之后，指令数为奇数时有2字节填充
+                tries_pos = pos + (2 if insns_size % 2 else 0)
+                handlers_pos = tries_pos + tries_size * 8
                 for i in range(tries_size):
                     start_addr = struct.unpack('<I', self.dex_data[tries_pos: tries_pos + 4])[0]
                     insn_count = struct.unpack('<H', self.dex_data[tries_pos + 4: tries_pos + 6])[0]
                     handler_off = struct.unpack('<H', self.dex_data[tries_pos + 6: tries_pos + 8])[0]
 
+                    # handler_off 是相对 encoded_catch_handler_list 起始处的字节偏移
+                    handlers, catch_all = self._read_catch_handler(handlers_pos + handler_off)
                     tries.append({
                         'start_addr': start_addr,
                         'insn_count': insn_count,
-                        'handler_off': handler_off
+                        'handler_off': handler_off,
+                        'handlers': handlers,
+                        'catch_all': catch_all
                     })
 
                     tries_pos += 8
 
-                # 解析handlers表
-                handlers = {}
-                handlers_pos = tries_pos
-
-                # 每个handler列表以uleb128格式的size开始
-                # 如果size为负数，表示最后一个entry是catch-all
-                # 否则，最后一个entry是catch-all
-
-                # 这里简化处理，不详细解析handlers表
-
             self.code_items[code_off] = {
                 'registers_size': registers_size,
                 'ins_size': ins_size,
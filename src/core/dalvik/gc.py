@@ -1,94 +1,457 @@
 # src/core/dalvik/gc.py
 import logging
 import time
-from typing import Dict, Any, Set
+from itertools import chain
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set
+
+from .liveness import get_liveness
 
 logger = logging.getLogger(__name__)
 
+# 分代垃圾回收
+#
+# 新分配的对象进入新生代（young：对象ID -> 经历的次要回收次数），新生代字节数达到 nursery_size
+# 时做次要回收：只标记和清除新生代，老年代对象一律视为存活，其中指向新生代的引用作为额外的根。
+# 这些引用由卡表找出：每 CARD_SIZE 个连续的对象ID为一张卡，iput-object/aput-object 和
+# 引用数组的写入无条件把被写对象所在的卡标脏（cards 以卡号为下标）。次要回收只扫描脏卡中的老年代对象，
+# 不递归标记老年代，扫描后清除卡；仍指向新生代存活对象的卡，以及晋升对象中仍指向新生代的对象所在的卡
+# 重新标脏。静态字段本身就是根，sput-object 不标卡。每次次要回收的脏卡数与占比记录在 card_stats。
+# 在 promotion_age 次次要回收中存活的对象晋升到老年代（old）。
+# 老年代字节数达到 gc_threshold * heap_size 时做完整回收：标记全部可达对象并清除整个堆。
+# 两种回收的次数、耗时和回收/晋升的对象数与字节数分别记录在 stats['minor'] 与 stats['major']。
+# 对象大小在分配时按类的实例字段布局或数组长度计算（见 class_linker.py、arrays.py），保存在对象的 'size' 中
+#
+# 堆大小按 ART 的堆增长规则调整：每次完整回收后以存活字节数 live 为基准，
+# 目标大小为 live / target_utilization，空闲部分限制在 [min_free, max_free] 之间；
+# 上次调整以来GC暂停占用的时间比例超过 max_gc_time_ratio 时（GC吞吐量不足），空闲部分再乘以
+# growth_multiplier。堆大小不超过 growth_limit，也不小于初始大小
+#
+# 标记位保存在以对象ID为下标的 bytearray 中（每个对象一字节），回收的ID由对象表复用（见 object_table.py），
+# 位图长度只取决于同时存活对象数，不随累计分配次数增长（完整回收后ID空间收缩时位图随之缩短）：
+# allocated 记录堆中现有的对象，每次回收新建 marks，回收范围（整个堆或新生代）同样是这种位图。
+# 标记用显式工作栈，入栈时置标记位，对象图再深也不会递归。完整回收的清除是对两张位图的一次线性扫描：
+# 两者按整数运算得到已分配且未标记对象的位图，再用 bytes.find 逐个找出
+#
+# 增量标记（incremental 为真时，老年代达到阈值触发的完整回收改为增量进行）：三色标记，
+# 标记位为0的对象是白色，标记位为1且在工作栈中的是灰色，出栈扫描过的是黑色。
+#   开始   暂停一次扫描全部根（含静态字段）置灰
+#   标记片 每次 collect_if_needed（分配时与解释器周期检查时）处理工作栈，不超过 max_pause_ms
+#   重新标记 工作栈清空后暂停一次：重新扫描调用帧等根（不含静态字段），处理剩余灰色对象后清除
+# 标记期间新分配的对象直接为黑色。iput-object/aput-object/sput-object、filled-new-array 和
+# 引用数组的 arraycopy 经过写屏障（插入屏障），把写入的白色对象置灰，因而黑色对象不会指向白色对象；
+# 静态字段的写入都经过屏障，重新标记时不必再扫描全部类。次要回收可以在两个标记片之间进行。
+# 每次暂停（次要回收、完整回收、增量回收的开始、标记片与重新标记）的时长记入直方图 pauses
+
+MINOR = 'minor'
+MAJOR = 'major'
+
+CARD_SHIFT = 5
+CARD_SIZE = 1 << CARD_SHIFT  # 每张卡覆盖的对象ID数
+
+PAUSE_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)  # 暂停直方图各桶的上界（毫秒）
+
 
 class GarbageCollector:
-    """标记-清除垃圾回收器"""
+    """分代标记-清除垃圾回收器"""
 
     def __init__(self, vm):
         self.vm = vm
-        self.heap_size = 1024 * 1024  # 1MB堆大小
+        self.heap_size = 1024 * 1024  # 当前堆大小（初始1MB），完整回收后按增长规则调整
+        self.min_heap_size = self.heap_size
+        self.growth_limit = 64 * 1024 * 1024  # 堆大小上限
+        self.target_utilization = 0.75  # 完整回收后存活字节数占堆大小的目标比例
+        self.min_free = 512 * 1024  # 调整后至少保留的空闲字节数
+        self.max_free = 2 * 1024 * 1024  # 调整后最多保留的空闲字节数
+        self.max_gc_time_ratio = 0.1  # GC暂停时间占比超过该值时加大空闲部分
+        self.growth_multiplier = 2.0
         self.used_heap = 0
-        self.gc_threshold = 0.7  # 堆使用率达到70%时触发GC
+        self.allocated_bytes = 0  # 累计分配的字节数
+        self.gc_threshold = 0.9  # 老年代达到堆大小的90%时触发完整回收
+        self.nursery_size = 256 * 1024  # 新生代达到该字节数时触发次要回收
+        self.promotion_age = 2  # 存活过几次次要回收后晋升到老年代
+        self.young: Dict[int, int] = {}  # 新生代：对象ID -> 年龄
+        self.old: Set[int] = set()  # 老年代对象ID
+        self.allocated = bytearray()  # 以对象ID为下标，堆中现有的对象为1
+        self.cards = bytearray(1)  # 卡表：以 对象ID >> CARD_SHIFT 为下标，脏卡为1
+        self.young_used = 0
+        self.old_used = 0
         self.gc_count = 0
         self.last_gc_time = 0
+        self.stats = {kind: {'count': 0, 'time': 0.0, 'freed': 0, 'freed_bytes': 0, 'promoted': 0,
+                             'promoted_bytes': 0} for kind in (MINOR, MAJOR)}
+        self.stats[MINOR].update(cards=0, dirty_cards=0)
+        self._window_start = time.perf_counter()  # 上次调整堆大小的时刻
+        self._window_gc_time = 0.0  # 此后GC暂停的累计时长
+        self.incremental = True  # 老年代达到阈值时增量标记，而不是暂停完成整个回收
+        self.max_pause_ms = 2.0  # 每个标记片的最长时间（毫秒）
+        self.marking = False  # 增量标记进行中，写屏障生效
+        self.marks = bytearray()  # 增量标记的标记位图
+        self.mark_stack: List[int] = []  # 增量标记的工作栈（灰色对象）
+        self._cycle_time = 0.0  # 当前增量回收累计的暂停时长
+        self.incremental_stats = {'cycles': 0, 'slices': 0, 'remark_time': 0.0, 'max_remark': 0.0}
+        self.pauses = [0] * (len(PAUSE_BUCKETS) + 1)  # 暂停时长直方图，最后一桶为超过最大上界
+        self.max_pause = 0.0
+        # 上次回收扫描的寄存器数与按引用图跳过的寄存器数
+        self.root_stats = {'scanned_registers': 0, 'skipped_registers': 0}
+        # 上次次要回收的卡表扫描：卡数、脏卡数、脏卡占比与扫描的老年代对象数
+        self.card_stats = {'cards': 0, 'dirty': 0, 'dirty_ratio': 0.0, 'scanned_objects': 0}
+
+    def record_allocation(self, object_id: int, size: int) -> None:
+        """新对象写入堆后登记到新生代"""
+        allocated = self.allocated
+        if object_id >= len(allocated):
+            allocated.extend(bytes(max(object_id + 1 - len(allocated), len(allocated))))
+            self.cards.extend(bytes((len(allocated) >> CARD_SHIFT) + 1 - len(self.cards)))
+        allocated[object_id] = 1
+        if self.marking:
+            # 标记期间分配的对象为黑色
+            marks = self.marks
+            if len(marks) < len(allocated):
+                marks.extend(bytes(len(allocated) - len(marks)))
+            marks[object_id] = 1
+        self.young[object_id] = 0
+        self.young_used += size
+        self.used_heap += size
+        self.allocated_bytes += size
+
+    def card_mark(self, object_id: int) -> None:
+        """卡表写屏障：引用写入对象 object_id 后标脏它所在的卡（解释器和编译代码直接内联）"""
+        self.cards[object_id >> CARD_SHIFT] = 1
 
     def collect_if_needed(self) -> None:
         """根据需要执行垃圾回收"""
-        if self.used_heap / self.heap_size >= self.gc_threshold:
-            logger.info(f"触发垃圾回收: 堆使用率 {self.used_heap / self.heap_size:.2%}")
-            self.collect()
+        if self.young_used >= self.nursery_size:
+            self.collect_minor()
+        if self.marking:
+            self._mark_slice()
+        elif self.old_used >= self.gc_threshold * self.heap_size:
+            logger.info(f"触发垃圾回收: 老年代使用率 {self.old_used / self.heap_size:.2%}")
+            if self.incremental:
+                self.start_marking()
+            else:
+                self.collect()
 
     def collect(self) -> None:
-        """执行垃圾回收"""
-        start_time = time.time()
+        """完整回收：暂停标记全部可达对象，清除整个堆；放弃进行中的增量标记"""
+        start_time = time.perf_counter()
+        self.marking = False
+        self.marks = bytearray()
+        self.mark_stack = []
+        heap = self.vm.heap
+        before = len(heap)
+
+        marks = self._mark(self.allocated)
+        freed_bytes = self._sweep(marks)
+
+        elapsed = self._pause(start_time)
+        self._finish(MAJOR, elapsed, before - len(heap), freed_bytes)
+
+    # ---- 增量标记 ----
+
+    def start_marking(self) -> None:
+        """开始增量回收：扫描全部根并置灰，之后由标记片推进"""
+        start_time = time.perf_counter()
+        self.root_stats = {'scanned_registers': 0, 'skipped_registers': 0}
+        self.marks = bytearray(len(self.allocated))
+        self.mark_stack = []
+        self.marking = True
+        self.shade_all(chain(self._roots(), self._static_roots()))
+        self._cycle_time = self._pause(start_time)
+
+    def write_barrier(self, value: Any) -> None:
+        """插入屏障：标记期间写入对象或静态字段的白色对象置灰。调用方先检查 marking"""
+        marks = self.marks
+        if isinstance(value, int) and 0 < value < len(marks) and not marks[value] and self.allocated[value]:
+            marks[value] = 1
+            self.mark_stack.append(value)
+
+    def shade_all(self, values: Iterable[Any]) -> None:
+        """批量写入（filled-new-array、arraycopy）的写屏障"""
+        for value in values:
+            self.write_barrier(value)
+
+    def _mark_slice(self) -> None:
+        """一个标记片：处理工作栈直到清空或用完 max_pause_ms；上一片已清空时做重新标记和清除"""
+        start_time = time.perf_counter()
+        if self.mark_stack:
+            self.incremental_stats['slices'] += 1
+            self._trace(self.mark_stack, self.marks, self.allocated, start_time + self.max_pause_ms / 1000)
+            self._cycle_time += self._pause(start_time)
+            return
+
+        # 重新标记：调用帧、待写入的结果等没有屏障的根；静态字段的写入都经过了屏障
+        heap = self.vm.heap
+        before = len(heap)
+        self.root_stats = {'scanned_registers': 0, 'skipped_registers': 0}
+        self.shade_all(self._roots())
+        self._trace(self.mark_stack, self.marks, self.allocated)
+        remark = time.perf_counter() - start_time
+        self.marking = False
+        freed_bytes = self._sweep(self.marks)
+        self.marks = bytearray()
+
+        stats = self.incremental_stats
+        stats['cycles'] += 1
+        stats['remark_time'] += remark
+        stats['max_remark'] = max(stats['max_remark'], remark)
+        self._cycle_time += self._pause(start_time)
+        self._finish(MAJOR, self._cycle_time, before - len(heap), freed_bytes)
+
+    def collect_minor(self) -> None:
+        """次要回收：只标记和清除新生代，存活够久的对象晋升"""
+        start_time = time.perf_counter()
+        young = self.young
+        before = len(young)
+        scope = bytearray(len(self.allocated))
+        for object_id in young:
+            scope[object_id] = 1
+
+        remembered = self._scan_cards(scope)
+        marks = self._mark(scope, chain.from_iterable(remembered.values()))
+        heap, allocated = self.vm.heap, self.allocated
+        promoted = promoted_bytes = 0
+        survived = 0
+        freed_bytes = 0
+        freed_ids = []
+        promoted_ids = []
+        for object_id in list(young):
+            size = heap[object_id]['size']
+            if not marks[object_id]:
+                del heap[object_id]
+                del young[object_id]
+                allocated[object_id] = 0
+                freed_ids.append(object_id)
+                freed_bytes += size
+                continue
+            survived += 1
+            age = young[object_id] + 1
+            if age < self.promotion_age:
+                young[object_id] = age
+                continue
+            del young[object_id]
+            self.old.add(object_id)
+            promoted_ids.append(object_id)
+            promoted_bytes += size
+            promoted += 1
+        self.young_used -= freed_bytes + promoted_bytes
+        self.old_used += promoted_bytes
+        self.used_heap -= freed_bytes
+        self.vm.object_table.recycle(freed_ids)
+        self._redirty_cards(remembered, promoted_ids)
+
+        self._finish(MINOR, self._pause(start_time), before - survived, freed_bytes, promoted, promoted_bytes)
+
+    def _pause(self, start_time: float) -> float:
+        """记录一次暂停，返回时长（秒）"""
+        elapsed = time.perf_counter() - start_time
+        milliseconds = elapsed * 1000
+        bucket = 0
+        while bucket < len(PAUSE_BUCKETS) and milliseconds > PAUSE_BUCKETS[bucket]:
+            bucket += 1
+        self.pauses[bucket] += 1
+        self.max_pause = max(self.max_pause, elapsed)
+        self._window_gc_time += elapsed
+        return elapsed
+
+    def pause_histogram(self) -> Dict[str, int]:
+        """暂停时长直方图：桶上界（毫秒）-> 次数"""
+        labels = [f"<={bound:g}ms" for bound in PAUSE_BUCKETS] + [f">{PAUSE_BUCKETS[-1]:g}ms"]
+        return dict(zip(labels, self.pauses))
+
+    def _finish(self, kind: str, elapsed: float, freed: int, freed_bytes: int, promoted: int = 0,
+                promoted_bytes: int = 0) -> None:
+        stats = self.stats[kind]
+        stats['count'] += 1
+        stats['time'] += elapsed
+        stats['freed'] += freed
+        stats['freed_bytes'] += freed_bytes
+        stats['promoted'] += promoted
+        stats['promoted_bytes'] += promoted_bytes
         self.gc_count += 1
+        self.last_gc_time = time.time()
+        logger.info(f"{'次要' if kind == MINOR else '完整'}回收完成: 回收了 {freed} 个对象 ({freed_bytes} 字节), "
+                    f"晋升 {promoted} 个, 耗时 {elapsed:.4f}s")
+        if kind == MAJOR:
+            self._resize_heap()
+        logger.info(f"堆状态: {self.used_heap}/{self.heap_size} ({self.used_heap / self.heap_size:.2%}), "
+                    f"新生代 {self.young_used}, 老年代 {self.old_used}")
 
-        # 标记阶段
-        marked_objects = self._mark()
+    def _resize_heap(self) -> None:
+        """完整回收后按存活字节数、目标利用率和GC吞吐量调整堆大小"""
+        live = self.used_heap
+        now = time.perf_counter()
+        window = now - self._window_start
+        gc_time_ratio = self._window_gc_time / window if window > 0 else 0.0
+        self._window_start, self._window_gc_time = now, 0.0
 
-        # 清除阶段
-        self._sweep(marked_objects)
+        free = min(max(live / self.target_utilization - live, self.min_free), self.max_free)
+        if gc_time_ratio > self.max_gc_time_ratio:
+            free *= self.growth_multiplier
+        heap_size = min(max(int(live + free), self.min_heap_size), self.growth_limit)
+        if heap_size != self.heap_size:
+            logger.info(f"调整堆大小: {self.heap_size} -> {heap_size} (存活 {live}, GC时间占比 {gc_time_ratio:.1%})")
+            self.heap_size = heap_size
+        if live >= self.growth_limit:
+            logger.warning(f"存活对象 {live} 字节已达到堆大小上限 {self.growth_limit}")
 
-        end_time = time.time()
-        logger.info(
-            f"垃圾回收完成: 回收了 {len(self.vm.heap) - len(marked_objects)} 个对象, 耗时 {end_time - start_time:.4f}s")
-        logger.info(f"堆状态: {self.used_heap}/{self.heap_size} ({self.used_heap / self.heap_size:.2%})")
-        self.last_gc_time = end_time
+    def report(self) -> Dict[str, Any]:
+        """各代大小、两种回收与增量标记的统计和暂停直方图"""
+        return {'used': self.used_heap, 'heap_size': self.heap_size, 'allocated_bytes': self.allocated_bytes,
+                'young': self.young_used, 'old': self.old_used,
+                'young_objects': len(self.young), 'old_objects': len(self.old),
+                MINOR: dict(self.stats[MINOR]), MAJOR: dict(self.stats[MAJOR]),
+                'incremental': dict(self.incremental_stats), 'marking': self.marking,
+                'pauses': self.pause_histogram(), 'max_pause_ms': self.max_pause * 1000,
+                'cards': dict(self.card_stats), 'object_table': self.vm.object_table.report()}
 
-    def _mark(self) -> Set[int]:
-        """标记可达对象"""
-        marked = set()
+    def _mark(self, scope: bytearray, extra_roots: Iterable[int] = ()) -> bytearray:
+        """从根集合标记 scope 位图（整个堆或新生代）中的可达对象，不进入 scope 之外的对象，返回标记位图"""
+        self.root_stats = {'scanned_registers': 0, 'skipped_registers': 0}
+        limit = len(scope)
+        marks = bytearray(limit)
+        stack = []
+        for value in chain(self._roots(), self._static_roots(), extra_roots):
+            if isinstance(value, int) and 0 < value < limit and scope[value] and not marks[value]:
+                marks[value] = 1
+                stack.append(value)
+        self._trace(stack, marks, scope)
+        return marks
 
-        # 从根集合开始标记
-        # 1. 寄存器中的对象引用
-        for value in self.vm.interpreter.registers:
-            if isinstance(value, int) and value in self.vm.heap:
-                self._mark_object(value, marked)
+    def _trace(self, stack: List[int], marks: bytearray, scope: bytearray, deadline: Optional[float] = None) -> None:
+        """处理工作栈直到为空或到达 deadline：栈中对象已标记，其字段和引用数组元素中未标记的对象置位后入栈"""
+        heap = self.vm.heap
+        limit = len(scope)
+        count = 0
+        while stack:
+            obj = heap.get(stack.pop())
+            if obj is None:
+                continue  # 增量标记期间置灰后又被次要回收清除
+            data = obj.get('data')
+            references = chain(obj['fields'].values(), data) if isinstance(data, list) else obj['fields'].values()
+            for value in references:
+                if isinstance(value, int) and 0 < value < limit and scope[value] and not marks[value]:
+                    marks[value] = 1
+                    stack.append(value)
+            count += 1
+            if deadline is not None and not count & 0xFF and time.perf_counter() >= deadline:
+                return
 
-        # 2. 调用栈中的对象引用
-        for frame in self.vm.interpreter.call_stack:
-            for value in frame.get('registers', []):
-                if isinstance(value, int) and value in self.vm.heap:
-                    self._mark_object(value, marked)
+    def _roots(self) -> Iterator[Any]:
+        """根集合中除静态字段外的值，调用方过滤出对象引用"""
+        interpreter = self.vm.interpreter
 
-        return marked
+        # 1. 当前帧的寄存器：只扫描当前pc处活跃的引用寄存器
+        yield from self._frame_roots(interpreter.registers, interpreter.current_code, interpreter.pc, False)
 
-    def _mark_object(self, object_id: int, marked: Set[int]) -> None:
-        """递归标记对象及其引用的对象"""
-        if object_id in marked:
-            return
+        # 2. 调用栈中的帧停在调用指令上
+        for frame in interpreter.call_stack:
+            yield from self._frame_roots(frame.get('registers', []), frame.get('code'), frame.get('pc', 0), True)
+
+        # 尚未写入寄存器的调用结果、返回值和捕获的异常
+        yield interpreter.result
+        yield interpreter.return_value
+        yield interpreter.caught_exception
+
+        # 3. 内建函数持有的对象（Integer缓存等）
+        yield from self.vm.intrinsics.roots()
+
+    def _static_roots(self) -> Iterator[Any]:
+        """4. 类的静态字段"""
+        for runtime_class in self.vm.classes.classes.values():
+            yield from runtime_class.statics
+
+    def _frame_roots(self, registers: List[Any], code: Optional[Dict[str, Any]], pc: int,
+                     in_call: bool) -> List[Any]:
+        """按引用图取一帧中的引用寄存器，没有引用图时保守返回全部寄存器"""
+        live = None
+        if code is not None:
+            liveness = get_liveness(code)
+            live = liveness.call_map(pc) if in_call else liveness.reference_map(pc)
+        if live is None:
+            values = registers
+        else:
+            values = [registers[r] for r in live if r < len(registers)]
+            self.root_stats['skipped_registers'] += len(registers) - len(values)
+        self.root_stats['scanned_registers'] += len(values)
+        return values
 
-        marked.add(object_id)
-        obj = self.vm.heap[object_id]
+    def _scan_cards(self, scope: bytearray) -> Dict[int, List[int]]:
+        """扫描脏卡中的老年代对象，返回 卡号 -> 其中指向新生代的引用；扫描过的卡清除"""
+        heap, old, cards = self.vm.heap, self.old, self.cards
+        limit = len(scope)
+        remembered = {}
+        dirty = scanned = 0
+        card = cards.find(1)
+        while card >= 0:
+            dirty += 1
+            cards[card] = 0
+            found = []
+            for object_id in range(card << CARD_SHIFT, (card + 1) << CARD_SHIFT):
+                if object_id not in old:
+                    continue
+                scanned += 1
+                obj = heap[object_id]
+                data = obj.get('data')
+                references = chain(obj['fields'].values(), data) if isinstance(data, list) else obj['fields'].values()
+                found.extend(value for value in references
+                             if isinstance(value, int) and 0 < value < limit and scope[value])
+            if found:
+                remembered[card] = found
+            card = cards.find(1, card + 1)
 
-        # 遍历对象的字段，标记引用的对象
-        for field_value in obj['fields'].values():
-            if isinstance(field_value, int) and field_value in self.vm.heap:
-                self._mark_object(field_value, marked)
+        total = len(cards)
+        self.card_stats = {'cards': total, 'dirty': dirty, 'dirty_ratio': dirty / total, 'scanned_objects': scanned}
+        stats = self.stats[MINOR]
+        stats['cards'] += total
+        stats['dirty_cards'] += dirty
+        return remembered
 
-    def _sweep(self, marked_objects: Set[int]) -> None:
-        """清除未标记的对象"""
-        objects_to_delete = []
+    def _redirty_cards(self, remembered: Dict[int, List[int]], promoted: List[int]) -> None:
+        """次要回收后仍有老年代对象指向新生代的卡重新标脏"""
+        young, heap, cards = self.young, self.vm.heap, self.cards
+        for card, references in remembered.items():
+            if any(value in young for value in references):
+                cards[card] = 1
+        for object_id in promoted:
+            obj = heap[object_id]
+            data = obj.get('data')
+            references = chain(obj['fields'].values(), data) if isinstance(data, list) else obj['fields'].values()
+            if any(isinstance(value, int) and value in young for value in references):
+                cards[object_id >> CARD_SHIFT] = 1
 
-        # 找出未标记的对象
-        for object_id in self.vm.heap:
-            if object_id not in marked_objects:
-                objects_to_delete.append(object_id)
+    def _sweep(self, marks: bytearray) -> int:
+        """清除未标记的对象：对 allocated 与标记位图的一次线性扫描，返回回收的字节数"""
+        heap, allocated = self.vm.heap, self.allocated
+        young, old = self.young, self.old
+        young_bytes = old_bytes = 0
+        freed_ids = list(_unmarked(allocated, marks))
+        for object_id in freed_ids:
+            obj_size = heap.pop(object_id)['size']
+            allocated[object_id] = 0
+            # 按所在的代扣减大小
+            if young.pop(object_id, None) is not None:
+                young_bytes += obj_size
+            else:
+                old.discard(object_id)
+                old_bytes += obj_size
+        self.young_used -= young_bytes
+        self.old_used -= old_bytes
+        self.used_heap -= young_bytes + old_bytes
+        table = self.vm.object_table
+        table.recycle(freed_ids)
+        if len(allocated) > 2 * table.next_id:
+            del allocated[table.next_id:]  # ID空间收缩后位图和卡表随之缩短
+            del self.cards[(table.next_id >> CARD_SHIFT) + 1:]
 
-        # 删除未标记的对象
-        for object_id in objects_to_delete:
-            obj_size = self._get_object_size(self.vm.heap[object_id])
-            del self.vm.heap[object_id]
-            self.used_heap -= obj_size
+        logger.info(f"删除了 {len(freed_ids)} 个不可达对象")
+        return young_bytes + old_bytes
 
-        logger.info(f"删除了 {len(objects_to_delete)} 个不可达对象")
 
-    def _get_object_size(self, obj: Dict[str, Any]) -> int:
-        """估算对象大小"""
-        # 简化实现，实际需要根据对象类型和字段计算
-        return 1024  # 假设每个对象1KB
\ No newline at end of file
+def _unmarked(allocated: bytearray, marks: bytearray) -> Iterator[int]:
+    """已分配但未标记的对象ID：两张位图按整数求 allocated & ~marks 后逐个查找非零字节"""
+    size = len(allocated)
+    garbage = (int.from_bytes(allocated, 'little') & ~int.from_bytes(marks, 'little')).to_bytes(size, 'little')
+    index = garbage.find(1)
+    while index >= 0:
+        yield index
+        index = garbage.find(1, index + 1)
@@ -1,14 +1,89 @@
-import struct
 import logging
 from typing import Dict, Any, List, Optional
 
+from .registers import (
+    WIDE_HIGH, INT_MIN, INT_MAX, LONG_MIN, LONG_MAX, new_register_file, int32, int64, int_div, int_rem, long_div, long_rem,
+    int_to_byte, int_to_char, int_to_short, float32, as_float, as_double,
+    float_div, float_rem, float_to_int, float_to_long, long_to_float, int_bits_to_float, long_bits_to_double,
+)
+from .arrays import fill_from_bytes
+from .intrinsics import JavaException, STRING
+from .strings import JavaString
+from .class_linker import INITIALIZED, FIELD_DEFAULTS
+from .gc import CARD_SHIFT
+from .opcodes import (
+    SGET_QUICK, SGET_WIDE_QUICK, SPUT_QUICK, SPUT_WIDE_QUICK, SPUT_NARROW_QUICK, SPUT_OBJECT_QUICK,
+)
+
 logger = logging.getLogger(__name__)
 
+_UNRESOLVED = object()  # 调用点尚未解析内建函数的标记
+
+# sput-boolean/byte/char/short 的写入转换
+_NARROW_CONVERSIONS = {
+    0x6A: lambda value: 1 if value else 0,
+    0x6B: int_to_byte,
+    0x6C: int_to_char,
+    0x6D: int_to_short,
+}
+
+# float/double 字段写入时统一转换为 Python float
+_FLOAT_CONVERSIONS = {'F': as_float, 'D': as_double}
+
 
 class BytecodeInterpreter:
     def __init__(self, vm):
         self.vm = vm
+        self.registers = []
+        self.call_stack = []
+        self.pc = 0
+        self.exception = None
+        self.caught_exception = None
+        self.result = None
+        self.return_value = None
+        self.current_method = None
+        self.current_class = None
+        self.current_code = None
+        self.register_size = 0
         self.instructions = {
+            0x00: self._nop,
+
+            # 数据移动
+            0x01: self._move,
+            0x02: self._move_from16,
+            0x03: self._move_16,
+            0x04: self._move_wide,
+            0x05: self._move_wide_from16,
+            0x06: self._move_wide_16,
+            0x07: self._move_object,
+            0x08: self._move_object_from16,
+            0x09: self._move_object_16,
+            0x0A: self._move_result,
+            0x0B: self._move_result_wide,
+            0x0C: self._move_result_object,
+            0x0D: self._move_exception,
+
+            # 返回指令
+            0x0E: self._return_void,
+            0x0F: self._return,
+            0x10: self._return_wide,
+            0x11: self._return_object,
+
+            # 常量
+            0x12: self._const_4,
+            0x13: self._const_16,
+            0x14: self._const,
+            0x15: self._const_high16,
+            0x16: self._const_wide_16,
+            0x17: self._const_wide_32,
+            0x18: self._const_wide,
+            0x19: self._const_wide_high16,
+            0x1A: self._const_string,
+            0x1B: self._const_string_jumbo,
+
+            # 调用指令
+            0x6E: self._invoke_virtual,
+            0x6F: self._invoke_super,
             0x70: self._invoke_direct,
             0x71: self._invoke_static,
             0x72: self._invoke_interface,
@@ -18,20 +93,51 @@ class BytecodeInterpreter:
             0x77: self._invoke_static_range,
             0x78: self._invoke_interface_range,
 
-            # 返回指令
-            0x79: self._return_void,
-            0x7A: self._return,
-            0x7B: self._return_wide,
-            0x7C: self._return_object,
-
             # 实例操作
             0x22: self._new_instance,
             0x23: self._new_array,
             0x24: self._filled_new_array,
             0x25: self._filled_new_array_range,
             0x26: self._fill_array_data,
+            0x21: self._array_length,
             0x27: self._throw,
 
+            # 字段操作，窄类型读取与普通读取共用处理函数
+            0x52: self._iget,
+            0x53: self._iget_wide,
+            0x54: self._iget,
+            0x55: self._iget,
+            0x56: self._iget,
+            0x57: self._iget,
+            0x58: self._iget,
+            0x59: self._iput,
+            0x5A: self._iput,
+            0x5B: self._iput_object,
+            0x5C: self._iput_boolean,
+            0x5D: self._iput_byte,
+            0x5E: self._iput_char,
+            0x5F: self._iput_short,
+            0x60: self._sget,
+            0x61: self._sget_wide,
+            0x62: self._sget,
+            0x63: self._sget,
+            0x64: self._sget,
+            0x65: self._sget,
+            0x66: self._sget,
+            0x67: self._sput,
+            0x68: self._sput_wide,
+            0x69: self._sput_object,
+            0x6A: self._sput_narrow,
+            0x6B: self._sput_narrow,
+            0x6C: self._sput_narrow,
+            0x6D: self._sput_narrow,
+            SGET_QUICK: self._sget_quick,
+            SGET_WIDE_QUICK: self._sget_wide_quick,
+            SPUT_QUICK: self._sput_quick,
+            SPUT_WIDE_QUICK: self._sput_quick,
+            SPUT_NARROW_QUICK: self._sput_narrow_quick,
+            SPUT_OBJECT_QUICK: self._sput_object_quick,
+
             # 数组操作
             0x44: self._aget,
             0x45: self._aget_wide,
@@ -49,36 +155,59 @@ class BytecodeInterpreter:
             0x51: self._aput_short,
 
             # 类型转换
-            0x28: self._check_cast,
-            0x29: self._instance_of,
+            0x1F: self._check_cast,
+            0x20: self._instance_of,
 
             # 比较指令
-            0x2A: self._cmpl_float,
-            0x2B: self._cmpg_float,
-            0x2C: self._cmpl_double,
-            0x2D: self._cmpg_double,
-            0x2E: self._cmp_long,
+            0x2D: self._cmpl_float,
+            0x2E: self._cmpg_float,
+            0x2F: self._cmpl_double,
+            0x30: self._cmpg_double,
+            0x31: self._cmp_long,
 
             # 条件分支
-            0x2F: self._if_eq,
-            0x30: self._if_ne,
-            0x31: self._if_lt,
-            0x32: self._if_ge,
-            0x33: self._if_gt,
-            0x34: self._if_le,
-            0x35: self._if_eqz,
-            0x36: self._if_nez,
-            0x37: self._if_ltz,
-            0x38: self._if_gez,
-            0x39: self._if_gtz,
-            0x3A: self._if_lez,
+            0x32: self._if_eq,
+            0x33: self._if_ne,
+            0x34: self._if_lt,
+            0x35: self._if_ge,
+            0x36: self._if_gt,
+            0x37: self._if_le,
+            0x38: self._if_eqz,
+            0x39: self._if_nez,
+            0x3A: self._if_ltz,
+            0x3B: self._if_gez,
+            0x3C: self._if_gtz,
+            0x3D: self._if_lez,
 
             # 无条件分支
-            0x3B: self._goto,
-            0x3C: self._goto_16,
-            0x3D: self._goto_32,
-            0x3E: self._packed_switch,
-            0x3F: self._sparse_switch,
+            0x28: self._goto,
+            0x29: self._goto_16,
+            0x2A: self._goto_32,
+            0x2B: self._packed_switch,
+            0x2C: self._sparse_switch,
+
+            # 一元运算与类型转换
+            0x7B: self._neg_int,
+            0x7C: self._not_int,
+            0x7D: self._neg_long,
+            0x7E: self._not_long,
+            0x7F: self._neg_float,
+            0x80: self._neg_double,
+            0x81: self._int_to_long,
+            0x82: self._int_to_float,
+            0x83: self._int_to_double,
+            0x84: self._long_to_int,
+            0x85: self._long_to_float,
+            0x86: self._long_to_double,
+            0x87: self._float_to_int,
+            0x88: self._float_to_long,
+            0x89: self._float_to_double,
+            0x8A: self._double_to_int,
+            0x8B: self._double_to_long,
+            0x8C: self._double_to_float,
+            0x8D: self._int_to_byte,
+            0x8E: self._int_to_char,
+            0x8F: self._int_to_short,
 
             # 算术运算
             0x90: self._add_int,
@@ -114,35 +243,67 @@ class BytecodeInterpreter:
             0xAE: self._div_double,
             0xAF: self._rem_double,
 
-            # 自增运算
-            0xB0: self._neg_int,
-            0xB1: self._not_int,
-            0xB2: self._neg_long,
-            0xB3: self._not_long,
-            0xB4: self._neg_float,
-            0xB5: self._neg_double,
-            0xB6: self._int_to_long,
-            0xB7: self._int_to_float,
-            0xB8: self._int_to_double,
-            0xB9: self._long_to_int,
-            0xBA: self._long_to_float,
-            0xBB: self._long_to_double,
-            0xBC: self._float_to_int,
-            0xBD: self._float_to_long,
-            0xBE: self._float_to_double,
-            0xBF: self._double_to_int,
-            0xC0: self._double_to_long,
-            0xC1: self._double_to_float,
-            0xC2: self._int_to_byte,
-            0xC3: self._int_to_char,
-            0xC4: self._int_to_short,
-
-            # 特殊指令
-            0xF0: self._nop,  # 扩展指令，这里简化处理
+            # 字面量运算
+            0xD0: self._add_int_lit,
+            0xD1: self._rsub_int_lit,
+            0xD2: self._mul_int_lit,
+            0xD3: self._div_int_lit,
+            0xD4: self._rem_int_lit,
+            0xD5: self._and_int_lit,
+            0xD6: self._or_int_lit,
+            0xD7: self._xor_int_lit,
+            0xD8: self._add_int_lit,
+            0xD9: self._rsub_int_lit,
+            0xDA: self._mul_int_lit,
+            0xDB: self._div_int_lit,
+            0xDC: self._rem_int_lit,
+            0xDD: self._and_int_lit,
+            0xDE: self._or_int_lit,
+            0xDF: self._xor_int_lit,
+            0xE0: self._shl_int_lit,
+            0xE1: self._shr_int_lit,
+            0xE2: self._ushr_int_lit,
         }
 
-    def interpret(self, method: Dict[str, Any], class_def: Dict[str, Any], dex_parser) -> None:
-        """解释执行方法"""
+        # 2addr 指令在解码时已规整为三地址形式，与 23x 运算共用处理函数
+        for i in range(0x20):
+            self.instructions[0xB0 + i] = self.instructions[0x90 + i]
+
+        # 通过校验的方法中 float/double 寄存器必定保存 Python float，使用不做位模式转换的处理函数
+        self.unchecked_instructions = dict(self.instructions)
+        self.unchecked_instructions.update({
+            0x2D: self._cmpl_unchecked,
+            0x2E: self._cmpg_unchecked,
+            0x2F: self._cmpl_unchecked,
+            0x30: self._cmpg_unchecked,
+            0x7F: self._neg_unchecked,
+            0x80: self._neg_double_unchecked,
+            0x87: self._float_to_int_unchecked,
+            0x88: self._float_to_long_unchecked,
+            0x89: self._float_to_double_unchecked,
+            0x8A: self._float_to_int_unchecked,
+            0x8B: self._float_to_long_unchecked,
+            0x8C: self._double_to_float_unchecked,
+            0xA6: self._add_float_unchecked,
+            0xA7: self._sub_float_unchecked,
+            0xA8: self._mul_float_unchecked,
+            0xA9: self._div_float_unchecked,
+            0xAA: self._rem_float_unchecked,
+            0xAB: self._add_double_unchecked,
+            0xAC: self._sub_double_unchecked,
+            0xAD: self._mul_double_unchecked,
+            0xAE: self._div_double_unchecked,
+            0xAF: self._rem_double_unchecked,
+        })
+        for i in range(0xA6, 0xB0):
+            self.unchecked_instructions[i + 0x20] = self.unchecked_instructions[i]
+
+    def interpret(self, method: Dict[str, Any], class_def: Dict[str, Any], dex_parser,
+                  args: Optional[List[Any]] = None, registers: Optional[List[Any]] = None, pc: int = 0) -> Any:
+        """解释执行方法，返回方法的返回值
+
+        registers 不为空时直接使用该寄存器文件并从 pc 处继续执行（编译后的代码去优化时使用）
+        """
         self.current_method = method
         self.current_class = class_def
 
@@ -150,26 +311,65 @@ class BytecodeInterpreter:
         code_off = method.get('code_off', 0)
         if code_off == 0:
             logger.warning(f"方法 {method['name']} 没有代码")
-            return
+            return None
 
         # 获取代码项
         code = dex_parser.code_items.get(code_off)
         if not code:
             logger.warning(f"无法获取方法 {method['name']} 的代码")
-            return
+            return None
 
-        # 初始化寄存器和程序计数器
+        # 初始化寄存器和程序计数器，参数位于寄存器文件末尾
+        self.current_code = code
         self.register_size = code['registers_size']
-        self.registers = [None] * self.register_size
-        self.pc = 0
+        proto = method.get('proto')
+        if registers is not None:
+            self.registers = registers
+        else:
+            self.registers = new_register_file(self.register_size)
+            if args:
+                if proto is not None:
+                    args = self._normalize_args(proto, args)
+                self.registers[self.register_size - len(args):] = args
+        self.pc = pc
         self.exception = None
+        self.return_value = None
+
+        verification = dex_parser.verification.get(code_off)
+        if verification is None:
+            verification = self.vm.verifier.verify_method(method, dex_parser)
+        handlers = self.unchecked_instructions if verification['unchecked'] else self.instructions
 
         # 执行方法
         logger.info(f"开始解释执行方法: {method['class_name']}.{method['name']}")
-        self._execute_code(code, dex_parser)
-
-    def _execute_code(self, code: Dict[str, Any], dex_parser) -> None:
-        """执行代码"""
+        self._execute_code(code, dex_parser, handlers)
+        if proto is not None and self.return_value is not None:
+            # 返回值按方法原型规整，未通过校验的方法可能返回浮点数的位模式
+            return_type = proto['return_type']
+            if return_type == 'F':
+                self.return_value = as_float(self.return_value)
+            elif return_type == 'D':
+                self.return_value = as_double(self.return_value)
+        return self.return_value
+
+    @staticmethod
+    def _normalize_args(proto: Dict[str, Any], args: List[Any]) -> List[Any]:
+        """把 float/double 参数统一为 Python float，args 按寄存器布局排列（宽值占两项）"""
+        parameters = proto['parameters']
+        if 'F' not in parameters and 'D' not in parameters:
+            return args
+        args = list(args)
+        reg = len(args) - sum(2 if t in ('J', 'D') else 1 for t in parameters)
+        for type_name in parameters:
+            if type_name == 'F':
+                args[reg] = as_float(args[reg])
+            elif type_name == 'D':
+                args[reg] = as_double(args[reg])
+            reg += 2 if type_name in ('J', 'D') else 1
+        return args
+
+    def _execute_code(self, code: Dict[str, Any], dex_parser, handlers: Dict[int, Any]) -> None:
+        """执行代码，handlers 为按校验结果选定的指令处理函数表"""
         insns = code['insns']
         tries = code['tries']
 
@@ -181,6 +381,7 @@ class BytecodeInterpreter:
                 if handler:
                     # 跳转到异常处理代码
                     self.pc = handler['handler_pc']
+                    self.caught_exception = self.exception
                     self.exception = None
                     logger.info(f"捕获异常，跳转到处理代码: {self.pc}")
                     continue
@@ -193,1536 +394,1533 @@ class BytecodeInterpreter:
             insn = insns[self.pc]
             opcode = insn['opcode']
 
-            if opcode in self.instructions:
+            if opcode in handlers:
                 # 执行指令
                 logger.debug(f"执行指令: 0x{opcode:02x} at offset {insn['offset']}")
-                self.instructions[opcode](insn, insns, dex_parser)
+                pc = self.pc
+                handlers[opcode](insn, insns, dex_parser)
+                if self.pc <= pc and self.exception is None and self._back_edge(code, dex_parser):
+                    return
             else:
                 logger.warning(f"未知指令: 0x{opcode:02x} at offset {insn['offset']}")
-                self.pc += 1
+                self.pc += insn.get('width', 1)
 
             # 检查垃圾回收条件
             if self.pc % 100 == 0:  # 每执行100条指令检查一次
                 self.vm.gc.collect_if_needed()
 
-    def _find_exception_handler(self, pc: int, exception_type: str, tries: List[Dict[str, Any]], dex_parser) -> \
+    def _back_edge(self, code: Dict[str, Any], dex_parser) -> bool:
+        """回边计数；循环变热后把寄存器交给OSR编译的代码执行到方法结束，返回是否已切换"""
+        entry = self.vm.jit.on_back_edge(self.current_method, code, dex_parser, self.pc)
+        if entry is None:
+            return False
+        registers = self.registers
+        # 之后由编译后的代码持有这些值，解释器帧不再需要扫描
+        self.registers = []
+        self.return_value = self.vm.jit.execute_compiled(entry, registers)
+        self.pc = len(code['insns'])
+        return True
+
+    def _find_exception_handler(self, pc: int, exception: Any, tries: List[Dict[str, Any]], dex_parser) -> \
             Optional[Dict[str, Any]]:
-        """查找匹配的异常处理器"""
-        # 简化实现，实际需要解析handlers表
+        """查找覆盖pc且能捕获该异常的处理器"""
         for try_block in tries:
-            if pc >= try_block['start_addr'] and pc < try_block['start_addr'] + try_block['insn_count']:
-                # 找到匹配的try块，现在需要查找匹配的catch处理器
-                # 这里简化处理，假设只有一个catch-all处理器
-                return {
-                    'handler_pc': try_block['handler_off']
-                }
+            if try_block['start_addr'] <= pc < try_block['start_addr'] + try_block['insn_count']:
+                names = self._exception_names(exception, dex_parser)
+                for handler in try_block['handlers']:
+                    if handler['type'][1:-1].rsplit('/', 1)[-1] in names:
+                        return {'handler_pc': handler['addr']}
+                if try_block['catch_all'] is not None:
+                    return {'handler_pc': try_block['catch_all']}
+                # try 块互不重叠，没有匹配的处理器时异常继续向调用方传播
+                return None
 
         return None
 
-    # 指令实现（仅展示部分关键指令，完整实现需要所有指令）
+    def _exception_names(self, exception: Any, dex_parser) -> set:
+        """异常类及其父类的简单类名集合"""
+        if isinstance(exception, str):
+            # 虚拟机产生的异常以 "类名: 消息" 字符串表示
+            name = exception.split(':', 1)[0]
+            broad = {'Error'} if name.endswith('Error') else {'Exception', 'RuntimeException'}
+            return {name, 'Throwable'} | broad
+        names = {'Throwable'}
+        class_name = self.vm.get_object_type(exception)
+        while class_name:
+            names.add(class_name[1:-1].rsplit('/', 1)[-1])
+            class_def = dex_parser.class_by_name.get(class_name)
+            class_name = class_def['superclass_name'] if class_def else None
+        return names
+
+    # 指令实现
+    # 操作数在方法解码时已写入指令（见 opcodes.decode_instructions），
+    # long/double 以完整值保存在低位寄存器，高位寄存器为 WIDE_HIGH
     def _nop(self, insn, insns, dex_parser):
         """nop指令"""
-        self.pc += 1
+        self.pc += insn['width']
 
     def _move(self, insn, insns, dex_parser):
         """move指令"""
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        self.registers[vA] = self.registers[vB]
-        self.pc += 1
+        self.registers[insn['vA']] = self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _const_4(self, insn, insns, dex_parser):
         """const/4指令"""
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = insn['opcode'] & 0x0F
-        self.registers[vA] = value
-        self.pc += 1
+        self.registers[insn['vA']] = insn['literal']
+        self.pc += insn['width']
 
     def _new_instance(self, insn, insns, dex_parser):
         """new-instance指令"""
-        vA = (insn['opcode'] >> 4) & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 2: insn['offset'] + 4])[0]
-        class_name = dex_parser.type_ids[type_idx]
+        class_name = dex_parser.type_ids[insn['index']]
+        error = self.vm.classes.ensure_initialized(dex_parser, class_name)
+        if error is not None:
+            self.exception = error
+            return
 
         # 创建对象实例
         object_id = self.vm._create_object(class_name)
-        self.registers[vA] = object_id
+        self.registers[insn['vA']] = object_id
 
         logger.debug(f"创建实例: {class_name} (ID: {object_id})")
-        self.pc += 2
-
-    def _invoke_virtual(self, insn, insns, dex_parser):
-        """invoke-virtual指令"""
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用方法
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self.pc += insn['width']
 
     def _move_result(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        # 假设结果在栈顶
-        result = self.vm.stack.pop()
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = self.result
+        self.pc += insn['width']
 
     def _move_from16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        self.registers[vA] = self.registers[vB]
-        self.pc += 2
+        self.registers[insn['vA']] = self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _move_16(self, insn, insns, dex_parser):
-        vA = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        vB = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 3: insn['offset'] + 5])[0]
-        self.registers[vA] = self.registers[vB]
-        self.pc += 4
+        self.registers[insn['vA']] = self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _move_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        self.registers[vA] = self.registers[vB]
-        self.registers[vA + 1] = self.registers[vB + 1]
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _move_wide_from16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        self.registers[vA] = self.registers[vB]
-        self.registers[vA + 1] = self.registers[vB + 1]
-        self.pc += 2
+        vA = insn['vA']
+        self.registers[vA] = self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _move_wide_16(self, insn, insns, dex_parser):
-        vA = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        vB = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 3: insn['offset'] + 5])[0]
-        self.registers[vA] = self.registers[vB]
-        self.registers[vA + 1] = self.registers[vB + 1]
-        self.pc += 4
+        vA = insn['vA']
+        self.registers[vA] = self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _move_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        self.registers[vA] = self.registers[vB]
-        self.pc += 1
+        self.registers[insn['vA']] = self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _move_object_from16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        self.registers[vA] = self.registers[vB]
-        self.pc += 2
+        self.registers[insn['vA']] = self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _move_object_16(self, insn, insns, dex_parser):
-        vA = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        vB = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 3: insn['offset'] + 5])[0]
-        self.registers[vA] = self.registers[vB]
-        self.pc += 4
+        self.registers[insn['vA']] = self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _move_result_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        result_low = self.vm.stack.pop()
-        result_high = self.vm.stack.pop()
-        self.registers[vA] = result_low
-        self.registers[vA + 1] = result_high
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = self.result
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _move_result_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        result = self.vm.stack.pop()
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = self.result
+        self.pc += insn['width']
 
     def _move_exception(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        exception = self.vm.stack.pop()
-        self.registers[vA] = exception
-        self.pc += 1
+        self.registers[insn['vA']] = self.caught_exception
+        self.caught_exception = None
+        self.pc += insn['width']
 
     def _const_16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        self.registers[vA] = value
-        self.pc += 2
+        self.registers[insn['vA']] = insn['literal']
+        self.pc += insn['width']
 
     def _const(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<I', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 5])[0]
-        self.registers[vA] = value
-        self.pc += 4
+        self.registers[insn['vA']] = insn['literal']
+        self.pc += insn['width']
 
     def _const_high16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0] << 16
-        self.registers[vA] = value
-        self.pc += 2
+        self.registers[insn['vA']] = insn['literal']
+        self.pc += insn['width']
 
     def _const_wide_16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        self.registers[vA] = value
-        self.registers[vA + 1] = 0
-        self.pc += 2
+        vA = insn['vA']
+        self.registers[vA] = insn['literal']
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _const_wide_32(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<I', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 5])[0]
-        self.registers[vA] = value
-        self.registers[vA + 1] = 0
-        self.pc += 4
+        vA = insn['vA']
+        self.registers[vA] = insn['literal']
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _const_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<Q', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 9])[0]
-        self.registers[vA] = value & 0xFFFFFFFF
-        self.registers[vA + 1] = value >> 32
-        self.pc += 8
+        vA = insn['vA']
+        self.registers[vA] = insn['literal']
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _const_wide_high16(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        value = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0] << 48
-        self.registers[vA] = value & 0xFFFFFFFF
-        self.registers[vA + 1] = value >> 32
-        self.pc += 2
+        vA = insn['vA']
+        self.registers[vA] = insn['literal']
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _const_string(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        string_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        string_value = dex_parser.string_data[string_idx]
-        self.registers[vA] = string_value
-        self.pc += 2
+        # 首次执行时解析为驻留字符串并缓存在指令上，之后只加载引用
+        string = insn.get('string')
+        if string is None:
+            string = insn['string'] = self.vm.strings.intern(dex_parser.string_ids[insn['index']])
+        self.registers[insn['vA']] = string
+        self.pc += insn['width']
 
     def _const_string_jumbo(self, insn, insns, dex_parser):
-        vA = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        string_idx = struct.unpack('<I', self.vm.dex_data[insn['offset'] + 3: insn['offset'] + 7])[0]
-        string_value = dex_parser.string_data[string_idx]
-        self.registers[vA] = string_value
-        self.pc += 6
+        self._const_string(insn, insns, dex_parser)
 
     def _const_class(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        class_name = dex_parser.type_ids[type_idx]
+        class_name = dex_parser.type_ids[insn['index']]
         # 简单示例，将类名作为类对象
-        self.registers[vA] = class_name
-        self.pc += 2
+        self.registers[insn['vA']] = class_name
+        self.pc += insn['width']
 
     def _monitor_enter(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        object_id = self.registers[vA]
+        object_id = self.registers[insn['vA']]
         # 简单示例，假设锁操作成功
         self.vm.lock_object(object_id)
-        self.pc += 1
+        self.pc += insn['width']
 
     def _monitor_exit(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        object_id = self.registers[vA]
+        object_id = self.registers[insn['vA']]
         # 简单示例，假设解锁操作成功
         self.vm.unlock_object(object_id)
-        self.pc += 1
+        self.pc += insn['width']
+
+    def _field_name(self, insn, dex_parser) -> str:
+        """字段名，首次解析时一并缓存字段默认值与写入转换"""
+        name = insn.get('field_name')
+        if name is None:
+            field_ref = dex_parser.field_ids[insn['index']]
+            type_name = field_ref['type_name']
+            insn['field_default'] = FIELD_DEFAULTS.get(type_name, 0)
+            insn['field_convert'] = _FLOAT_CONVERSIONS.get(type_name)
+            name = insn['field_name'] = field_ref['name']
+        return name
+
+    def _instance_fields(self, insn) -> Optional[Dict[str, Any]]:
+        obj = self.vm.heap.get(self.registers[insn['vB']])
+        if obj is None:
+            self.exception = "NullPointerException: field access on null object"
+            return None
+        return obj['fields']
 
     def _iget(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = field_value
-        self.pc += 2
+        # 窄类型在写入时已完成转换，读取时无需再次转换
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        self.registers[insn['vA']] = fields.get(self._field_name(insn, dex_parser), insn['field_default'])
+        self.pc += insn['width']
 
     def _iget_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = field_value & 0xFFFFFFFF
-        self.registers[vA + 1] = field_value >> 32
-        self.pc += 2
-
-    def _iget_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = field_value
-        self.pc += 2
-
-    def _iget_boolean(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = bool(field_value)
-        self.pc += 2
-
-    def _iget_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = field_value & 0xFF
-        self.pc += 2
-
-    def _iget_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = field_value & 0xFFFF
-        self.pc += 2
-
-    def _iget_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.vm.get_object_field(object_id, field_idx)
-        self.registers[vA] = field_value & 0xFFFF
-        self.pc += 2
-
-    def _sget(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = field_value
-        self.pc += 2
-
-    def _sget_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = field_value & 0xFFFFFFFF
-        self.registers[vA + 1] = field_value >> 32
-        self.pc += 2
-
-    def _sget_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = field_value
-        self.pc += 2
-
-    def _sget_boolean(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = bool(field_value)
-        self.pc += 2
-
-    def _sget_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = field_value & 0xFF
-        self.pc += 2
-
-    def _sget_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = field_value & 0xFFFF
-        self.pc += 2
-
-    def _sget_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.vm.get_static_field(field_idx)
-        self.registers[vA] = field_value & 0xFFFF
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        vA = insn['vA']
+        self.registers[vA] = fields.get(self._field_name(insn, dex_parser), insn['field_default'])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _iput(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.registers[vA]
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        name = self._field_name(insn, dex_parser)
+        value = self.registers[insn['vA']]
+        convert = insn['field_convert']
+        # float/double 字段统一保存 Python float，读取方无需再转换
+        fields[name] = value if convert is None else convert(value)
+        self.pc += insn['width']
 
     def _iput_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.registers[vA]
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
-
-    def _iput_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = (self.registers[vA + 1] << 32) | self.registers[vA]
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        value = self.registers[insn['vA']]
+        gc = self.vm.gc
+        gc.cards[self.registers[insn['vB']] >> CARD_SHIFT] = 1
+        if gc.marking:
+            gc.write_barrier(value)
+        fields[self._field_name(insn, dex_parser)] = value
+        self.pc += insn['width']
 
     def _iput_boolean(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = int(self.registers[vA])
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        fields[self._field_name(insn, dex_parser)] = 1 if self.registers[insn['vA']] else 0
+        self.pc += insn['width']
 
     def _iput_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.registers[vA] & 0xFF
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        fields[self._field_name(insn, dex_parser)] = int_to_byte(self.registers[insn['vA']])
+        self.pc += insn['width']
 
     def _iput_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.registers[vA] & 0xFFFF
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        fields[self._field_name(insn, dex_parser)] = int_to_char(self.registers[insn['vA']])
+        self.pc += insn['width']
 
     def _iput_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        object_id = self.registers[vB]
-        field_value = self.registers[vA] & 0xFFFF
-        self.vm.set_object_field(object_id, field_idx, field_value)
-        self.pc += 2
+        fields = self._instance_fields(insn)
+        if fields is None:
+            return
+        fields[self._field_name(insn, dex_parser)] = int_to_short(self.registers[insn['vA']])
+        self.pc += insn['width']
+
+    def _static_field(self, insn, dex_parser, quick_opcode):
+        """解析静态字段并按需初始化类，返回 (静态存储, 槽位)
+
+        类初始化完成后把指令改写为快速形式，之后不再经过这里
+        """
+        classes = self.vm.classes
+        runtime_class, slot = classes.resolve_static_field(dex_parser, insn['index'])
+        error = classes.initialize(runtime_class, dex_parser)
+        if error is not None:
+            self.exception = error
+            return None
+        if runtime_class.state == INITIALIZED:
+            insn['statics'] = runtime_class.statics
+            insn['slot'] = slot
+            insn['quickened'] = insn['opcode']
+            insn['opcode'] = quick_opcode
+        return runtime_class.statics, slot
+
+    def _sget(self, insn, insns, dex_parser):
+        field = self._static_field(insn, dex_parser, SGET_QUICK)
+        if field is None:
+            return
+        statics, slot = field
+        self.registers[insn['vA']] = statics[slot]
+        self.pc += insn['width']
+
+    def _sget_wide(self, insn, insns, dex_parser):
+        field = self._static_field(insn, dex_parser, SGET_WIDE_QUICK)
+        if field is None:
+            return
+        statics, slot = field
+        vA = insn['vA']
+        self.registers[vA] = statics[slot]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _sput(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.registers[vA]
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
+        convert = _FLOAT_CONVERSIONS.get(dex_parser.field_ids[insn['index']]['type_name'])
+        if convert is not None:
+            # float 字段按窄类型的方式写入：转换为 Python float
+            insn['convert'] = convert
+            self._sput_narrow_store(insn, dex_parser)
+            return
+        field = self._static_field(insn, dex_parser, SPUT_QUICK)
+        if field is None:
+            return
+        statics, slot = field
+        statics[slot] = self.registers[insn['vA']]
+        self.pc += insn['width']
+
+    def _sput_object(self, insn, insns, dex_parser):
+        field = self._static_field(insn, dex_parser, SPUT_OBJECT_QUICK)
+        if field is None:
+            return
+        self._sput_object_store(field[0], field[1], insn)
+
+    def _sput_object_store(self, statics, slot, insn):
+        """静态字段不在重新标记时扫描，写入必须经过写屏障"""
+        value = self.registers[insn['vA']]
+        gc = self.vm.gc
+        if gc.marking:
+            gc.write_barrier(value)
+        statics[slot] = value
+        self.pc += insn['width']
 
     def _sput_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = (self.registers[vA + 1] << 32) | self.registers[vA]
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
+        convert = _FLOAT_CONVERSIONS.get(dex_parser.field_ids[insn['index']]['type_name'])
+        if convert is not None:
+            insn['convert'] = convert
+            self._sput_narrow_store(insn, dex_parser)
+            return
+        field = self._static_field(insn, dex_parser, SPUT_WIDE_QUICK)
+        if field is None:
+            return
+        statics, slot = field
+        statics[slot] = self.registers[insn['vA']]
+        self.pc += insn['width']
+
+    def _sput_narrow(self, insn, insns, dex_parser):
+        """sput-boolean/byte/char/short：按字段类型截断后写入"""
+        insn['convert'] = _NARROW_CONVERSIONS[insn.get('quickened', insn['opcode'])]
+        self._sput_narrow_store(insn, dex_parser)
+
+    def _sput_narrow_store(self, insn, dex_parser):
+        """按 insn['convert'] 转换后写入静态字段，初始化完成后改写为 SPUT_NARROW_QUICK"""
+        field = self._static_field(insn, dex_parser, SPUT_NARROW_QUICK)
+        if field is None:
+            return
+        statics, slot = field
+        statics[slot] = insn['convert'](self.registers[insn['vA']])
+        self.pc += insn['width']
+
+    # 快速形式：类已初始化，槽位已解析
+    def _sget_quick(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = insn['statics'][insn['slot']]
+        self.pc += insn['width']
+
+    def _sget_wide_quick(self, insn, insns, dex_parser):
+        vA = insn['vA']
+        self.registers[vA] = insn['statics'][insn['slot']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _sput_quick(self, insn, insns, dex_parser):
+        insn['statics'][insn['slot']] = self.registers[insn['vA']]
+        self.pc += insn['width']
+
+    def _sput_object_quick(self, insn, insns, dex_parser):
+        self._sput_object_store(insn['statics'], insn['slot'], insn)
+
+    def _sput_narrow_quick(self, insn, insns, dex_parser):
+        insn['statics'][insn['slot']] = insn['convert'](self.registers[insn['vA']])
+        self.pc += insn['width']
+
+    def _invoke(self, insn, dex_parser, virtual, static=False):
+        """调用指令的公共实现：先查内建函数表，再执行字节码方法或本地方法"""
+        regs = self.registers
+        intrinsic = insn.get('intrinsic', _UNRESOLVED)
+        if intrinsic is _UNRESOLVED:
+            # 每个调用点只解析一次，结果缓存在指令上
+            intrinsic = insn['intrinsic'] = self.vm.intrinsics.lookup(dex_parser.method_ids[insn['index']])
+        if intrinsic is not None:
+            try:
+                self.result = intrinsic(self.vm, [regs[r] for r in insn['args'] if regs[r] is not WIDE_HIGH])
+            except JavaException as e:
+                self.exception = str(e)
+                return
+            self.pc += insn['width']
+            return
 
-    def _sput_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.registers[vA]
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
-
-    def _sput_boolean(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = int(self.registers[vA])
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
-
-    def _sput_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.registers[vA] & 0xFF
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
-
-    def _sput_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.registers[vA] & 0xFFFF
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
-
-    def _sput_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        field_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        field_value = self.registers[vA] & 0xFFFF
-        self.vm.set_static_field(field_idx, field_value)
-        self.pc += 2
+        method = dex_parser.method_ids[insn['index']]
+        args = [regs[r] for r in insn['args']]
+        if virtual:
+            receiver = args[0]
+            if receiver is None or receiver == 0:
+                self.exception = f"NullPointerException: invoke {method['name']} on null"
+                return
+            method = self._resolve_virtual(method, receiver, dex_parser)
+        elif static:
+            error = self.vm.classes.ensure_initialized(dex_parser, method['class_name'])
+            if error is not None:
+                self.exception = error
+                return
+
+        self.result = self.invoke_method(method, dex_parser, args)
+        if self.exception is None:
+            self.pc += insn['width']
+
+    def receiver_type(self, receiver: Any) -> Optional[str]:
+        """虚方法接收者的运行时类名"""
+        return STRING if isinstance(receiver, JavaString) else self.vm.get_object_type(receiver)
+
+    def _resolve_virtual(self, method: Dict[str, Any], receiver: Any, dex_parser) -> Dict[str, Any]:
+        """按接收者的运行时类型查找覆盖方法，找不到时使用静态解析的方法"""
+        return self.resolve_override(method, self.receiver_type(receiver), dex_parser)
+
+    def resolve_override(self, method: Dict[str, Any], receiver_class: Optional[str], dex_parser) -> Dict[str, Any]:
+        """在 receiver_class 及其父类中查找 method 的覆盖方法"""
+        if receiver_class is None or receiver_class == method['class_name']:
+            return method
+        proto = method['proto']
+        key = (receiver_class, method['name'], tuple(proto['parameters']), proto['return_type'])
+        target = dex_parser.vtable_cache.get(key)
+        if target is None:
+            target = method
+            class_def = dex_parser.class_by_name.get(receiver_class)
+            while class_def is not None and target is method:
+                for entry in class_def['virtual_methods']:
+                    candidate = dex_parser.method_ids[entry['method_idx']]
+                    if (candidate['name'] == method['name'] and
+                            candidate['proto']['parameters'] == proto['parameters'] and
+                            candidate['proto']['return_type'] == proto['return_type']):
+                        target = candidate
+                        break
+                class_def = dex_parser.class_by_name.get(class_def['superclass_name'])
+            dex_parser.vtable_cache[key] = target
+        return target
+
+    def invoke_method(self, method: Dict[str, Any], dex_parser, args: List[Any]) -> Any:
+        """调用方法：有字节码则执行编译后的代码或保存当前帧后解释执行，否则交给虚拟机的本地方法"""
+        if method.get('code_off', 0) not in dex_parser.code_items:
+            try:
+                return self.vm.call_native_method(method, args)
+            except JavaException as e:
+                self.exception = str(e)
+                return None
+
+        # 已编译的方法直接执行：当前帧停在调用指令上，GC 按当前帧的引用图扫描，无需入栈
+        jit = self.vm.jit
+        compiled = jit.lookup(method, dex_parser)
+        if compiled is not None:
+            return jit.execute_compiled(compiled, args)
+        return self._interpret_frame(method, dex_parser, args)
+
+    def deoptimize(self, method: Dict[str, Any], dex_parser, registers: List[Any], pc: int) -> Any:
+        """编译后的代码去优化：保存当前帧后，用编译代码交出的寄存器从 pc 处继续解释执行"""
+        return self._interpret_frame(method, dex_parser, None, registers, pc)
+
+    def _interpret_frame(self, method: Dict[str, Any], dex_parser, args: Optional[List[Any]],
+                         registers: Optional[List[Any]] = None, pc: int = 0) -> Any:
+        """保存当前帧，解释执行被调用方法后恢复"""
+        frame = {
+            'method': self.current_method,
+            'class_def': self.current_class,
+            'code': self.current_code,
+            'registers': self.registers,
+            'register_size': self.register_size,
+            'pc': self.pc,
+        }
+        self.call_stack.append(frame)
+        try:
+            class_def = dex_parser.class_by_name.get(method['class_name'], {})
+            return self.interpret(method, class_def, dex_parser, args, registers, pc)
+        except RecursionError:
+            self.exception = "StackOverflowError"
+            return None
+        finally:
+            # 被调用方未处理的异常保留在 self.exception 中，由调用方继续查找处理器
+            self.call_stack.pop()
+            self.current_method = frame['method']
+            self.current_class = frame['class_def']
+            self.current_code = frame['code']
+            self.registers = frame['registers']
+            self.register_size = frame['register_size']
+            self.pc = frame['pc']
+
+    def _invoke_virtual(self, insn, insns, dex_parser):
+        """invoke-virtual指令"""
+        self._invoke(insn, dex_parser, True)
 
     def _invoke_super(self, insn, insns, dex_parser):
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用父类方法
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        # 方法引用已指向父类方法，按直接调用处理
+        self._invoke(insn, dex_parser, False)
 
     def _invoke_direct(self, insn, insns, dex_parser):
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用直接方法
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, False)
 
     def _invoke_static(self, insn, insns, dex_parser):
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用静态方法
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, False, static=True)
 
     def _invoke_interface(self, insn, insns, dex_parser):
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用接口方法
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, True)
 
     def _invoke_virtual_range(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用虚拟方法范围
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, True)
 
     def _invoke_super_range(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用父类方法范围
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, False)
 
     def _invoke_direct_range(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用直接方法范围
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, False)
 
     def _invoke_static_range(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用静态方法范围
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, False, static=True)
 
     def _invoke_interface_range(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        method_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        # 简单示例，调用接口方法范围
-        # 这里需要根据实际情况实现方法调用逻辑
-        self.pc += 2
+        self._invoke(insn, dex_parser, True)
 
     def _return_void(self, insn, insns, dex_parser):
-        # 简单示例，返回空
-        self.vm.stack.pop_frame()
-        return
+        self.return_value = None
+        self.pc = len(insns)
 
     def _return_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        result = (self.registers[vA + 1] << 32) | self.registers[vA]
-        self.vm.stack.pop_frame()
-        self.vm.stack.push(result)
-        return
+        self.return_value = self.registers[insn['vA']]
+        self.pc = len(insns)
 
     def _return_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        result = self.registers[vA]
-        self.vm.stack.pop_frame()
-        self.vm.stack.push(result)
-        return
+        self.return_value = self.registers[insn['vA']]
+        self.pc = len(insns)
 
     def _return(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        result = self.registers[vA]
-        self.vm.stack.pop_frame()
-        self.vm.stack.push(result)
-        return
+        self.return_value = self.registers[insn['vA']]
+        self.pc = len(insns)
 
     def _new_array(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        array_length = self.registers[vB]
-        array_type = dex_parser.type_ids[type_idx]
+        array_length = self.registers[insn['vB']]
+        if array_length < 0:
+            self.exception = f"NegativeArraySizeException: {array_length}"
+            return
+        array_type = dex_parser.type_ids[insn['index']]
         array_id = self.vm._create_array(array_type, array_length)
-        self.registers[vA] = array_id
-        self.pc += 2
+        self.registers[insn['vA']] = array_id
+        self.pc += insn['width']
+
+    def _array_length(self, insn, insns, dex_parser):
+        array_obj = self.vm.heap.get(self.registers[insn['vB']])
+        if array_obj is None:
+            self.exception = "NullPointerException: array is null"
+            return
+        self.registers[insn['vA']] = len(array_obj['data'])
+        self.pc += insn['width']
 
     def _filled_new_array(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        array_type = dex_parser.type_ids[type_idx]
-        array_length = vRegCount
-        array_id = self.vm._create_array(array_type, array_length)
-        for i in range(array_length):
-            self.vm.set_array_element(array_id, i, self.registers[vRegStart + i])
-        self.vm.stack.push(array_id)
-        self.pc += 2
+        array_type = dex_parser.type_ids[insn['index']]
+        values = [self.registers[reg] for reg in insn['args']]
+        array_id = self.vm._create_array(array_type, len(values))
+        data = self.vm.heap[array_id]['data']
+        for i, value in enumerate(values):
+            data[i] = value
+        if self.vm.gc.marking:
+            self.vm.gc.shade_all(values)
+        self.result = array_id
+        self.pc += insn['width']
 
     def _filled_new_array_range(self, insn, insns, dex_parser):
-        vRegCount = (insn['opcode'] >> 4) & 0x0F
-        vRegStart = insn['opcode'] & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        array_type = dex_parser.type_ids[type_idx]
-        array_length = vRegCount
-        array_id = self.vm._create_array(array_type, array_length)
-        for i in range(array_length):
-            self.vm.set_array_element(array_id, i, self.registers[vRegStart + i])
-        self.vm.stack.push(array_id)
-        self.pc += 2
+        self._filled_new_array(insn, insns, dex_parser)
 
     def _fill_array_data(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        array_id = self.registers[vA]
-        data_offset = struct.unpack('<I', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 5])[0]
-        # 简单示例，填充数组数据
-        # 这里需要根据实际情况实现数组数据填充逻辑
-        self.pc += 4
+        # 负载已在方法解码时转为原始字节，这里一次性复制到数组缓冲区
+        array_obj = self.vm.heap.get(self.registers[insn['vA']])
+        if array_obj is None:
+            self.exception = "NullPointerException: array is null"
+            return
+        data = array_obj['data']
+        if insn['element_count'] > len(data):
+            self.exception = f"ArrayIndexOutOfBoundsException: length={len(data)}; count={insn['element_count']}"
+            return
+        fill_from_bytes(data, insn['array_data'], insn['element_width'])
+        self.pc += insn['width']
 
     def _throw(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        exception = self.registers[vA]
+        exception = self.registers[insn['vA']]
         self.exception = exception
-        self.pc += 1
 
+    # 数组元素直接读写对象的类型化存储（见 arrays.py），无需经由VM逐元素访问
     def _aget(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = element
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aget_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = element & 0xFFFFFFFF
-        self.registers[vA + 1] = element >> 32
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        regs[insn['vA'] + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _aget_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = element
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aget_boolean(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = bool(element)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aget_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = element & 0xFF
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aget_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = element & 0xFFFF
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aget_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        element = self.vm.get_array_element(array_id, index)
-        self.registers[vA] = element & 0xFFFF
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            regs[insn['vA']] = data[index]
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aput(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = self.registers[vA]
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = regs[insn['vA']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            if value.__class__ is int and data.typecode == 'f':
+                value = int_bits_to_float(value)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aput_wide(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = (self.registers[vA + 1] << 32) | self.registers[vA]
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = regs[insn['vA']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            if value.__class__ is int and data.typecode == 'd':
+                value = long_bits_to_double(value)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aput_object(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = self.registers[vA]
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = regs[insn['vA']]
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        gc = self.vm.gc
+        gc.cards[regs[insn['vB']] >> CARD_SHIFT] = 1
+        if gc.marking:
+            gc.write_barrier(value)
+        self.pc += insn['width']
 
     def _aput_boolean(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = int(self.registers[vA])
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = 1 if regs[insn['vA']] else 0
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aput_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = self.registers[vA] & 0xFF
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = int_to_byte(regs[insn['vA']])
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aput_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = self.registers[vA] & 0xFFFF
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = int_to_char(regs[insn['vA']])
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _aput_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        array_id = self.registers[vB]
-        index = self.registers[vC]
-        value = self.registers[vA] & 0xFFFF
-        self.vm.set_array_element(array_id, index, value)
-        self.pc += 1
+        regs = self.registers
+        index = regs[insn['vC']]
+        value = int_to_short(regs[insn['vA']])
+        try:
+            data = self.vm.heap[regs[insn['vB']]]['data']
+            if index < 0:
+                raise IndexError(index)
+            data[index] = value
+        except KeyError:
+            self.exception = "NullPointerException: array is null"
+            return
+        except IndexError:
+            self.exception = f"ArrayIndexOutOfBoundsException: index={index}"
+            return
+        self.pc += insn['width']
 
     def _check_cast(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        target_type = dex_parser.type_ids[type_idx]
-        object_id = self.registers[vA]
-        object_type = self.vm.get_object_type(object_id)
-        if object_type != target_type:
+        target_type = dex_parser.type_ids[insn['index']]
+        # 字符串不在对象堆中，与虚分派一样按接收者取运行时类型；null 的类型为 None，可转换为任何类型
+        object_type = self.receiver_type(self.registers[insn['vA']])
+        if object_type is not None and object_type != target_type:
             self.exception = f"ClassCastException: {object_type} cannot be cast to {target_type}"
-            self.pc += 1
             return
-        self.pc += 2
+        self.pc += insn['width']
 
     def _instance_of(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        type_idx = struct.unpack('<H', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        target_type = dex_parser.type_ids[type_idx]
-        object_id = self.registers[vB]
-        object_type = self.vm.get_object_type(object_id)
+        target_type = dex_parser.type_ids[insn['index']]
+        object_type = self.receiver_type(self.registers[insn['vB']])
         result = int(object_type == target_type)
-        self.registers[vA] = result
-        self.pc += 2
+        self.registers[insn['vA']] = result
+        self.pc += insn['width']
 
     def _cmpl_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        if value1 < value2:
+        value1 = as_float(self.registers[insn['vB']])
+        value2 = as_float(self.registers[insn['vC']])
+        if value1 > value2:
             result = 1
-        elif value1 > value2:
-            result = -1
-        else:
+        elif value1 == value2:
             result = 0
-        self.registers[vA] = result
-        self.pc += 1
+        else:
+            # 小于或任一操作数为NaN
+            result = -1
+        self.registers[insn['vA']] = result
+        self.pc += insn['width']
 
     def _cmpg_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        if value1 > value2:
-            result = 1
-        elif value1 < value2:
+        value1 = as_float(self.registers[insn['vB']])
+        value2 = as_float(self.registers[insn['vC']])
+        if value1 < value2:
             result = -1
-        else:
+        elif value1 == value2:
             result = 0
-        self.registers[vA] = result
-        self.pc += 1
+        else:
+            # 大于或任一操作数为NaN
+            result = 1
+        self.registers[insn['vA']] = result
+        self.pc += insn['width']
 
     def _cmpl_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        if value1 < value2:
+        value1 = as_double(self.registers[insn['vB']])
+        value2 = as_double(self.registers[insn['vC']])
+        if value1 > value2:
             result = 1
-        elif value1 > value2:
-            result = -1
-        else:
+        elif value1 == value2:
             result = 0
-        self.registers[vA] = result
-        self.pc += 1
+        else:
+            result = -1
+        self.registers[insn['vA']] = result
+        self.pc += insn['width']
 
     def _cmpg_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        if value1 > value2:
-            result = 1
-        elif value1 < value2:
+        value1 = as_double(self.registers[insn['vB']])
+        value2 = as_double(self.registers[insn['vC']])
+        if value1 < value2:
             result = -1
-        else:
+        elif value1 == value2:
             result = 0
-        self.registers[vA] = result
-        self.pc += 1
+        else:
+            result = 1
+        self.registers[insn['vA']] = result
+        self.pc += insn['width']
 
     def _cmp_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
+        value1 = self.registers[insn['vB']]
+        value2 = self.registers[insn['vC']]
         if value1 > value2:
             result = 1
         elif value1 < value2:
             result = -1
         else:
             result = 0
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = result
+        self.pc += insn['width']
 
     def _if_eg(self, insn, insns, dex_parser):
         # 可能是拼写错误，应该是 _if_eq
         self._if_eq(insn, insns, dex_parser)
 
     def _if_ne(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value1 = self.registers[vA]
-        value2 = self.registers[vB]
-        if value1 != value2:
-            self.pc += offset
+        if self.registers[insn['vA']] != self.registers[insn['vB']]:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_eq(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value1 = self.registers[vA]
-        value2 = self.registers[vB]
-        if value1 == value2:
-            self.pc += offset
+        if self.registers[insn['vA']] == self.registers[insn['vB']]:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_lt(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value1 = self.registers[vA]
-        value2 = self.registers[vB]
-        if value1 < value2:
-            self.pc += offset
+        if self.registers[insn['vA']] < self.registers[insn['vB']]:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_le(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value1 = self.registers[vA]
-        value2 = self.registers[vB]
-        if value1 <= value2:
-            self.pc += offset
+        if self.registers[insn['vA']] <= self.registers[insn['vB']]:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_gt(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value1 = self.registers[vA]
-        value2 = self.registers[vB]
-        if value1 > value2:
-            self.pc += offset
+        if self.registers[insn['vA']] > self.registers[insn['vB']]:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_ge(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value1 = self.registers[vA]
-        value2 = self.registers[vB]
-        if value1 >= value2:
-            self.pc += offset
+        if self.registers[insn['vA']] >= self.registers[insn['vB']]:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
+    # 与 null/0 显式比较：寄存器中的 JavaString 等值不按 Python 真值判断
     def _if_eqz(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value = self.registers[vA]
-        if value == 0:
-            self.pc += offset
+        value = self.registers[insn['vA']]
+        if value == 0 or value is None:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_ltz(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value = self.registers[vA]
-        if value < 0:
-            self.pc += offset
+        if self.registers[insn['vA']] < 0:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_nez(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value = self.registers[vA]
-        if value != 0:
-            self.pc += offset
+        value = self.registers[insn['vA']]
+        if value != 0 and value is not None:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_gez(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value = self.registers[vA]
-        if value >= 0:
-            self.pc += offset
+        if self.registers[insn['vA']] >= 0:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_gtz(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value = self.registers[vA]
-        if value > 0:
-            self.pc += offset
+        if self.registers[insn['vA']] > 0:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _if_lez(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        value = self.registers[vA]
-        if value <= 0:
-            self.pc += offset
+        if self.registers[insn['vA']] <= 0:
+            self.pc = insn['target']
         else:
-            self.pc += 2
+            self.pc += insn['width']
 
     def _goto(self, insn, insns, dex_parser):
-        offset = struct.unpack('<b', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 2])[0]
-        self.pc += offset
+        self.pc = insn['target']
 
     def _goto_16(self, insn, insns, dex_parser):
-        offset = struct.unpack('<h', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 3])[0]
-        self.pc += offset
+        self.pc = insn['target']
 
     def _goto_32(self, insn, insns, dex_parser):
-        offset = struct.unpack('<i', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 5])[0]
-        self.pc += offset
+        self.pc = insn['target']
 
     def _packed_switch(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        key = self.registers[vA]
-        table_offset = struct.unpack('<I', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 5])[0]
-        first_key = struct.unpack('<I', self.vm.dex_data[table_offset: table_offset + 4])[0]
-        size = struct.unpack('<I', self.vm.dex_data[table_offset + 4: table_offset + 8])[0]
-        for i in range(size):
-            target_offset = struct.unpack('<i', self.vm.dex_data[table_offset + 8 + i * 4: table_offset + 12 + i * 4])[0]
-            if key == first_key + i:
-                self.pc += target_offset
-                return
-        self.pc += 4
+        # 负载表已在方法解码时展开为直接索引数组
+        targets = insn['switch_targets']
+        index = self.registers[insn['vA']] - insn['first_key']
+        if 0 <= index < len(targets):
+            self.pc = targets[index]
+        else:
+            self.pc += insn['width']
 
     def _sparse_switch(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        key = self.registers[vA]
-        table_offset = struct.unpack('<I', self.vm.dex_data[insn['offset'] + 1: insn['offset'] + 5])[0]
-        size = struct.unpack('<I', self.vm.dex_data[table_offset: table_offset + 4])[0]
-        for i in range(size):
-            case_key = struct.unpack('<I', self.vm.dex_data[table_offset + 4 + i * 8: table_offset + 8 + i * 8])[0]
-            target_offset = struct.unpack('<i', self.vm.dex_data[table_offset + 8 + i * 8: table_offset + 12 + i * 8])[0]
-            if key == case_key:
-                self.pc += target_offset
-                return
-        self.pc += 4
+        # 负载表已在方法解码时展开为 键 -> 目标pc 字典
+        self.pc = insn['switch_cases'].get(self.registers[insn['vA']], insn['pc'] + insn['width'])
+
+    # ---- int 运算（结果按32位回绕） ----
 
     def _add_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 + value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        result = regs[insn['vB']] + regs[insn['vC']]
+        regs[insn['vA']] = result if INT_MIN <= result <= INT_MAX else int32(result)
+        self.pc += insn['width']
 
     def _sub_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 - value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        result = regs[insn['vB']] - regs[insn['vC']]
+        regs[insn['vA']] = result if INT_MIN <= result <= INT_MAX else int32(result)
+        self.pc += insn['width']
 
     def _mul_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 * value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        result = regs[insn['vB']] * regs[insn['vC']]
+        regs[insn['vA']] = result if INT_MIN <= result <= INT_MAX else int32(result)
+        self.pc += insn['width']
 
     def _div_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
+        regs = self.registers
+        value2 = regs[insn['vC']]
         if value2 == 0:
             self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
             return
-        result = value1 // value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs[insn['vA']] = int_div(regs[insn['vB']], value2)
+        self.pc += insn['width']
 
     def _rem_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
+        regs = self.registers
+        value2 = regs[insn['vC']]
         if value2 == 0:
             self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
             return
-        result = value1 % value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs[insn['vA']] = int_rem(regs[insn['vB']], value2)
+        self.pc += insn['width']
 
     def _and_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 & value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = regs[insn['vB']] & regs[insn['vC']]
+        self.pc += insn['width']
 
     def _or_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 | value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = regs[insn['vB']] | regs[insn['vC']]
+        self.pc += insn['width']
 
     def _xor_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 ^ value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = regs[insn['vB']] ^ regs[insn['vC']]
+        self.pc += insn['width']
 
     def _shl_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 << value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = int32(regs[insn['vB']] << (regs[insn['vC']] & 0x1F))
+        self.pc += insn['width']
 
     def _shr_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 >> value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = regs[insn['vB']] >> (regs[insn['vC']] & 0x1F)
+        self.pc += insn['width']
 
     def _ushr_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = (value1 % 0x100000000) >> value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = int32((regs[insn['vB']] & 0xFFFFFFFF) >> (regs[insn['vC']] & 0x1F))
+        self.pc += insn['width']
+
+    # ---- long 运算（完整值保存在低位寄存器，结果按64位回绕） ----
 
     def _add_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 + value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        result = regs[insn['vB']] + regs[insn['vC']]
+        regs[vA] = result if LONG_MIN <= result <= LONG_MAX else int64(result)
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _sub_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 - value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        result = regs[insn['vB']] - regs[insn['vC']]
+        regs[vA] = result if LONG_MIN <= result <= LONG_MAX else int64(result)
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _mul_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 * value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        result = regs[insn['vB']] * regs[insn['vC']]
+        regs[vA] = result if LONG_MIN <= result <= LONG_MAX else int64(result)
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _div_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
+        regs = self.registers
+        vA = insn['vA']
+        value2 = regs[insn['vC']]
         if value2 == 0:
             self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
             return
-        result = value1 // value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs[vA] = long_div(regs[insn['vB']], value2)
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _rem_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
+        regs = self.registers
+        vA = insn['vA']
+        value2 = regs[insn['vC']]
         if value2 == 0:
             self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
             return
-        result = value1 % value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs[vA] = long_rem(regs[insn['vB']], value2)
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _and_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 & value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] & regs[insn['vC']]
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _or_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 | value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] | regs[insn['vC']]
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _xor_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 ^ value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] ^ regs[insn['vC']]
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _shl_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 << value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = int64(regs[insn['vB']] << (regs[insn['vC']] & 0x3F))
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _shr_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 >> value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] >> (regs[insn['vC']] & 0x3F)
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _ushr_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = self.registers[vC]
-        result = (value1 % 0x10000000000000000) >> value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = int64((regs[insn['vB']] & 0xFFFFFFFFFFFFFFFF) >> (regs[insn['vC']] & 0x3F))
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    # ---- float 运算（结果舍入为单精度） ----
 
     def _add_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 + value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = float32(as_float(regs[insn['vB']]) + as_float(regs[insn['vC']]))
+        self.pc += insn['width']
 
     def _sub_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 - value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = float32(as_float(regs[insn['vB']]) - as_float(regs[insn['vC']]))
+        self.pc += insn['width']
 
     def _mul_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        result = value1 * value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = float32(as_float(regs[insn['vB']]) * as_float(regs[insn['vC']]))
+        self.pc += insn['width']
 
     def _div_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        if value2 == 0:
-            self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
-            return
-        result = value1 / value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = float32(float_div(as_float(regs[insn['vB']]), as_float(regs[insn['vC']])))
+        self.pc += insn['width']
 
     def _rem_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = self.registers[vB]
-        value2 = self.registers[vC]
-        if value2 == 0:
-            self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
-            return
-        result = value1 % value2
-        self.registers[vA] = result
-        self.pc += 1
+        regs = self.registers
+        regs[insn['vA']] = float32(float_rem(as_float(regs[insn['vB']]), as_float(regs[insn['vC']])))
+        self.pc += insn['width']
+
+    # ---- double 运算 ----
 
     def _add_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 + value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = as_double(regs[insn['vB']]) + as_double(regs[insn['vC']])
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _sub_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 - value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = as_double(regs[insn['vB']]) - as_double(regs[insn['vC']])
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _mul_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        result = value1 * value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = as_double(regs[insn['vB']]) * as_double(regs[insn['vC']])
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _div_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        if value2 == 0:
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = float_div(as_double(regs[insn['vB']]), as_double(regs[insn['vC']]))
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _rem_double(self, insn, insns, dex_parser):
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = float_rem(as_double(regs[insn['vB']]), as_double(regs[insn['vC']]))
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    # ---- 无检查形式：用于通过校验的方法，操作数已是 Python float ----
+
+    def _cmpl_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        value1 = regs[insn['vB']]
+        value2 = regs[insn['vC']]
+        regs[insn['vA']] = 1 if value1 > value2 else (0 if value1 == value2 else -1)
+        self.pc += insn['width']
+
+    def _cmpg_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        value1 = regs[insn['vB']]
+        value2 = regs[insn['vC']]
+        regs[insn['vA']] = -1 if value1 < value2 else (0 if value1 == value2 else 1)
+        self.pc += insn['width']
+
+    def _add_float_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        regs[insn['vA']] = float32(regs[insn['vB']] + regs[insn['vC']])
+        self.pc += insn['width']
+
+    def _sub_float_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        regs[insn['vA']] = float32(regs[insn['vB']] - regs[insn['vC']])
+        self.pc += insn['width']
+
+    def _mul_float_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        regs[insn['vA']] = float32(regs[insn['vB']] * regs[insn['vC']])
+        self.pc += insn['width']
+
+    def _div_float_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        regs[insn['vA']] = float32(float_div(regs[insn['vB']], regs[insn['vC']]))
+        self.pc += insn['width']
+
+    def _rem_float_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        regs[insn['vA']] = float32(float_rem(regs[insn['vB']], regs[insn['vC']]))
+        self.pc += insn['width']
+
+    def _add_double_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] + regs[insn['vC']]
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _sub_double_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] - regs[insn['vC']]
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _mul_double_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = regs[insn['vB']] * regs[insn['vC']]
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _div_double_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = float_div(regs[insn['vB']], regs[insn['vC']])
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _rem_double_unchecked(self, insn, insns, dex_parser):
+        regs = self.registers
+        vA = insn['vA']
+        regs[vA] = float_rem(regs[insn['vB']], regs[insn['vC']])
+        regs[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _neg_unchecked(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = -self.registers[insn['vB']]
+        self.pc += insn['width']
+
+    def _neg_double_unchecked(self, insn, insns, dex_parser):
+        vA = insn['vA']
+        self.registers[vA] = -self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _float_to_int_unchecked(self, insn, insns, dex_parser):
+        # float-to-int 与 double-to-int 共用
+        self.registers[insn['vA']] = float_to_int(self.registers[insn['vB']])
+        self.pc += insn['width']
+
+    def _float_to_long_unchecked(self, insn, insns, dex_parser):
+        vA = insn['vA']
+        self.registers[vA] = float_to_long(self.registers[insn['vB']])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _float_to_double_unchecked(self, insn, insns, dex_parser):
+        vA = insn['vA']
+        self.registers[vA] = self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
+
+    def _double_to_float_unchecked(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = float32(self.registers[insn['vB']])
+        self.pc += insn['width']
+
+    # ---- 字面量运算（lit16/lit8 共用） ----
+
+    def _add_int_lit(self, insn, insns, dex_parser):
+        result = self.registers[insn['vB']] + insn['literal']
+        self.registers[insn['vA']] = result if INT_MIN <= result <= INT_MAX else int32(result)
+        self.pc += insn['width']
+
+    def _rsub_int_lit(self, insn, insns, dex_parser):
+        result = insn['literal'] - self.registers[insn['vB']]
+        self.registers[insn['vA']] = result if INT_MIN <= result <= INT_MAX else int32(result)
+        self.pc += insn['width']
+
+    def _mul_int_lit(self, insn, insns, dex_parser):
+        result = self.registers[insn['vB']] * insn['literal']
+        self.registers[insn['vA']] = result if INT_MIN <= result <= INT_MAX else int32(result)
+        self.pc += insn['width']
+
+    def _div_int_lit(self, insn, insns, dex_parser):
+        if insn['literal'] == 0:
             self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
             return
-        result = value1 / value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        self.registers[insn['vA']] = int_div(self.registers[insn['vB']], insn['literal'])
+        self.pc += insn['width']
 
-    def _rem_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        vC = (insn['opcode'] >> 8) & 0x0F
-        value1 = (self.registers[vB + 1] << 32) | self.registers[vB]
-        value2 = (self.registers[vC + 1] << 32) | self.registers[vC]
-        if value2 == 0:
+    def _rem_int_lit(self, insn, insns, dex_parser):
+        if insn['literal'] == 0:
             self.exception = "ArithmeticException: division by zero"
-            self.pc += 1
             return
-        result = value1 % value2
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        self.registers[insn['vA']] = int_rem(self.registers[insn['vB']], insn['literal'])
+        self.pc += insn['width']
+
+    def _and_int_lit(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = self.registers[insn['vB']] & insn['literal']
+        self.pc += insn['width']
+
+    def _or_int_lit(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = self.registers[insn['vB']] | insn['literal']
+        self.pc += insn['width']
+
+    def _xor_int_lit(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = self.registers[insn['vB']] ^ insn['literal']
+        self.pc += insn['width']
+
+    def _shl_int_lit(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = int32(self.registers[insn['vB']] << (insn['literal'] & 0x1F))
+        self.pc += insn['width']
+
+    def _shr_int_lit(self, insn, insns, dex_parser):
+        self.registers[insn['vA']] = self.registers[insn['vB']] >> (insn['literal'] & 0x1F)
+        self.pc += insn['width']
+
+    def _ushr_int_lit(self, insn, insns, dex_parser):
+        value = self.registers[insn['vB']] & 0xFFFFFFFF
+        self.registers[insn['vA']] = int32(value >> (insn['literal'] & 0x1F))
+        self.pc += insn['width']
+
+    # ---- 一元运算与类型转换 ----
 
     def _neg_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = -value
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = int32(-self.registers[insn['vB']])
+        self.pc += insn['width']
 
     def _not_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = ~value
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = ~self.registers[insn['vB']]
+        self.pc += insn['width']
 
     def _neg_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = -value
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = int64(-self.registers[insn['vB']])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _not_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = ~value
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = ~self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _neg_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = -value
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = -as_float(self.registers[insn['vB']])
+        self.pc += insn['width']
 
     def _neg_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = -value
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = -as_double(self.registers[insn['vB']])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _int_to_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        self.registers[vA] = value
-        self.registers[vA + 1] = 0
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = self.registers[insn['vB']]
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _int_to_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = float(value)
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = float32(float(self.registers[insn['vB']]))
+        self.pc += insn['width']
 
     def _int_to_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = float(value)
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = float(self.registers[insn['vB']])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _long_to_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = int(value)
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = int32(self.registers[insn['vB']])
+        self.pc += insn['width']
 
     def _long_to_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = float(value)
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = long_to_float(self.registers[insn['vB']])
+        self.pc += insn['width']
 
     def _long_to_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = float(value)
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = float(self.registers[insn['vB']])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _float_to_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = int(value)
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = float_to_int(as_float(self.registers[insn['vB']]))
+        self.pc += insn['width']
 
     def _float_to_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = int(value)
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = float_to_long(as_float(self.registers[insn['vB']]))
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _float_to_double(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = float(value)
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = as_float(self.registers[insn['vB']])
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _double_to_int(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = int(value)
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = float_to_int(as_double(self.registers[insn['vB']]))
+        self.pc += insn['width']
 
     def _double_to_long(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = int(value)
-        self.registers[vA] = result & 0xFFFFFFFF
-        self.registers[vA + 1] = result >> 32
-        self.pc += 1
+        vA = insn['vA']
+        self.registers[vA] = float_to_long(as_double(self.registers[insn['vB']]))
+        self.registers[vA + 1] = WIDE_HIGH
+        self.pc += insn['width']
 
     def _double_to_float(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = (self.registers[vB + 1] << 32) | self.registers[vB]
-        result = float(value)
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = float32(as_double(self.registers[insn['vB']]))
+        self.pc += insn['width']
 
     def _int_to_byte(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = value & 0xFF
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = int_to_byte(self.registers[insn['vB']])
+        self.pc += insn['width']
 
     def _int_to_short(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = value & 0xFFFF
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = int_to_short(self.registers[insn['vB']])
+        self.pc += insn['width']
 
     def _int_to_char(self, insn, insns, dex_parser):
-        vA = (insn['opcode'] >> 4) & 0x0F
-        vB = insn['opcode'] & 0x0F
-        value = self.registers[vB]
-        result = value & 0xFFFF
-        self.registers[vA] = result
-        self.pc += 1
+        self.registers[insn['vA']] = int_to_char(self.registers[insn['vB']])
+        self.pc += insn['width']
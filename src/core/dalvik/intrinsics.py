@@ -0,0 +1,392 @@
+# src/core/dalvik/intrinsics.py
+import math
+import time
+import logging
+from decimal import Decimal
+from fractions import Fraction
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .registers import int32, int64, float32, as_float, as_double, float_to_int, float_to_long
+from .strings import JavaString
+
+logger = logging.getLogger(__name__)
+
+# 内建函数（intrinsic）：常用Java库方法直接以Python操作实现，
+# 不再经过解释执行框架代码或 AndroidRuntime 的反射式本地方法调用。
+# 只登记 final 类或静态方法，按静态解析的方法签名即可确定目标，无需虚分派。
+# 调用约定: fn(vm, args) -> 返回值，args 为实参寄存器值（已去掉宽值高位占位）
+# 会分配堆对象的内建函数登记为 allocates：分配可能触发GC，编译代码在调用前把引用寄存器写回帧
+
+STRING = 'Ljava/lang/String;'
+STRING_BUILDER = 'Ljava/lang/StringBuilder;'
+INTEGER = 'Ljava/lang/Integer;'
+
+INTRINSICS: Dict[str, Callable[[Any, List[Any]], Any]] = {}
+ALLOCATING: Set[Callable[[Any, List[Any]], Any]] = set()  # 会分配堆对象的内建函数
+
+
+class JavaException(Exception):
+    """内建函数抛出的Java异常，消息格式与解释器的异常字符串一致"""
+
+
+def intrinsic(*signatures: str, allocates: bool = False):
+    """把函数登记为一个或多个方法签名的内建实现"""
+    def register(fn):
+        for signature in signatures:
+            INTRINSICS[signature] = fn
+        if allocates:
+            ALLOCATING.add(fn)
+        return fn
+    return register
+
+
+def method_signature(method_ref: Dict[str, Any]) -> str:
+    """方法签名，如 Ljava/lang/String;->charAt(I)C"""
+    signature = method_ref.get('signature')
+    if signature is None:
+        proto = method_ref['proto']
+        signature = (f"{method_ref['class_name']}->{method_ref['name']}"
+                     f"({''.join(proto['parameters'])}){proto['return_type']}")
+        method_ref['signature'] = signature
+    return signature
+
+
+class IntrinsicRegistry:
+    """按方法签名登记的内建函数表，调用点解析一次后缓存在指令上"""
+
+    def __init__(self, vm):
+        self.vm = vm
+        self.table = dict(INTRINSICS)
+        self.allocating = set(ALLOCATING)
+        self.integer_cache = {}  # Integer.valueOf 缓存的 -128..127 装箱对象
+
+    def register(self, signature: str, fn: Callable[[Any, List[Any]], Any], allocates: bool = True) -> None:
+        """登记或替换内建函数；外部登记的函数默认按可能分配对象处理"""
+        self.table[signature] = fn
+        if allocates:
+            self.allocating.add(fn)
+
+    def allocates(self, fn: Callable[[Any, List[Any]], Any]) -> bool:
+        """内建函数是否可能分配对象（调用点即GC安全点）"""
+        return fn in self.allocating
+
+    def lookup(self, method_ref: Dict[str, Any]) -> Optional[Callable[[Any, List[Any]], Any]]:
+        """查找方法对应的内建函数，没有则返回None"""
+        return self.table.get(method_signature(method_ref))
+
+    def roots(self) -> List[int]:
+        """内建函数持有的堆对象，作为GC根"""
+        return list(self.integer_cache.values())
+
+
+def _string(value: Any) -> JavaString:
+    if not isinstance(value, JavaString):
+        raise JavaException("NullPointerException: string is null")
+    return value
+
+
+def _heap_object(vm, object_id: Any) -> Dict[str, Any]:
+    obj = vm.heap.get(object_id) if isinstance(object_id, int) else None
+    if obj is None:
+        raise JavaException("NullPointerException: object is null")
+    return obj
+
+
+def java_float_to_string(value: float, single: bool = False) -> str:
+    """按 Float/Double.toString 的格式输出（最短可往返的十进制表示）"""
+    if value != value:
+        return 'NaN'
+    if value in (math.inf, -math.inf):
+        return 'Infinity' if value > 0 else '-Infinity'
+    text = repr(value)
+    if single:
+        for precision in range(1, 10):
+            text = f"{value:.{precision}g}"
+            if float32(float(text)) == value:
+                break
+        text = repr(float(text))
+    if value == 0 or 1e-3 <= abs(value) < 1e7:
+        return text
+    # 科学计数法: 尾数至少保留一位小数，如 1.0E10
+    sign, digits, exponent = Decimal(text).normalize().as_tuple()
+    mantissa = ''.join(map(str, digits))
+    return (f"{'-' if sign else ''}{mantissa[0]}.{mantissa[1:] or '0'}"
+            f"E{len(digits) - 1 + exponent}")
+
+
+def java_to_string(vm, value: Any) -> str:
+    """引用值的字符串形式（String.valueOf(Object)）"""
+    if isinstance(value, JavaString):
+        return value.value
+    if value is None or value == 0:
+        return 'null'
+    obj = vm.heap.get(value)
+    if obj is None:
+        return 'null'
+    if obj['class_name'] == INTEGER:
+        return str(obj['fields']['value'])
+    if 'builder' in obj:
+        return ''.join(obj['builder'])
+    return f"{obj['class_name'][1:-1].replace('/', '.')}@{value:x}"
+
+
+# ---- java.lang.String ----
+
+@intrinsic(f'{STRING}->length()I')
+def _string_length(vm, args):
+    return len(_string(args[0]).value)
+
+
+@intrinsic(f'{STRING}->isEmpty()Z')
+def _string_is_empty(vm, args):
+    return 0 if _string(args[0]).value else 1
+
+
+@intrinsic(f'{STRING}->charAt(I)C')
+def _string_char_at(vm, args):
+    value, index = _string(args[0]).value, args[1]
+    if not 0 <= index < len(value):
+        raise JavaException(f"StringIndexOutOfBoundsException: index={index}, length={len(value)}")
+    return ord(value[index])
+
+
+@intrinsic(f'{STRING}->equals(Ljava/lang/Object;)Z')
+def _string_equals(vm, args):
+    string, other = _string(args[0]), args[1]
+    return 1 if other is string or (isinstance(other, JavaString) and other.value == string.value) else 0
+
+
+@intrinsic(f'{STRING}->hashCode()I')
+def _string_hash_code(vm, args):
+    return _string(args[0]).hash_code()
+
+
+@intrinsic(f'{STRING}->intern(){STRING}')
+def _string_intern(vm, args):
+    return vm.strings.intern_string(_string(args[0]))
+
+
+@intrinsic(f'{STRING}->toString(){STRING}')
+def _string_to_string(vm, args):
+    return _string(args[0])
+
+
+# ---- java.lang.StringBuilder ----
+# 本地表示：对象的 'builder' 为字符串片段列表，toString 时一次拼接
+
+def _builder(vm, object_id) -> List[str]:
+    obj = _heap_object(vm, object_id)
+    builder = obj.get('builder')
+    if builder is None:
+        builder = obj['builder'] = []
+    return builder
+
+
+@intrinsic(f'{STRING_BUILDER}-><init>()V', f'{STRING_BUILDER}-><init>(I)V')
+def _builder_init(vm, args):
+    _heap_object(vm, args[0])['builder'] = []
+
+
+@intrinsic(f'{STRING_BUILDER}-><init>(Ljava/lang/String;)V')
+def _builder_init_string(vm, args):
+    _heap_object(vm, args[0])['builder'] = [_string(args[1]).value]
+
+
+def _append(to_text: Callable[[Any, Any], str]):
+    def append(vm, args):
+        _builder(vm, args[0]).append(to_text(vm, args[1]))
+        return args[0]
+    return append
+
+
+INTRINSICS.update({
+    f'{STRING_BUILDER}->append(Ljava/lang/String;){STRING_BUILDER}': _append(java_to_string),
+    f'{STRING_BUILDER}->append(Ljava/lang/Object;){STRING_BUILDER}': _append(java_to_string),
+    f'{STRING_BUILDER}->append(Ljava/lang/CharSequence;){STRING_BUILDER}': _append(java_to_string),
+    f'{STRING_BUILDER}->append(I){STRING_BUILDER}': _append(lambda vm, v: str(v)),
+    f'{STRING_BUILDER}->append(J){STRING_BUILDER}': _append(lambda vm, v: str(v)),
+    f'{STRING_BUILDER}->append(C){STRING_BUILDER}': _append(lambda vm, v: chr(v)),
+    f'{STRING_BUILDER}->append(Z){STRING_BUILDER}': _append(lambda vm, v: 'true' if v else 'false'),
+    f'{STRING_BUILDER}->append(F){STRING_BUILDER}': _append(
+        lambda vm, v: java_float_to_string(as_float(v), single=True)),
+    f'{STRING_BUILDER}->append(D){STRING_BUILDER}': _append(lambda vm, v: java_float_to_string(as_double(v))),
+})
+
+
+@intrinsic(f'{STRING_BUILDER}->toString(){STRING}')
+def _builder_to_string(vm, args):
+    builder = _builder(vm, args[0])
+    if len(builder) > 1:
+        builder[:] = [''.join(builder)]
+    return JavaString(builder[0] if builder else '')
+
+
+@intrinsic(f'{STRING_BUILDER}->length()I')
+def _builder_length(vm, args):
+    return sum(len(part) for part in _builder(vm, args[0]))
+
+
+# ---- java.lang.Math ----
+
+def _java_max(a, b):
+    if a != a or b != b:
+        return math.nan
+    return a if a > b or (a == b == 0 and math.copysign(1, b) < 0) else b
+
+
+def _java_min(a, b):
+    if a != a or b != b:
+        return math.nan
+    return a if a < b or (a == b == 0 and math.copysign(1, a) < 0) else b
+
+
+def _log(x):
+    if x > 0:
+        return math.log(x)
+    return -math.inf if x == 0 else math.nan
+
+
+def _log10(x):
+    if x > 0:
+        return math.log10(x)
+    return -math.inf if x == 0 else math.nan
+
+
+def _sqrt(x):
+    return math.sqrt(x) if x >= 0 else math.nan
+
+
+def _cbrt(x):
+    """正确舍入的立方根：** 的结果做一次牛顿迭代，再在相邻的三个 double 中取立方最接近 x 的"""
+    if not math.isfinite(x) or x == 0:
+        return x
+    a = abs(x)
+    y = a ** (1 / 3)
+    y -= (y * y * y - a) / (3 * y * y)
+    target = Fraction(a)
+    y = min((math.nextafter(y, 0), y, math.nextafter(y, math.inf)), key=lambda c: abs(Fraction(c) ** 3 - target))
+    return math.copysign(y, x)
+
+
+def _exp(x):
+    try:
+        return math.exp(x)
+    except OverflowError:
+        return math.inf
+
+
+def _pow(x, y):
+    try:
+        return math.pow(x, y)
+    except OverflowError:
+        return math.inf
+    except ValueError:
+        # 0 的负数次幂为无穷大，负数的非整数次幂为 NaN
+        if x == 0:
+            return math.copysign(math.inf, x) if y == int(y) and int(y) % 2 else math.inf
+        return math.nan
+
+
+def _unary_double(fn):
+    def call(x):
+        try:
+            return fn(x)
+        except ValueError:
+            return math.nan
+    return lambda vm, args: call(as_double(args[0]))
+
+
+def _rounding(fn):
+    def call(vm, args):
+        x = as_double(args[0])
+        if not math.isfinite(x):
+            return x
+        # 结果为0时保留输入的符号：Math.ceil(-0.5) 与 Math.floor(-0.0) 都是 -0.0
+        result = float(fn(x))
+        return math.copysign(result, x) if result == 0 else result
+    return call
+
+
+INTRINSICS.update({
+    'Ljava/lang/Math;->abs(I)I': lambda vm, args: args[0] if args[0] >= 0 else int32(-args[0]),
+    'Ljava/lang/Math;->abs(J)J': lambda vm, args: args[0] if args[0] >= 0 else int64(-args[0]),
+    'Ljava/lang/Math;->abs(F)F': lambda vm, args: abs(as_float(args[0])),
+    'Ljava/lang/Math;->abs(D)D': lambda vm, args: abs(as_double(args[0])),
+    'Ljava/lang/Math;->max(II)I': lambda vm, args: max(args[0], args[1]),
+    'Ljava/lang/Math;->max(JJ)J': lambda vm, args: max(args[0], args[1]),
+    'Ljava/lang/Math;->max(FF)F': lambda vm, args: _java_max(as_float(args[0]), as_float(args[1])),
+    'Ljava/lang/Math;->max(DD)D': lambda vm, args: _java_max(as_double(args[0]), as_double(args[1])),
+    'Ljava/lang/Math;->min(II)I': lambda vm, args: min(args[0], args[1]),
+    'Ljava/lang/Math;->min(JJ)J': lambda vm, args: min(args[0], args[1]),
+    'Ljava/lang/Math;->min(FF)F': lambda vm, args: _java_min(as_float(args[0]), as_float(args[1])),
+    'Ljava/lang/Math;->min(DD)D': lambda vm, args: _java_min(as_double(args[0]), as_double(args[1])),
+    'Ljava/lang/Math;->sqrt(D)D': _unary_double(_sqrt),
+    'Ljava/lang/Math;->cbrt(D)D': _unary_double(_cbrt),
+    'Ljava/lang/Math;->sin(D)D': _unary_double(math.sin),
+    'Ljava/lang/Math;->cos(D)D': _unary_double(math.cos),
+    'Ljava/lang/Math;->tan(D)D': _unary_double(math.tan),
+    'Ljava/lang/Math;->atan(D)D': _unary_double(math.atan),
+    'Ljava/lang/Math;->exp(D)D': _unary_double(_exp),
+    'Ljava/lang/Math;->log(D)D': _unary_double(_log),
+    'Ljava/lang/Math;->log10(D)D': _unary_double(_log10),
+    'Ljava/lang/Math;->floor(D)D': _rounding(math.floor),
+    'Ljava/lang/Math;->ceil(D)D': _rounding(math.ceil),
+    'Ljava/lang/Math;->atan2(DD)D': lambda vm, args: math.atan2(as_double(args[0]), as_double(args[1])),
+    'Ljava/lang/Math;->hypot(DD)D': lambda vm, args: math.hypot(as_double(args[0]), as_double(args[1])),
+    'Ljava/lang/Math;->pow(DD)D': lambda vm, args: _pow(as_double(args[0]), as_double(args[1])),
+    'Ljava/lang/Math;->round(F)I': lambda vm, args: float_to_int(_round_half_up(as_float(args[0]))),
+    'Ljava/lang/Math;->round(D)J': lambda vm, args: float_to_long(_round_half_up(as_double(args[0]))),
+})
+
+
+def _round_half_up(x: float) -> float:
+    """Math.round：x - floor(x) 是精确的，不像 floor(x + 0.5) 那样在加法中舍入"""
+    if not math.isfinite(x):
+        return x
+    f = math.floor(x)
+    return f + 1 if x - f >= 0.5 else f
+
+
+# ---- java.lang.System ----
+
+@intrinsic('Ljava/lang/System;->arraycopy(Ljava/lang/Object;ILjava/lang/Object;II)V')
+def _system_arraycopy(vm, args):
+    src, src_pos, dst, dst_pos, length = args
+    try:
+        vm.array_copy(src, src_pos, dst, dst_pos, length)
+    except KeyError:
+        raise JavaException("NullPointerException: arraycopy on null array")
+    except IndexError as e:
+        raise JavaException(f"ArrayIndexOutOfBoundsException: {e}")
+    except TypeError as e:
+        raise JavaException(f"ArrayStoreException: {e}")
+
+
+@intrinsic('Ljava/lang/System;->nanoTime()J')
+def _system_nano_time(vm, args):
+    return time.perf_counter_ns()
+
+
+@intrinsic('Ljava/lang/System;->currentTimeMillis()J')
+def _system_current_time_millis(vm, args):
+    return time.time_ns() // 1000000
+
+
+# ---- java.lang.Integer ----
+
+@intrinsic(f'{INTEGER}->valueOf(I){INTEGER}', allocates=True)
+def _integer_value_of(vm, args):
+    value = args[0]
+    cache = vm.intrinsics.integer_cache
+    boxed = cache.get(value)
+    if boxed is None:
+        boxed = vm._create_object(INTEGER)
+        vm.heap[boxed]['fields']['value'] = value
+        if -128 <= value <= 127:
+            cache[value] = boxed
+    return boxed
+
+
+@intrinsic(f'{INTEGER}->intValue()I')
+def _integer_int_value(vm, args):
+    return _heap_object(vm, args[0])['fields']['value']
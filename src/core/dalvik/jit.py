@@ -1,111 +1,427 @@
 # src/core/dalvik/jit.py
+import heapq
+import itertools
 import logging
-import inspect
-import types
-from typing import Dict, Any, Callable
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from .code_cache import CodeCache
+from .code_space import CodeSpace
+from .intrinsics import JavaException
+from .jit_codegen import BASELINE, OPTIMIZED, MethodTranslator, UnsupportedMethod, _pending_exception, new_profile
 
 logger = logging.getLogger(__name__)
 
 
 class JITCompiler:
-    """JIT编译器"""
+    """JIT编译器：把热点方法翻译为Python函数（见 jit_codegen.py）
+
+    分层执行：解释器 -> 基线版本（记录profile）-> 优化版本（按profile特化，假设不成立时去优化）。
+    调用计数和编译结果保存在代码项上：'invocations' 为解释执行的调用次数，
+    'jit' 为当前使用的编译版本，无法编译时为 False，之后一直解释执行；'tier' 为其层级，
+    'baseline' 为基线版本，'profile' 为基线版本收集的profile；
+    'backedges' 为各循环头的回边计数，'osr' 为以循环头为入口的OSR版本；
+    'requests' 为排队中的编译请求；'method_id' 为第一次请求编译时分配的整数方法ID，
+    'code_size' 为已安装编译代码的字节数，'referenced' 为代码空间的访问位；
+    'inlining' 为优化版本各调用点的内联决定
+
+    已安装的编译代码受 code_space 的字节预算限制，超出预算时冷方法被逐出回解释执行（见 code_space.py）
+
+    编译请求按热度进入优先队列，由后台编译线程处理，解释器在编译版本安装前继续解释执行。
+    安装只是对代码项的一次赋值，执行线程看到的要么是旧版本要么是完整的新版本。
+    background 为 False 时在请求线程上同步编译（基线和OSR立即编译，优化请求在下一次方法查找时编译）
+
+    启用代码缓存（enable_code_cache）后，安装的基线和优化版本同时写入磁盘，
+    下次启动时方法第一次调用就加载缓存的版本；'cached' 记录代码项是否已从缓存加载，没有条目时为 False
+    """
 
     def __init__(self, vm):
         self.vm = vm
-        self.compiled_methods = {}  # 已编译方法缓存
-        self.compilation_threshold = 10  # 方法执行多少次后触发编译
-
-    def should_compile(self, method: Dict[str, Any]) -> bool:
-        """判断是否应该编译方法"""
-        method_id = self._get_method_id(method)
-
-        # 检查执行次数
-        if method_id not in self.compiled_methods:
-            self.compiled_methods[method_id] = {
-                'execution_count': 1,
-                'compiled_code': None
-            }
-            return False
+        self.compilation_threshold = 10  # 解释执行多少次后编译基线版本
+        self.optimize_threshold = 1000  # 基线版本执行多少次后请求优化编译
+        self.osr_threshold = 1000  # 循环回边执行多少次后触发OSR编译
+        self.max_deoptimizations = 3  # 去优化超过该次数后不再优化，停留在基线版本
+        self.inline_max_size = 16  # 可内联方法的最大代码单元数
+        self.inline_budget = 64  # 每个方法内联的代码单元总数
+        self.vectorize = True  # 把简单计数循环改写为 NumPy 切片运算
+        self.vector_min_length = 16  # 剩余迭代数不少于该值时才走向量化路径
+        self.background = True
+        self.code_cache: Optional[CodeCache] = None
+        self.code_space = CodeSpace(budget=4 * 1024 * 1024)  # 已安装编译代码的字节预算
+        self._method_ids = itertools.count()
+        # 编译队列：(-热度, 序号, 请求) 的小顶堆，热度高的先编译
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        # 各方法最近一次编译的排队延迟与编译耗时（秒）
+        self.timings: Dict[int, Dict[str, Any]] = {}
+        self.stats = {'compiled': 0, 'optimized': 0, 'rejected': 0, 'compiled_calls': 0, 'osr_compiled': 0,
+                      'osr_entries': 0, 'deoptimizations': 0, 'vectorized': 0, 'precompiled': 0, 'queue_latency': 0.0, 'compile_time': 0.0}
 
-        self.compiled_methods[method_id]['execution_count'] += 1
+    def status(self) -> Dict[str, Any]:
+        """运行时可观察的编译状态：各层阈值、编译队列深度与统计"""
+        return {
+            'thresholds': {'baseline': self.compilation_threshold, 'optimize': self.optimize_threshold,
+                           'osr': self.osr_threshold},
+            'queue_depth': len(self._queue),
+            'compiling': self._worker is not None,
+            **self.stats,
+            'code_space': self.code_space.report(),
+            'code_cache': dict(self.code_cache.stats) if self.code_cache is not None else None,
+        }
+
+    def inlining_report(self, dex_parser) -> List[Dict[str, Any]]:
+        """各优化版本的调用点：被内联的目标及其大小，未内联的原因"""
+        report = []
+        for code in dex_parser.code_items.values():
+            if code.get('tier') == OPTIMIZED:
+                report.extend(code.get('inlining', ()))
+        return report
 
-        # 达到编译阈值且未编译
-        return (self.compiled_methods[method_id]['execution_count'] >= self.compilation_threshold and
-                self.compiled_methods[method_id]['compiled_code'] is None)
+    def enable_code_cache(self, directory: str) -> CodeCache:
+        """在 directory 中持久化编译结果，索引在第一次查找时读取"""
+        self.code_cache = CodeCache(directory)
+        return self.code_cache
 
-    def compile_method(self, method: Dict[str, Any], class_def: Dict[str, Any], dex_parser) -> Callable:
-        """编译方法"""
-        method_id = self._get_method_id(method)
-        logger.info(f"JIT编译方法: {method['name']} (ID: {method_id})")
+    def should_compile(self, method: Dict[str, Any], dex_parser) -> bool:
+        """累计调用次数，判断是否应该编译方法"""
+        code = dex_parser.code_items.get(method.get('code_off', 0))
+        if code is None or 'jit' in code:
+            return False
+        count = code['invocations'] = code.get('invocations', 0) + 1
+        return count >= self.compilation_threshold
+
+    def lookup(self, method: Dict[str, Any], dex_parser) -> Optional[Callable]:
+        """方法的编译入口：已安装编译版本时返回它，否则返回 None 由解释器执行"""
+        if self._queue and not self.background:
+            self.process_queue()
+        code = dex_parser.code_items.get(method.get('code_off', 0))
+        if code is None:
+            return None
+        compiled = code.get('jit')
+        space = self.code_space.stats
+        if compiled:
+            code['referenced'] = True
+            space['hits'] += 1
+            return compiled
+        if compiled is None:
+            if self.code_cache is not None and 'cached' not in code:
+                compiled = self._load_cached(method, code, dex_parser)
+            if compiled is None and self.should_compile(method, dex_parser):
+                if self.background:
+                    self._request('baseline', method, dex_parser, code, code['invocations'])
+                else:
+                    compiled = self.compile_method(method, dex_parser.class_by_name.get(method['class_name'], {}),
+                                                   dex_parser)
+            if compiled is not None:
+                space['hits'] += 1
+                return compiled
+        space['misses'] += 1
+        return None
 
-        # 解析方法代码
-        code_off = method.get('code_off', 0)
-        if code_off == 0:
+    def compile_method(self, method: Dict[str, Any], class_def: Dict[str, Any], dex_parser) -> Optional[Callable]:
+        """在当前线程编译并安装基线版本，无法编译时返回 None 并记录在代码项上"""
+        code = dex_parser.code_items.get(method.get('code_off', 0))
+        if code is None:
             logger.warning(f"方法 {method['name']} 没有代码可编译")
             return None
+        return self._compile_baseline(method, code, dex_parser)
+
+    def precompile(self, method: Dict[str, Any], dex_parser, hotness: int, tier: int = BASELINE) -> bool:
+        """按上次运行的启动profile提前编译：加入基线编译请求，tier 为优化层级时接着请求优化。
+        返回是否加入了请求"""
+        code = dex_parser.code_items.get(method.get('code_off', 0))
+        if code is None or code.get('jit') is False:
+            return False
+        if 'jit' not in code and self.code_cache is not None and 'cached' not in code:
+            self._load_cached(method, code, dex_parser)
+        requested = False
+        if 'jit' not in code:
+            self._request('baseline', method, dex_parser, code, hotness)
+            requested = True
+        if tier == OPTIMIZED and code.get('tier', BASELINE) == BASELINE:
+            # 同热度的请求按入队顺序处理，优化请求在基线版本安装之后编译
+            if code.get('profile') is None:
+                code['profile'] = new_profile()
+            self._request('optimize', method, dex_parser, code, hotness)
+            requested = True
+        return requested
+
+    def install_precompiled(self, code: Dict[str, Any], function: Callable) -> bool:
+        """安装AOT镜像中的基线版本。AOT代码不计入代码空间：优化版本被逐出或去优化时回到它"""
+        if code.get('jit'):
+            return False
+        self._method_id(code)
+        code['aot'] = function
+        code['baseline'] = function
+        code['tier'] = BASELINE
+        code['jit'] = function
+        self.stats['precompiled'] += 1
+        return True
+
+    def request_optimization(self, method: Dict[str, Any], dex_parser) -> None:
+        """基线版本达到优化阈值时调用：把方法加入编译队列"""
+        code = dex_parser.code_items[method['code_off']]
+        if code.get('deoptimizations', 0) > self.max_deoptimizations:
+            return
+        self._request('optimize', method, dex_parser, code, code['profile']['calls'])
 
-        code = self._parse_method_code(code_off, dex_parser)
-        if not code:
-            logger.warning(f"无法解析方法 {method['name']} 的代码")
+    def process_queue(self) -> None:
+        """在当前线程编译并安装队列中的全部请求"""
+        while True:
+            with self._condition:
+                if not self._queue:
+                    return
+                request = heapq.heappop(self._queue)[2]
+            self._compile_request(request)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待编译队列清空且编译线程空闲，返回是否在超时前完成"""
+        if not self.background:
+            self.process_queue()
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._worker is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def optimize_method(self, method: Dict[str, Any], dex_parser) -> Optional[Callable]:
+        """按基线版本的profile编译优化版本，成功后替换基线版本"""
+        code = dex_parser.code_items[method['code_off']]
+        if code.get('tier') != BASELINE:
+            return None
+        function = self._translate(method, code, dex_parser, OPTIMIZED)
+        if function is None:
             return None
+        logger.info(f"JIT优化编译方法: {self._get_method_id(method)}")
+        code['inlining'] = function.inlining
+        code['tier'] = OPTIMIZED
+        code['jit'] = function
+        self.stats['optimized'] += 1
+        self._charge(code)
+        self._store_cached(method, code, dex_parser, function, OPTIMIZED)
+        return function
 
-        # 生成Python代码
-        python_code = self._generate_python_code(method, class_def, code, dex_parser)
+    def deoptimize(self, method: Dict[str, Any], dex_parser, pc: int, registers: List[Any]) -> Any:
+        """优化版本的假设不成立：退回基线版本重新收集profile，当前调用交给解释器从 pc 处继续执行"""
+        code = dex_parser.code_items[method['code_off']]
+        self.stats['deoptimizations'] += 1
+        code['deoptimizations'] = code.get('deoptimizations', 0) + 1
+        if code.get('tier') == OPTIMIZED:
+            logger.info(f"去优化方法: {self._get_method_id(method)} (pc {pc})")
+            baseline = code.get('baseline')
+            if baseline is None:
+                # 从缓存加载的优化版本没有基线版本：回到解释执行，达到阈值后重新编译基线版本
+                code.pop('tier', None)
+                code.pop('jit', None)
+            else:
+                code['tier'] = BASELINE
+                code['jit'] = baseline
+                code['profile']['calls'] = 0
+                self._store_cached(method, code, dex_parser, baseline, BASELINE)
+            self._charge(code)
 
-        # 编译Python代码
-        compiled_code = compile(python_code, f"jit_{method_id}", 'exec')
+        interpreter = self.vm.interpreter
+        result = interpreter.deoptimize(method, dex_parser, registers, pc)
+        if interpreter.exception is not None:
+            raise _pending_exception(interpreter)
+        return result
 
-        # 创建命名空间并执行
-        namespace = {
-            'vm': self.vm,
-            'registers': [None] * code['registers_size'],
-            'logger': logger
-        }
+    def on_back_edge(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser, pc: int) -> Optional[Callable]:
+        """解释器执行回边跳转到 pc 时调用，循环变热后返回以 pc 为入口的OSR版本"""
+        counts = code.get('backedges')
+        if counts is None:
+            counts = code['backedges'] = {}
+        count = counts[pc] = counts.get(pc, 0) + 1
+        if count < self.osr_threshold or code.get('jit') is False:
+            return None
+        osr = code.get('osr')
+        if osr is None:
+            osr = code['osr'] = {}
+        entry = osr.get(pc)
+        if entry is None:
+            if self.background:
+                self._request('osr', method, dex_parser, code, count, pc)
+                return None
+            entry = self._compile_osr(method, code, dex_parser, pc)
+        if entry:
+            self.stats['osr_entries'] += 1
+        return entry or None
 
-        exec(compiled_code, namespace)
+    # ---- 编译队列 ----
 
-        # 获取生成的函数
-        function_name = f"compiled_{method_id}"
-        if function_name in namespace:
-            self.compiled_methods[method_id]['compiled_code'] = namespace[function_name]
-            return namespace[function_name]
+    def _request(self, kind: str, method: Dict[str, Any], dex_parser, code: Dict[str, Any], hotness: int,
+                 pc: Optional[int] = None) -> None:
+        """加入编译队列；排队期间方法继续变热，热度翻倍时以新的优先级重新入队"""
+        key = kind if pc is None else (kind, pc)
+        requests = code.get('requests')
+        if requests is None:
+            requests = code['requests'] = {}
+        previous = requests.get(key)
+        if previous is not None:
+            if hotness < 2 * previous['hotness']:
+                return
+            previous['superseded'] = True
+        self._method_id(code)
+        if code.get('verification') is None:
+            # 校验会改写指令，只在执行线程上进行
+            self.vm.verifier.verify_method(method, dex_parser)
 
-        return None
+        request = {'kind': kind, 'key': key, 'method': method, 'dex_parser': dex_parser, 'code': code, 'pc': pc,
+                   'hotness': hotness, 'enqueued': time.perf_counter(), 'superseded': False}
+        requests[key] = request
+        with self._condition:
+            heapq.heappush(self._queue, (-hotness, next(self._sequence), request))
+            if self.background and self._worker is None:
+                self._worker = threading.Thread(target=self._work, name='jit-compiler', daemon=True)
+                self._worker.start()
+            self._condition.notify_all()
+
+    def _work(self) -> None:
+        """编译线程：队列清空后退出，有新请求时重新启动"""
+        while True:
+            with self._condition:
+                if not self._queue:
+                    self._worker = None
+                    self._condition.notify_all()
+                    return
+                request = heapq.heappop(self._queue)[2]
+            try:
+                self._compile_request(request)
+            except Exception:
+                logger.exception(f"JIT编译失败: {self._get_method_id(request['method'])}")
+
+    def _compile_request(self, request: Dict[str, Any]) -> None:
+        if request['superseded']:
+            return
+        method, dex_parser, code = request['method'], request['dex_parser'], request['code']
+        start = time.perf_counter()
+        kind = request['kind']
+        if kind == 'baseline':
+            if 'jit' not in code:
+                self._compile_baseline(method, code, dex_parser)
+        elif kind == 'optimize':
+            self.optimize_method(method, dex_parser)
+        elif request['pc'] not in code.get('osr', ()):
+            self._compile_osr(method, code, dex_parser, request['pc'])
+        end = time.perf_counter()
+        code['requests'].pop(request['key'], None)
+
+        latency = start - request['enqueued']
+        self.timings[self._method_id(code)] = {'kind': kind, 'queue_latency': latency,
+                                                     'compile_time': end - start}
+        self.stats['queue_latency'] += latency
+        self.stats['compile_time'] += end - start
+
+    # ---- 编译 ----
+
+    def _compile_baseline(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser) -> Optional[Callable]:
+        function = self._translate(method, code, dex_parser, BASELINE)
+        if function is None:
+            code['jit'] = False
+            self.stats['rejected'] += 1
+            return None
+
+        logger.info(f"JIT编译方法: {self._get_method_id(method)}")
+        # 先写入辅助状态，最后一次赋值安装，执行线程只读取 'jit'
+        code['baseline'] = function
+        code['tier'] = BASELINE
+        code['jit'] = function
+        self.stats['compiled'] += 1
+        self._charge(code)
+        self._store_cached(method, code, dex_parser, function, BASELINE)
+        return function
+
+    def _compile_osr(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser, pc: int):
+        """编译以 pc 为入口的OSR版本并安装，无法编译时记为 False"""
+        function = self._translate(method, code, dex_parser, BASELINE, osr_pc=pc)
+        if function is None:
+            code.setdefault('jit', False)
+            code.setdefault('osr', {})[pc] = False
+            self.stats['rejected'] += 1
+            return False
+        logger.info(f"OSR编译方法: {self._get_method_id(method)} (循环头 {pc})")
+        code.setdefault('osr', {})[pc] = function
+        self.stats['osr_compiled'] += 1
+        self._charge(code)
+        return function
+
+    def _translate(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser, tier: int,
+                   osr_pc: Optional[int] = None) -> Optional[Callable]:
+        if code.get('verification') is None:
+            self.vm.verifier.verify_method(method, dex_parser)
+        try:
+            return MethodTranslator(self.vm, method, code, dex_parser, osr_pc=osr_pc, tier=tier).compile()
+        except UnsupportedMethod as e:
+            logger.debug(f"方法 {self._get_method_id(method)} 保持当前层级: {e}")
+            return None
+
+    # ---- 代码缓存 ----
+
+    def _load_cached(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser) -> Optional[Callable]:
+        """安装缓存中的编译版本；缓存的优化版本没有基线版本，去优化时回到解释执行"""
+        loaded = self.code_cache.load(self.vm, method, code, dex_parser)
+        if loaded is None:
+            return None
+        function, tier = loaded
+        logger.info(f"从代码缓存加载方法: {self._get_method_id(method)}")
+        if tier == BASELINE:
+            code['baseline'] = function
+        code['tier'] = tier
+        code['jit'] = function
+        self._charge(code)
+        return function
+
+    def _store_cached(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser, function: Callable,
+                      tier: int) -> None:
+        if self.code_cache is not None:
+            self.code_cache.store(method, code, dex_parser, function, tier)
+
+    # ---- 代码空间 ----
 
-    def execute_compiled(self, method: Dict[str, Any], class_def: Dict[str, Any], dex_parser) -> None:
-        """执行已编译的方法"""
-        method_id = self._get_method_id(method)
+    def _method_id(self, code: Dict[str, Any]) -> int:
+        """代码项的整数方法ID，第一次使用时分配"""
+        method_id = code.get('method_id')
+        if method_id is None:
+            method_id = code['method_id'] = next(self._method_ids)
+        return method_id
 
-        if method_id in self.compiled_methods and self.compiled_methods[method_id]['compiled_code']:
-            logger.info(f"执行JIT编译的方法: {method['name']}")
-            self.compiled_methods[method_id]['compiled_code'](self.vm, method, class_def, dex_parser)
-        else:
-            logger.warning(f"未找到已编译的方法: {method['name']}")
+    def _charge(self, code: Dict[str, Any]) -> None:
+        self._method_id(code)
+        self.code_space.charge(code)
+
+    # ---- 执行 ----
+
+    def execute_compiled(self, function: Callable, args: List[Any]) -> Any:
+        """在解释器中执行已编译的方法，未处理的Java异常转为解释器的挂起异常"""
+        self.stats['compiled_calls'] += 1
+        interpreter = self.vm.interpreter
+        try:
+            return function(args)
+        except JavaException as e:
+            interpreter.exception = e.args[0] if e.args else str(e)
+        except RecursionError:
+            interpreter.exception = "StackOverflowError"
+        return None
+
+    def invoke(self, method: Dict[str, Any], dex_parser, args: List[Any]) -> Any:
+        """编译后的代码发起的调用：目标已编译时直接调用，异常以 JavaException 向上传播"""
+        function = self.lookup(method, dex_parser)
+        if function is not None:
+            self.stats['compiled_calls'] += 1
+            return function(args)
+        interpreter = self.vm.interpreter
+        result = interpreter.invoke_method(method, dex_parser, args)
+        if interpreter.exception is not None:
+            raise _pending_exception(interpreter)
+        return result
 
     def _get_method_id(self, method: Dict[str, Any]) -> str:
         """获取方法唯一标识"""
         return f"{method['class_name']}.{method['name']}"
-
-    def _parse_method_code(self, code_off: int, dex_parser) -> Dict[str, Any]:
-        """解析方法代码（与解释器类似）"""
-        # 简化实现，与解释器中的方法类似
-        return {}
-
-    def _generate_python_code(self, method: Dict[str, Any], class_def: Dict[str, Any], code: Dict[str, Any],
-                              dex_parser) -> str:
-        """生成Python代码"""
-        python_code = f"""
-def compiled_{self._get_method_id(method)}(vm, method, class_def, dex_parser):
-    logger.info(f"执行编译后的方法: {{method['name']}}")
-    registers = [None] * {code['registers_size']}
-
-    # 方法体编译结果
-    # 这里是简化实现，实际需要根据字节码生成对应的Python代码
-
-    # 示例: 模拟执行一些指令
-    logger.info("执行编译后的代码...")
-
-    # 返回结果
-    return None
-"""
-        return python_code
\ No newline at end of file
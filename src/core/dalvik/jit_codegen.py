@@ -0,0 +1,792 @@
+# src/core/dalvik/jit_codegen.py
+import logging
+import math
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+from .cfg import get_cfg
+from .gc import CARD_SHIFT
+from .class_linker import INITIALIZED, FIELD_DEFAULTS
+from .intrinsics import JavaException
+from .jit_optimizer import MethodOptimizer
+from .jit_vectorizer import vector_views, emit_vector_loop, find_vector_loops
+from .liveness import get_liveness, uses_defs
+from .opcodes import GOTO_OPCODES, RETURN_OPCODES
+from .registers import (
+    WIDE_HIGH, int32, int64, int_div, int_rem, long_div, long_rem, int_to_byte, int_to_char, int_to_short,
+    float32, as_float, as_double, float_div, float_rem, float_to_int, float_to_long, long_to_float,
+    int_bits_to_float, long_bits_to_double,
+)
+from .arrays import fill_from_bytes, numpy
+from .verifier import CONST, CONST_WIDE
+
+logger = logging.getLogger(__name__)
+
+# 字节码到Python源码的翻译
+#
+# - 寄存器翻译为局部变量 v0..vN，宽值只保存在低位寄存器对应的变量中
+# - 基本块按控制流图组织：只有一个前驱的块直接内联到前驱的分支中，
+#   其余块（循环头、汇合点）放入 while True 循环中按 pc 分派，循环内层的块排在分派链前面
+# - 字段名、静态字段槽位、调用目标和内建函数在翻译时解析并作为常量绑定到生成函数的全局命名空间
+# - Java异常以 JavaException 抛出，参数为异常字符串或 throw 的对象引用
+# - 分配对象、调用方法和调用会分配对象的内建函数可能触发GC，这些安全点之前把活跃的引用寄存器
+#   写入帧的寄存器列表，帧与解释器的帧格式相同，GC 按活跃性分析的 call_map 扫描
+# - iput-object/aput-object 之后标脏卡表，iput-object/aput-object/sput-object 之后在增量标记期间
+#   调用GC的写屏障（见 gc.py）
+# - 每个常量记录一个重定位项，说明如何在另一个进程中重新得到它，省略的类初始化检查记为假设，
+#   供持久化代码缓存（见 code_cache.py）保存和加载生成的代码对象
+# - 优化版本先由 jit_optimizer.py 对指令序列做内联、常量折叠、复制传播和死存储消除
+# - 简单计数循环由 jit_vectorizer.py 在进入循环处生成 NumPy 切片运算的快速路径，守卫失败时执行原循环
+# - OSR（栈上替换）版本以循环头为入口，参数为解释器的寄存器文件，只读取入口处活跃的寄存器
+# - 分层编译：基线版本（BASELINE）在条件分支和虚调用处记录分支与接收者类型的profile；
+#   优化版本（OPTIMIZED）按profile把从未执行的分支替换为去优化，把单态虚调用替换为
+#   类型检查加直接调用，检查失败时把寄存器交还解释器从当前pc继续执行
+#
+# 只翻译通过校验且可使用无检查处理函数的方法；含 try 块或暂不支持的指令的方法继续解释执行
+
+COMPILER_VERSION = 8
+
+# 编译层级，0 为解释执行
+BASELINE = 1
+OPTIMIZED = 2
+
+_MAX_NESTING = 40  # 内联分支的最大缩进层数，超过后改为分派
+
+_INT_BINOPS = {0x90: '+', 0x91: '-', 0x92: '*', 0x95: '&', 0x96: '|', 0x97: '^'}
+_LONG_BINOPS = {0x9B: '+', 0x9C: '-', 0x9D: '*', 0xA0: '&', 0xA1: '|', 0xA2: '^'}
+_FLOAT_BINOPS = {0xA6: '+', 0xA7: '-', 0xA8: '*'}
+_DOUBLE_BINOPS = {0xAB: '+', 0xAC: '-', 0xAD: '*'}
+_LIT_BINOPS = {0: '+', 2: '*', 5: '&', 6: '|', 7: '^'}  # 按 (op - 0xD0) % 8 或 op - 0xD8
+_IF_OPERATORS = {0: '==', 1: '!=', 2: '<', 3: '>=', 4: '>', 5: '<='}
+_NARROW_STORE = {'Z': '1 if {} else 0', 'B': 'int_to_byte({})', 'C': 'int_to_char({})', 'S': 'int_to_short({})'}
+_ARRAY_NARROW_STORE = {0x4E: 'Z', 0x4F: 'B', 0x50: 'C', 0x51: 'S'}
+_UNARY_TEMPLATES = {
+    0x7B: None, 0x7C: '~{B}', 0x7D: None, 0x7E: '~{B}', 0x7F: '-{B}', 0x80: '-{B}',
+    0x81: '{B}', 0x82: 'float32(float({B}))', 0x83: 'float({B})',
+    0x85: 'long_to_float({B})', 0x86: 'float({B})',
+    0x87: 'float_to_int({B})', 0x88: 'float_to_long({B})', 0x89: '{B}',
+    0x8A: 'float_to_int({B})', 0x8B: 'float_to_long({B})', 0x8C: 'float32({B})',
+    0x8D: 'int_to_byte({B})', 0x8E: 'int_to_char({B})', 0x8F: 'int_to_short({B})',
+}
+# 可能分配对象或调用方法、从而触发GC的指令
+_SAFEPOINT_OPCODES = frozenset([0x22, 0x23, 0x24, 0x25] + list(range(0x60, 0x6E)) +
+                               list(range(0x6E, 0x73)) + list(range(0x74, 0x79)))
+
+
+class UnsupportedMethod(Exception):
+    """方法无法翻译，继续由解释器执行"""
+
+
+def new_profile() -> Dict[str, Any]:
+    """基线版本收集的profile：调用次数、各条件分支的 [不跳转, 跳转] 次数、各虚调用点的接收者类型计数"""
+    return {'calls': 0, 'branches': {}, 'receivers': {}}
+
+
+def wrap32(expr: str) -> str:
+    return f"((({expr}) + 0x80000000) & 0xFFFFFFFF) - 0x80000000"
+
+
+def wrap64(expr: str) -> str:
+    return f"((({expr}) + 0x8000000000000000) & 0xFFFFFFFFFFFFFFFF) - 0x8000000000000000"
+
+
+def _pending_exception(interpreter) -> JavaException:
+    """取出解释器中挂起的异常，转换为 JavaException"""
+    exception = interpreter.exception
+    interpreter.exception = None
+    return JavaException(exception)
+
+
+def _check_cast(vm, object_id: Any, target_type: str) -> None:
+    object_type = vm.interpreter.receiver_type(object_id)
+    if object_type is not None and object_type != target_type:
+        raise JavaException(f"ClassCastException: {object_type} cannot be cast to {target_type}")
+
+
+def _filled_new_array(vm, array_type: str, values: List[Any]) -> int:
+    array_id = vm._create_array(array_type, len(values))
+    data = vm.heap[array_id]['data']
+    for i, value in enumerate(values):
+        data[i] = value
+    if vm.gc.marking:
+        vm.gc.shade_all(values)
+    return array_id
+
+
+def _fill_array_data(vm, array_id: Any, insn: Dict[str, Any]) -> None:
+    array_obj = vm.heap.get(array_id)
+    if array_obj is None:
+        raise JavaException("NullPointerException: array is null")
+    data = array_obj['data']
+    if insn['element_count'] > len(data):
+        raise JavaException(f"ArrayIndexOutOfBoundsException: length={len(data)}; count={insn['element_count']}")
+    fill_from_bytes(data, insn['array_data'], insn['element_width'])
+
+
+def _static_field(vm, dex_parser, field_idx: int):
+    """静态字段的慢速路径：类尚未初始化时每次执行都检查"""
+    classes = vm.classes
+    runtime_class, slot = classes.resolve_static_field(dex_parser, field_idx)
+    error = classes.initialize(runtime_class, dex_parser)
+    if error is not None:
+        raise JavaException(error)
+    return runtime_class.statics, slot
+
+
+def _ensure_initialized(vm, dex_parser, class_name: str) -> None:
+    error = vm.classes.ensure_initialized(dex_parser, class_name)
+    if error is not None:
+        raise JavaException(error)
+
+
+# 生成代码可以直接使用的全局名字
+RUNTIME_GLOBALS = {
+    'JavaException': JavaException, 'WIDE_HIGH': WIDE_HIGH,
+    'int32': int32, 'int64': int64, 'int_div': int_div, 'int_rem': int_rem, 'long_div': long_div,
+    'long_rem': long_rem, 'int_to_byte': int_to_byte, 'int_to_char': int_to_char, 'int_to_short': int_to_short,
+    'float32': float32, 'as_float': as_float, 'as_double': as_double, 'float_div': float_div,
+    'float_rem': float_rem, 'float_to_int': float_to_int, 'float_to_long': float_to_long, 'long_to_float': long_to_float,
+    'int_bits_to_float': int_bits_to_float, 'long_bits_to_double': long_bits_to_double,
+    '_pending_exception': _pending_exception, '_check_cast': _check_cast, '_filled_new_array': _filled_new_array,
+    '_fill_array_data': _fill_array_data, '_static_field': _static_field,
+    '_ensure_initialized': _ensure_initialized, '_vector_views': vector_views, '_np': numpy,
+}
+
+
+def bind_function(vm, dex_parser, code_object: types.CodeType, constants: Dict[str, Any]) -> Callable:
+    """用运行时对象和常量构造生成函数的全局命名空间，创建函数"""
+    namespace = dict(RUNTIME_GLOBALS)
+    namespace.update(constants)
+    interpreter = vm.interpreter
+    namespace.update({
+        '_vm': vm, '_heap': vm.heap, '_gc': vm.gc, '_interp': interpreter, '_dex': dex_parser,
+        '_jit': vm.jit, '_stack': interpreter.call_stack, '_deopt': vm.jit.deoptimize,
+        '_receiver_type': interpreter.receiver_type,
+    })
+    return types.FunctionType(code_object, namespace)
+
+
+class MethodTranslator:
+    """把一个方法翻译为Python函数"""
+
+    def __init__(self, vm, method: Dict[str, Any], code: Dict[str, Any], dex_parser, osr_pc: Optional[int] = None,
+                 tier: int = BASELINE):
+        self.vm = vm
+        self.method = method
+        self.code = code
+        self.dex_parser = dex_parser
+        self.cfg = get_cfg(code)
+        verification = code.get('verification')
+        if verification is None or not verification['verified']:
+            raise UnsupportedMethod("未通过校验")
+        if not verification['unchecked']:
+            raise UnsupportedMethod("存在同时作为整数和浮点数使用的常量")
+        if code.get('tries'):
+            raise UnsupportedMethod("含 try 块")
+        self.types = verification['types']
+        self.constants: Dict[str, Any] = {}
+        self.relocations: Dict[str, tuple] = {}  # 常量名 -> 重定位项
+        self.assumptions: Dict[tuple, None] = {}  # 翻译时成立的假设（有序集合）
+        self._constant_names: Dict[int, str] = {}
+        self.dispatch: Dict[int, None] = {}     # 需要按pc分派的块（有序集合）
+        self.needs_loop = False                 # 是否生成了分派跳转
+        self.has_safepoints = False
+        self.name = f"jit_{method['name'].strip('<>')}_{method.get('code_off', 0):x}"
+        # 入口块：普通版本从 pc 0 开始，OSR 版本从循环头开始
+        self.osr_pc = osr_pc
+        self.entry = 0
+        if osr_pc is not None:
+            self.entry = self.cfg.block_of.get(osr_pc)
+            if self.entry is None or self.cfg.blocks[self.entry].start != osr_pc:
+                raise UnsupportedMethod(f"pc {osr_pc} 不是基本块的起点")
+            self.name += f"_osr{osr_pc}"
+        self.insns = code['insns']                # 优化版本使用优化后的副本
+        self.next_register = code['registers_size']  # 内联目标使用的额外局部变量
+        self.inlining: List[Dict[str, Any]] = []
+        self.vector_loops: Dict[int, Dict[str, Any]] = {}  # 循环头块号 -> 可向量化的循环
+        self._block = None                      # 正在生成的块
+        self.tier = tier
+        if tier == OPTIMIZED:
+            self.profile = code.get('profile')
+            if self.profile is None:
+                raise UnsupportedMethod("没有profile")
+            self.name += "_opt"
+        else:
+            self.profile = code.get('profile')
+            if self.profile is None:
+                self.profile = code['profile'] = new_profile()
+
+    # ---- 入口 ----
+
+    def translate(self) -> str:
+        """生成函数源码"""
+        bodies = {}
+        self.dispatch[self.entry] = None
+        emitted = set()
+        while True:
+            pending = [index for index in self.dispatch if index not in emitted]
+            if not pending:
+                break
+            for index in pending:
+                emitted.add(index)
+                lines: List[str] = []
+                self._emit_block(self.cfg.blocks[index], lines, 0)
+                bodies[index] = lines
+
+        out = [f"def {self.name}(args):"]
+        out.extend('    ' + line for line in self._prologue())
+        if self.entry in self.vector_loops:
+            out.extend('    ' + line for line in self._vector_entry(self.entry))
+        body_indent = '    '
+        if self.has_safepoints:
+            out.append("    _stack.append(_F)")
+            out.append("    try:")
+            body_indent = '        '
+
+        if not self.needs_loop:
+            out.extend(body_indent + line for line in bodies[self.entry])
+        else:
+            loop_blocks = sorted((i for i in bodies if i != self.entry),
+                                 key=lambda i: (-self.cfg.blocks[i].loop_depth, self.cfg.blocks[i].start))
+            out.append(f"{body_indent}pc = {self.cfg.blocks[self.entry].start}")
+            out.append(body_indent + "while True:")
+            keyword = 'if'
+            for index in loop_blocks:
+                out.append(f"{body_indent}    {keyword} pc == {self.cfg.blocks[index].start}:")
+                out.extend(body_indent + '        ' + line for line in bodies[index])
+                keyword = 'elif'
+            if loop_blocks:
+                out.append(f"{body_indent}    else:")
+                out.extend(body_indent + '        ' + line for line in bodies[self.entry])
+            else:
+                out.extend(body_indent + '    ' + line for line in bodies[self.entry])
+
+        if self.has_safepoints:
+            out.append("    finally:")
+            out.append("        _stack.pop()")
+        return '\n'.join(out) + '\n'
+
+    def compile(self) -> Callable:
+        """翻译并编译，返回生成的函数"""
+        self._check_supported()
+        if self.tier == OPTIMIZED:
+            optimizer = MethodOptimizer(self)
+            self.insns = optimizer.run()
+            self.inlining = optimizer.inlining
+            logger.debug(f"{self.name} 优化: {optimizer.stats}")
+            # 全部调用都被内联时不再需要把帧压入调用栈
+            self.has_safepoints = any(self._is_safepoint(self.insns[pc])
+                                      for block in self.cfg.reachable() for pc in block.pcs)
+        if self.vm.jit.vectorize and numpy is not None:
+            self.vector_loops = find_vector_loops(self)
+        source = self.translate()
+        module = compile(source, f"<{self.name}>", 'exec')
+        code_object = next(c for c in module.co_consts if isinstance(c, types.CodeType))
+        function = bind_function(self.vm, self.dex_parser, code_object, self.constants)
+        function.source = source
+        function.relocations = self.relocations
+        function.assumptions = list(self.assumptions)
+        function.inlining = self.inlining
+        return function
+
+    def _check_supported(self) -> None:
+        insns = self.code['insns']
+        for block in self.cfg.reachable():
+            for pc in block.pcs:
+                op = insns[pc].get('quickened', insns[pc]['opcode'])
+                if op in (0x0D, 0x1D, 0x1E) or op > 0xE2 or 0x3E <= op <= 0x43 or op in (0x73, 0x79, 0x7A):
+                    raise UnsupportedMethod(f"暂不支持的指令 0x{op:02x}")
+                if op in _SAFEPOINT_OPCODES:
+                    self.has_safepoints = True
+
+    def _is_safepoint(self, insn: Dict[str, Any]) -> bool:
+        op = insn.get('quickened', insn['opcode'])
+        if op not in _SAFEPOINT_OPCODES:
+            return False
+        if 'inline' not in insn:
+            return True
+        # 内联的静态调用只在目标类尚未初始化时需要执行 <clinit>
+        runtime_class = self.vm.classes.classes.get(self.dex_parser.method_ids[insn['index']]['class_name'])
+        return op in (0x71, 0x77) and (runtime_class is None or runtime_class.state != INITIALIZED)
+
+    def _prologue(self) -> List[str]:
+        registers_size = self.code['registers_size']
+        ins_size = self.code['ins_size']
+        lines = []
+        if self.osr_pc is not None:
+            # 从解释器的寄存器文件接收循环头处活跃的寄存器
+            live = get_liveness(self.code).live_in[self.osr_pc]
+            dead = [f"v{r}" for r in range(registers_size) if r not in live]
+            if dead:
+                lines.append(' = '.join(dead) + ' = None')
+            lines.extend(f"v{r} = args[{r}]" for r in sorted(live))
+        else:
+            lines.extend(self._parameters(registers_size, ins_size))
+            if self.tier == BASELINE:
+                profile = self.const(self.profile, ('profile',))
+                lines.append(f"{profile}['calls'] += 1")
+                lines.append(f"if {profile}['calls'] == _jit.optimize_threshold:")
+                lines.append(f"    _jit.request_optimization({self.const(self.method, ('method',))}, _dex)")
+        if self.has_safepoints:
+            method = self.const(self.method, ('method',))
+            class_def = self.const(self.dex_parser.class_by_name.get(self.method['class_name'], {}), ('class_def',))
+            lines.append(f"_R = [None] * {registers_size}")
+            lines.append(f"_F = {{'method': {method}, 'class_def': {class_def}, "
+                         f"'code': {self.const(self.code, ('code',))}, "
+                         f"'registers': _R, 'register_size': {registers_size}, 'pc': 0}}")
+        return lines
+
+    def _parameters(self, registers_size: int, ins_size: int) -> List[str]:
+        """普通入口：参数按寄存器布局传入"""
+        first_arg = registers_size - ins_size
+        lines = []
+        locals_ = [f"v{r}" for r in range(first_arg)]
+        if locals_:
+            lines.append(' = '.join(locals_) + ' = None')
+        if ins_size:
+            params = [f"v{r}" for r in range(first_arg, registers_size)]
+            lines.append(f"{', '.join(params)}{',' if len(params) == 1 else ''} = args")
+            # float/double 参数统一为 Python float（调用方可能是未通过校验的解释执行方法）
+            reg = first_arg if self.method.get('access_flags', 0x8) & 0x8 else first_arg + 1
+            for type_name in self.method['proto']['parameters']:
+                if type_name == 'F':
+                    lines.append(f"v{reg} = as_float(v{reg})")
+                elif type_name == 'D':
+                    lines.append(f"v{reg} = as_double(v{reg})")
+                reg += 2 if type_name in ('J', 'D') else 1
+        return lines
+
+    # ---- 常量 ----
+
+    def const(self, value: Any, relocation: tuple) -> str:
+        """把对象绑定为生成函数的全局常量，返回其名字；relocation 说明在其他进程中如何重新得到它"""
+        name = self._constant_names.get(id(value))
+        if name is None:
+            name = f"_k{len(self.constants)}"
+            self.constants[name] = value
+            self.relocations[name] = relocation
+            self._constant_names[id(value)] = name
+        return name
+
+    def literal(self, value: Any) -> str:
+        if type(value) is float and not math.isfinite(value):
+            return self.const(value, ('value', value))
+        return repr(value)
+
+    # ---- 块与控制流 ----
+
+    def _emit_block(self, block, lines: List[str], depth: int) -> None:
+        insns = self.insns
+        last = block.last_pc
+        outer, self._block = self._block, block.index
+        for pc in block.pcs:
+            insn = insns[pc]
+            if pc == last:
+                self._emit_terminator(block, insn, lines, depth)
+            else:
+                lines.extend(self._emit_insn(insn, pc))
+        self._block = outer
+
+    def _jump(self, target_pc: int, lines: List[str], depth: int) -> None:
+        """跳转到 target_pc：能内联时直接生成目标块，否则交给分派循环"""
+        index = self.cfg.block_of[target_pc]
+        block = self.cfg.blocks[index]
+        loop = self.vector_loops.get(index)
+        if loop is not None and self._block not in loop['blocks']:
+            lines.extend(self._vector_entry(index))
+        if index != self.entry and len(block.predecessors) == 1 and depth < _MAX_NESTING:
+            self._emit_block(block, lines, depth)
+            return
+        self.dispatch[index] = None
+        self.needs_loop = True
+        lines.append(f"pc = {target_pc}")
+        lines.append("continue")
+
+    def _vector_entry(self, header: int) -> List[str]:
+        """从循环外进入可向量化的循环时先尝试向量化路径"""
+        return emit_vector_loop(self, self.vector_loops[header], self.vm.jit.vector_min_length)
+
+    def _emit_terminator(self, block, insn: Dict[str, Any], lines: List[str], depth: int) -> None:
+        op = insn.get('quickened', insn['opcode'])
+        pc = insn['pc']
+        next_pc = pc + insn['width']
+        A = f"v{insn.get('vA')}"
+        if op in GOTO_OPCODES:
+            self._jump(insn['target'], lines, depth)
+        elif 'taken' in insn:
+            # 条件在翻译时已知（常量折叠）
+            self._jump(insn['target'] if insn['taken'] else next_pc, lines, depth)
+        elif 0x32 <= op <= 0x37:
+            self._conditional(pc, f"{A} {_IF_OPERATORS[op - 0x32]} v{insn['vB']}", insn['target'], next_pc, lines,
+                              depth)
+        elif 0x38 <= op <= 0x3D:
+            # 与 null/0 显式比较，不按寄存器值的 Python 真值判断
+            condition = ({0x38: f"{A} == 0 or {A} is None", 0x39: f"{A} != 0 and {A} is not None"}.get(op)
+                         or f"{A} {_IF_OPERATORS[op - 0x38]} 0")
+            self._conditional(pc, condition, insn['target'], next_pc, lines, depth)
+        elif op in (0x2B, 0x2C):
+            if op == 0x2B:
+                cases = {insn['first_key'] + i: target for i, target in enumerate(insn['switch_targets'])}
+            else:
+                cases = dict(insn['switch_cases'])
+            for target in set(cases.values()) | {next_pc}:
+                self.dispatch[self.cfg.block_of[target]] = None
+            self.needs_loop = True
+            lines.append(f"pc = {self.const(cases, ('value', cases))}.get({A}, {next_pc})")
+            lines.append("continue")
+        elif op in RETURN_OPCODES:
+            lines.append("return None" if op == 0x0E else f"return {A}")
+        elif op == 0x27:
+            lines.append(f"raise JavaException({A})")
+        else:
+            lines.extend(self._emit_insn(insn, pc))
+            self._jump(next_pc, lines, depth)
+
+    def _conditional(self, pc: int, condition: str, target_pc: int, next_pc: int, lines: List[str],
+                     depth: int) -> None:
+        """条件分支：基线版本计数，优化版本把从未执行过的一侧替换为去优化"""
+        if self.tier == BASELINE:
+            counts = self.profile['branches'].get(pc)
+            if counts is None:
+                counts = self.profile['branches'][pc] = [0, 0]
+            counter = self.const(counts, ('branch', pc))
+            lines.append(f"if {condition}:")
+            lines.append(f"    {counter}[1] += 1")
+            self._branch(target_pc, lines, depth)
+            lines.append(f"{counter}[0] += 1")
+            self._jump(next_pc, lines, depth)
+            return
+
+        not_taken, taken = self.profile['branches'].get(pc, (1, 1))
+        if taken == 0 and not_taken > 0:
+            lines.append(f"if {condition}:")
+            lines.append("    " + self._deoptimize(target_pc))
+            self._jump(next_pc, lines, depth)
+        elif not_taken == 0 and taken > 0:
+            lines.append(f"if not ({condition}):")
+            lines.append("    " + self._deoptimize(next_pc))
+            self._jump(target_pc, lines, depth)
+        else:
+            lines.append(f"if {condition}:")
+            self._branch(target_pc, lines, depth)
+            self._jump(next_pc, lines, depth)
+
+    def _deoptimize(self, pc: int) -> str:
+        """去优化：把全部寄存器交给解释器从 pc 处继续执行，返回其结果"""
+        registers = ', '.join(f"v{r}" for r in range(self.code['registers_size']))
+        return f"return _deopt({self.const(self.method, ('method',))}, _dex, {pc}, [{registers}])"
+
+    def _branch(self, target_pc: int, lines: List[str], depth: int) -> None:
+        branch: List[str] = []
+        self._jump(target_pc, branch, depth + 1)
+        lines.extend('    ' + line for line in branch)
+
+    # ---- 单条指令 ----
+
+    def _spill(self, pc: int) -> List[str]:
+        """安全点：把调用期间活跃的引用寄存器写入帧"""
+        live = get_liveness(self.code).call_map(pc)
+        if live is None:
+            live = range(self.code['registers_size'])
+        lines = [f"_R[{r}] = v{r}" for r in live]
+        lines.append(f"_F['pc'] = {pc}")
+        return lines
+
+    def _emit_insn(self, insn: Dict[str, Any], pc: int) -> List[str]:
+        op = insn.get('quickened', insn['opcode'])
+        A, B, C = (f"v{insn.get(k)}" for k in ('vA', 'vB', 'vC'))
+        dex = self.dex_parser
+
+        if op == 0x00:
+            return []
+        if 0x01 <= op <= 0x09:
+            return [f"{A} = {B}"]
+        if 0x0A <= op <= 0x0C:
+            return [f"{A} = _res"]
+        if 0x12 <= op <= 0x19:
+            return [f"{A} = {self.literal(insn['literal'])}"]
+        if op in (0x1A, 0x1B):
+            string = self.vm.strings.intern(dex.string_ids[insn['index']])
+            return [f"{A} = {self.const(string, ('string', insn['index']))}"]
+        if op == 0x1C:
+            return [f"{A} = {dex.type_ids[insn['index']]!r}"]
+        if op == 0x1F:
+            return [f"_check_cast(_vm, {A}, {dex.type_ids[insn['index']]!r})"]
+        if op == 0x20:
+            return [f"{A} = int(_receiver_type({B}) == {dex.type_ids[insn['index']]!r})"]
+        if op == 0x21:
+            return [f"_a = _heap.get({B})",
+                    "if _a is None:",
+                    "    raise JavaException('NullPointerException: array is null')",
+                    f"{A} = len(_a['data'])"]
+        if op == 0x22:
+            class_name = dex.type_ids[insn['index']]
+            lines = self._spill(pc) + self._ensure_initialized(class_name)
+            return lines + [f"{A} = _vm._create_object({class_name!r})"]
+        if op == 0x23:
+            return [f"if {B} < 0:",
+                    f"    raise JavaException(f'NegativeArraySizeException: {{{B}}}')"] + self._spill(pc) + \
+                   [f"{A} = _vm._create_array({dex.type_ids[insn['index']]!r}, {B})"]
+        if op in (0x24, 0x25):
+            values = ', '.join(f"v{r}" for r in insn['args'])
+            return self._spill(pc) + [f"_res = _filled_new_array(_vm, {dex.type_ids[insn['index']]!r}, [{values}])"]
+        if op == 0x26:
+            return [f"_fill_array_data(_vm, {A}, {self.const(insn, ('insn', pc))})"]
+        if op in (0x2D, 0x2F):
+            return [f"{A} = 1 if {B} > {C} else (0 if {B} == {C} else -1)"]
+        if op in (0x2E, 0x30):
+            return [f"{A} = -1 if {B} < {C} else (0 if {B} == {C} else 1)"]
+        if op == 0x31:
+            return [f"{A} = ({B} > {C}) - ({B} < {C})"]
+        if 0x44 <= op <= 0x4A:
+            return self._array_access(B, C) + [f"{A} = _a[{C}]"]
+        if 0x4B <= op <= 0x51:
+            return self._array_access(B, C) + self._array_store(insn, op, pc, A, B, C)
+        if 0x52 <= op <= 0x5F:
+            return self._instance_field(insn, op, A, B)
+        if 0x60 <= op <= 0x6D:
+            return self._static_field(insn, op, pc, A)
+        if 0x6E <= op <= 0x72 or 0x74 <= op <= 0x78:
+            return self._invoke(insn, op, pc)
+        if op in _UNARY_TEMPLATES:
+            template = _UNARY_TEMPLATES[op]
+            if template is None:
+                expr = wrap32(f"-{B}") if op == 0x7B else wrap64(f"-{B}")
+            else:
+                expr = template.format(B=B)
+            return [f"{A} = {expr}"]
+        if op == 0x84:
+            return [f"{A} = {wrap32(B)}"]
+        if 0x90 <= op <= 0xCF:
+            return self._binop(op - 0x20 if op >= 0xB0 else op, A, B, C)
+        if 0xD0 <= op <= 0xE2:
+            return self._binop_literal(op, A, B, insn['literal'])
+        raise UnsupportedMethod(f"暂不支持的指令 0x{op:02x}")
+
+    def _ensure_initialized(self, class_name: str) -> List[str]:
+        runtime_class = self.vm.classes.classes.get(class_name)
+        if runtime_class is not None and runtime_class.state == INITIALIZED:
+            self.assumptions[('initialized', class_name)] = None
+            return []
+        return [f"_ensure_initialized(_vm, _dex, {class_name!r})"]
+
+    @staticmethod
+    def _array_access(array: str, index: str) -> List[str]:
+        return ["try:",
+                f"    _a = _heap[{array}]['data']",
+                "except KeyError:",
+                "    raise JavaException('NullPointerException: array is null') from None",
+                f"if {index} < 0 or {index} >= len(_a):",
+                f"    raise JavaException(f'ArrayIndexOutOfBoundsException: index={{{index}}}')"]
+
+    def _array_store(self, insn, op: int, pc: int, value: str, array: str, index: str) -> List[str]:
+        narrow = _ARRAY_NARROW_STORE.get(op)
+        if narrow is not None:
+            return [f"_a[{index}] = {_NARROW_STORE[narrow].format(value)}"]
+        value_type = self.types[pc][insn['vA']]
+        if op in (0x4B, 0x4C) and type(value_type) is tuple and value_type[0] in (CONST, CONST_WIDE):
+            # 常量的位模式写入浮点数组时按位解释，与解释器一致
+            typecode, convert = ('f', 'int_bits_to_float') if op == 0x4B else ('d', 'long_bits_to_double')
+            return [f"_a[{index}] = {convert}({value}) if {value}.__class__ is int and _a.typecode == '{typecode}' "
+                    f"else {value}"]
+        if op == 0x4D:
+            return [f"_a[{index}] = {value}"] + self._write_barrier(value, array)
+        return [f"_a[{index}] = {value}"]
+
+    @staticmethod
+    def _write_barrier(value: str, holder: Optional[str] = None) -> List[str]:
+        """引用写入后的GC写屏障：写入对象 holder 时标脏它的卡，增量标记期间再把 value 置灰"""
+        card = [f"_gc.cards[{holder} >> {CARD_SHIFT}] = 1"] if holder is not None else []
+        return card + ["if _gc.marking:", f"    _gc.write_barrier({value})"]
+
+    def _instance_field(self, insn, op: int, A: str, B: str) -> List[str]:
+        field_ref = self.dex_parser.field_ids[insn['index']]
+        name = field_ref['name']
+        lines = [f"_o = _heap.get({B})",
+                 "if _o is None:",
+                 "    raise JavaException('NullPointerException: field access on null object')"]
+        if op <= 0x58:
+            default = FIELD_DEFAULTS.get(field_ref['type_name'], 0)
+            return lines + [f"{A} = _o['fields'].get({name!r}, {self.literal(default)})"]
+        lines.append(f"_o['fields'][{name!r}] = {self._store_value(op - 0x59, field_ref, A)}")
+        return lines + self._write_barrier(A, B) if op == 0x5B else lines
+
+    def _static_field(self, insn, op: int, pc: int, A: str) -> List[str]:
+        field_ref = self.dex_parser.field_ids[insn['index']]
+        # 翻译可能在编译线程中进行，只使用已解析的类，不在这里创建类
+        resolved = self.vm.classes.peek_static_field(self.dex_parser, insn['index'])
+        if resolved is not None and resolved[0].state == INITIALIZED:
+            runtime_class, slot = resolved
+            statics = self.const(runtime_class.statics, ('statics', insn['index'], runtime_class.name, slot))
+            target = f"{statics}[{slot}]"
+            lines = []
+        else:
+            # 类尚未初始化：保留检查，<clinit> 可能在这里执行
+            lines = self._spill(pc) + [f"_st, _sl = _static_field(_vm, _dex, {insn['index']})"]
+            target = "_st[_sl]"
+        if op <= 0x66:
+            return lines + [f"{A} = {target}"]
+        lines.append(f"{target} = {self._store_value(op - 0x67, field_ref, A)}")
+        return lines + self._write_barrier(A) if op == 0x69 else lines
+
+    @staticmethod
+    def _store_value(kind: int, field_ref: Dict[str, Any], value: str) -> str:
+        """字段写入前的转换：窄类型截断，float/double 统一为 Python float"""
+        if kind >= 3:
+            return _NARROW_STORE['ZBCS'[kind - 3]].format(value)
+        convert = {'F': 'as_float', 'D': 'as_double'}.get(field_ref['type_name'])
+        return f"{convert}({value})" if convert else value
+
+    def _invoke(self, insn, op: int, pc: int) -> List[str]:
+        method_ref = self.dex_parser.method_ids[insn['index']]
+        proto = method_ref['proto']
+        regs = insn['args']
+        static = op in (0x71, 0x77)
+        virtual = op in (0x6E, 0x72, 0x74, 0x78)
+
+        # 按原型区分宽值的高位寄存器：内建函数不接收高位，字节码方法按寄存器布局接收
+        wide_high = set()
+        position = 0 if static else 1
+        for type_name in proto['parameters']:
+            if type_name in ('J', 'D'):
+                wide_high.add(position + 1)
+                position += 2
+            else:
+                position += 1
+
+        intrinsic = self.vm.intrinsics.lookup(method_ref)
+        if intrinsic is not None:
+            values = ', '.join(f"v{r}" for i, r in enumerate(regs) if i not in wide_high)
+            # 分配对象的内建函数可能触发GC，调用前写回引用寄存器
+            lines = self._spill(pc) if self.vm.intrinsics.allocates(intrinsic) else []
+            return lines + [f"_res = {self.const(intrinsic, ('intrinsic', insn['index']))}(_vm, [{values}])"]
+
+        values = ', '.join('WIDE_HIGH' if i in wide_high else f"v{r}" for i, r in enumerate(regs))
+        inline = insn.get('inline')
+        lines = self._spill(pc) if inline is None else []
+        null_check = [f"if v{regs[0]} is None or v{regs[0]} == 0:",
+                      f"    raise JavaException({'NullPointerException: invoke ' + method_ref['name'] + ' on null'!r})"]
+        if inline is not None and not virtual:
+            # 内联体不含安全点；只有静态调用的类初始化检查可能执行 <clinit>，需要先写回引用寄存器
+            if static:
+                initialize = self._ensure_initialized(method_ref['class_name'])
+                lines += self._spill(pc) + initialize if initialize else []
+            else:
+                lines += null_check
+            return lines + self._inline(inline, regs)
+
+        target = self.const(method_ref, ('method_ref', insn['index']))
+        if virtual:
+            receiver = f"v{regs[0]}"
+            lines += null_check
+            receivers = self.profile['receivers'].get(pc)
+            if self.tier == BASELINE:
+                if receivers is None:
+                    receivers = self.profile['receivers'][pc] = {}
+                counter = self.const(receivers, ('receivers', pc))
+                lines += [f"_t = _receiver_type({receiver})",
+                          f"{counter}[_t] = {counter}.get(_t, 0) + 1",
+                          f"_res = _jit.invoke(_interp.resolve_override({target}, _t, _dex), _dex, [{values}])"]
+            elif receivers and len(receivers) == 1:
+                # 单态调用点：检查接收者类型后直接调用翻译时解析的目标
+                receiver_class = next(iter(receivers))
+                lines += [f"if _receiver_type({receiver}) != {receiver_class!r}:",
+                          "    " + self._deoptimize(pc)]
+                if inline is not None:
+                    return lines + self._inline(inline, regs)
+                resolved = self.vm.interpreter.resolve_override(method_ref, receiver_class, self.dex_parser)
+                resolved = self.const(resolved, ('override', insn['index'], receiver_class))
+                lines.append(f"_res = _jit.invoke({resolved}, _dex, [{values}])")
+            else:
+                lines.append(f"_res = _jit.invoke(_interp._resolve_virtual({target}, {receiver}, _dex), _dex, "
+                             f"[{values}])")
+            return lines
+        if static:
+            lines += self._ensure_initialized(method_ref['class_name'])
+        return lines + [f"_res = _jit.invoke({target}, _dex, [{values}])"]
+
+    def _inline(self, inline: Dict[str, Any], regs: List[int]) -> List[str]:
+        """生成内联的目标方法：寄存器重新编号为额外的局部变量，方法内未改写的参数寄存器直接使用实参"""
+        code = inline['code']
+        insns = code['insns']
+        pcs = get_cfg(code).reachable()[0].pcs
+        registers_size = code['registers_size']
+        first_param = registers_size - code['ins_size']
+        written = set()
+        for pc in pcs:
+            written.update(uses_defs(insns[pc])[1])
+        lines = []
+        mapping = {}
+        for reg in range(registers_size):
+            arg = reg - first_param
+            if 0 <= arg < len(regs) and reg not in written:
+                mapping[reg] = regs[arg]
+                continue
+            mapping[reg] = self.next_register
+            self.next_register += 1
+            if 0 <= arg < len(regs):
+                lines.append(f"v{mapping[reg]} = v{regs[arg]}")
+
+        for pc in pcs:
+            insn = insns[pc]
+            op = insn.get('quickened', insn['opcode'])
+            if op in RETURN_OPCODES:
+                if op != 0x0E and inline['result'] is not None:
+                    lines.append(f"v{inline['result']} = v{mapping[insn['vA']]}")
+                break
+            renamed = dict(insn)
+            for field in ('vA', 'vB', 'vC'):
+                if renamed.get(field) is not None:
+                    renamed[field] = mapping[renamed[field]]
+            lines.extend(self._emit_insn(renamed, pc))
+        return lines
+
+    def _binop(self, op: int, A: str, B: str, C: str) -> List[str]:
+        if op in _INT_BINOPS:
+            expr = f"{B} {_INT_BINOPS[op]} {C}"
+            return [f"{A} = {expr if op >= 0x95 else wrap32(expr)}"]
+        if op in _LONG_BINOPS:
+            expr = f"{B} {_LONG_BINOPS[op]} {C}"
+            return [f"{A} = {expr if op >= 0xA0 else wrap64(expr)}"]
+        if op in (0x93, 0x94, 0x9E, 0x9F):
+            fn = {0x93: 'int_div', 0x94: 'int_rem', 0x9E: 'long_div', 0x9F: 'long_rem'}[op]
+            return [f"if {C} == 0:",
+                    "    raise JavaException('ArithmeticException: division by zero')",
+                    f"{A} = {fn}({B}, {C})"]
+        if op == 0x98:
+            return [f"{A} = {wrap32(f'{B} << ({C} & 0x1F)')}"]
+        if op == 0x99:
+            return [f"{A} = {B} >> ({C} & 0x1F)"]
+        if op == 0x9A:
+            return [f"{A} = {wrap32(f'({B} & 0xFFFFFFFF) >> ({C} & 0x1F)')}"]
+        if op == 0xA3:
+            return [f"{A} = {wrap64(f'{B} << ({C} & 0x3F)')}"]
+        if op == 0xA4:
+            return [f"{A} = {B} >> ({C} & 0x3F)"]
+        if op == 0xA5:
+            return [f"{A} = {wrap64(f'({B} & 0xFFFFFFFFFFFFFFFF) >> ({C} & 0x3F)')}"]
+        if op in _FLOAT_BINOPS:
+            return [f"{A} = float32({B} {_FLOAT_BINOPS[op]} {C})"]
+        if op in _DOUBLE_BINOPS:
+            return [f"{A} = {B} {_DOUBLE_BINOPS[op]} {C}"]
+        fn = 'float_div' if op in (0xA9, 0xAE) else 'float_rem'
+        return [f"{A} = float32({fn}({B}, {C}))" if op <= 0xAA else f"{A} = {fn}({B}, {C})"]
+
+    def _binop_literal(self, op: int, A: str, B: str, literal: int) -> List[str]:
+        kind = op - 0xD0 if op < 0xD8 else op - 0xD8
+        L = repr(literal)
+        if op >= 0xE0:
+            shift = literal & 0x1F
+            if op == 0xE0:
+                return [f"{A} = {wrap32(f'{B} << {shift}')}"]
+            if op == 0xE1:
+                return [f"{A} = {B} >> {shift}"]
+            return [f"{A} = {wrap32(f'({B} & 0xFFFFFFFF) >> {shift}')}"]
+        if kind == 1:
+            return [f"{A} = {wrap32(f'{L} - {B}')}"]
+        if kind in (3, 4):
+            if literal == 0:
+                return ["raise JavaException('ArithmeticException: division by zero')"]
+            return [f"{A} = {'int_div' if kind == 3 else 'int_rem'}({B}, {L})"]
+        expr = f"{B} {_LIT_BINOPS[kind]} {L}"
+        return [f"{A} = {expr if kind >= 5 else wrap32(expr)}"]
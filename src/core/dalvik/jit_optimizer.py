@@ -0,0 +1,328 @@
+# src/core/dalvik/jit_optimizer.py
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cfg import get_cfg
+from .class_linker import INITIALIZED
+from .intrinsics import method_signature
+from .liveness import get_liveness, uses_defs
+from .opcodes import RETURN_OPCODES
+from .registers import int32, int_div, int_rem
+
+logger = logging.getLogger(__name__)
+
+# 优化层级的指令级优化
+#
+# JIT以解码后的指令序列作为中间表示。优化版本在生成源码前复制一份指令序列并改写：
+# - 内联：非虚调用（invoke-static/invoke-direct）和profile中单态的虚调用，若目标是小的、
+#   无分支无调用的叶子方法，在调用点标记 'inline'，由代码生成器把目标方法的指令
+#   （寄存器重新编号为调用方的额外局部变量，未被改写的参数寄存器直接使用实参）生成在调用点；
+#   紧跟的 move-result 并入内联体
+# - 常量折叠：块内已知常量的 int 运算改写为常量，一个操作数已知时改写为 /lit 形式，
+#   条件已知的分支只生成实际跳转的一侧
+# - 复制传播：块内 move 之后对目标寄存器的读取改为读取源寄存器，直到任一方被改写或遇到安全点
+# - 死存储消除：无副作用、写入的寄存器在之后不再被读取的指令改写为 nop
+#
+# 改写不改变指令的pc，也不改变寄存器在块边界、安全点和去优化点上的值，
+# 因此解释器的寄存器布局、GC引用图和去优化仍按原始指令工作
+
+NOP = 0x00
+_CONST = 0x14
+_LIT16_BASE = 0xD0
+_LIT8_BASE = 0xD8
+
+# 指令只读取（不写入）的非宽寄存器操作数字段，可以做复制传播
+_NARROW_READS = {}
+for _op in (0x01, 0x02, 0x03, 0x07, 0x08, 0x09, 0x20, 0x21) + tuple(range(0x52, 0x59)) + (0x5A,) + \
+        tuple(range(0xD0, 0xE3)) + (0x7B, 0x7C, 0x7F, 0x81, 0x82, 0x83, 0x8D, 0x8E, 0x8F):
+    _NARROW_READS[_op] = ('vB',)
+for _op in (0x0F, 0x11, 0x27, 0x2B, 0x2C) + tuple(range(0x38, 0x3E)) + tuple(range(0x67, 0x6E)):
+    if _op != 0x68:
+        _NARROW_READS[_op] = ('vA',)
+for _op in (0x2D, 0x2E, 0x45) + tuple(range(0x44, 0x4B)) + (0x4C,) + tuple(range(0x90, 0x9B)) + \
+        tuple(range(0xA6, 0xAB)) + tuple(range(0xB0, 0xBB)) + tuple(range(0xC6, 0xCB)):
+    _NARROW_READS[_op] = ('vB', 'vC')
+for _op in tuple(range(0x32, 0x38)) + (0x59,) + tuple(range(0x5B, 0x60)):
+    _NARROW_READS[_op] = ('vA', 'vB')
+for _op in (0x4B,) + tuple(range(0x4D, 0x52)):
+    _NARROW_READS[_op] = ('vA', 'vB', 'vC')
+
+# 没有副作用、不会抛出异常、只写一个非宽寄存器的指令，可以作为死存储删除
+_PURE = frozenset([0x01, 0x02, 0x03, 0x07, 0x08, 0x09, 0x12, 0x13, 0x14, 0x15, 0x7B, 0x7C, 0x7F, 0x82,
+                   0x8D, 0x8E, 0x8F] +
+                  [op for op in range(0x90, 0x9B) if op not in (0x93, 0x94)] +
+                  [op for op in range(0xB0, 0xBB) if op not in (0xB3, 0xB4)] +
+                  list(range(0xA6, 0xAB)) + list(range(0xC6, 0xCB)) +
+                  [op for op in range(0xD0, 0xE3) if op not in (0xD3, 0xD4, 0xDB, 0xDC)])
+
+# 内联目标允许的指令：不分配对象、不调用方法、不需要按pc查询类型
+_INLINABLE = frozenset([0x00] + list(range(0x01, 0x0A)) + [0x0E, 0x0F, 0x10, 0x11] + list(range(0x12, 0x1D)) +
+                       [0x1F, 0x20, 0x21] + list(range(0x2D, 0x32)) + list(range(0x44, 0x4B)) +
+                       list(range(0x4D, 0x6E)) + list(range(0x7B, 0x90)) + list(range(0x90, 0xE3)))
+_SAFEPOINTS = frozenset([0x22, 0x23, 0x24, 0x25] + list(range(0x60, 0x79)))
+_NON_VIRTUAL_INVOKES = frozenset([0x70, 0x71, 0x76, 0x77])
+_VIRTUAL_INVOKES = frozenset([0x6E, 0x72, 0x74, 0x78])
+# int 二元运算的种类（add..ushr）按 op - 0x90 编号，可交换的种类
+_COMMUTATIVE = frozenset([0, 2, 5, 6, 7])
+
+
+def op_of(insn: Dict[str, Any]) -> int:
+    return insn.get('quickened', insn['opcode'])
+
+
+def fold_int(kind: int, b: int, c: int) -> Optional[int]:
+    """按Java语义计算 int 二元运算（种类同 add-int..ushr-int），除数为0时返回 None"""
+    if kind in (3, 4):
+        if c == 0:
+            return None
+        return int_div(b, c) if kind == 3 else int_rem(b, c)
+    if kind >= 8:
+        shift = c & 0x1F
+        if kind == 8:
+            return int32(b << shift)
+        if kind == 9:
+            return b >> shift
+        return int32((b & 0xFFFFFFFF) >> shift)
+    return int32((b + c, b - c, b * c, 0, 0, b & c, b | c, b ^ c)[kind])
+
+
+def _lit_kind(op: int) -> int:
+    """/lit 指令的运算种类，rsub 为 1（lit - vB）"""
+    return op - _LIT16_BASE if op < _LIT8_BASE else op - _LIT8_BASE
+
+
+class MethodOptimizer:
+    """对一个方法的指令序列做内联、常量折叠、复制传播和死存储消除"""
+
+    def __init__(self, translator):
+        self.translator = translator
+        self.vm = translator.vm
+        self.method = translator.method
+        self.code = translator.code
+        self.dex_parser = translator.dex_parser
+        self.cfg = translator.cfg
+        self.profile = translator.profile
+        jit = self.vm.jit
+        self.inline_max_size = jit.inline_max_size
+        self.inline_budget = jit.inline_budget
+        self.insns: List[Optional[Dict[str, Any]]] = list(self.code['insns'])
+        self.inlining: List[Dict[str, Any]] = []  # 各调用点的内联决定
+        self.stats = {'inlined': 0, 'folded': 0, 'propagated': 0, 'removed': 0}
+
+    def run(self) -> List[Optional[Dict[str, Any]]]:
+        for block in self.cfg.reachable():
+            self._inline_calls(block)
+            self._fold_and_propagate(block)
+        liveness = get_liveness(self.code)
+        if liveness.precise:
+            for block in self.cfg.reachable():
+                self._remove_dead_stores(block, liveness)
+        return self.insns
+
+    def _replace(self, pc: int, **fields) -> Dict[str, Any]:
+        """用改写后的副本替换 pc 处的指令，原始指令仍由解释器使用"""
+        insn = dict(self.insns[pc])
+        if 'opcode' in fields:
+            insn.pop('quickened', None)
+        insn.update(fields)
+        self.insns[pc] = insn
+        return insn
+
+    # ---- 内联 ----
+
+    def _inline_calls(self, block) -> None:
+        for pc in block.pcs:
+            insn = self.insns[pc]
+            op = op_of(insn)
+            if op in _NON_VIRTUAL_INVOKES:
+                callee = self.dex_parser.method_ids[insn['index']]
+            elif op in _VIRTUAL_INVOKES:
+                receivers = self.profile['receivers'].get(pc)
+                if not receivers or len(receivers) != 1:
+                    continue
+                method_ref = self.dex_parser.method_ids[insn['index']]
+                callee = self.vm.interpreter.resolve_override(method_ref, next(iter(receivers)), self.dex_parser)
+            else:
+                continue
+            if self.vm.intrinsics.lookup(self.dex_parser.method_ids[insn['index']]) is not None:
+                continue
+            callee_code, reason = self._inline_candidate(callee)
+            site = {'method': method_signature(self.method), 'pc': pc, 'callee': method_signature(callee),
+                    'inlined': callee_code is not None}
+            self.inlining.append(site)
+            if callee_code is None:
+                site['reason'] = reason
+                continue
+            size = len(callee_code['insns'])
+            site['size'] = size
+            self.inline_budget -= size
+            self.stats['inlined'] += 1
+
+            # 紧跟的 move-result 并入内联体
+            result = None
+            next_pc = pc + insn['width']
+            following = self.insns[next_pc] if next_pc < len(self.insns) else None
+            if following is not None and next_pc in block.pcs and 0x0A <= op_of(following) <= 0x0C:
+                result = following['vA']
+                self._replace(next_pc, opcode=NOP)
+            self._replace(pc, inline={'method': callee, 'code': callee_code, 'result': result})
+
+    def _inline_candidate(self, callee: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+        """判断能否内联，返回 (目标代码项, 原因)"""
+        if callee.get('code_off') == self.method.get('code_off'):
+            return None, "递归调用"
+        code = self.dex_parser.code_items.get(callee.get('code_off', 0))
+        if code is None:
+            return None, "没有字节码"
+        size = len(code['insns'])
+        if size > self.inline_max_size:
+            return None, f"方法过大 ({size} > {self.inline_max_size})"
+        if size > self.inline_budget:
+            return None, "超出内联预算"
+        verification = code.get('verification')
+        if verification is None or not verification['verified'] or not verification['unchecked']:
+            return None, "未通过校验"
+        if code.get('tries'):
+            return None, "含 try 块"
+        blocks = get_cfg(code).reachable()
+        if len(blocks) != 1 or op_of(code['insns'][blocks[0].last_pc]) not in RETURN_OPCODES:
+            return None, "含分支"
+        classes = self.vm.classes
+        for pc in blocks[0].pcs:
+            insn = code['insns'][pc]
+            op = op_of(insn)
+            if op not in _INLINABLE:
+                return None, f"含指令 0x{op:02x}"
+            if 0x60 <= op <= 0x6D:
+                resolved = classes.peek_static_field(self.dex_parser, insn['index'])
+                if resolved is None or resolved[0].state != INITIALIZED:
+                    return None, "静态字段所属类尚未初始化"
+        return code, ''
+
+    # ---- 常量折叠与复制传播 ----
+
+    def _fold_and_propagate(self, block) -> None:
+        constants: Dict[int, int] = {}  # 寄存器 -> 已知的 int 常量
+        copies: Dict[int, int] = {}     # 目标寄存器 -> 源寄存器
+        for pc in block.pcs:
+            insn = self.insns[pc]
+            op = op_of(insn)
+            if op in _SAFEPOINTS or 'inline' in insn or 0x6E <= op <= 0x78:
+                # 安全点之后源寄存器可能不在引用图中，不再把读取改到源寄存器
+                copies.clear()
+            fields = _NARROW_READS.get(op, ())
+            rewrite = {f: copies[insn[f]] for f in fields if insn[f] in copies}
+            if rewrite:
+                insn = self._replace(pc, **rewrite)
+                self.stats['propagated'] += len(rewrite)
+
+            insn = self._fold(pc, insn, op, constants)
+            op = op_of(insn)
+
+            effect = uses_defs(insn)
+            defs = effect[1] if effect is not None else ()
+            if 'inline' in insn and insn['inline']['result'] is not None:
+                result = insn['inline']['result']
+                defs = (result, result + 1)
+            for reg in defs:
+                constants.pop(reg, None)
+                copies.pop(reg, None)
+                for target in [t for t, source in copies.items() if source == reg]:
+                    del copies[target]
+            if op in (0x01, 0x02, 0x03, 0x07, 0x08, 0x09) and insn['vB'] != insn['vA']:
+                copies[insn['vA']] = insn['vB']
+            elif 0x12 <= op <= 0x15 and type(insn['literal']) is int:
+                constants[insn['vA']] = insn['literal']
+
+    def _fold(self, pc: int, insn: Dict[str, Any], op: int, constants: Dict[int, int]) -> Dict[str, Any]:
+        kind = None
+        if 0x90 <= op <= 0x9A or 0xB0 <= op <= 0xBA:
+            kind = op - 0x90 if op < 0xB0 else op - 0xB0
+            b, c = constants.get(insn['vB']), constants.get(insn['vC'])
+            if b is not None and c is not None:
+                return self._constant(pc, insn, fold_int(kind, b, c))
+            if c is not None:
+                return self._to_literal(pc, insn, kind, insn['vB'], c)
+            if b is not None and kind in _COMMUTATIVE:
+                return self._to_literal(pc, insn, kind, insn['vC'], b)
+            if b is not None and kind == 1:
+                return self._to_literal(pc, insn, 1, insn['vC'], b, reverse=True)
+        elif 0xD0 <= op <= 0xE2:
+            b = constants.get(insn['vB'])
+            if b is not None:
+                literal = insn['literal']
+                if op >= 0xE0:
+                    value = fold_int(op - 0xE0 + 8, b, literal)
+                elif _lit_kind(op) == 1:
+                    value = int32(literal - b)
+                else:
+                    value = fold_int(_lit_kind(op), b, literal)
+                return self._constant(pc, insn, value)
+        elif op in (0x7B, 0x7C, 0x8D, 0x8E, 0x8F, 0x01, 0x02, 0x03):
+            b = constants.get(insn['vB'])
+            if b is not None:
+                value = {0x7B: int32(-b), 0x7C: ~b, 0x8D: int32((b & 0xFF) << 24) >> 24, 0x8E: b & 0xFFFF,
+                         0x8F: int32((b & 0xFFFF) << 16) >> 16}.get(op, b)
+                return self._constant(pc, insn, value)
+        elif 0x32 <= op <= 0x37 or 0x38 <= op <= 0x3D:
+            a = constants.get(insn['vA'])
+            b = constants.get(insn['vB']) if op <= 0x37 else 0
+            if a is not None and b is not None:
+                test = (op - 0x32) if op <= 0x37 else (op - 0x38)
+                taken = (a == b, a != b, a < b, a >= b, a > b, a <= b)[test]
+                self.stats['folded'] += 1
+                return self._replace(pc, taken=taken)
+        return insn
+
+    def _constant(self, pc: int, insn: Dict[str, Any], value: Optional[int]) -> Dict[str, Any]:
+        if value is None:
+            return insn     # 除以常量0：保留原指令在运行时抛出异常
+        self.stats['folded'] += 1
+        return self._replace(pc, opcode=_CONST, literal=value, vB=None, vC=None)
+
+    def _to_literal(self, pc: int, insn: Dict[str, Any], kind: int, source: int, literal: int,
+                    reverse: bool = False) -> Dict[str, Any]:
+        """一个操作数为常量：改写为 /lit 形式"""
+        if kind >= 8:
+            op = _LIT8_BASE + kind
+            literal &= 0x1F
+        elif reverse:
+            op = _LIT16_BASE + 1        # rsub-int: literal - vB
+        elif kind == 1:
+            if literal == -0x80000000:
+                return insn
+            op, literal = _LIT16_BASE, -literal
+        else:
+            op = _LIT16_BASE + kind
+        if not -0x8000 <= literal <= 0x7FFF or (kind in (3, 4) and literal == 0):
+            return insn
+        self.stats['folded'] += 1
+        return self._replace(pc, opcode=op, vB=source, vC=None, literal=literal)
+
+    # ---- 死存储消除 ----
+
+    def _remove_dead_stores(self, block, liveness) -> None:
+        pcs = block.pcs
+        for i in range(len(pcs) - 1, -1, -1):
+            insn = self.insns[pcs[i]]
+            if op_of(insn) not in _PURE:
+                continue
+            reg = insn['vA']
+            if self._dead_after(reg, pcs[i + 1:], liveness, block.last_pc):
+                self._replace(pcs[i], opcode=NOP)
+                self.stats['removed'] += 1
+
+    def _dead_after(self, reg: int, pcs: List[int], liveness, last_pc: int) -> bool:
+        """寄存器在之后的指令中不再被读取，且不在安全点或去优化点需要的寄存器中"""
+        for pc in pcs:
+            insn = self.insns[pc]
+            effect = uses_defs(insn)
+            if effect is None or reg in effect[0]:
+                return False
+            op = op_of(insn)
+            if 'inline' in insn or op in _SAFEPOINTS or 0x6E <= op <= 0x78:
+                if reg in liveness.live_in[pc] or reg in liveness.live_out[pc]:
+                    return False
+            if reg in effect[1]:
+                return True
+        return reg not in liveness.live_out[last_pc]
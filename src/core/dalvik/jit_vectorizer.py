@@ -0,0 +1,275 @@
+# src/core/dalvik/jit_vectorizer.py
+import logging
+from typing import Any, Dict, List, Optional
+
+from .arrays import as_numpy
+from .liveness import get_liveness
+from .opcodes import GOTO_OPCODES
+from .verifier import CONST, CONST_WIDE
+
+logger = logging.getLogger(__name__)
+
+# 计数循环的向量化
+#
+# 识别只有循环头和循环体两个块的简单计数循环：
+#     header: [array-length ...] if-ge i, n, exit
+#     body:   对 a[i] 的 aget/aput 与 int/long/float/double 运算 ...; add-int/lit i, i, 1; goto header
+# 循环体内的数组访问下标都是 i，数组、n 和其他只读寄存器在循环内不变，循环体写入的临时寄存器
+# 在每次迭代中先写后读且在循环之后不再使用，因此各次迭代之间没有依赖，
+# 整个循环可以改写为对 [i, n) 切片的逐条 NumPy 运算（按原指令顺序，同一数组先写后读的语义不变）。
+#
+# 进入循环时（从循环外跳到循环头，或方法/OSR入口就是循环头）先尝试向量化路径，守卫条件：
+# NumPy 可用、所有数组非空且由 array.array 保存、0 <= i 且 n 不超过所有数组长度、剩余迭代数足够多。
+# 守卫通过时按切片计算、写回数组并令 i = n，随后循环头的条件直接退出；
+# 守卫失败时什么都不做，原有的逐元素循环照常执行（包括在越界处抛出异常）。
+#
+# 向量值使用 Java 类型对应的定长 dtype（int32/int64/float32/float64），整数溢出按补码回绕、
+# 浮点运算逐条舍入到 float32，与逐元素执行的结果一致；可能抛出异常或语义不同的指令
+# （整数除法取余、浮点转整数、比较）不做向量化
+
+# 循环体中允许的指令
+_INT_BINOPS = {0x90: '+', 0x91: '-', 0x92: '*', 0x95: '&', 0x96: '|', 0x97: '^'}
+_LONG_BINOPS = {0x9B: '+', 0x9C: '-', 0x9D: '*', 0xA0: '&', 0xA1: '|', 0xA2: '^'}
+_FLOAT_BINOPS = {0xA6: '+', 0xA7: '-', 0xA8: '*', 0xA9: '/', 0xAB: '+', 0xAC: '-', 0xAD: '*', 0xAE: '/'}
+_LIT_BINOPS = {0: '+', 2: '*', 5: '&', 6: '|', 7: '^'}
+_UNARY = {
+    0x7B: '-{B}', 0x7C: '~{B}', 0x7D: '-{B}', 0x7E: '~{B}', 0x7F: '-{B}', 0x80: '-{B}',
+    0x81: '{B}.astype(_np.int64)', 0x82: '{B}.astype(_np.float32)', 0x83: '{B}.astype(_np.float64)',
+    0x84: '{B}.astype(_np.int32)', 0x85: '{B}.astype(_np.float32)', 0x86: '{B}.astype(_np.float64)',
+    0x89: '{B}.astype(_np.float64)', 0x8C: '{B}.astype(_np.float32)',
+    0x8D: '{B}.astype(_np.int8).astype(_np.int32)', 0x8E: '{B}.astype(_np.uint16).astype(_np.int32)',
+    0x8F: '{B}.astype(_np.int16).astype(_np.int32)',
+}
+_NARROW_GETS = frozenset([0x47, 0x48, 0x49, 0x4A])
+_NARROW_PUTS = frozenset([0x4F, 0x50, 0x51])
+
+
+class NotVectorizable(Exception):
+    """循环不满足向量化条件"""
+
+
+def vector_views(vm, arrays: tuple) -> Optional[List[Any]]:
+    """数组的 NumPy 视图；任一数组为空、不是原始类型数组或没有安装 NumPy 时返回 None"""
+    views = []
+    for array_id in arrays:
+        obj = vm.heap.get(array_id)
+        if obj is None:
+            return None
+        view = as_numpy(obj['data'])
+        if view is None:
+            return None
+        views.append(view)
+    return views
+
+
+def find_vector_loops(translator) -> Dict[int, Dict[str, Any]]:
+    """可向量化的循环：循环头块号 -> 循环描述"""
+    if not get_liveness(translator.code).precise:
+        return {}
+    loops = {}
+    for loop in translator.cfg.loops:
+        try:
+            loops[loop.header] = _analyze(translator, loop)
+        except NotVectorizable as e:
+            logger.debug(f"{translator.name} 循环 {loop.header} 不能向量化: {e}")
+    return loops
+
+
+def _analyze(translator, loop) -> Dict[str, Any]:
+    cfg = translator.cfg
+    insns = translator.insns
+    if len(loop.blocks) != 2 or loop.children or len(loop.back_edges) != 1:
+        raise NotVectorizable("不是两个块的简单循环")
+    header = cfg.blocks[loop.header]
+    body = cfg.blocks[loop.back_edges[0]]
+
+    # 循环头：若干 array-length，然后 if-ge i, n 退出
+    test = insns[header.last_pc]
+    if test.get('quickened', test['opcode']) != 0x35 or 'taken' in test:
+        raise NotVectorizable("循环头不是 if-ge")
+    if cfg.block_of[test['target']] in loop.blocks or test['pc'] + test['width'] != body.start:
+        raise NotVectorizable("循环头的分支方向不符")
+    counter, limit = test['vA'], test['vB']
+    lengths = []
+    for pc in header.pcs[:-1]:
+        insn = insns[pc]
+        if insn.get('quickened', insn['opcode']) != 0x21:
+            raise NotVectorizable("循环头含有其他指令")
+        lengths.append((insn['vA'], insn['vB']))
+
+    # 循环体：计数器加一，回到循环头
+    pcs = body.pcs
+    if len(pcs) < 3 or insns[pcs[-1]].get('quickened', insns[pcs[-1]]['opcode']) not in GOTO_OPCODES:
+        raise NotVectorizable("循环体不以 goto 结束")
+    step = insns[pcs[-2]]
+    if step.get('quickened', step['opcode']) not in (0xD0, 0xD8) or step['vA'] != counter or \
+            step['vB'] != counter or step['literal'] != 1:
+        raise NotVectorizable("计数器不是逐一递增")
+
+    liveness = get_liveness(translator.code)
+    carried = liveness.live_in[header.start] | liveness.live_in[test['target']]
+    invariant = {limit} | {reg for pair in lengths for reg in pair}
+    vector = {counter}      # 本次迭代中保存向量值的寄存器，计数器作为值使用时是 arange
+    scalar = set()          # 本次迭代中写入的标量（常量、不变量的复制）
+    arrays: List[int] = []
+    statements = []
+    uses_counter = False
+
+    def operand(reg: int) -> bool:
+        """读取寄存器，返回是否为向量"""
+        nonlocal uses_counter
+        if reg in vector:
+            uses_counter = uses_counter or reg == counter
+            return True
+        if reg in scalar:
+            return False
+        invariant.add(reg)
+        return False
+
+    def define(reg: int, is_vector: bool, wide: bool = False) -> None:
+        if reg == counter or reg in invariant or (wide and reg + 1 in (counter, *invariant)):
+            raise NotVectorizable(f"循环内改写了不变的寄存器 v{reg}")
+        if reg in carried or (wide and reg + 1 in carried):
+            raise NotVectorizable(f"v{reg} 跨迭代或在循环之后使用")
+        (vector if is_vector else scalar).add(reg)
+        (scalar if is_vector else vector).discard(reg)
+
+    def array_slot(insn: Dict[str, Any]) -> int:
+        if insn['vC'] != counter:
+            raise NotVectorizable("数组下标不是循环计数器")
+        array = insn['vB']
+        if array in vector or array in scalar:
+            raise NotVectorizable("数组引用在循环内改写")
+        invariant.add(array)
+        if array not in arrays:
+            arrays.append(array)
+        return arrays.index(array)
+
+    for pc in pcs[:-2]:
+        insn = insns[pc]
+        op = insn.get('quickened', insn['opcode'])
+        A, B, C = insn.get('vA'), insn.get('vB'), insn.get('vC')
+        if op == 0x00:
+            continue
+        if op in (0x01, 0x02, 0x03, 0x04, 0x05, 0x06):
+            define(A, operand(B), wide=op >= 0x04)
+            statements.append((op, insn))
+        elif 0x12 <= op <= 0x19:
+            define(A, False, wide=op >= 0x16)
+            statements.append((op, insn))
+        elif 0x44 <= op <= 0x4A and op != 0x46:
+            array_slot(insn)
+            define(A, True, wide=op == 0x45)
+            statements.append((op, insn))
+        elif 0x4B <= op <= 0x51 and op != 0x4D:
+            array_slot(insn)
+            value_type = translator.types[pc][A]
+            if op in (0x4B, 0x4C) and type(value_type) is tuple and value_type[0] in (CONST, CONST_WIDE):
+                raise NotVectorizable("常量位模式写入数组")
+            operand(A)
+            statements.append((op, insn))
+        elif op in _UNARY:
+            if not operand(B):
+                raise NotVectorizable("循环内的标量运算")
+            define(A, True, wide=op in (0x7D, 0x7E, 0x80, 0x81, 0x83, 0x86, 0x89))
+            statements.append((op, insn))
+        elif 0x90 <= op <= 0xCF:
+            base = op - 0x20 if op >= 0xB0 else op
+            if not (base in _INT_BINOPS or base in _LONG_BINOPS or base in _FLOAT_BINOPS or
+                    base in (0x98, 0x99, 0x9A, 0xAA, 0xAF)):
+                raise NotVectorizable(f"指令 0x{op:02x} 不能向量化")
+            if not (operand(B) | operand(C)):
+                raise NotVectorizable("循环内的标量运算")
+            define(A, True, wide=0x9B <= base <= 0xA5 or base >= 0xAB)
+            statements.append((base, insn))
+        elif 0xD0 <= op <= 0xE2 and op not in (0xD3, 0xD4, 0xDB, 0xDC):
+            if not operand(B):
+                raise NotVectorizable("循环内的标量运算")
+            define(A, True)
+            statements.append((op, insn))
+        else:
+            raise NotVectorizable(f"指令 0x{op:02x} 不能向量化")
+    if not arrays:
+        raise NotVectorizable("循环内没有数组访问")
+
+    return {'header': loop.header, 'blocks': set(loop.blocks), 'counter': counter, 'limit': limit,
+            'lengths': lengths, 'arrays': arrays, 'statements': statements, 'uses_counter': uses_counter}
+
+
+def emit_vector_loop(translator, loop: Dict[str, Any], min_length: int) -> List[str]:
+    """进入循环前尝试的向量化路径"""
+    i, n = f"v{loop['counter']}", f"v{loop['limit']}"
+    arrays = list(loop['arrays'])
+    for _, array in loop['lengths']:
+        if array not in arrays:
+            arrays.append(array)
+    names = ', '.join(f"v{r}" for r in arrays)
+    lines = [f"_w = _vector_views(_vm, ({names}{',' if len(arrays) == 1 else ''}))",
+             "if _w is not None:"]
+    # 数组非空时循环头的 array-length 不会抛出异常，提前求出 n
+    lines.extend(f"    v{dest} = len(_w[{arrays.index(array)}])" for dest, array in loop['lengths'])
+    bounds = ' and '.join(f"{n} <= len(_w[{k}])" for k in range(len(loop['arrays'])))
+    lines.append(f"    if {i} >= 0 and {n} - {i} >= {min_length} and {bounds}:")
+    body = ["_jit.stats['vectorized'] += 1"]
+    body.extend(f"_x{k} = _w[{k}][{i}:{n}]" for k in range(len(loop['arrays'])))
+    if loop['uses_counter']:
+        body.append(f"_iv = _np.arange({i}, {n}, dtype=_np.int32)")
+    body.append("with _np.errstate(all='ignore'):")
+    body.extend('    ' + line for op, insn in loop['statements']
+                for line in _statement(translator, op, insn, loop))
+    body.append(f"{i} = {n}")
+    body.append(f"{' = '.join(f'_x{k}' for k in range(len(loop['arrays'])))} = None")
+    lines.extend('        ' + line for line in body)
+    lines.append("    _w = None")
+    return lines
+
+
+def _statement(translator, op: int, insn: Dict[str, Any], loop: Dict[str, Any]) -> List[str]:
+    def reg(field: str) -> str:
+        r = insn[field]
+        return '_iv' if r == loop['counter'] else f"v{r}"
+
+    A = f"v{insn['vA']}"
+    if op == 0x00:
+        return []
+    if 0x01 <= op <= 0x06:
+        return [f"{A} = {reg('vB')}"]
+    if 0x12 <= op <= 0x19:
+        return [f"{A} = {translator.literal(insn['literal'])}"]
+    if 0x44 <= op <= 0x4A:
+        x = f"_x{loop['arrays'].index(insn['vB'])}"
+        if op in _NARROW_GETS:
+            return [f"{A} = {x}.astype(_np.int32)"]
+        return [f"{A} = {x}.copy()"]
+    if 0x4B <= op <= 0x51:
+        x = f"_x{loop['arrays'].index(insn['vB'])}"
+        value = reg('vA')
+        if op == 0x4E:
+            return [f"{x}[:] = _np.asarray({value}) != 0"]
+        if op in _NARROW_PUTS:
+            # 窄类型按补码截断
+            return [f"{x}[:] = _np.asarray({value}).astype({x}.dtype)"]
+        return [f"{x}[:] = {value}"]
+    B = reg('vB')
+    if op in _UNARY:
+        return [f"{A} = {_UNARY[op].format(B=B)}"]
+    if 0xD0 <= op <= 0xE2:
+        literal = insn['literal']
+        if op >= 0xE0:
+            if op == 0xE2:
+                return [f"{A} = (_np.asarray({B}).astype(_np.uint32) >> {literal & 0x1F}).astype(_np.int32)"]
+            return [f"{A} = {B} {'<<' if op == 0xE0 else '>>'} {literal & 0x1F}"]
+        kind = op - 0xD0 if op < 0xD8 else op - 0xD8
+        if kind == 1:
+            return [f"{A} = {literal!r} - {B}"]
+        return [f"{A} = {B} {_LIT_BINOPS[kind]} {literal!r}"]
+    C = reg('vC')
+    operator = _INT_BINOPS.get(op) or _LONG_BINOPS.get(op) or _FLOAT_BINOPS.get(op)
+    if operator is not None:
+        return [f"{A} = {B} {operator} {C}"]
+    if op in (0x98, 0x99):
+        return [f"{A} = {B} {'<<' if op == 0x98 else '>>'} ({C} & 0x1F)"]
+    if op == 0x9A:
+        return [f"{A} = (_np.asarray({B}).astype(_np.uint32) >> ({C} & 0x1F)).astype(_np.int32)"]
+    # float/double 取余与 Java 一样向零截断
+    return [f"{A} = _np.fmod({B}, {C})"]
@@ -0,0 +1,165 @@
+# src/core/dalvik/liveness.py
+import logging
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from .cfg import get_cfg
+from .opcodes import CAN_THROW
+from .verifier import DOUBLE, LONG, REF, UNARY_TYPES, binop_types
+
+logger = logging.getLogger(__name__)
+
+# 寄存器活跃性与引用图
+#
+# 基于控制流图做逆向数据流分析，求出每条指令执行前后的活跃寄存器。
+# 解释器在任意指令边界都可能触发GC（周期检查、分配、调用），因此每条指令都是安全点：
+# - 正在执行的帧使用当前pc的 reference_map：指令执行前活跃的引用寄存器
+# - 调用栈中的帧停在发起调用的指令上，调用返回后该指令可能继续读取操作数
+#   （如 <clinit> 返回后的 sput），使用 call_map：指令前后活跃的引用寄存器之并
+# 方法通过校验时按寄存器类型只保留引用；未通过校验时保留全部活跃寄存器
+# 结果缓存在代码项的 'liveness' 中
+
+_WIDE = (LONG, DOUBLE)
+
+
+def _pair(reg: int, wide: bool) -> Tuple[int, ...]:
+    return (reg, reg + 1) if wide else (reg,)
+
+
+def uses_defs(insn: Dict[str, Any]) -> Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """指令读取和写入的寄存器，无法确定时返回 None"""
+    op = insn.get('quickened', insn['opcode'])
+    a, b, c = insn.get('vA'), insn.get('vB'), insn.get('vC')
+    if op == 0x00 or op == 0x0E or 0x28 <= op <= 0x2A:
+        return (), ()
+    if 0x01 <= op <= 0x09:
+        wide = 0x04 <= op <= 0x06
+        return _pair(b, wide), _pair(a, wide)
+    if 0x0A <= op <= 0x0D:
+        return (), _pair(a, op == 0x0B)
+    if 0x0F <= op <= 0x11:
+        return _pair(a, op == 0x10), ()
+    if 0x12 <= op <= 0x19:
+        return (), _pair(a, op >= 0x16)
+    if op in (0x1A, 0x1B, 0x1C, 0x22):
+        return (), (a,)
+    if op in (0x1D, 0x1E, 0x26, 0x27, 0x2B, 0x2C) or 0x38 <= op <= 0x3D:
+        return (a,), ()
+    if op == 0x1F:
+        return (a,), (a,)
+    if op in (0x20, 0x21, 0x23) or 0xD0 <= op <= 0xE2:
+        return (b,), (a,)
+    if op in (0x24, 0x25) or 0x6E <= op <= 0x72 or 0x74 <= op <= 0x78:
+        return tuple(insn['args']), ()
+    if 0x2D <= op <= 0x31:
+        wide = op >= 0x2F
+        return _pair(b, wide) + _pair(c, wide), (a,)
+    if 0x32 <= op <= 0x37:
+        return (a, b), ()
+    if 0x44 <= op <= 0x4A:
+        return (b, c), _pair(a, op == 0x45)
+    if 0x4B <= op <= 0x51:
+        return _pair(a, op == 0x4C) + (b, c), ()
+    if 0x52 <= op <= 0x58:
+        return (b,), _pair(a, op == 0x53)
+    if 0x59 <= op <= 0x5F:
+        return _pair(a, op == 0x5A) + (b,), ()
+    if 0x60 <= op <= 0x66:
+        return (), _pair(a, op == 0x61)
+    if 0x67 <= op <= 0x6D:
+        return _pair(a, op == 0x68), ()
+    if op in UNARY_TYPES:
+        source, target = UNARY_TYPES[op]
+        return _pair(b, source in _WIDE), _pair(a, target in _WIDE)
+    if 0x90 <= op <= 0xCF:
+        type_b, type_c, target = binop_types(op - 0x20 if op >= 0xB0 else op)
+        return _pair(b, type_b in _WIDE) + _pair(c, type_c in _WIDE), _pair(a, target in _WIDE)
+    return None
+
+
+class Liveness:
+    """方法的活跃寄存器与各安全点的引用图"""
+
+    def __init__(self, code: Dict[str, Any]):
+        self.code = code
+        self.live_in: Dict[int, FrozenSet[int]] = {}
+        self.live_out: Dict[int, FrozenSet[int]] = {}
+        self.reference_maps: Dict[int, Tuple[int, ...]] = {}
+        self.call_maps: Dict[int, Tuple[int, ...]] = {}
+        self.precise = self._analyze()
+        if self.precise:
+            self._build_maps()
+
+    def reference_map(self, pc: int) -> Optional[Tuple[int, ...]]:
+        """正在执行的帧在 pc 处需要扫描的寄存器，未知时返回 None"""
+        return self.reference_maps.get(pc)
+
+    def call_map(self, pc: int) -> Optional[Tuple[int, ...]]:
+        """在 pc 处发起调用的帧需要扫描的寄存器，未知时返回 None"""
+        return self.call_maps.get(pc)
+
+    def _analyze(self) -> bool:
+        insns = self.code['insns']
+        cfg = get_cfg(self.code)
+        effects = {}
+        for block in cfg.reachable():
+            for pc in block.pcs:
+                effect = uses_defs(insns[pc])
+                if effect is None:
+                    logger.debug(f"无法分析指令 0x{insns[pc]['opcode']:02x} 的寄存器，使用保守扫描")
+                    return False
+                effects[pc] = (frozenset(effect[0]), frozenset(effect[1]))
+
+        empty = frozenset()
+        block_in = {index: empty for index in cfg.order}
+        changed = True
+        while changed:
+            changed = False
+            # 逆向分析按逆后序的反序遍历收敛最快
+            for index in reversed(cfg.order):
+                block = cfg.blocks[index]
+                live = self._block_pass(block, insns, effects, block_in, record=False)
+                if live != block_in[index]:
+                    block_in[index] = live
+                    changed = True
+
+        for index in cfg.order:
+            self._block_pass(cfg.blocks[index], insns, effects, block_in, record=True)
+        return True
+
+    def _block_pass(self, block, insns, effects, block_in, record: bool) -> FrozenSet[int]:
+        """在块内逆向传播活跃集合，返回块入口的活跃寄存器"""
+        live = frozenset().union(*(block_in[s] for s in block.successors))
+        handler_live = frozenset().union(*(block_in[h] for h in block.handlers))
+        for pc in reversed(block.pcs):
+            uses, defs = effects[pc]
+            if record:
+                self.live_out[pc] = live
+            live = uses | (live - defs)
+            if handler_live and insns[pc].get('quickened', insns[pc]['opcode']) in CAN_THROW:
+                # 抛出异常时指令的写入尚未发生，处理器需要的寄存器在指令之前就必须活跃
+                live |= handler_live
+            if record:
+                self.live_in[pc] = live
+        return live
+
+    def _build_maps(self) -> None:
+        verification = self.code.get('verification')
+        types = verification['types'] if verification and verification['verified'] else None
+        for pc, live_in in self.live_in.items():
+            live_both = live_in | self.live_out[pc]
+            if types is None:
+                self.reference_maps[pc] = tuple(sorted(live_in))
+                self.call_maps[pc] = tuple(sorted(live_both))
+            else:
+                # 指令前的类型状态；指令写入的寄存器在调用返回后才会成为引用，调用期间不需要扫描
+                state = types[pc]
+                self.reference_maps[pc] = tuple(sorted(r for r in live_in if state[r] == REF))
+                self.call_maps[pc] = tuple(sorted(r for r in live_both if state[r] == REF))
+
+
+def get_liveness(code: Dict[str, Any]) -> Liveness:
+    """获取代码项的活跃性分析结果，首次调用时计算并缓存"""
+    liveness = code.get('liveness')
+    if liveness is None:
+        liveness = code['liveness'] = Liveness(code)
+    return liveness
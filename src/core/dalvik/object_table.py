@@ -0,0 +1,64 @@
+# src/core/dalvik/object_table.py
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 对象表：分配与回收对象ID
+#
+# 对象ID是标记位图（gc.py 的 allocated、marks）的下标，ID 0 表示 null。
+# ID不再随分配次数单调增长：回收的ID进入空闲表，分配时先复用空闲表中最小的ID，
+# 空闲表为空时才从 next_id 递增（bump 分配）。ID空间因此只与同时存活的对象数的峰值有关，
+# 位图不会随累计分配次数变长。
+# 每次回收后 recycle 把空闲表按降序排列，pop() 即取出最小的ID；与 next_id 相连的空闲ID直接退回。
+#
+# 对象仍保存在 dict objects（即 vm.heap）中：ID稠密时 dict 按ID查找同样是一次C级操作，
+# 缺失的ID抛出 KeyError，解释器和编译代码都依赖它抛出 NullPointerException；
+# 换成列表需要在每次访问外包一层Python方法来区分空槽、null 与负数下标，反而更慢。
+# 回收器负责从 objects 中删除对象并清除位图，再把这些ID交给 recycle。
+
+
+class ObjectTable:
+    """对象ID -> 对象，ID从空闲表复用或递增分配"""
+
+    def __init__(self):
+        self.objects: Dict[int, Dict[str, Any]] = {}
+        self.next_id = 1  # 0 是 null
+        self.free_ids: List[int] = []  # 降序排列，末尾是最小的空闲ID
+        self.peak_id = 0  # 曾经使用过的最大ID
+        self.stats = {'allocations': 0, 'reused': 0}
+
+    def allocate(self, obj: Dict[str, Any]) -> int:
+        """放入对象，返回它的ID"""
+        free_ids = self.free_ids
+        if free_ids:
+            object_id = free_ids.pop()
+            self.stats['reused'] += 1
+        else:
+            object_id = self.next_id
+            self.next_id += 1
+        self.objects[object_id] = obj
+        self.stats['allocations'] += 1
+        return object_id
+
+    def recycle(self, object_ids: List[int]) -> None:
+        """回收器已删除的对象的ID放回空闲表"""
+        if not object_ids:
+            return
+        free_ids = self.free_ids
+        free_ids.extend(object_ids)
+        free_ids.sort(reverse=True)
+        self.peak_id = max(self.peak_id, self.next_id - 1)
+
+        # 紧挨 next_id 的空闲ID退回，ID空间随存活对象减少而收缩
+        top = 0
+        while top < len(free_ids) and free_ids[top] == self.next_id - 1 - top:
+            top += 1
+        if top:
+            del free_ids[:top]
+            self.next_id -= top
+            logger.debug(f"对象ID空间收缩到 {self.next_id}")
+
+    def report(self) -> Dict[str, int]:
+        return {'objects': len(self.objects), 'next_id': self.next_id, 'free_ids': len(self.free_ids),
+                'peak_id': max(self.peak_id, self.next_id - 1), **self.stats}
@@ -0,0 +1,349 @@
+# src/core/dalvik/opcodes.py
+import sys
+import logging
+from array import array
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# 各指令格式占用的代码单元（16位）数
+FORMAT_WIDTHS = {
+    '10x': 1, '12x': 1, '11n': 1, '11x': 1, '10t': 1,
+    '20t': 2, '22x': 2, '21t': 2, '21s': 2, '21h': 2, '21c': 2,
+    '23x': 2, '22b': 2, '22t': 2, '22s': 2, '22c': 2,
+    '30t': 3, '32x': 3, '31i': 3, '31t': 3, '31c': 3, '35c': 3, '3rc': 3,
+    '45cc': 4, '4rcc': 4,
+    '51l': 5,
+}
+
+# 伪指令（数据负载）标识
+PACKED_SWITCH_PAYLOAD = 0x0100
+SPARSE_SWITCH_PAYLOAD = 0x0200
+FILL_ARRAY_DATA_PAYLOAD = 0x0300
+
+OPCODE_FORMATS: Dict[int, str] = {}
+OPCODE_NAMES: Dict[int, str] = {}
+
+
+def _define(first: int, fmt: str, *names: str) -> None:
+    """按顺序定义一组连续的操作码"""
+    for i, name in enumerate(names):
+        OPCODE_FORMATS[first + i] = fmt
+        OPCODE_NAMES[first + i] = name
+
+
+_define(0x00, '10x', 'nop')
+_define(0x01, '12x', 'move')
+_define(0x02, '22x', 'move/from16')
+_define(0x03, '32x', 'move/16')
+_define(0x04, '12x', 'move-wide')
+_define(0x05, '22x', 'move-wide/from16')
+_define(0x06, '32x', 'move-wide/16')
+_define(0x07, '12x', 'move-object')
+_define(0x08, '22x', 'move-object/from16')
+_define(0x09, '32x', 'move-object/16')
+_define(0x0A, '11x', 'move-result', 'move-result-wide', 'move-result-object', 'move-exception')
+_define(0x0E, '10x', 'return-void')
+_define(0x0F, '11x', 'return', 'return-wide', 'return-object')
+_define(0x12, '11n', 'const/4')
+_define(0x13, '21s', 'const/16')
+_define(0x14, '31i', 'const')
+_define(0x15, '21h', 'const/high16')
+_define(0x16, '21s', 'const-wide/16')
+_define(0x17, '31i', 'const-wide/32')
+_define(0x18, '51l', 'const-wide')
+_define(0x19, '21h', 'const-wide/high16')
+_define(0x1A, '21c', 'const-string')
+_define(0x1B, '31c', 'const-string/jumbo')
+_define(0x1C, '21c', 'const-class')
+_define(0x1D, '11x', 'monitor-enter', 'monitor-exit')
+_define(0x1F, '21c', 'check-cast')
+_define(0x20, '22c', 'instance-of')
+_define(0x21, '12x', 'array-length')
+_define(0x22, '21c', 'new-instance')
+_define(0x23, '22c', 'new-array')
+_define(0x24, '35c', 'filled-new-array')
+_define(0x25, '3rc', 'filled-new-array/range')
+_define(0x26, '31t', 'fill-array-data')
+_define(0x27, '11x', 'throw')
+_define(0x28, '10t', 'goto')
+_define(0x29, '20t', 'goto/16')
+_define(0x2A, '30t', 'goto/32')
+_define(0x2B, '31t', 'packed-switch', 'sparse-switch')
+_define(0x2D, '23x', 'cmpl-float', 'cmpg-float', 'cmpl-double', 'cmpg-double', 'cmp-long')
+_define(0x32, '22t', 'if-eq', 'if-ne', 'if-lt', 'if-ge', 'if-gt', 'if-le')
+_define(0x38, '21t', 'if-eqz', 'if-nez', 'if-ltz', 'if-gez', 'if-gtz', 'if-lez')
+_define(0x44, '23x', 'aget', 'aget-wide', 'aget-object', 'aget-boolean', 'aget-byte', 'aget-char', 'aget-short',
+        'aput', 'aput-wide', 'aput-object', 'aput-boolean', 'aput-byte', 'aput-char', 'aput-short')
+_define(0x52, '22c', 'iget', 'iget-wide', 'iget-object', 'iget-boolean', 'iget-byte', 'iget-char', 'iget-short',
+        'iput', 'iput-wide', 'iput-object', 'iput-boolean', 'iput-byte', 'iput-char', 'iput-short')
+_define(0x60, '21c', 'sget', 'sget-wide', 'sget-object', 'sget-boolean', 'sget-byte', 'sget-char', 'sget-short',
+        'sput', 'sput-wide', 'sput-object', 'sput-boolean', 'sput-byte', 'sput-char', 'sput-short')
+_define(0x6E, '35c', 'invoke-virtual', 'invoke-super', 'invoke-direct', 'invoke-static', 'invoke-interface')
+_define(0x74, '3rc', 'invoke-virtual/range', 'invoke-super/range', 'invoke-direct/range',
+        'invoke-static/range', 'invoke-interface/range')
+_define(0x7B, '12x', 'neg-int', 'not-int', 'neg-long', 'not-long', 'neg-float', 'neg-double',
+        'int-to-long', 'int-to-float', 'int-to-double', 'long-to-int', 'long-to-float', 'long-to-double',
+        'float-to-int', 'float-to-long', 'float-to-double', 'double-to-int', 'double-to-long', 'double-to-float',
+        'int-to-byte', 'int-to-char', 'int-to-short')
+_BINOP_NAMES = ('add-int', 'sub-int', 'mul-int', 'div-int', 'rem-int', 'and-int', 'or-int', 'xor-int',
+                'shl-int', 'shr-int', 'ushr-int',
+                'add-long', 'sub-long', 'mul-long', 'div-long', 'rem-long', 'and-long', 'or-long', 'xor-long',
+                'shl-long', 'shr-long', 'ushr-long',
+                'add-float', 'sub-float', 'mul-float', 'div-float', 'rem-float',
+                'add-double', 'sub-double', 'mul-double', 'div-double', 'rem-double')
+_define(0x90, '23x', *_BINOP_NAMES)
+_define(0xB0, '12x', *(name + '/2addr' for name in _BINOP_NAMES))
+_define(0xD0, '22s', 'add-int/lit16', 'rsub-int', 'mul-int/lit16', 'div-int/lit16', 'rem-int/lit16',
+        'and-int/lit16', 'or-int/lit16', 'xor-int/lit16')
+_define(0xD8, '22b', 'add-int/lit8', 'rsub-int/lit8', 'mul-int/lit8', 'div-int/lit8', 'rem-int/lit8',
+        'and-int/lit8', 'or-int/lit8', 'xor-int/lit8', 'shl-int/lit8', 'shr-int/lit8', 'ushr-int/lit8')
+_define(0xFA, '45cc', 'invoke-polymorphic')
+_define(0xFB, '4rcc', 'invoke-polymorphic/range')
+_define(0xFC, '35c', 'invoke-custom')
+_define(0xFD, '3rc', 'invoke-custom/range')
+_define(0xFE, '21c', 'const-method-handle', 'const-method-type')
+
+# 2addr 指令在解码时被规整为三地址形式（vA = vA op vB），与对应的 23x 指令共用处理函数
+BINOP_2ADDR_BASE = 0xB0
+BINOP_BASE = 0x90
+
+# 可能抛出异常的指令（异常处理边只从这些指令出发）
+CAN_THROW = frozenset(
+    [0x1A, 0x1B, 0x1C, 0x1D, 0x1E, 0x1F, 0x20, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27] +
+    list(range(0x44, 0x6E)) +                       # 数组、实例字段、静态字段
+    list(range(0x6E, 0x73)) + list(range(0x74, 0x79)) +  # 调用
+    [0x93, 0x94, 0x9E, 0x9F, 0xB3, 0xB4, 0xBE, 0xBF,      # int/long 除法与取余
+     0xD3, 0xD4, 0xDB, 0xDC] +
+    list(range(0xFA, 0x100))
+)
+
+RETURN_OPCODES = frozenset([0x0E, 0x0F, 0x10, 0x11])
+GOTO_OPCODES = frozenset([0x28, 0x29, 0x2A])
+
+
+def successors(insn: Dict[str, Any]) -> List[int]:
+    """指令的正常后继pc（不含异常处理边）"""
+    opcode = insn.get('quickened', insn['opcode'])
+    if opcode in RETURN_OPCODES or opcode == 0x27:
+        return []
+    if opcode in GOTO_OPCODES:
+        return [insn['target']]
+    next_pc = insn['pc'] + insn['width']
+    if 0x32 <= opcode <= 0x3D:
+        return [next_pc, insn['target']]
+    if opcode == 0x2B:
+        return [next_pc] + insn['switch_targets']
+    if opcode == 0x2C:
+        return [next_pc] + list(insn['switch_cases'].values())
+    return [next_pc]
+
+
+def instruction_pcs(insns: List[Dict[str, Any]]) -> List[int]:
+    """所有指令（不含数据负载）的起始pc"""
+    pcs = []
+    pc = 0
+    while pc < len(insns):
+        insn = insns[pc]
+        if insn['format'] != 'payload':
+            pcs.append(pc)
+        pc += insn['width']
+    return pcs
+
+
+# 内部快速指令：占用DEX中未使用的操作码，不会出现在解码结果中。
+# 类初始化完成后，解释器把 sget/sput 指令改写为快速形式（原操作码保存在 'quickened' 中），
+# 之后直接按槽位读写静态字段，不再检查类是否已初始化
+SGET_QUICK = 0xF3
+SGET_WIDE_QUICK = 0xF4
+SPUT_QUICK = 0xF5
+SPUT_WIDE_QUICK = 0xF6
+SPUT_NARROW_QUICK = 0xF7
+SPUT_OBJECT_QUICK = 0xF8  # 写入前经过GC写屏障
+OPCODE_NAMES.update({SGET_QUICK: 'sget-quick', SGET_WIDE_QUICK: 'sget-wide-quick', SPUT_QUICK: 'sput-quick',
+                     SPUT_WIDE_QUICK: 'sput-wide-quick', SPUT_NARROW_QUICK: 'sput-narrow-quick',
+                     SPUT_OBJECT_QUICK: 'sput-object-quick'})
+
+
+def _s4(value: int) -> int:
+    return value - 0x10 if value & 0x8 else value
+
+
+def _s8(value: int) -> int:
+    return value - 0x100 if value & 0x80 else value
+
+
+def _s16(value: int) -> int:
+    return value - 0x10000 if value & 0x8000 else value
+
+
+def _s32(value: int) -> int:
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def _s64(value: int) -> int:
+    return value - 0x10000000000000000 if value & 0x8000000000000000 else value
+
+
+def code_units(insns: List[Dict[str, Any]]) -> List[int]:
+    """将解析器输出的指令单元还原为16位代码单元"""
+    return [insn['opcode'] | (insn['registers'] << 8) for insn in insns]
+
+
+def payload_width(units: List[int], pc: int) -> int:
+    """计算数据负载伪指令占用的代码单元数"""
+    ident = units[pc]
+    if ident == PACKED_SWITCH_PAYLOAD:
+        return units[pc + 1] * 2 + 4
+    if ident == SPARSE_SWITCH_PAYLOAD:
+        return units[pc + 1] * 4 + 2
+    # fill-array-data-payload: ident, element_width, size(32位), data
+    element_width = units[pc + 1]
+    size = units[pc + 2] | (units[pc + 3] << 16)
+    return (size * element_width + 1) // 2 + 4
+
+
+def decode_instruction(units: List[int], pc: int) -> Dict[str, Any]:
+    """解码位于pc处的一条指令，返回格式、宽度和操作数"""
+    unit = units[pc]
+    opcode = unit & 0xFF
+    if opcode == 0x00 and unit in (PACKED_SWITCH_PAYLOAD, SPARSE_SWITCH_PAYLOAD, FILL_ARRAY_DATA_PAYLOAD):
+        return {'format': 'payload', 'width': payload_width(units, pc)}
+
+    fmt = OPCODE_FORMATS.get(opcode)
+    if fmt is None:
+        # 未使用的操作码按单个代码单元处理
+        return {'format': '10x', 'width': 1}
+
+    width = FORMAT_WIDTHS[fmt]
+    if pc + width > len(units):
+        raise ValueError(f"指令越界: 0x{opcode:02x} at pc {pc}")
+
+    aa = unit >> 8
+    decoded = {'format': fmt, 'width': width}
+
+    if fmt == '12x':
+        if BINOP_2ADDR_BASE <= opcode < BINOP_2ADDR_BASE + 0x20:
+            decoded.update(vA=aa & 0x0F, vB=aa & 0x0F, vC=aa >> 4)
+        else:
+            decoded.update(vA=aa & 0x0F, vB=aa >> 4)
+    elif fmt == '11n':
+        decoded.update(vA=aa & 0x0F, literal=_s4(aa >> 4))
+    elif fmt == '11x':
+        decoded['vA'] = aa
+    elif fmt == '10t':
+        decoded['target'] = pc + _s8(aa)
+    elif fmt == '20t':
+        decoded['target'] = pc + _s16(units[pc + 1])
+    elif fmt == '30t':
+        decoded['target'] = pc + _s32(units[pc + 1] | (units[pc + 2] << 16))
+    elif fmt == '22x':
+        decoded.update(vA=aa, vB=units[pc + 1])
+    elif fmt == '32x':
+        decoded.update(vA=units[pc + 1], vB=units[pc + 2])
+    elif fmt == '21t':
+        decoded.update(vA=aa, target=pc + _s16(units[pc + 1]))
+    elif fmt == '21s':
+        decoded.update(vA=aa, literal=_s16(units[pc + 1]))
+    elif fmt == '21h':
+        shift = 48 if opcode == 0x19 else 16
+        decoded.update(vA=aa, literal=_s16(units[pc + 1]) << shift)
+    elif fmt == '21c':
+        decoded.update(vA=aa, index=units[pc + 1])
+    elif fmt == '23x':
+        decoded.update(vA=aa, vB=units[pc + 1] & 0xFF, vC=units[pc + 1] >> 8)
+    elif fmt == '22b':
+        decoded.update(vA=aa, vB=units[pc + 1] & 0xFF, literal=_s8(units[pc + 1] >> 8))
+    elif fmt == '22t':
+        decoded.update(vA=aa & 0x0F, vB=aa >> 4, target=pc + _s16(units[pc + 1]))
+    elif fmt == '22s':
+        decoded.update(vA=aa & 0x0F, vB=aa >> 4, literal=_s16(units[pc + 1]))
+    elif fmt == '22c':
+        decoded.update(vA=aa & 0x0F, vB=aa >> 4, index=units[pc + 1])
+    elif fmt == '31i':
+        decoded.update(vA=aa, literal=_s32(units[pc + 1] | (units[pc + 2] << 16)))
+    elif fmt == '31t':
+        decoded.update(vA=aa, payload=pc + _s32(units[pc + 1] | (units[pc + 2] << 16)))
+    elif fmt == '31c':
+        decoded.update(vA=aa, index=units[pc + 1] | (units[pc + 2] << 16))
+    elif fmt in ('35c', '45cc'):
+        count = aa >> 4
+        regs = [units[pc + 2] & 0x0F, (units[pc + 2] >> 4) & 0x0F,
+                (units[pc + 2] >> 8) & 0x0F, units[pc + 2] >> 12, aa & 0x0F]
+        decoded.update(index=units[pc + 1], args=regs[:count])
+        if fmt == '45cc':
+            decoded['proto_index'] = units[pc + 3]
+    elif fmt in ('3rc', '4rcc'):
+        first = units[pc + 2]
+        decoded.update(index=units[pc + 1], args=list(range(first, first + aa)))
+        if fmt == '4rcc':
+            decoded['proto_index'] = units[pc + 3]
+    elif fmt == '51l':
+        value = (units[pc + 1] | (units[pc + 2] << 16) |
+                 (units[pc + 3] << 32) | (units[pc + 4] << 48))
+        decoded.update(vA=aa, literal=_s64(value))
+
+    return decoded
+
+
+def _read_s32(units: List[int], pos: int) -> int:
+    return _s32(units[pos] | (units[pos + 1] << 16))
+
+
+def decode_packed_switch(units: List[int], pc: int, payload: int) -> Dict[str, Any]:
+    """解码 packed-switch 负载为直接索引的目标数组（绝对pc）"""
+    if units[payload] != PACKED_SWITCH_PAYLOAD:
+        raise ValueError(f"packed-switch 负载无效: pc {pc}")
+    size = units[payload + 1]
+    first_key = _read_s32(units, payload + 2)
+    targets = [pc + _read_s32(units, payload + 4 + i * 2) for i in range(size)]
+    return {'first_key': first_key, 'switch_targets': targets}
+
+
+def decode_sparse_switch(units: List[int], pc: int, payload: int) -> Dict[str, Any]:
+    """解码 sparse-switch 负载为 键 -> 目标pc 的字典"""
+    if units[payload] != SPARSE_SWITCH_PAYLOAD:
+        raise ValueError(f"sparse-switch 负载无效: pc {pc}")
+    size = units[payload + 1]
+    keys_pos = payload + 2
+    targets_pos = keys_pos + size * 2
+    return {'switch_cases': {
+        _read_s32(units, keys_pos + i * 2): pc + _read_s32(units, targets_pos + i * 2)
+        for i in range(size)
+    }}
+
+
+def decode_fill_array_data(units: List[int], payload: int) -> Dict[str, Any]:
+    """解码 fill-array-data 负载，返回元素宽度、元素个数和小端序原始字节"""
+    if units[payload] != FILL_ARRAY_DATA_PAYLOAD:
+        raise ValueError(f"fill-array-data 负载无效: pc {payload}")
+    element_width = units[payload + 1]
+    size = units[payload + 2] | (units[payload + 3] << 16)
+    byte_count = element_width * size
+    data_units = array('H', units[payload + 4: payload + 4 + (byte_count + 1) // 2])
+    if sys.byteorder != 'little':
+        data_units.byteswap()
+    return {'element_width': element_width, 'element_count': size,
+            'array_data': data_units.tobytes()[:byte_count]}
+
+
+def decode_instructions(insns: List[Dict[str, Any]]) -> None:
+    """就地解码方法的指令单元
+
+    每条指令的首个代码单元会被补充 'pc'、'format'、'width' 以及 vA/vB/vC、
+    literal、index、target、payload、args 等操作数字段；其余代码单元保持原样。
+    switch 与 fill-array-data 指令的负载在此一次性解码并附加到指令上。
+    """
+    units = code_units(insns)
+    pc = 0
+    while pc < len(units):
+        insn = insns[pc]
+        insn.update(decode_instruction(units, pc))
+        insn['pc'] = pc
+        if insn['opcode'] == 0x2B and insn['format'] == '31t':
+            insn.update(decode_packed_switch(units, pc, insn['payload']))
+        elif insn['opcode'] == 0x2C and insn['format'] == '31t':
+            insn.update(decode_sparse_switch(units, pc, insn['payload']))
+        elif insn['opcode'] == 0x26 and insn['format'] == '31t':
+            insn.update(decode_fill_array_data(units, insn['payload']))
+        pc += insn['width']
@@ -0,0 +1,186 @@
+# src/core/dalvik/registers.py
+import math
+import struct
+from typing import Any, List
+
+# 寄存器文件表示
+# - int/float/对象引用各占一个寄存器，直接保存 Python 原生值
+# - long/double 作为一个完整的 Python int/float 存放在低位寄存器中，
+#   高位寄存器保存 WIDE_HIGH 占位标记，不再拆分为两个32位半值
+
+INT_MIN = -0x80000000
+INT_MAX = 0x7FFFFFFF
+LONG_MIN = -0x8000000000000000
+LONG_MAX = 0x7FFFFFFFFFFFFFFF
+
+_FLOAT = struct.Struct('<f')
+_INT = struct.Struct('<i')
+_DOUBLE = struct.Struct('<d')
+_LONG = struct.Struct('<q')
+
+
+class _WideHigh:
+    """宽值高位寄存器的占位标记"""
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'WIDE_HIGH'
+
+
+WIDE_HIGH = _WideHigh()
+
+
+def new_register_file(size: int) -> List[Any]:
+    """创建指定大小的寄存器文件"""
+    return [None] * size
+
+
+def get_wide(registers: List[Any], index: int) -> Any:
+    """读取宽值（long/double）"""
+    return registers[index]
+
+
+def set_wide(registers: List[Any], index: int, value: Any) -> None:
+    """写入宽值，高位寄存器置为占位标记"""
+    registers[index] = value
+    registers[index + 1] = WIDE_HIGH
+
+
+# ---- 整数回绕 ----
+
+def int32(value: int) -> int:
+    """按Java int语义回绕到32位有符号整数"""
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def int64(value: int) -> int:
+    """按Java long语义回绕到64位有符号整数"""
+    return ((value + 0x8000000000000000) & 0xFFFFFFFFFFFFFFFF) - 0x8000000000000000
+
+
+def int_div(a: int, b: int) -> int:
+    """Java int 除法（向零截断），调用方负责检查除数为0"""
+    q = abs(a) // abs(b)
+    return int32(-q if (a < 0) != (b < 0) else q)
+
+
+def int_rem(a: int, b: int) -> int:
+    """Java int 取余（结果符号与被除数相同）"""
+    r = abs(a) % abs(b)
+    return -r if a < 0 else r
+
+
+def long_div(a: int, b: int) -> int:
+    """Java long 除法（向零截断）"""
+    q = abs(a) // abs(b)
+    return int64(-q if (a < 0) != (b < 0) else q)
+
+
+long_rem = int_rem
+
+
+def int_to_byte(value: int) -> int:
+    return ((value + 0x80) & 0xFF) - 0x80
+
+
+def int_to_char(value: int) -> int:
+    return value & 0xFFFF
+
+
+def int_to_short(value: int) -> int:
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+
+# ---- 浮点 ----
+
+def float32(value: float) -> float:
+    """将双精度值舍入为Java float精度"""
+    try:
+        return _FLOAT.unpack(_FLOAT.pack(value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def long_to_float(value: int) -> float:
+    """l2f：long 直接舍入到 float（就近舍入，平局取偶），不经过 double 的第二次舍入"""
+    magnitude = abs(value)
+    shift = magnitude.bit_length() - 24
+    if shift <= 0:
+        return float(value)
+    mantissa, rest = divmod(magnitude, 1 << shift)
+    half = 1 << (shift - 1)
+    if rest > half or (rest == half and mantissa & 1):
+        mantissa += 1
+    return math.copysign(math.ldexp(mantissa, shift), value)
+
+
+def int_bits_to_float(bits: int) -> float:
+    """将32位位模式解释为float（const 指令加载的浮点常量）"""
+    return _FLOAT.unpack(_INT.pack(int32(bits)))[0]
+
+
+def long_bits_to_double(bits: int) -> float:
+    """将64位位模式解释为double"""
+    return _DOUBLE.unpack(_LONG.pack(int64(bits)))[0]
+
+
+def float_to_int_bits(value: float) -> int:
+    return _INT.unpack(_FLOAT.pack(value))[0]
+
+
+def double_to_long_bits(value: float) -> int:
+    return _LONG.unpack(_DOUBLE.pack(value))[0]
+
+
+def as_float(value: Any) -> float:
+    """读取float寄存器；常量加载的位模式按需转换"""
+    if value.__class__ is float:
+        return value
+    return int_bits_to_float(value)
+
+
+def as_double(value: Any) -> float:
+    """读取double寄存器；常量加载的位模式按需转换"""
+    if value.__class__ is float:
+        return value
+    return long_bits_to_double(value)
+
+
+def float_div(a: float, b: float) -> float:
+    """IEEE 754 除法（除数为0时返回无穷大或NaN，而不是抛出异常）"""
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a != a or a == 0.0:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def float_rem(a: float, b: float) -> float:
+    """Java浮点取余（与C fmod一致）"""
+    try:
+        return math.fmod(a, b)
+    except ValueError:
+        return math.nan
+
+
+def float_to_int(value: float) -> int:
+    """Java f2i/d2i：NaN转为0，超出范围时饱和"""
+    if value != value:
+        return 0
+    if value >= INT_MAX:
+        return INT_MAX
+    if value <= INT_MIN:
+        return INT_MIN
+    return int(value)
+
+
+def float_to_long(value: float) -> int:
+    """Java f2l/d2l：NaN转为0，超出范围时饱和"""
+    if value != value:
+        return 0
+    if value >= LONG_MAX:
+        return LONG_MAX
+    if value <= LONG_MIN:
+        return LONG_MIN
+    return int(value)
@@ -0,0 +1,135 @@
+# src/core/dalvik/startup_profile.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from .code_cache import dex_signature, methods_by_signature
+from .intrinsics import method_signature
+from .jit_codegen import new_profile
+
+logger = logging.getLogger(__name__)
+
+# 启动profile（类似 ART 的 baseline profile）
+#
+# 进程退出时按 DEX 签名写出一个紧凑的 JSON 文件，记录：
+#   methods  热方法的签名、热度（解释调用 + 基线版本调用 + 回边次数）、达到的编译层级，
+#            以及虚调用点上出现过的接收者类型（按次数排序）
+#   classes  启动窗口（startup_window 秒）内加载的类，按加载顺序
+# 同一个 APK 下次启动时，在 main 之前加载并链接这些类（分配静态字段槽位，不执行 <clinit>），
+# 把接收者类型写回代码项的 profile，并按热度把方法加入编译队列；上次达到优化层级的方法
+# 在基线版本之后接着请求优化编译。方法按签名在 method_ids 中查找，DEX 签名不同时忽略旧文件
+
+PROFILE_VERSION = 1
+
+
+class StartupProfile:
+    """热方法与启动类的跨进程记录"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.startup_window = 1.0  # 启动阶段的时长（秒），此期间加载的类写入profile
+        self.max_methods = 1000  # profile 中最多记录的热方法数
+        self.max_receivers = 4  # 每个调用点最多记录的接收者类型数
+        self.started: Optional[float] = None
+        self.stats = {'loaded': 0, 'classes': 0, 'methods': 0, 'saved': 0, 'errors': 0}
+
+    def path(self, dex_parser) -> str:
+        return os.path.join(self.directory, f"{dex_signature(dex_parser)}.prof")
+
+    # ---- 启动 ----
+
+    def begin(self, vm, dex_parser) -> bool:
+        """启动阶段开始：有上次运行的profile时预加载类并提前编译热方法，返回是否应用了profile"""
+        self.started = time.perf_counter()
+        profile = self.load(dex_parser)
+        if profile is None:
+            return False
+        for class_name in profile['classes']:
+            if class_name in dex_parser.class_by_name and class_name not in vm.classes.classes:
+                vm.classes.get_class(dex_parser, class_name)
+                self.stats['classes'] += 1
+
+        methods = methods_by_signature(dex_parser)
+        for entry in profile['methods']:
+            method = methods.get(entry['method'])
+            if method is None:
+                continue
+            code = dex_parser.code_items[method['code_off']]
+            receivers = entry.get('receivers')
+            if receivers:
+                seeded = code.get('profile')
+                if seeded is None:
+                    seeded = code['profile'] = new_profile()
+                for pc, types in receivers.items():
+                    counts = seeded['receivers'].setdefault(int(pc), {})
+                    for type_name in types:
+                        counts.setdefault(type_name, 1)
+            if vm.jit.precompile(method, dex_parser, entry['hotness'], entry['tier']):
+                self.stats['methods'] += 1
+        self.stats['loaded'] += 1
+        logger.info(f"应用启动profile: {self.stats['classes']} 个类, {self.stats['methods']} 个方法")
+        return True
+
+    def load(self, dex_parser) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(dex_parser), 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"启动profile无法读取，忽略: {e}")
+            self.stats['errors'] += 1
+            return None
+        if profile.get('version') != PROFILE_VERSION or profile.get('dex') != dex_signature(dex_parser):
+            return None
+        return profile
+
+    # ---- 退出 ----
+
+    def record(self, vm, dex_parser) -> Dict[str, Any]:
+        """当前进程的热方法、接收者类型与启动类"""
+        jit = vm.jit
+        methods = []
+        for method in methods_by_signature(dex_parser).values():
+            code = dex_parser.code_items[method['code_off']]
+            profile = code.get('profile') or {}
+            hotness = code.get('invocations', 0) + profile.get('calls', 0) + sum(code.get('backedges', {}).values())
+            tier = code.get('tier', 0)
+            if not tier and hotness < jit.compilation_threshold:
+                continue
+            entry = {'method': method_signature(method), 'hotness': hotness, 'tier': tier}
+            receivers = {str(pc): [t for t, _ in sorted(counts.items(), key=lambda item: -item[1])]
+                         [:self.max_receivers]
+                         for pc, counts in profile.get('receivers', {}).items() if counts}
+            if receivers:
+                entry['receivers'] = receivers
+            methods.append(entry)
+        methods.sort(key=lambda entry: -entry['hotness'])
+
+        classes: List[str] = []
+        if self.started is not None:
+            deadline = self.started + self.startup_window
+            classes = [name for name, loaded in vm.classes.load_times.items() if loaded <= deadline]
+        return {'version': PROFILE_VERSION, 'dex': dex_signature(dex_parser),
+                'methods': methods[:self.max_methods], 'classes': classes}
+
+    def save(self, vm, dex_parser) -> bool:
+        """写出profile，先写临时文件再替换"""
+        data = json.dumps(self.record(vm, dex_parser), separators=(',', ':'))
+        path = self.path(dex_parser)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"启动profile写入失败: {e}")
+            self.stats['errors'] += 1
+            return False
+        self.stats['saved'] += 1
+        return True
+
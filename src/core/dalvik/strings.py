@@ -0,0 +1,73 @@
+# src/core/dalvik/strings.py
+import logging
+from typing import Dict, Optional
+
+from .registers import int32
+
+logger = logging.getLogger(__name__)
+
+# java.lang.String 的本地表示
+# - 寄存器中直接保存 JavaString 对象（即引用），不占用对象堆的ID
+# - value 为 Python str，每个字符对应一个 UTF-16 代码单元（增补字符以代理对保存），
+#   因此 len/下标与 Java 的 length/charAt 一致
+# - 引用比较（if-eq 等）按对象身份进行，内容比较走 String.equals
+
+
+def java_string_hash(value: str) -> int:
+    """String.hashCode: s[0]*31^(n-1) + ... + s[n-1]，按int回绕"""
+    h = 0
+    for ch in value:
+        h = (31 * h + ord(ch)) & 0xFFFFFFFF
+    return int32(h)
+
+
+class JavaString:
+    """Java字符串：包装 Python str，缓存 hashCode"""
+    __slots__ = ('value', '_hash')
+
+    def __init__(self, value: str):
+        self.value = value
+        self._hash = None
+
+    def hash_code(self) -> int:
+        """String.hashCode，首次计算后缓存"""
+        h = self._hash
+        if h is None:
+            h = self._hash = java_string_hash(self.value)
+        return h
+
+    def __str__(self) -> str:
+        return self.value
+
+    def __repr__(self) -> str:
+        return f"JavaString({self.value!r})"
+
+
+class StringTable:
+    """虚拟机范围的字符串驻留表，const-string 与 String.intern 共用"""
+
+    def __init__(self):
+        self.table: Dict[str, JavaString] = {}
+
+    def intern(self, value: str) -> JavaString:
+        """返回内容为 value 的驻留字符串，不存在时创建"""
+        string = self.table.get(value)
+        if string is None:
+            # setdefault 保证JIT编译线程与解释器同时驻留时得到同一个对象
+            string = self.table.setdefault(value, JavaString(value))
+        return string
+
+    def intern_string(self, string: JavaString) -> JavaString:
+        """String.intern(): 已有相同内容的驻留字符串则返回它，否则驻留该对象本身"""
+        return self.table.setdefault(string.value, string)
+
+    def lookup(self, value: str) -> Optional[JavaString]:
+        return self.table.get(value)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+
+def decode_mutf8(data: bytes) -> str:
+    """解码DEX中的MUTF-8字符串：C0 80 表示NUL，增补字符以两个3字节代理编码保存"""
+    return data.replace(b'\xc0\x80', b'\x00').decode('utf-8', errors='surrogatepass')
@@ -0,0 +1,509 @@
+# src/core/dalvik/verifier.py
+import logging
+from typing import Any, Dict, List, Tuple
+
+from .cfg import get_cfg
+from .opcodes import CAN_THROW, OPCODE_NAMES, successors
+from .registers import int_bits_to_float, long_bits_to_double
+
+logger = logging.getLogger(__name__)
+
+# 字节码数据流校验
+#
+# 对每个方法做一次前向数据流分析，证明每个pc处各寄存器的类型：
+# - 读取的寄存器都已赋值，宽值的高低位成对出现，操作数类型与指令要求一致
+# - 记录不可达的指令
+# - const 指令加载的是位模式，分析会找出每个常量被当作哪种类型使用；
+#   只作为 float/double 使用的常量直接改写为浮点数，
+#   这样通过校验的方法中 float/double 寄存器一定保存 Python float，
+#   解释器可以选用不做 as_float/as_double 检查的处理函数
+#
+# 结果按 code_off 缓存在 DEXParser.verification 中
+
+# 寄存器类型
+UNDEFINED = 'U'    # 尚未赋值
+CONFLICT = 'X'     # 各路径类型不一致，不能再读取
+INT = 'I'          # int/boolean/byte/char/short
+FLOAT = 'F'
+NARROW = 'N'       # aget 的结果：int 或 float，均为原生表示
+REF = 'L'
+LONG = 'J'
+LONG_HI = 'j'
+DOUBLE = 'D'
+DOUBLE_HI = 'd'
+WIDE = 'W'         # aget-wide 的结果：long 或 double
+WIDE_HI = 'w'
+CONST_HI = 'k'     # 64位常量的高位
+# 常量类型为 (CONST, 定义pc集合) 或 (CONST_WIDE, 定义pc集合)
+CONST = 'c'
+CONST_WIDE = 'C'
+
+_HIGH_OF = {LONG: LONG_HI, DOUBLE: DOUBLE_HI, WIDE: WIDE_HI}
+_HIGH_TYPES = (LONG_HI, DOUBLE_HI, WIDE_HI, CONST_HI)
+
+ACC_STATIC = 0x8
+
+# 一元运算: 操作码 -> (源类型, 结果类型)
+UNARY_TYPES = {
+    0x7B: (INT, INT), 0x7C: (INT, INT), 0x7D: (LONG, LONG), 0x7E: (LONG, LONG),
+    0x7F: (FLOAT, FLOAT), 0x80: (DOUBLE, DOUBLE),
+    0x81: (INT, LONG), 0x82: (INT, FLOAT), 0x83: (INT, DOUBLE),
+    0x84: (LONG, INT), 0x85: (LONG, FLOAT), 0x86: (LONG, DOUBLE),
+    0x87: (FLOAT, INT), 0x88: (FLOAT, LONG), 0x89: (FLOAT, DOUBLE),
+    0x8A: (DOUBLE, INT), 0x8B: (DOUBLE, LONG), 0x8C: (DOUBLE, FLOAT),
+    0x8D: (INT, INT), 0x8E: (INT, INT), 0x8F: (INT, INT),
+}
+
+
+def binop_types(opcode: int) -> Tuple[str, str, str]:
+    """23x 运算的 (vB类型, vC类型, 结果类型)"""
+    if opcode <= 0x9A:
+        return INT, INT, INT
+    if opcode <= 0xA5:
+        # shl/shr/ushr-long 的移位量为 int
+        return (LONG, INT, LONG) if opcode >= 0xA3 else (LONG, LONG, LONG)
+    if opcode <= 0xAA:
+        return FLOAT, FLOAT, FLOAT
+    return DOUBLE, DOUBLE, DOUBLE
+
+
+def descriptor_type(descriptor: str) -> str:
+    """类型描述符对应的寄存器类型"""
+    first = descriptor[0]
+    if first in 'L[':
+        return REF
+    if first == 'J':
+        return LONG
+    if first == 'D':
+        return DOUBLE
+    if first == 'F':
+        return FLOAT
+    return INT
+
+
+class VerifyError(Exception):
+    """方法未通过校验"""
+
+
+class _MethodVerifier:
+    """单个方法的数据流分析"""
+
+    def __init__(self, method: Dict[str, Any], code: Dict[str, Any], dex_parser):
+        self.method = method
+        self.code = code
+        self.insns = code['insns']
+        self.dex_parser = dex_parser
+        self.registers_size = code['registers_size']
+        self.const_uses: Dict[int, set] = {}  # 常量定义pc -> 被当作的类型集合
+        self.state: List[Any] = []
+        self.pc = 0
+
+    # ---- 类型合并 ----
+
+    def merge(self, a: Any, b: Any) -> Any:
+        if a == b:
+            return a
+        if type(a) is tuple and type(b) is tuple:
+            if a[0] == b[0]:
+                return a[0], a[1] | b[1]
+            return CONFLICT
+        if type(b) is tuple:
+            a, b = b, a
+        if type(a) is tuple:
+            # 常量与确定类型合并：常量按该类型使用
+            kind = a[0]
+            if kind == CONST and b in (INT, FLOAT, REF, NARROW):
+                if b != NARROW:
+                    self._record(a, b)
+                return b
+            if kind == CONST_WIDE and b in (LONG, DOUBLE, WIDE):
+                if b != WIDE:
+                    self._record(a, b)
+                return b
+            return CONFLICT
+        if NARROW in (a, b) and (INT in (a, b) or FLOAT in (a, b)):
+            return a if b == NARROW else b
+        if WIDE in (a, b) and (LONG in (a, b) or DOUBLE in (a, b)):
+            return a if b == WIDE else b
+        if WIDE_HI in (a, b) and (LONG_HI in (a, b) or DOUBLE_HI in (a, b)):
+            return a if b == WIDE_HI else b
+        if CONST_HI in (a, b) and (a in _HIGH_TYPES and b in _HIGH_TYPES):
+            return a if b == CONST_HI else b
+        return CONFLICT
+
+    def _record(self, const_type: Tuple[str, frozenset], kind: str) -> None:
+        for pc in const_type[1]:
+            self.const_uses.setdefault(pc, set()).add(kind)
+
+    # ---- 读取与写入 ----
+
+    def _fail(self, message: str):
+        name = OPCODE_NAMES.get(self._opcode(self.insns[self.pc]), '?')
+        raise VerifyError(f"pc {self.pc} ({name}): {message}")
+
+    def _check_register(self, reg: int) -> None:
+        if not 0 <= reg < self.registers_size:
+            self._fail(f"寄存器 v{reg} 越界")
+
+    def use(self, reg: int, expected: str) -> Any:
+        """读取32位寄存器并检查类型"""
+        self._check_register(reg)
+        actual = self.state[reg]
+        if type(actual) is tuple:
+            if actual[0] != CONST:
+                self._fail(f"v{reg} 是宽值常量，期望 {expected}")
+            if expected == REF:
+                if any(self.insns[pc]['literal'] != 0 for pc in actual[1]):
+                    self._fail(f"v{reg} 是非零常量，不能作为引用")
+            # 每次使用都记录：NARROW、'any' 也算作“不只是浮点数”的用法
+            self._record(actual, expected)
+            return actual
+        if actual == expected:
+            return actual
+        if expected == NARROW and actual in (INT, FLOAT):
+            return actual
+        if actual == NARROW and expected in (INT, FLOAT):
+            return actual
+        if expected == 'any' and actual in (INT, FLOAT, NARROW, REF):
+            return actual
+        self._fail(f"v{reg} 类型为 {actual}，期望 {expected}")
+
+    def use_wide(self, reg: int, expected: str) -> Any:
+        """读取宽值寄存器对并检查类型"""
+        self._check_register(reg + 1)
+        low, high = self.state[reg], self.state[reg + 1]
+        if type(low) is tuple:
+            if low[0] != CONST_WIDE or high != CONST_HI:
+                self._fail(f"v{reg} 不是完整的宽值常量")
+            self._record(low, expected)
+            return low
+        if high != _HIGH_OF.get(low):
+            self._fail(f"v{reg}/v{reg + 1} 不是成对的宽值")
+        if low == expected or expected == WIDE or low == WIDE:
+            return low
+        self._fail(f"v{reg} 类型为 {low}，期望 {expected}")
+
+    def define(self, reg: int, value_type: Any) -> None:
+        """写入32位寄存器，被覆盖的宽值另一半随之失效"""
+        self._check_register(reg)
+        state = self.state
+        if reg > 0 and state[reg] in _HIGH_TYPES:
+            state[reg - 1] = CONFLICT
+        if reg + 1 < self.registers_size and state[reg + 1] in _HIGH_TYPES and self._is_wide_low(state[reg]):
+            state[reg + 1] = CONFLICT
+        state[reg] = value_type
+
+    def define_wide(self, reg: int, value_type: Any) -> None:
+        self._check_register(reg + 1)
+        state = self.state
+        if reg > 0 and state[reg] in _HIGH_TYPES:
+            state[reg - 1] = CONFLICT
+        if reg + 2 < self.registers_size and state[reg + 2] in _HIGH_TYPES and self._is_wide_low(state[reg + 1]):
+            state[reg + 2] = CONFLICT
+        state[reg] = value_type
+        state[reg + 1] = CONST_HI if type(value_type) is tuple else _HIGH_OF[value_type]
+
+    @staticmethod
+    def _is_wide_low(value_type: Any) -> bool:
+        return value_type in _HIGH_OF or (type(value_type) is tuple and value_type[0] == CONST_WIDE)
+
+    def use_typed(self, reg: int, value_type: str) -> None:
+        if value_type in (LONG, DOUBLE, WIDE):
+            self.use_wide(reg, value_type)
+        else:
+            self.use(reg, value_type)
+
+    def define_typed(self, reg: int, value_type: str) -> None:
+        if value_type in (LONG, DOUBLE):
+            self.define_wide(reg, value_type)
+        else:
+            self.define(reg, value_type)
+
+    @staticmethod
+    def _opcode(insn: Dict[str, Any]) -> int:
+        return insn.get('quickened', insn['opcode'])
+
+    # ---- 入口状态 ----
+
+    def entry_state(self) -> List[Any]:
+        state = [UNDEFINED] * (self.registers_size + 1)  # 最后一项为 result 寄存器
+        proto = self.method.get('proto') or {'parameters': []}
+        params = [descriptor_type(t) for t in proto['parameters']]
+        words = sum(2 if t in (LONG, DOUBLE) else 1 for t in params)
+        ins_size = self.code['ins_size']
+        access_flags = self.method.get('access_flags')
+        is_static = (access_flags & ACC_STATIC) != 0 if access_flags is not None else words == ins_size
+        if not is_static:
+            params.insert(0, REF)
+            words += 1
+        if words != ins_size:
+            raise VerifyError(f"参数占用 {words} 个寄存器，与 ins_size={ins_size} 不符")
+
+        reg = self.registers_size - ins_size
+        for param in params:
+            state[reg] = param
+            if param in (LONG, DOUBLE):
+                state[reg + 1] = _HIGH_OF[param]
+                reg += 2
+            else:
+                reg += 1
+        return state
+
+    # ---- 单条指令 ----
+
+    def transfer(self, insn: Dict[str, Any]) -> None:
+        """按指令语义更新 self.state"""
+        op = self._opcode(insn)
+        result = self.state[-1]
+        self.state[-1] = UNDEFINED
+        dex = self.dex_parser
+
+        if op == 0x00:
+            return
+        if 0x01 <= op <= 0x03:
+            self.define(insn['vA'], self.use(insn['vB'], 'any'))
+        elif 0x04 <= op <= 0x06:
+            self.define_wide(insn['vA'], self.use_wide(insn['vB'], WIDE))
+        elif 0x07 <= op <= 0x09:
+            self.define(insn['vA'], self.use(insn['vB'], REF))
+        elif op == 0x0A:
+            if result not in (INT, FLOAT):
+                self._fail("move-result 之前没有返回32位值的调用")
+            self.define(insn['vA'], result)
+        elif op == 0x0B:
+            if result not in (LONG, DOUBLE):
+                self._fail("move-result-wide 之前没有返回宽值的调用")
+            self.define_wide(insn['vA'], result)
+        elif op == 0x0C:
+            if result != REF:
+                self._fail("move-result-object 之前没有返回引用的调用")
+            self.define(insn['vA'], REF)
+        elif op == 0x0D:
+            self.define(insn['vA'], REF)
+        elif op == 0x0E:
+            return
+        elif 0x0F <= op <= 0x11:
+            self._return(insn, op)
+        elif 0x12 <= op <= 0x15:
+            self.define(insn['vA'], (CONST, frozenset([self.pc])))
+        elif 0x16 <= op <= 0x19:
+            self.define_wide(insn['vA'], (CONST_WIDE, frozenset([self.pc])))
+        elif op in (0x1A, 0x1B, 0x1C):
+            self.define(insn['vA'], REF)
+        elif op in (0x1D, 0x1E, 0x26, 0x27):
+            self.use(insn['vA'], REF)
+        elif op == 0x1F:
+            self.use(insn['vA'], REF)
+            self.define(insn['vA'], REF)
+        elif op in (0x20, 0x21):
+            self.use(insn['vB'], REF)
+            self.define(insn['vA'], INT)
+        elif op == 0x22:
+            self.define(insn['vA'], REF)
+        elif op == 0x23:
+            self.use(insn['vB'], INT)
+            self.define(insn['vA'], REF)
+        elif op in (0x24, 0x25):
+            element = dex.type_ids[insn['index']][1:]
+            for reg in insn['args']:
+                self.use(reg, INT if element == 'I' else REF)
+            self.state[-1] = REF
+        elif 0x28 <= op <= 0x2A:
+            return
+        elif op in (0x2B, 0x2C):
+            self.use(insn['vA'], INT)
+        elif op in (0x2D, 0x2E):
+            self.use(insn['vB'], FLOAT)
+            self.use(insn['vC'], FLOAT)
+            self.define(insn['vA'], INT)
+        elif 0x2F <= op <= 0x31:
+            operand = LONG if op == 0x31 else DOUBLE
+            self.use_wide(insn['vB'], operand)
+            self.use_wide(insn['vC'], operand)
+            self.define(insn['vA'], INT)
+        elif 0x32 <= op <= 0x37:
+            expected = INT
+            if op <= 0x33 and REF in (self.state[insn['vA']], self.state[insn['vB']]):
+                expected = REF
+            self.use(insn['vA'], expected)
+            self.use(insn['vB'], expected)
+        elif 0x38 <= op <= 0x3D:
+            self.use(insn['vA'], REF if op <= 0x39 and self.state[insn['vA']] == REF else INT)
+        elif 0x44 <= op <= 0x4A:
+            self.use(insn['vB'], REF)
+            self.use(insn['vC'], INT)
+            if op == 0x45:
+                self.define_wide(insn['vA'], WIDE)
+            else:
+                self.define(insn['vA'], {0x44: NARROW, 0x46: REF}.get(op, INT))
+        elif 0x4B <= op <= 0x51:
+            if op == 0x4C:
+                self.use_wide(insn['vA'], WIDE)
+            else:
+                self.use(insn['vA'], {0x4B: NARROW, 0x4D: REF}.get(op, INT))
+            self.use(insn['vB'], REF)
+            self.use(insn['vC'], INT)
+        elif 0x52 <= op <= 0x6D:
+            field_type = descriptor_type(dex.field_ids[insn['index']]['type_name'])
+            if op <= 0x5F:
+                self.use(insn['vB'], REF)
+            if op in (0x52, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x60, 0x61, 0x62, 0x63, 0x64, 0x65, 0x66):
+                self.define_typed(insn['vA'], field_type)
+            else:
+                self.use_typed(insn['vA'], field_type)
+        elif 0x6E <= op <= 0x72 or 0x74 <= op <= 0x78:
+            self._invoke(insn, op)
+        elif op in UNARY_TYPES:
+            source, target = UNARY_TYPES[op]
+            self.use_typed(insn['vB'], source)
+            self.define_typed(insn['vA'], target)
+        elif 0x90 <= op <= 0xCF:
+            type_b, type_c, target = binop_types(op - 0x20 if op >= 0xB0 else op)
+            self.use_typed(insn['vB'], type_b)
+            self.use_typed(insn['vC'], type_c)
+            self.define_typed(insn['vA'], target)
+        elif 0xD0 <= op <= 0xE2:
+            self.use(insn['vB'], INT)
+            self.define(insn['vA'], INT)
+        else:
+            self._fail("不支持的指令")
+
+    def _return(self, insn: Dict[str, Any], op: int) -> None:
+        """返回值须与方法原型一致；原型为 void 时只检查值的宽度"""
+        return_type = (self.method.get('proto') or {}).get('return_type', 'V')
+        if op == 0x10:
+            self.use_wide(insn['vA'], WIDE if return_type == 'V' else descriptor_type(return_type))
+        elif op == 0x11:
+            self.use(insn['vA'], REF)
+        else:
+            self.use(insn['vA'], 'any' if return_type == 'V' else descriptor_type(return_type))
+
+    def _invoke(self, insn: Dict[str, Any], op: int) -> None:
+        method_ref = self.dex_parser.method_ids[insn['index']]
+        proto = method_ref['proto']
+        expected = [descriptor_type(t) for t in proto['parameters']]
+        if op not in (0x71, 0x77):
+            expected.insert(0, REF)
+        args = insn['args']
+        i = 0
+        for value_type in expected:
+            if i >= len(args):
+                self._fail("实参寄存器不足")
+            if value_type in (LONG, DOUBLE):
+                if i + 1 >= len(args) or args[i + 1] != args[i] + 1:
+                    self._fail("宽值实参必须占用相邻的两个寄存器")
+                self.use_wide(args[i], value_type)
+                i += 2
+            else:
+                self.use(args[i], value_type)
+                i += 1
+        if i != len(args):
+            self._fail("实参寄存器数与方法原型不符")
+        return_type = proto['return_type']
+        self.state[-1] = UNDEFINED if return_type == 'V' else descriptor_type(return_type)
+
+    # ---- 数据流迭代 ----
+
+    def run(self) -> Dict[int, Tuple[Any, ...]]:
+        insns = self.insns
+        cfg = get_cfg(self.code)
+        starts = cfg.block_of
+        if 0 not in starts:
+            raise VerifyError("方法没有指令")
+
+        states: Dict[int, Tuple[Any, ...]] = {0: tuple(self.entry_state())}
+        worklist = [0]
+        while worklist:
+            pc = worklist.pop()
+            self.pc = pc
+            insn = insns[pc]
+            before = states[pc]
+
+            if self._opcode(insn) in CAN_THROW:
+                for handler_pc in cfg.handler_pcs(pc):
+                    # 异常处理器入口的寄存器状态为抛出指令执行之前的状态
+                    self._flow(states, worklist, starts, handler_pc, before[:-1] + (UNDEFINED,))
+
+            self.state = list(before)
+            self.transfer(insn)
+            after = tuple(self.state)
+            for next_pc in successors(insn):
+                self._flow(states, worklist, starts, next_pc, after)
+        return states
+
+    def _flow(self, states, worklist, starts, target: int, state: Tuple[Any, ...]) -> None:
+        if target not in starts:
+            self._fail(f"跳转目标 {target} 不是指令起始位置" if target < len(self.insns) else "执行越过方法末尾")
+        old = states.get(target)
+        if old is None:
+            states[target] = state
+            worklist.append(target)
+            return
+        merged = tuple(self.merge(a, b) for a, b in zip(old, state))
+        if merged != old:
+            states[target] = merged
+            worklist.append(target)
+
+
+class BytecodeVerifier:
+    """字节码校验器，结果按 code_off 缓存在解析器上"""
+
+    def __init__(self, vm):
+        self.vm = vm
+        self.stats = {'verified': 0, 'failed': 0, 'unchecked': 0}
+
+    def verify_method(self, method: Dict[str, Any], dex_parser) -> Dict[str, Any]:
+        """校验方法，返回校验结果（已缓存时直接返回）"""
+        code_off = method.get('code_off', 0)
+        cached = dex_parser.verification.get(code_off)
+        if cached is not None:
+            return cached
+
+        code = dex_parser.code_items[code_off]
+        verifier = _MethodVerifier(method, code, dex_parser)
+        result = {'verified': False, 'unchecked': False, 'error': None, 'unreachable': [], 'types': {}}
+        try:
+            states = verifier.run()
+        except VerifyError as e:
+            result['error'] = str(e)
+            self.stats['failed'] += 1
+            logger.info(f"方法未通过校验: {method['class_name']}.{method['name']}: {e}")
+        else:
+            result['verified'] = True
+            result['types'] = states
+            result['unreachable'] = get_cfg(code).unreachable_pcs()
+            result['unchecked'] = self._specialize_constants(verifier, code['insns'])
+            self.stats['verified'] += 1
+            if result['unchecked']:
+                self.stats['unchecked'] += 1
+            if result['unreachable']:
+                logger.debug(f"{method['class_name']}.{method['name']} 存在不可达指令: {result['unreachable']}")
+
+        dex_parser.verification[code_off] = result
+        code['verification'] = result  # 供只持有代码项的分析（如GC引用图）使用
+        return result
+
+    def verify_dex(self, dex_parser) -> Dict[str, int]:
+        """校验DEX中所有带代码的方法，返回统计"""
+        for method in dex_parser.method_ids:
+            if method.get('code_off', 0) in dex_parser.code_items:
+                self.verify_method(method, dex_parser)
+        logger.info(f"字节码校验完成: {self.stats}")
+        return dict(self.stats)
+
+    @staticmethod
+    def _specialize_constants(verifier: _MethodVerifier, insns: List[Dict[str, Any]]) -> bool:
+        """把只作为浮点数使用的常量改写为 Python float
+
+        返回能否使用无检查的处理函数：同一个常量既当作整数又当作浮点数使用时不能
+        """
+        unchecked = True
+        for pc, kinds in verifier.const_uses.items():
+            insn = insns[pc]
+            if kinds == {FLOAT} or kinds == {DOUBLE}:
+                if type(insn['literal']) is int:
+                    convert = int_bits_to_float if FLOAT in kinds else long_bits_to_double
+                    insn['literal'] = convert(insn['literal'])
+            elif FLOAT in kinds or DOUBLE in kinds:
+                unchecked = False
+        return unchecked
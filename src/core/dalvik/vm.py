@@ -6,6 +6,14 @@ from .dex_parser import DEXParser
 from .interpreter import BytecodeInterpreter  # 新增导入
 from .jit import JITCompiler  # 新增导入
 from .gc import GarbageCollector  # 新增导入
+from .intrinsics import IntrinsicRegistry
+from .strings import StringTable
+from .class_linker import ClassLinker
+from .verifier import BytecodeVerifier
+from .arrays import array_size, new_storage
+from .object_table import ObjectTable
+from .startup_profile import StartupProfile
+from .aot_image import load_image
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +24,29 @@ class DalvikVM:
     def __init__(self):
         self.loaded_classes = {}
         self.registered_natives = {}
-        self.heap = {}  # 对象堆
-        self.next_object_id = 1
+        self.native_method_proxy = None
+        self.object_table = ObjectTable()  # 对象ID的分配与复用
+        self.heap = self.object_table.objects  # 对象堆：对象ID -> 对象
 
         # 新增组件
         self.interpreter = BytecodeInterpreter(self)  # 字节码解释器
         self.jit = JITCompiler(self)  # JIT编译器
         self.gc = GarbageCollector(self)  # 垃圾回收器
+        self.intrinsics = IntrinsicRegistry(self)  # 内建函数表
+        self.strings = StringTable()  # 字符串驻留表
+        self.classes = ClassLinker(self)  # 类链接与初始化
+        self.verifier = BytecodeVerifier(self)  # 字节码校验，方法首次执行时进行
+        self.startup_profile: Optional[StartupProfile] = None  # 启动profile，启用后 main 前后读写
+        self.aot_image: Optional[str] = None  # dex2py 生成的AOT镜像路径，main 之前加载
+
+    def enable_startup_profile(self, directory: str) -> StartupProfile:
+        """在 directory 中保存启动profile：main 返回时写出，下次执行同一DEX的 main 之前应用"""
+        self.startup_profile = StartupProfile(directory)
+        return self.startup_profile
+
+    def load_aot(self, path: str, dex_parser) -> Dict[str, Any]:
+        """加载 dex2py 为该DEX生成的AOT镜像，把其中的方法安装为编译版本，返回安装统计"""
+        return load_image(self, dex_parser, path)
 
     def load_dex(self, dex_data: bytes) -> bool:
         """加载DEX文件"""
@@ -63,44 +87,121 @@ class DalvikVM:
             logger.error(f"找不到主类定义: {main_method['class_name']}")
             return
 
-        # 执行主方法
-        self._execute_method(main_method, main_class, parser)
+        if self.aot_image is not None:
+            self.load_aot(self.aot_image, parser)
+
+        # 执行主方法，前后应用和写出启动profile
+        if self.startup_profile is None:
+            self._execute_method(main_method, main_class, parser)
+            return
+        self.startup_profile.begin(self, parser)
+        try:
+            self._execute_method(main_method, main_class, parser)
+        finally:
+            self.startup_profile.save(self, parser)
 
     def _execute_method(self, method: Dict[str, Any], class_def: Dict[str, Any], dex_parser) -> None:
         """执行方法"""
-        # 检查是否应该JIT编译
-        if self.jit.should_compile(method):
-            compiled_function = self.jit.compile_method(method, class_def, dex_parser)
-            if compiled_function:
-                self.jit.execute_compiled(method, class_def, dex_parser)
-                return
+        # 已编译（或达到编译阈值）时执行编译后的代码
+        compiled_function = self.jit.lookup(method, dex_parser)
+        if compiled_function is not None:
+            code = dex_parser.code_items[method['code_off']]
+            self.jit.execute_compiled(compiled_function, [None] * code['ins_size'])
+            return
 
         # 否则使用解释器执行
         self.interpreter.interpret(method, class_def, dex_parser)
 
     def _create_object(self, class_name: str) -> int:
         """创建对象实例"""
-        object_id = self.next_object_id
-        self.next_object_id += 1
+        # 按类的实例字段布局计算对象大小
+        obj_size = self.classes.instance_size(class_name)
 
-        # 估算对象大小
-        obj_size = 1024  # 简化为1KB
-        self.gc.used_heap += obj_size
+        # 先检查是否需要垃圾回收，避免新对象在写入寄存器之前被回收
+        self.gc.collect_if_needed()
 
-        self.heap[object_id] = {
+        object_id = self.object_table.allocate({
             'class_name': class_name,
             'fields': {},
-            'marked': False
-        }
+            'size': obj_size
+        })
+        self.gc.record_allocation(object_id, obj_size)
+        return object_id
+
+    def _create_array(self, array_type: str, length: int) -> int:
+        """创建数组，基本类型数组使用按元素宽度排列的连续缓冲区"""
+        if length < 0:
+            raise ValueError(f"NegativeArraySizeException: {length}")
 
-        logger.debug(f"创建对象: {class_name} (ID: {object_id}, 大小: {obj_size}B)")
+        data = new_storage(array_type, length)
+        obj_size = array_size(data)
 
-        # 检查是否需要垃圾回收
         self.gc.collect_if_needed()
 
-        return object_id
+        array_id = self.object_table.allocate({
+            'class_name': array_type,
+            'fields': {},
+            'size': obj_size,
+            'data': data
+        })
+        self.gc.record_allocation(array_id, obj_size)
+        return array_id
+
+    def get_array_length(self, array_id: int) -> int:
+        """获取数组长度"""
+        return len(self.heap[array_id]['data'])
+
+    def get_array_element(self, array_id: int, index: int) -> Any:
+        """读取数组元素"""
+        if index < 0:
+            raise IndexError(index)
+        return self.heap[array_id]['data'][index]
+
+    def set_array_element(self, array_id: int, index: int, value: Any) -> None:
+        """写入数组元素"""
+        if index < 0:
+            raise IndexError(index)
+        self.heap[array_id]['data'][index] = value
+        self.gc.card_mark(array_id)
+
+    def array_copy(self, src_id: int, src_pos: int, dst_id: int, dst_pos: int, length: int) -> None:
+        """System.arraycopy：一次切片赋值完成复制（重叠区域同样正确）"""
+        src = self.heap[src_id]['data']
+        dst = self.heap[dst_id]['data']
+        if (src_pos < 0 or dst_pos < 0 or length < 0 or
+                src_pos + length > len(src) or dst_pos + length > len(dst)):
+            raise IndexError(f"arraycopy: last source index {src_pos + length} out of bounds")
+        if type(src) is not type(dst) or getattr(src, 'typecode', None) != getattr(dst, 'typecode', None):
+            raise TypeError("arraycopy: type mismatch")
+        dst[dst_pos:dst_pos + length] = src[src_pos:src_pos + length]
+        if isinstance(dst, list):
+            self.gc.card_mark(dst_id)
+            if self.gc.marking:
+                self.gc.shade_all(dst[dst_pos:dst_pos + length])
+
+    def get_object_type(self, object_id: int) -> Optional[str]:
+        """获取对象的类名"""
+        obj = self.heap.get(object_id)
+        return obj['class_name'] if obj else None
 
     def register_native_method(self, method_name: str, handler) -> None:
         """注册本地方法"""
         self.registered_natives[method_name] = handler
-        logger.info(f"注册本地方法: {method_name}")
\ No newline at end of file
+        logger.info(f"注册本地方法: {method_name}")
+
+    def register_native_method_proxy(self, proxy) -> None:
+        """注册本地方法代理，未单独注册的本地方法统一转发给代理"""
+        self.native_method_proxy = proxy
+
+    def call_native_method(self, method: Dict[str, Any], args: list) -> Any:
+        """调用没有字节码的方法：先查已注册的本地方法，再交给代理"""
+        class_name = method['class_name']
+        if class_name.startswith('L') and class_name.endswith(';'):
+            class_name = class_name[1:-1]
+        handler = self.registered_natives.get(f"{class_name}.{method['name']}")
+        if handler is not None:
+            return handler(self, method, args)
+        if self.native_method_proxy is not None:
+            return self.native_method_proxy(class_name, method['name'], args)
+        logger.warning(f"未实现的方法: {class_name}.{method['name']}")
+        return None
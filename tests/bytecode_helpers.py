@@ -0,0 +1,213 @@
+# tests/bytecode_helpers.py
+"""测试用的Dalvik字节码汇编辅助函数"""
+import struct
+
+from src.core.dalvik.dex_parser import DEXParser
+from src.core.dalvik.opcodes import decode_instructions
+
+
+def i10x(op):
+    return [op]
+
+
+def i11x(op, a):
+    return [op | (a << 8)]
+
+
+def i11n(op, a, literal):
+    return [op | ((a | ((literal & 0xF) << 4)) << 8)]
+
+
+def i12x(op, a, b):
+    return [op | ((a | (b << 4)) << 8)]
+
+
+def i10t(op, offset):
+    return [op | ((offset & 0xFF) << 8)]
+
+
+def i20t(op, offset):
+    return [op, offset & 0xFFFF]
+
+
+def i21s(op, a, literal):
+    return [op | (a << 8), literal & 0xFFFF]
+
+
+def i21t(op, a, offset):
+    return [op | (a << 8), offset & 0xFFFF]
+
+
+def i21c(op, a, index):
+    return [op | (a << 8), index]
+
+
+def i22b(op, a, b, literal):
+    return [op | (a << 8), b | ((literal & 0xFF) << 8)]
+
+
+def i22c(op, a, b, index):
+    return [op | ((a | (b << 4)) << 8), index]
+
+
+def i22s(op, a, b, literal):
+    return [op | ((a | (b << 4)) << 8), literal & 0xFFFF]
+
+
+def i22t(op, a, b, offset):
+    return [op | ((a | (b << 4)) << 8), offset & 0xFFFF]
+
+
+def i23x(op, a, b, c):
+    return [op | (a << 8), b | (c << 8)]
+
+
+def i31i(op, a, literal):
+    literal &= 0xFFFFFFFF
+    return [op | (a << 8), literal & 0xFFFF, literal >> 16]
+
+
+def i31t(op, a, offset):
+    return i31i(op, a, offset)
+
+
+def invoke(op, index, regs):
+    """35c 调用指令"""
+    count = len(regs)
+    padded = list(regs) + [0] * (5 - count)
+    return [op | ((padded[4] | (count << 4)) << 8), index,
+            padded[0] | (padded[1] << 4) | (padded[2] << 8) | (padded[3] << 12)]
+
+
+def invoke_range(op, index, first, count):
+    """3rc 调用指令"""
+    return [op | (count << 8), index, first]
+
+
+def i51l(op, a, literal):
+    literal &= 0xFFFFFFFFFFFFFFFF
+    return [op | (a << 8)] + [(literal >> shift) & 0xFFFF for shift in (0, 16, 32, 48)]
+
+
+def _s32_units(value):
+    value &= 0xFFFFFFFF
+    return [value & 0xFFFF, value >> 16]
+
+
+def packed_switch_payload(first_key, offsets):
+    """packed-switch 负载，offsets 相对于 switch 指令"""
+    units = [0x0100, len(offsets)] + _s32_units(first_key)
+    for offset in offsets:
+        units.extend(_s32_units(offset))
+    return units
+
+
+def sparse_switch_payload(cases):
+    """sparse-switch 负载，cases 为 键 -> 相对于 switch 指令的偏移"""
+    keys = sorted(cases)
+    units = [0x0200, len(keys)]
+    for key in keys:
+        units.extend(_s32_units(key))
+    for key in keys:
+        units.extend(_s32_units(cases[key]))
+    return units
+
+
+def fill_array_payload(element_width, values, fmt):
+    """fill-array-data 负载，values 按 struct 格式 fmt 打包"""
+    raw = struct.pack('<' + fmt * len(values), *values)
+    if len(raw) % 2:
+        raw += b'\x00'
+    units = [0x0300, element_width, len(values) & 0xFFFF, len(values) >> 16]
+    units.extend(struct.unpack('<%dH' % (len(raw) // 2), raw))
+    return units
+
+
+def float_bits(value):
+    return struct.unpack('<i', struct.pack('<f', value))[0]
+
+
+def double_bits(value):
+    return struct.unpack('<q', struct.pack('<d', value))[0]
+
+
+def assemble(*parts):
+    """把若干指令的代码单元拼接为一个列表"""
+    units = []
+    for part in parts:
+        units.extend(part)
+    return units
+
+
+def build_code(units, registers_size, ins_size=0, tries=None):
+    """由代码单元构造与 DEXParser 输出一致的代码项"""
+    insns = [{'opcode': unit & 0xFF, 'registers': unit >> 8, 'offset': i * 2}
+             for i, unit in enumerate(units)]
+    decode_instructions(insns)
+    return {
+        'registers_size': registers_size,
+        'ins_size': ins_size,
+        'outs_size': 0,
+        'tries_size': len(tries or []),
+        'insns': insns,
+        'tries': tries or [],
+    }
+
+
+def make_method(parser, units, registers_size, ins_size=0, name='run', class_name='LTest;', code_off=None,
+                parameters=None, return_type='V', tries=None):
+    """向解析器注册一个静态方法并返回方法描述，parameters 默认为 ins_size 个 int"""
+    if code_off is None:
+        code_off = 0x1000 + len(parser.code_items) * 0x100
+    if parameters is None:
+        parameters = ['I'] * ins_size
+    parser.code_items[code_off] = build_code(units, registers_size, ins_size, tries)
+    shorty = ''.join(t if len(t) == 1 else 'L' for t in [return_type] + list(parameters))
+    return {'class_name': class_name, 'name': name, 'code_off': code_off, 'access_flags': 0x9,
+            'proto': {'shorty': shorty, 'return_type': return_type, 'parameters': list(parameters)}}
+
+
+def method_ref(parser, class_name, name, parameters=(), return_type='V', code_off=0):
+    """向解析器的 method_ids 追加方法引用，返回方法索引"""
+    parameters = list(parameters)
+    shorty = ''.join(t if len(t) == 1 else 'L' for t in [return_type] + parameters)
+    parser.method_ids.append({
+        'class_name': class_name, 'name': name, 'code_off': code_off,
+        'proto': {'shorty': shorty, 'return_type': return_type, 'parameters': parameters},
+    })
+    return len(parser.method_ids) - 1
+
+
+def field_ref(parser, class_name, name, type_name):
+    """向解析器的 field_ids 追加字段引用，返回字段索引"""
+    parser.field_ids.append({'class_name': class_name, 'name': name, 'type_name': type_name})
+    return len(parser.field_ids) - 1
+
+
+def make_class(parser, class_name, superclass_name='Ljava/lang/Object;', static_fields=(), static_values=(),
+               clinit=None):
+    """向解析器注册类定义
+
+    static_fields 为 (字段名, 类型) 列表，clinit 为 (代码单元, 寄存器数)
+    """
+    fields = [{'field_idx': field_ref(parser, class_name, name, type_name), 'access_flags': 0x8}
+              for name, type_name in static_fields]
+    direct_methods = []
+    if clinit is not None:
+        units, registers_size = clinit
+        method = make_method(parser, units, registers_size, name='<clinit>', class_name=class_name)
+        index = method_ref(parser, class_name, '<clinit>', code_off=method['code_off'])
+        direct_methods.append({'method_idx': index, 'access_flags': 0x10008, 'code_off': method['code_off']})
+    class_def = {
+        'class_name': class_name, 'superclass_name': superclass_name, 'interfaces': [],
+        'static_fields': fields, 'instance_fields': [], 'direct_methods': direct_methods,
+        'virtual_methods': [], 'static_values': list(static_values),
+    }
+    parser.class_defs.append(class_def)
+    parser.class_by_name[class_name] = class_def
+    return class_def
+
+
+def new_parser():
+    """创建一个不含DEX数据的解析器，测试直接填充 code_items"""
+    return DEXParser(b'')
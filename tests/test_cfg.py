@@ -0,0 +1,71 @@
+# tests/test_cfg.py
+import unittest
+
+from src.core.dalvik.cfg import get_cfg
+from tests.bytecode_helpers import (
+    assemble, build_code, i10x, i11n, i11x, i10t, i22b, i22t, i23x,
+)
+
+
+class TestControlFlowGraph(unittest.TestCase):
+
+    def nested_loops(self):
+        # for (i = 0; i < n; i++) for (j = 0; j < n; j++) s += j;
+        return build_code(assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0      (s)
+            i11n(0x12, 1, 0),            # 1: const/4 v1, 0      (i)
+            i22t(0x35, 1, 4, 13),        # 2: if-ge v1, v4, +13 -> 15
+            i11n(0x12, 2, 0),            # 4: const/4 v2, 0      (j)
+            i22t(0x35, 2, 4, 7),         # 5: if-ge v2, v4, +7 -> 12
+            i23x(0x90, 0, 0, 2),         # 7: add-int v0, v0, v2
+            i22b(0xD8, 2, 2, 1),         # 9: add-int/lit8 v2, v2, 1
+            i10t(0x28, -6),              # 11: goto -> 5
+            i22b(0xD8, 1, 1, 1),         # 12: add-int/lit8 v1, v1, 1
+            i10t(0x28, -12),             # 14: goto -> 2
+            i11x(0x0F, 0),               # 15: return v0
+        ), 5, ins_size=1)
+
+    def test_blocks_and_edges(self):
+        cfg = get_cfg(self.nested_loops())
+        self.assertEqual([block.start for block in cfg.blocks], [0, 2, 4, 5, 7, 12, 15])
+        self.assertEqual(cfg.block_at(9).index, 4)
+        self.assertEqual(sorted(cfg.block_at(2).successors), [2, 6])
+        self.assertEqual(sorted(cfg.block_at(2).predecessors), [0, 5])
+        self.assertEqual(cfg.unreachable_pcs(), [])
+
+    def test_dominators_and_loop_nest(self):
+        cfg = get_cfg(self.nested_loops())
+        self.assertTrue(cfg.dominates(1, 4))
+        self.assertFalse(cfg.dominates(4, 5))
+        self.assertEqual(cfg.blocks[6].idom, 1)
+
+        self.assertEqual(len(cfg.loops), 2)
+        outer, inner = cfg.loops
+        self.assertEqual((outer.header, inner.header), (1, 3))
+        self.assertIs(inner.parent, outer)
+        self.assertEqual(inner.blocks, {3, 4})
+        self.assertEqual([block.loop_depth for block in cfg.blocks], [0, 1, 1, 2, 2, 1, 0])
+        self.assertTrue(cfg.back_edge(4, 3))
+        self.assertFalse(cfg.irreducible)
+
+    def test_memoized_on_code_item(self):
+        code = self.nested_loops()
+        self.assertIs(get_cfg(code), get_cfg(code))
+
+    def test_handler_edges_and_unreachable_block(self):
+        tries = [{'start_addr': 0, 'insn_count': 2, 'handler_off': 0, 'catch_all': 4, 'handlers': []}]
+        code = build_code(assemble(
+            i23x(0x93, 0, 1, 2),         # 0: div-int v0, v1, v2
+            i11x(0x0F, 0),               # 2: return v0
+            i10x(0x0E),                  # 3: return-void（不可达）
+            i11x(0x0F, 1),               # 4: return v1（处理器）
+        ), 3, ins_size=2, tries=tries)
+        cfg = get_cfg(code)
+        self.assertEqual(cfg.handler_pcs(0), [4])
+        self.assertEqual(cfg.handler_pcs(2), [])
+        self.assertEqual(cfg.unreachable_pcs(), [3])
+        self.assertEqual(cfg.block_at(4).idom, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# tests/test_class_linker.py
+import unittest
+
+from src.core.dalvik.vm import DalvikVM
+from src.core.dalvik.dex_parser import DEXParser
+from src.core.dalvik.opcodes import SGET_QUICK
+from src.core.dalvik.class_linker import INITIALIZED, ERROR
+from tests.bytecode_helpers import (
+    assemble, make_class, make_method, new_parser, i11n, i11x, i21c, i22b, i23x,
+)
+
+
+def sget_field(parser, class_name, name):
+    return next(i for i, f in enumerate(parser.field_ids) if f['class_name'] == class_name and f['name'] == name)
+
+
+class TestClassInitialization(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+
+    def run_code(self, units, registers_size):
+        self.method = make_method(self.parser, units, registers_size)
+        return self.vm.interpreter.interpret(self.method, {}, self.parser)
+
+    def test_static_values_and_clinit_run_once(self):
+        # static int x = 5 (encoded); static String s = "hi"; static { x += 1; }
+        make_class(self.parser, 'LA;', static_fields=[('x', 'I'), ('s', 'Ljava/lang/String;'), ('y', 'J')],
+                   static_values=[5, ('string', 'hi')],
+                   clinit=(assemble(
+                       i21c(0x60, 0, 0),            # sget v0, A.x
+                       i22b(0xD8, 0, 0, 1),         # add-int/lit8 v0, v0, 1
+                       i21c(0x67, 0, 0),            # sput v0, A.x
+                       [0x000E],                    # return-void
+                   ), 1))
+        units = assemble(
+            i21c(0x60, 0, sget_field(self.parser, 'LA;', 'x')),
+            i21c(0x62, 1, sget_field(self.parser, 'LA;', 's')),
+            i11x(0x0F, 0),
+        )
+        self.assertEqual(self.run_code(units, 2), 6)
+        self.assertIs(self.vm.interpreter.registers[1], self.vm.strings.intern('hi'))
+        self.assertEqual(self.vm.classes.classes['LA;'].statics[2], 0)
+
+        # 指令已改写为快速形式，再次执行不会重复初始化
+        insn = self.parser.code_items[self.method['code_off']]['insns'][0]
+        self.assertEqual(insn['opcode'], SGET_QUICK)
+        self.assertEqual(insn['quickened'], 0x60)
+        self.assertEqual(self.vm.interpreter.interpret(self.method, {}, self.parser), 6)
+
+    def test_superclass_initialized_first(self):
+        make_class(self.parser, 'LBase;', static_fields=[('ready', 'I')],
+                   clinit=(assemble(i11n(0x12, 0, 1), i21c(0x67, 0, 0), [0x000E]), 1))
+        base_ready = sget_field(self.parser, 'LBase;', 'ready')
+        make_class(self.parser, 'LDerived;', superclass_name='LBase;', static_fields=[('copy', 'I')],
+                   clinit=(assemble(
+                       i21c(0x60, 0, base_ready),
+                       i21c(0x67, 0, len(self.parser.field_ids)),   # sput v0, Derived.copy
+                       [0x000E],
+                   ), 1))
+        units = assemble(i21c(0x60, 0, sget_field(self.parser, 'LDerived;', 'copy')), i11x(0x0F, 0))
+        self.assertEqual(self.run_code(units, 1), 1)
+        self.assertEqual(self.vm.classes.classes['LBase;'].state, INITIALIZED)
+
+    def test_recursive_initialization_sees_partial_state(self):
+        # A.<clinit> 读取 B.v；B.<clinit> 读取正在初始化的 A.x（此时只有编码初始值）
+        make_class(self.parser, 'LA;', static_fields=[('x', 'I'), ('fromB', 'I')], static_values=[7],
+                   clinit=(assemble(i21c(0x60, 0, 2), i21c(0x67, 0, 1), [0x000E]), 1))
+        make_class(self.parser, 'LB;', static_fields=[('v', 'I')],
+                   clinit=(assemble(
+                       i21c(0x60, 0, 0),            # sget v0, A.x
+                       i22b(0xDA, 0, 0, 10),        # mul-int/lit8 v0, v0, 10
+                       i21c(0x67, 0, 2),            # sput v0, B.v
+                       [0x000E],
+                   ), 1))
+        units = assemble(i21c(0x60, 0, 1), i11x(0x0F, 0))
+        self.assertEqual(self.run_code(units, 1), 70)
+
+    def test_failed_clinit(self):
+        make_class(self.parser, 'LBad;', static_fields=[('x', 'I')],
+                   clinit=(assemble(i11n(0x12, 0, 0), i23x(0x93, 0, 0, 0), [0x000E]), 1))  # div-int 0/0
+        units = assemble(i21c(0x60, 0, 0), i11x(0x0F, 0))
+        self.run_code(units, 1)
+        self.assertTrue(self.vm.interpreter.exception.startswith("ExceptionInInitializerError"))
+        self.assertEqual(self.vm.classes.classes['LBad;'].state, ERROR)
+        self.vm.interpreter.interpret(self.method, {}, self.parser)
+        self.assertTrue(self.vm.interpreter.exception.startswith("NoClassDefFoundError"))
+
+
+class TestEncodedValues(unittest.TestCase):
+
+    def test_read_encoded_array(self):
+        data = bytes([
+            6,                  # 元素个数
+            0x04, 0xFE,         # int -2
+            0x30, 0xC0, 0x3F,   # float 1.5，只存储高2字节
+            0x3F,               # boolean true
+            0x1E,               # null
+            0x17, 0x00,         # string@0
+            0x26, 0x00, 0x01,   # long 0x100
+        ])
+        parser = DEXParser(data)
+        parser.string_ids = ['abc']
+        values, end = parser._read_encoded_array(0)
+        self.assertEqual(values, [-2, 1.5, 1, 0, ('string', 'abc'), 0x100])
+        self.assertEqual(end, len(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# tests/test_code_cache.py
+import os
+import tempfile
+import unittest
+
+from src.core.dalvik.vm import DalvikVM
+from tests.bytecode_helpers import (
+    assemble, make_class, make_method, new_parser, i10t, i11n, i11x, i21c, i21t, i22b, i22t, i23x,
+)
+
+
+class TestCodeCache(unittest.TestCase):
+    """每次 launch 创建新的虚拟机和解析器，模拟进程重启"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def launch(self):
+        self.vm = DalvikVM()
+        self.jit = self.vm.jit
+        self.jit.background = False
+        self.jit.compilation_threshold = 3
+        self.jit.optimize_threshold = 5
+        self.cache = self.jit.enable_code_cache(self.directory.name)
+        self.parser = new_parser()
+        self.parser.type_ids.append('LFoo;')
+        foo = make_class(self.parser, 'LFoo;', static_fields=[('count', 'I')])
+        count = foo['static_fields'][0]['field_idx']
+        self.loop = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i11n(0x12, 1, 0),            # 1: const/4 v1, 0
+            i22t(0x35, 1, 2, 7),         # 2: if-ge v1, v2, +7 -> 9
+            i23x(0x90, 0, 0, 1),         # 4: add-int v0, v0, v1
+            i22b(0xD8, 1, 1, 1),         # 6: add-int/lit8 v1, v1, 1
+            i10t(0x28, -6),              # 8: goto -> 2
+            i11x(0x0F, 0),               # 9: return v0
+        ), 3, ins_size=1, name='sum', return_type='I')
+        self.counter = make_method(self.parser, assemble(
+            i21c(0x60, 0, count),        # sget v0, LFoo;->count
+            i23x(0x90, 0, 0, 1),         # add-int v0, v0, v1
+            i21c(0x67, 0, count),        # sput v0, LFoo;->count
+            i11x(0x0F, 0),               # return v0
+        ), 2, ins_size=1, name='add', return_type='I')
+        self.sign = make_method(self.parser, assemble(
+            i21t(0x3B, 1, 4),            # 0: if-gez v1, +4 -> 4
+            i11n(0x12, 0, -1),           # 2: const/4 v0, -1
+            i11x(0x0F, 0),               # 3: return v0
+            i22b(0xDA, 0, 1, 2),         # 4: mul-int/lit8 v0, v1, 2
+            i11x(0x0F, 0),               # 6: return v0
+        ), 2, ins_size=1, name='sign', return_type='I')
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def code(self, method):
+        return self.parser.code_items[method['code_off']]
+
+    def test_warm_launch_loads_compiled_code_on_first_call(self):
+        self.launch()
+        for _ in range(4):
+            self.assertEqual(self.call(self.loop, 10), 45)
+        self.assertEqual(self.cache.stats['stores'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'index.json')))
+
+        self.launch()
+        self.assertEqual(self.call(self.loop, 10), 45)
+        code = self.code(self.loop)
+        self.assertTrue(callable(code['jit']))
+        self.assertTrue(code['cached'])
+        self.assertNotIn('invocations', code)
+        self.assertEqual(self.jit.stats['compiled'], 0)
+        self.assertEqual(self.jit.status()['code_cache']['hits'], 1)
+        self.assertIn('while True', code['jit'].source)
+
+    def test_different_dex_signature_misses(self):
+        self.launch()
+        for _ in range(4):
+            self.call(self.loop, 3)
+
+        self.launch()
+        self.parser.header['signature'] = bytes(range(20))
+        self.assertEqual(self.call(self.loop, 3), 3)
+        self.assertIs(self.code(self.loop)['cached'], False)
+        self.assertNotIn('jit', self.code(self.loop))
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_static_field_assumption_retried_until_class_initialized(self):
+        self.launch()
+        for i in range(4):
+            self.call(self.counter, 1)
+        self.assertNotIn('_static_field(', self.code(self.counter)['jit'].source)
+
+        # 新进程中 LFoo; 尚未初始化：第一次调用解释执行并初始化类，第二次调用加载缓存的版本
+        self.launch()
+        self.assertEqual(self.call(self.counter, 5), 5)
+        self.assertNotIn('jit', self.code(self.counter))
+        self.assertEqual(self.cache.stats['stale'], 1)
+        self.assertEqual(self.call(self.counter, 2), 7)
+        self.assertTrue(self.code(self.counter)['cached'])
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_cached_optimized_code_deoptimizes_to_interpreter(self):
+        self.launch()
+        for i in range(8):
+            self.call(self.sign, i)
+        self.assertEqual(self.code(self.sign)['tier'], 2)
+        self.assertEqual(self.cache.index[self.code(self.sign)['cache_key']]['tier'], 2)
+
+        self.launch()
+        code = self.code(self.sign)
+        self.assertEqual(self.call(self.sign, 3), 6)
+        self.assertEqual(code['tier'], 2)
+        self.assertNotIn('baseline', code)
+
+        # 没有基线版本可退回：回到解释执行，达到阈值后重新编译基线版本并覆盖缓存条目
+        self.assertEqual(self.call(self.sign, -3), -1)
+        self.assertNotIn('jit', code)
+        for i in range(3):
+            self.assertEqual(self.call(self.sign, -i), 0 if i == 0 else -1)
+        self.assertEqual(code['tier'], 1)
+        self.assertEqual(self.cache.index[code['cache_key']]['tier'], 1)
+
+    def test_corrupt_entry_is_discarded(self):
+        self.launch()
+        for _ in range(4):
+            self.call(self.loop, 4)
+        entry = self.cache.index[self.code(self.loop)['cache_key']]
+        with open(os.path.join(self.directory.name, entry['file']), 'wb') as f:
+            f.write(b'\x00garbage')
+
+        self.launch()
+        self.assertEqual(self.call(self.loop, 4), 6)
+        self.assertNotIn('jit', self.code(self.loop))
+        self.assertEqual(self.cache.stats['errors'], 1)
+        self.assertEqual(self.cache.index, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# tests/test_dex2py.py
+import os
+import tempfile
+import unittest
+
+from src.core.dalvik.dex2py import BUNDLE, PACKAGE, compile_dex
+from src.core.dalvik.vm import DalvikVM
+from tests.bytecode_helpers import (
+    assemble, make_class, make_method, method_ref, new_parser, i10t, i11n, i11x, i21c, i22b, i22t, i23x,
+)
+
+
+class TestDex2Py(unittest.TestCase):
+    """编译与加载使用各自的解析器和虚拟机，模拟构建时编译、运行时加载"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def build(self):
+        self.vm = DalvikVM()
+        self.vm.jit.background = False
+        self.parser = parser = new_parser()
+        parser.type_ids.append('LFoo;')
+        foo = make_class(parser, 'LFoo;', static_fields=[('count', 'I')])
+        count = foo['static_fields'][0]['field_idx']
+        self.sum = self.register(make_method(parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i11n(0x12, 1, 0),            # 1: const/4 v1, 0
+            i22t(0x35, 1, 2, 7),         # 2: if-ge v1, v2, +7 -> 9
+            i23x(0x90, 0, 0, 1),         # 4: add-int v0, v0, v1
+            i22b(0xD8, 1, 1, 1),         # 6: add-int/lit8 v1, v1, 1
+            i10t(0x28, -6),              # 8: goto -> 2
+            i11x(0x0F, 0),               # 9: return v0
+        ), 3, ins_size=1, name='sum', return_type='I'))
+        self.add = self.register(make_method(parser, assemble(
+            i21c(0x60, 0, count),        # sget v0, LFoo;->count
+            i23x(0x90, 0, 0, 1),         # add-int v0, v0, v1
+            i21c(0x67, 0, count),        # sput v0, LFoo;->count
+            i11x(0x0F, 0),               # return v0
+        ), 2, ins_size=1, name='add', class_name='LFoo;', return_type='I'))
+        self.broken = self.register(make_method(parser, assemble(
+            i11x(0x0F, 5),               # return v5：寄存器越界，不能通过校验
+        ), 2, ins_size=1, name='broken', return_type='I'))
+
+    def register(self, method):
+        method_ref(self.parser, method['class_name'], method['name'], method['proto']['parameters'],
+                   method['proto']['return_type'], code_off=method['code_off'])
+        return method
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def code(self, method):
+        return self.parser.code_items[method['code_off']]
+
+    def compile_and_reload(self, output_format, processes=1):
+        self.build()
+        output = os.path.join(self.directory.name, 'image' if output_format == PACKAGE else 'image.bundle')
+        report = compile_dex(self.parser, output, output_format, processes)
+        self.build()
+        return report, self.vm.load_aot(output, self.parser)
+
+    def check_loaded(self, report, loaded):
+        self.assertEqual(report['methods'], 3)
+        self.assertEqual(report['compiled'], 2)
+        self.assertEqual(list(report['failed']), ['LTest;->broken(I)I'])
+        self.assertEqual(loaded, {'installed': 2, 'skipped': 0, 'error': None})
+
+        # 第一次调用就执行编译版本，类初始化检查保留在生成代码中
+        for method in (self.sum, self.add):
+            self.assertEqual(self.code(method)['tier'], 1)
+        self.assertEqual(self.call(self.sum, 5), 10)
+        self.assertEqual(self.call(self.add, 3), 3)
+        self.assertEqual(self.call(self.add, 4), 7)
+        self.assertNotIn('invocations', self.code(self.sum))
+        self.assertNotIn('jit', self.code(self.broken))
+
+    def test_package_image(self):
+        report, loaded = self.compile_and_reload(PACKAGE)
+        self.assertTrue(os.path.isfile(os.path.join(report['output'], '__init__.py')))
+        self.check_loaded(report, loaded)
+        self.assertIn('def ', self.code(self.sum)['jit'].source)
+
+    def test_bundle_image_compiled_in_parallel(self):
+        report, loaded = self.compile_and_reload(BUNDLE, processes=2)
+        self.assertEqual(report['processes'], 2)
+        self.check_loaded(report, loaded)
+
+    def test_evicted_method_returns_to_aot_version(self):
+        self.compile_and_reload(PACKAGE)
+        jit = self.vm.jit
+        jit.optimize_threshold = 2
+        code = self.code(self.sum)
+        aot = code['jit']
+        for i in range(4):
+            self.assertEqual(self.call(self.sum, 4), 6)
+        self.assertEqual(code['tier'], 2)
+        self.assertEqual(jit.code_space.size, code['code_size'])
+
+        # AOT版本不计入代码空间，逐出优化版本后回到它
+        jit.code_space.clear()
+        self.assertIs(code['jit'], aot)
+        self.assertEqual(code['tier'], 1)
+        self.assertEqual(jit.code_space.size, 0)
+        self.assertEqual(self.call(self.sum, 4), 6)
+
+    def test_image_of_other_dex_ignored(self):
+        self.build()
+        output = os.path.join(self.directory.name, 'image')
+        compile_dex(self.parser, output, PACKAGE, 1)
+        self.build()
+        self.parser.header['signature'] = bytes(range(20))
+        loaded = self.vm.load_aot(output, self.parser)
+        self.assertEqual(loaded['installed'], 0)
+        self.assertIsNotNone(loaded['error'])
+        self.assertNotIn('jit', self.code(self.sum))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+# tests/test_gc.py
+import unittest
+
+from src.core.dalvik.gc import CARD_SIZE, PAUSE_BUCKETS
+from src.core.dalvik.vm import DalvikVM
+from tests.bytecode_helpers import assemble, field_ref, make_class, make_method, new_parser, i10x, i11n, i22c
+
+
+class TestGenerationalGC(unittest.TestCase):
+    """根集合直接写入解释器寄存器（没有代码项时保守扫描全部寄存器）"""
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.gc = self.vm.gc
+        self.size = self.vm.classes.instance_size('LFoo;')  # 未链接的类：只有对象头
+        self.gc.nursery_size = 4 * self.size     # 每4个对象一次次要回收
+        self.gc.promotion_age = 2
+        self.roots = self.vm.interpreter.registers = []
+
+    def allocate(self, count):
+        return [self.vm._create_object('LFoo;') for _ in range(count)]
+
+    def test_short_lived_objects_die_in_minor_collections(self):
+        for _ in range(10):
+            self.allocate(4)
+        report = self.gc.report()
+        self.assertGreaterEqual(report['minor']['count'], 9)
+        self.assertEqual(report['major']['count'], 0)
+        self.assertEqual(report['minor']['promoted'], 0)
+        self.assertLessEqual(len(self.vm.heap), 4)
+        self.assertEqual(report['old'], 0)
+
+    def test_survivors_promoted_after_promotion_age(self):
+        keep = self.allocate(2)
+        self.roots.extend(keep)
+        self.gc.collect_minor()
+        self.assertEqual(self.gc.young, {keep[0]: 1, keep[1]: 1})
+        self.gc.collect_minor()
+        self.assertEqual(self.gc.young, {})
+        self.assertEqual(self.gc.old, set(keep))
+        self.assertEqual(self.gc.old_used, 2 * self.size)
+        self.assertEqual(self.gc.stats['minor']['promoted'], 2)
+
+    def test_old_to_young_references_keep_young_objects(self):
+        self.gc.nursery_size = 1 << 40
+        holder, = self.allocate(1)
+        self.roots.append(holder)
+        self.gc.collect_minor()
+        self.gc.collect_minor()
+        self.assertIn(holder, self.gc.old)
+
+        child, garbage = self.allocate(2)
+        array_holder = self.vm._create_array('[Ljava/lang/Object;', 1)
+        self.vm.heap[holder]['fields']['child'] = child
+        self.vm.heap[holder]['fields']['array'] = array_holder
+        self.gc.card_mark(holder)                # 与 iput-object 的卡表写屏障相同
+        element, = self.allocate(1)
+        self.vm.set_array_element(array_holder, 0, element)
+        self.gc.collect_minor()
+        self.assertEqual(set(self.gc.young), {child, array_holder, element})
+        self.assertNotIn(garbage, self.vm.heap)
+
+    def test_minor_collection_scans_only_dirty_cards(self):
+        self.gc.nursery_size = 1 << 40
+        parser = new_parser()
+        field = field_ref(parser, 'LFoo;', 'next', 'LFoo;')
+        store = make_method(parser, assemble(
+            i22c(0x5B, 1, 0, field),             # iput-object v1, v0, LFoo;->next
+            i10x(0x0E),                          # return-void
+        ), 2, ins_size=2, parameters=['LFoo;', 'LFoo;'], return_type='V')
+        old = self.allocate(10 * CARD_SIZE)
+        self.roots.extend(old)
+        self.gc.collect_minor()
+        self.gc.collect_minor()
+        self.assertEqual(len(self.gc.old), len(old))
+
+        holder = old[5 * CARD_SIZE]
+        child, garbage = self.allocate(2)
+        self.vm.interpreter.invoke_method(store, parser, [holder, child])
+        self.gc.collect_minor()
+        cards = self.gc.card_stats
+        self.assertEqual(cards['dirty'], 1)
+        self.assertLessEqual(cards['scanned_objects'], CARD_SIZE)
+        self.assertAlmostEqual(cards['dirty_ratio'], 1 / cards['cards'])
+        self.assertIn(child, self.gc.young)
+        self.assertNotIn(garbage, self.vm.heap)
+
+        # child 仍在新生代，卡保持为脏；晋升后不再扫描
+        self.gc.collect_minor()
+        self.assertEqual(self.gc.card_stats['dirty'], 1)
+        self.assertIn(child, self.gc.old)
+        self.gc.collect_minor()
+        self.assertEqual(self.gc.card_stats['dirty'], 0)
+        self.assertEqual(self.gc.report()['cards']['scanned_objects'], 0)
+
+    def test_major_collection_only_when_old_generation_full(self):
+        self.gc.heap_size = self.gc.growth_limit = 16 * self.size  # 固定堆大小
+        self.gc.gc_threshold = 0.5               # 老年代达到8个对象时完整回收
+        for _ in range(12):
+            kept = self.allocate(4)
+            self.roots.extend(kept)
+            if len(self.roots) > 8:
+                del self.roots[:4]               # 老年代对象随后变为不可达
+        stats = self.gc.stats
+        self.assertGreater(stats['minor']['count'], stats['major']['count'])
+        self.assertGreater(stats['major']['count'], 0)
+        self.assertGreater(stats['major']['freed'], 0)
+        self.assertLess(self.gc.old_used, 12 * self.size)
+        self.assertEqual(self.gc.used_heap, self.gc.young_used + self.gc.old_used)
+        self.assertEqual(set(self.vm.heap), set(self.gc.young) | self.gc.old)
+
+    def test_deep_object_graph_marked_without_recursion(self):
+        self.gc.nursery_size = 1 << 40
+        nodes = self.allocate(20000)
+        for node, successor in zip(nodes, nodes[1:]):
+            self.vm.heap[node]['fields']['next'] = successor
+        garbage = self.allocate(3)
+        self.roots.append(nodes[0])
+        self.gc.collect_minor()
+        self.assertEqual(len(self.gc.young), 20000)
+        self.gc.collect()
+        self.assertEqual(set(self.vm.heap), set(nodes))
+        self.assertEqual(self.gc.stats['major']['freed'], 0)
+        self.assertEqual(self.gc.stats['minor']['freed'], 3)
+        self.assertFalse(any(self.gc.allocated[object_id] for object_id in garbage))
+        self.assertEqual(sum(self.gc.allocated), 20000)
+
+    def test_freed_ids_reused_and_id_space_stays_bounded(self):
+        table = self.vm.object_table
+        keep = self.allocate(1)
+        self.roots.extend(keep)
+        for _ in range(1000):
+            self.allocate(4)
+        self.assertEqual(table.stats['allocations'], 4001)
+        self.assertLessEqual(table.next_id, 10)   # 清除的ID都与 next_id 相连，直接退回
+        self.assertLessEqual(len(self.gc.allocated), 32)
+
+        # 复用最小的空闲ID，与 next_id 相连的空闲ID退回
+        self.gc.nursery_size = 1 << 40
+        self.roots[:] = self.allocate(3)
+        garbage = self.allocate(1)
+        self.gc.collect()
+        self.assertEqual(table.next_id, max(self.roots) + 1)
+        self.assertNotIn(garbage[0], self.vm.heap)
+        reused, = self.allocate(1)
+        self.assertEqual(reused, min(set(range(1, table.next_id)) - set(self.roots)))
+        self.assertEqual(table.stats['reused'], 1)
+        self.assertTrue(self.gc.allocated[reused])
+        self.assertEqual(len(self.vm.heap), 4)
+
+
+class TestHeapSizing(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.gc = self.vm.gc
+        self.gc.nursery_size = 1 << 40
+        self.roots = self.vm.interpreter.registers = []
+
+    def test_object_sizes_follow_class_layout_and_array_length(self):
+        parser = new_parser()
+        for class_name, superclass_name, fields in (('LPoint;', 'Ljava/lang/Object;', ['I', 'J', 'LFoo;', 'Z']),
+                                                    ('LPoint3;', 'LPoint;', ['D'])):
+            class_def = make_class(parser, class_name, superclass_name)
+            class_def['instance_fields'] = [{'field_idx': field_ref(parser, class_name, f'f{i}', type_name)}
+                                            for i, type_name in enumerate(fields)]
+        self.vm.classes.get_class(parser, 'LPoint3;')
+
+        sizes = {'LPoint;': 32,                  # 8 + 4 + 8 + 4 + 1 = 25，按8字节对齐
+                 'LPoint3;': 40}                 # 父类的25字节 + 8
+        for class_name, size in sizes.items():
+            object_id = self.vm._create_object(class_name)
+            self.assertEqual(self.vm.heap[object_id]['size'], size)
+        arrays = {('[I', 10): 56, ('[J', 3): 40, ('[LFoo;', 5): 32, ('[Z', 0): 16}
+        for (type_name, length), size in arrays.items():
+            array_id = self.vm._create_array(type_name, length)
+            self.assertEqual(self.vm.heap[array_id]['size'], size, type_name)
+        self.assertEqual(self.gc.young_used, sum(sizes.values()) + sum(arrays.values()))
+        self.assertEqual(self.gc.allocated_bytes, self.gc.young_used)
+
+    def test_heap_resized_by_target_utilization_after_major_collection(self):
+        gc = self.gc
+        gc.max_gc_time_ratio = 1.0               # 不按GC时间放大
+        gc.min_heap_size = 0
+        keep = self.vm._create_array('[I', 60000)
+        self.roots.append(keep)
+        self.vm._create_array('[I', 60000)
+        gc.collect()
+        live = gc.used_heap
+        self.assertEqual(live, self.vm.heap[keep]['size'])
+        self.assertEqual(gc.heap_size, live + gc.min_free)   # live / 0.75 - live < min_free
+
+        gc.min_free = 0
+        gc.collect()
+        self.assertEqual(gc.heap_size, int(live / gc.target_utilization))
+
+        gc.max_free = 1000
+        gc.collect()
+        self.assertEqual(gc.heap_size, live + 1000)
+
+        gc.max_gc_time_ratio = 0.0               # GC时间占比超标：空闲空间加倍
+        gc.collect()
+        self.assertEqual(gc.heap_size, live + 2000)
+
+        gc.min_heap_size = 1 << 20
+        gc.collect()
+        self.assertEqual(gc.heap_size, 1 << 20)
+
+        gc.growth_limit = live // 2
+        gc.collect()
+        self.assertEqual(gc.heap_size, gc.growth_limit)
+        self.assertEqual(gc.report()['heap_size'], gc.growth_limit)
+
+
+class TestIncrementalMarking(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.gc = self.vm.gc
+        self.gc.nursery_size = 1 << 40
+        self.roots = self.vm.interpreter.registers = []
+
+    def promote(self, objects):
+        """把对象直接放入老年代"""
+        for object_id in objects:
+            self.gc.young.pop(object_id)
+            self.gc.old.add(object_id)
+            size = self.vm.heap[object_id]['size']
+            self.gc.young_used -= size
+            self.gc.old_used += size
+
+    def test_marking_proceeds_in_bounded_slices(self):
+        heap = self.vm.heap
+        live = [self.vm._create_object('LFoo;') for _ in range(3000)]
+        for node, successor in zip(live, live[1:]):
+            heap[node]['fields']['next'] = successor
+        garbage = [self.vm._create_object('LFoo;') for _ in range(100)]
+        self.promote(live + garbage)
+        self.roots.append(live[0])
+        self.gc.heap_size = 3100 * self.vm.heap[live[0]]['size']
+        self.gc.gc_threshold = 0.99              # 回收垃圾后低于阈值
+        self.gc.max_pause_ms = 0.0               # 每片只处理一批对象
+
+        self.gc.collect_if_needed()
+        self.assertTrue(self.gc.marking)
+        while self.gc.marking:
+            young = self.vm._create_object('LBar;')  # 标记期间分配的对象为黑色
+            self.gc.collect_if_needed()
+        self.assertIn(young, heap)
+        self.assertGreater(self.gc.incremental_stats['slices'], 3)
+        self.assertEqual(self.gc.incremental_stats['cycles'], 1)
+        self.assertEqual(self.gc.stats['major']['freed'], 100)
+        self.assertTrue(set(live) <= set(heap))
+        # 垃圾对象的ID可能已被标记期间分配的对象复用
+        self.assertFalse(any(heap.get(object_id, {}).get('class_name') == 'LFoo;' for object_id in garbage))
+
+        # 开始、每个标记片和重新标记各是一次暂停
+        histogram = self.gc.pause_histogram()
+        self.assertEqual(len(histogram), len(PAUSE_BUCKETS) + 1)
+        self.assertEqual(sum(histogram.values()), self.gc.incremental_stats['slices'] + 2)
+        self.assertGreater(self.gc.report()['max_pause_ms'], 0)
+
+    def test_write_barrier_keeps_reference_moved_into_black_object(self):
+        parser = new_parser()
+        field = field_ref(parser, 'LFoo;', 'next', 'LFoo;')
+        move = make_method(parser, assemble(
+            i22c(0x54, 0, 3, field),             # iget-object v0, v3, LFoo;->next
+            i22c(0x5B, 0, 2, field),             # iput-object v0, v2, LFoo;->next
+            i11n(0x12, 1, 0),                    # const/4 v1, 0
+            i22c(0x5B, 1, 3, field),             # iput-object v1, v3, LFoo;->next
+            i10x(0x0E),                          # return-void
+        ), 4, ins_size=2, parameters=['LFoo;', 'LFoo;'], return_type='V')
+        black, grey, white = (self.vm._create_object('LFoo;') for _ in range(3))
+        self.vm.heap[grey]['fields']['next'] = white
+        self.roots.extend([black, grey])
+
+        # 扫描完 black 而 grey 仍在工作栈中时，把 white 从 grey 移到 black
+        self.gc.start_marking()
+        self.gc.mark_stack.remove(black)
+        self.gc._trace([black], self.gc.marks, self.gc.allocated)
+        self.assertFalse(self.gc.marks[white])
+        self.vm.interpreter.invoke_method(move, parser, [black, grey])
+        self.assertTrue(self.gc.marks[white])
+
+        while self.gc.marking:
+            self.gc._mark_slice()
+        self.assertIn(white, self.vm.heap)
+        self.assertEqual(self.vm.heap[black]['fields']['next'], white)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,291 @@
+# tests/test_interpreter.py
+import math
+import unittest
+
+from src.core.dalvik.vm import DalvikVM
+from src.core.dalvik.arrays import as_numpy, numpy
+from src.core.dalvik.registers import WIDE_HIGH, int32, int64, float32, int_div, int_rem, long_to_float
+from src.core.dalvik.strings import JavaString
+from tests.bytecode_helpers import (
+    assemble, make_method, new_parser, double_bits, float_bits,
+    i11n, i11x, i12x, i21s, i21t, i22b, i22c, i23x, i31i, i31t, i51l,
+    packed_switch_payload, sparse_switch_payload, fill_array_payload,
+)
+
+
+class TestRegisterHelpers(unittest.TestCase):
+
+    def test_int32_wraparound(self):
+        self.assertEqual(int32(0x7FFFFFFF + 1), -0x80000000)
+        self.assertEqual(int32(-0x80000000 - 1), 0x7FFFFFFF)
+
+    def test_int64_wraparound(self):
+        self.assertEqual(int64(0x7FFFFFFFFFFFFFFF + 1), -0x8000000000000000)
+
+    def test_division_truncates_toward_zero(self):
+        self.assertEqual(int_div(-7, 2), -3)
+        self.assertEqual(int_rem(-7, 2), -1)
+        self.assertEqual(int_div(-0x80000000, -1), -0x80000000)
+
+    def test_float32_rounding_and_overflow(self):
+        self.assertEqual(float32(0.1), 0.10000000149011612)
+        self.assertEqual(float32(1e300), math.inf)
+
+
+class TestArithmetic(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+
+    def run_code(self, units, registers_size, args=None):
+        method = make_method(self.parser, units, registers_size, len(args or []))
+        return self.vm.interpreter.interpret(method, {}, self.parser, args)
+
+    def test_add_int_wraps(self):
+        units = assemble(
+            i31i(0x14, 0, 0x7FFFFFFF),   # const v0, MAX_VALUE
+            i11n(0x12, 1, 1),            # const/4 v1, 1
+            i23x(0x90, 2, 0, 1),         # add-int v2, v0, v1
+            i11x(0x0F, 2),               # return v2
+        )
+        self.assertEqual(self.run_code(units, 3), -0x80000000)
+
+    def test_add_int_2addr_and_lit8(self):
+        units = assemble(
+            i11n(0x12, 0, 5),            # const/4 v0, 5
+            i11n(0x12, 1, -3),           # const/4 v1, -3
+            i12x(0xB0, 0, 1),            # add-int/2addr v0, v1
+            i22b(0xDA, 0, 0, 10),        # mul-int/lit8 v0, v0, 10
+            i11x(0x0F, 0),
+        )
+        self.assertEqual(self.run_code(units, 2), 20)
+
+    def test_long_kept_in_low_register(self):
+        units = assemble(
+            i51l(0x18, 0, 0x7FFFFFFFFFFFFFFF),  # const-wide v0, Long.MAX_VALUE
+            i21s(0x16, 2, 1),                   # const-wide/16 v2, 1
+            i23x(0x9B, 4, 0, 2),                # add-long v4, v0, v2
+            i11x(0x10, 4),                      # return-wide v4
+        )
+        self.assertEqual(self.run_code(units, 6), -0x8000000000000000)
+        self.assertEqual(self.vm.interpreter.registers[5], WIDE_HIGH)
+
+    def test_double_arithmetic_is_not_masked(self):
+        units = assemble(
+            i51l(0x18, 0, double_bits(1.5)),
+            i51l(0x18, 2, double_bits(2.25)),
+            i23x(0xAD, 4, 0, 2),                # mul-double v4, v0, v2
+            i11x(0x10, 4),
+        )
+        self.assertEqual(self.run_code(units, 6), 3.375)
+
+    def test_float_arithmetic_rounds_to_single(self):
+        units = assemble(
+            i31i(0x14, 0, float_bits(0.1)),
+            i31i(0x14, 1, float_bits(0.2)),
+            i23x(0xA6, 2, 0, 1),                # add-float v2, v0, v1
+            i11x(0x0F, 2),
+        )
+        self.assertEqual(self.run_code(units, 3), float32(float32(0.1) + float32(0.2)))
+
+    def test_float_division_by_zero(self):
+        units = assemble(
+            i31i(0x14, 0, float_bits(1.0)),
+            i11n(0x12, 1, 0),
+            i23x(0xA9, 2, 0, 1),                # div-float v2, v0, v1
+            i11x(0x0F, 2),
+        )
+        self.assertEqual(self.run_code(units, 3), math.inf)
+
+    def test_conversions(self):
+        units = assemble(
+            i11n(0x12, 0, -7),
+            i12x(0x83, 1, 0),                   # int-to-double v1, v0
+            i12x(0x8A, 3, 1),                   # double-to-int v3, v1
+            i12x(0x8D, 4, 3),                   # int-to-byte v4, v3
+            i11x(0x0F, 4),
+        )
+        self.assertEqual(self.run_code(units, 5), -7)
+        self.assertEqual(self.vm.interpreter.registers[1], -7.0)
+
+        # long-to-float 只舍入一次：经过 double 会先舍掉最低位，再在平局时向偶数舍入
+        units = assemble(
+            i51l(0x18, 0, 2 ** 60 + 2 ** 36 + 1),
+            i12x(0x85, 2, 0),                   # long-to-float v2, v0
+            i11x(0x0F, 2),
+        )
+        self.assertEqual(self.run_code(units, 3), float(2 ** 60 + 2 ** 37))
+        cases = {2 ** 24 + 1: 2 ** 24, 2 ** 24 + 3: 2 ** 24 + 4, -(2 ** 60 + 2 ** 36 + 1): -(2 ** 60 + 2 ** 37),
+                 -2 ** 63: -2 ** 63, 2 ** 63 - 1: 2 ** 63, 0: 0}
+        for value, want in cases.items():
+            self.assertEqual(long_to_float(value), float(want), value)
+
+    def test_double_to_int_saturates(self):
+        units = assemble(
+            i51l(0x18, 0, double_bits(1e20)),
+            i12x(0x8A, 2, 0),
+            i11x(0x0F, 2),
+        )
+        self.assertEqual(self.run_code(units, 3), 0x7FFFFFFF)
+
+    def test_cmpl_float_nan(self):
+        units = assemble(
+            i31i(0x14, 0, float_bits(math.nan)),
+            i31i(0x14, 1, float_bits(1.0)),
+            i23x(0x2D, 2, 0, 1),                # cmpl-float
+            i23x(0x2E, 3, 0, 1),                # cmpg-float
+            i23x(0x91, 2, 2, 3),                # sub-int v2, v2, v3
+            i11x(0x0F, 2),
+        )
+        self.assertEqual(self.run_code(units, 4), -2)
+
+    def test_counted_loop_with_arguments(self):
+        # long sum = 0; for (int i = n; i != 0; i--) sum += i;
+        units = assemble(
+            i21s(0x16, 0, 0),                   # const-wide/16 v0, 0
+            i12x(0x81, 2, 4),                   # int-to-long v2, v4
+            i23x(0x9B, 0, 0, 2),                # add-long v0, v0, v2
+            i22b(0xD8, 4, 4, -1),               # add-int/lit8 v4, v4, -1
+            i21t(0x39, 4, -5),                  # if-nez v4, -5
+            i11x(0x10, 0),                      # return-wide v0
+        )
+        self.assertEqual(self.run_code(units, 5, args=[100]), 5050)
+
+
+    def test_if_eqz_compares_with_null_not_truthiness(self):
+        units = assemble(
+            i21t(0x38, 1, 4),                   # pc0: if-eqz v1, pc4
+            i11n(0x12, 0, 1),                   # pc2: const/4 v0, 1
+            i11x(0x0F, 0),                      # pc3: return v0
+            i11n(0x12, 0, 0),                   # pc4: const/4 v0, 0
+            i11x(0x0F, 0),                      # pc5: return v0
+        )
+        method = make_method(self.parser, units, 2, 1, parameters=['Ljava/lang/String;'])
+        for value, not_null in ((JavaString(''), 1), (JavaString('a'), 1), (0, 0), (None, 0)):
+            self.assertEqual(self.vm.interpreter.interpret(method, {}, self.parser, [value]), not_null, repr(value))
+
+
+class TestSwitch(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+
+    def switch_method(self, switch_op, payload_builder):
+        # switch v1 (参数) -> 各分支返回不同常量，默认分支返回 -1
+        units = assemble(
+            i31t(switch_op, 1, 12),          # pc0: switch v1, payload at pc12
+            i11n(0x12, 0, -1),               # pc3: default
+            i11x(0x0F, 0),                   # pc4
+            i11n(0x12, 0, 1),                # pc5: case A
+            i11x(0x0F, 0),                   # pc6
+            i11n(0x12, 0, 2),                # pc7: case B
+            i11x(0x0F, 0),                   # pc8
+            i11n(0x12, 0, 3),                # pc9: case C
+            i11x(0x0F, 0),                   # pc10
+            [0x0000],                        # pc11: 对齐
+            payload_builder(),               # pc12
+        )
+        return make_method(self.parser, units, 2, 1)
+
+    def test_packed_switch_table_is_predecoded(self):
+        method = self.switch_method(0x2B, lambda: packed_switch_payload(10, [5, 7, 9]))
+        insn = self.parser.code_items[method['code_off']]['insns'][0]
+        self.assertEqual(insn['first_key'], 10)
+        self.assertEqual(insn['switch_targets'], [5, 7, 9])
+
+        interpret = self.vm.interpreter.interpret
+        self.assertEqual([interpret(method, {}, self.parser, [key]) for key in (9, 10, 11, 12, 13)],
+                         [-1, 1, 2, 3, -1])
+
+    def test_sparse_switch_uses_case_dict(self):
+        method = self.switch_method(0x2C, lambda: sparse_switch_payload({-1000: 5, 7: 7, 1 << 20: 9}))
+        insn = self.parser.code_items[method['code_off']]['insns'][0]
+        self.assertEqual(insn['switch_cases'], {-1000: 5, 7: 7, 1 << 20: 9})
+
+        interpret = self.vm.interpreter.interpret
+        self.assertEqual([interpret(method, {}, self.parser, [key]) for key in (-1000, 7, 1 << 20, 8)],
+                         [1, 2, 3, -1])
+
+
+class TestArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.parser.type_ids = ['[I', '[F', '[B', '[Ljava/lang/Object;']
+
+    def run_code(self, units, registers_size, args=None):
+        method = make_method(self.parser, units, registers_size, len(args or []))
+        return self.vm.interpreter.interpret(method, {}, self.parser, args)
+
+    def test_fill_array_data_and_sum(self):
+        # int[] a = {1, -2, 30, 400, 5000}; 倒序累加
+        units = assemble(
+            i11n(0x12, 0, 5),                   # pc0: const/4 v0, 5
+            i22c(0x23, 1, 0, 0),                # pc1: new-array v1, v0, int[]
+            i31t(0x26, 1, 13),                  # pc3: fill-array-data v1, payload at pc16
+            i11n(0x12, 2, 0),                   # pc6: const/4 v2, 0
+            i12x(0x21, 3, 1),                   # pc7: array-length v3, v1
+            i22b(0xD8, 3, 3, -1),               # pc8: add-int/lit8 v3, v3, -1
+            i23x(0x44, 4, 1, 3),                # pc10: aget v4, v1, v3
+            i12x(0xB0, 2, 4),                   # pc12: add-int/2addr v2, v4
+            i21t(0x39, 3, -5),                  # pc13: if-nez v3, pc8
+            i11x(0x0F, 2),                      # pc15: return v2
+            fill_array_payload(4, [1, -2, 30, 400, 5000], 'i'),
+        )
+        self.assertEqual(self.run_code(units, 5), 5429)
+        array_id = self.vm.interpreter.registers[1]
+        self.assertEqual(list(self.vm.heap[array_id]['data']), [1, -2, 30, 400, 5000])
+
+    def test_float_and_byte_stores_convert(self):
+        units = assemble(
+            i11n(0x12, 0, 2),
+            i22c(0x23, 1, 0, 1),                # new-array v1, v0, float[]
+            i22c(0x23, 2, 0, 2),                # new-array v2, v0, byte[]
+            i11n(0x12, 3, 1),
+            i31i(0x14, 4, float_bits(2.5)),
+            i23x(0x4B, 4, 1, 3),                # aput v4, v1, v3
+            i31i(0x14, 5, 300),
+            i23x(0x4F, 5, 2, 3),                # aput-byte v5, v2, v3
+            i23x(0x48, 0, 2, 3),                # aget-byte v0, v2, v3
+            i11x(0x0F, 0),
+        )
+        self.assertEqual(self.run_code(units, 6), 44)
+        float_array = self.vm.heap[self.vm.interpreter.registers[1]]['data']
+        self.assertEqual(float_array[1], 2.5)
+
+    def test_index_out_of_bounds(self):
+        units = assemble(
+            i11n(0x12, 0, 2),
+            i22c(0x23, 1, 0, 0),
+            i23x(0x44, 2, 1, 0),                # aget v2, v1, v0 (越界)
+            i11x(0x0F, 2),
+        )
+        self.run_code(units, 3)
+        self.assertTrue(self.vm.interpreter.exception.startswith("ArrayIndexOutOfBoundsException"))
+
+    def test_array_copy_overlapping(self):
+        array_id = self.vm._create_array('[I', 6)
+        for i in range(6):
+            self.vm.set_array_element(array_id, i, i + 1)
+        self.vm.array_copy(array_id, 0, array_id, 2, 4)
+        self.assertEqual(list(self.vm.heap[array_id]['data']), [1, 2, 1, 2, 3, 4])
+
+        other_id = self.vm._create_array('[F', 6)
+        with self.assertRaises(TypeError):
+            self.vm.array_copy(array_id, 0, other_id, 0, 1)
+        with self.assertRaises(IndexError):
+            self.vm.array_copy(array_id, 4, array_id, 0, 3)
+
+    @unittest.skipIf(numpy is None, "NumPy 未安装")
+    def test_numpy_view_shares_buffer(self):
+        array_id = self.vm._create_array('[I', 4)
+        view = as_numpy(self.vm.heap[array_id]['data'])
+        view[:] = numpy.arange(4) * 3
+        self.assertEqual(self.vm.get_array_element(array_id, 3), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
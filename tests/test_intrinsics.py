@@ -0,0 +1,238 @@
+# tests/test_intrinsics.py
+import math
+import unittest
+
+from src.core.dalvik.vm import DalvikVM
+from src.core.dalvik.intrinsics import java_float_to_string
+from src.core.dalvik.strings import JavaString, java_string_hash, decode_mutf8
+from tests.bytecode_helpers import (
+    assemble, make_method, method_ref, new_parser, double_bits,
+    i11n, i11x, i21c, i22t, i23x, i31i, i51l, invoke, invoke_range,
+)
+
+STRING = 'Ljava/lang/String;'
+BUILDER = 'Ljava/lang/StringBuilder;'
+
+
+class TestIntrinsics(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.parser.type_ids = [BUILDER, '[I']
+
+    def run_code(self, units, registers_size, args=None):
+        method = make_method(self.parser, units, registers_size, len(args or []))
+        self.method = method
+        return self.vm.interpreter.interpret(method, {}, self.parser, args)
+
+    def test_string_length_and_char_at(self):
+        length = method_ref(self.parser, STRING, 'length', [], 'I')
+        char_at = method_ref(self.parser, STRING, 'charAt', ['I'], 'C')
+        units = assemble(
+            invoke(0x6E, length, [2]),          # invoke-virtual {v2}, String.length()
+            i11x(0x0A, 0),                      # move-result v0
+            i11n(0x12, 1, 1),
+            invoke(0x6E, char_at, [2, 1]),      # invoke-virtual {v2, v1}, String.charAt(I)
+            i11x(0x0A, 1),
+            i23x(0x90, 0, 0, 1),                # add-int v0, v0, v1
+            i11x(0x0F, 0),
+        )
+        self.assertEqual(self.run_code(units, 3, [JavaString('hello')]), 5 + ord('e'))
+        # 调用点解析结果缓存在指令上
+        insn = self.parser.code_items[self.method['code_off']]['insns'][0]
+        self.assertIsNotNone(insn['intrinsic'])
+
+    def test_char_at_out_of_range_throws(self):
+        char_at = method_ref(self.parser, STRING, 'charAt', ['I'], 'C')
+        units = assemble(
+            i11n(0x12, 0, 7),
+            invoke(0x6E, char_at, [1, 0]),
+            i11x(0x0F, 0),
+        )
+        self.run_code(units, 2, [JavaString('abc')])
+        self.assertTrue(self.vm.interpreter.exception.startswith("StringIndexOutOfBoundsException"))
+
+    def test_string_builder_chain(self):
+        init = method_ref(self.parser, BUILDER, '<init>', [], 'V')
+        append_int = method_ref(self.parser, BUILDER, 'append', ['I'], BUILDER)
+        append_string = method_ref(self.parser, BUILDER, 'append', [STRING], BUILDER)
+        to_string = method_ref(self.parser, BUILDER, 'toString', [], STRING)
+        units = assemble(
+            i21c(0x22, 0, 0),                   # new-instance v0, StringBuilder
+            invoke(0x70, init, [0]),            # invoke-direct {v0}, <init>()
+            invoke(0x6E, append_string, [0, 2]),
+            i31i(0x14, 1, -42),
+            invoke(0x6E, append_int, [0, 1]),
+            invoke(0x6E, to_string, [0]),
+            i11x(0x0C, 0),                      # move-result-object v0
+            i11x(0x11, 0),
+        )
+        self.assertEqual(self.run_code(units, 3, [JavaString('x=')]).value, 'x=-42')
+
+    def test_math_with_wide_arguments(self):
+        max_int = method_ref(self.parser, 'Ljava/lang/Math;', 'max', ['I', 'I'], 'I')
+        sqrt = method_ref(self.parser, 'Ljava/lang/Math;', 'sqrt', ['D'], 'D')
+        units = assemble(
+            i51l(0x18, 0, double_bits(2.0)),
+            invoke_range(0x77, sqrt, 0, 2),     # invoke-static/range {v0, v1}, Math.sqrt(D)
+            i11x(0x0B, 0),                      # move-result-wide v0
+            i11n(0x12, 2, -3),
+            i11n(0x12, 3, 5),
+            invoke(0x71, max_int, [2, 3]),
+            i11x(0x0A, 2),
+            i11x(0x10, 0),
+        )
+        self.assertEqual(self.run_code(units, 4), math.sqrt(2.0))
+        self.assertEqual(self.vm.interpreter.registers[2], 5)
+
+    def test_math_rounding_and_cbrt_match_java(self):
+        table = self.vm.intrinsics.table
+        round_double = table['Ljava/lang/Math;->round(D)J']
+        round_float = table['Ljava/lang/Math;->round(F)I']
+        cbrt = table['Ljava/lang/Math;->cbrt(D)D']
+        cases = {0.49999999999999994: 0, 4503599627370497.0: 4503599627370497, 2.5: 3, -2.5: -2, -0.5: 0,
+                 math.nan: 0, 1e300: 2 ** 63 - 1, -math.inf: -2 ** 63}
+        for x, want in cases.items():
+            self.assertEqual(round_double(self.vm, [x]), want, x)
+        self.assertEqual(round_float(self.vm, [0.49999997]), 0)
+        self.assertEqual(round_float(self.vm, [8388609.0]), 8388609)
+        for x, want in ((1000.0, 10.0), (-27.0, -3.0), (8.0, 2.0), (1e-300, 1e-100), (2.0, 1.2599210498948732)):
+            self.assertEqual(cbrt(self.vm, [x]), want, x)
+        self.assertEqual(repr(cbrt(self.vm, [-0.0])), '-0.0')
+        self.assertTrue(math.isnan(cbrt(self.vm, [math.nan])))
+        self.assertEqual(cbrt(self.vm, [-math.inf]), -math.inf)
+
+        floor, ceil = table['Ljava/lang/Math;->floor(D)D'], table['Ljava/lang/Math;->ceil(D)D']
+        for fn, x, want in ((ceil, -0.5, '-0.0'), (ceil, -0.0, '-0.0'), (floor, -0.0, '-0.0'), (ceil, 0.5, '1.0'),
+                            (floor, 0.5, '0.0'), (floor, -0.5, '-1.0'), (ceil, -1.5, '-1.0')):
+            self.assertEqual(repr(fn(self.vm, [x])), want, (fn, x))
+
+    def test_integer_value_of_caches_small_values(self):
+        value_of = method_ref(self.parser, 'Ljava/lang/Integer;', 'valueOf', ['I'], 'Ljava/lang/Integer;')
+        units = assemble(
+            invoke(0x71, value_of, [3]),
+            i11x(0x0C, 0),
+            invoke(0x71, value_of, [3]),
+            i11x(0x0C, 1),
+            i11x(0x0F, 0),
+        )
+        self.run_code(units, 4, [100])
+        registers = self.vm.interpreter.registers
+        self.assertEqual(registers[0], registers[1])
+        self.run_code(units, 4, [1000])
+        self.assertNotEqual(registers[0], self.vm.interpreter.registers[1])
+        # 缓存的装箱对象作为GC根保留
+        self.vm.interpreter.registers = []
+        self.vm.gc.collect()
+        self.assertIn(self.vm.intrinsics.integer_cache[100], self.vm.heap)
+
+    def test_system_arraycopy(self):
+        arraycopy = method_ref(self.parser, 'Ljava/lang/System;', 'arraycopy',
+                               ['Ljava/lang/Object;', 'I', 'Ljava/lang/Object;', 'I', 'I'], 'V')
+        array_id = self.vm._create_array('[I', 4)
+        for i in range(4):
+            self.vm.set_array_element(array_id, i, i + 1)
+        units = assemble(
+            i11n(0x12, 0, 0),
+            i11n(0x12, 1, 1),
+            i11n(0x12, 2, 3),
+            invoke(0x71, arraycopy, [4, 0, 4, 1, 2]),   # arraycopy(a, 0, a, 1, 3)
+            i11x(0x11, 4),
+        )
+        self.run_code(units, 5, [array_id])
+        self.assertEqual(list(self.vm.heap[array_id]['data']), [1, 1, 2, 3])
+
+
+class TestInvoke(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+
+    def test_static_call_into_bytecode(self):
+        callee = make_method(self.parser, assemble(
+            i23x(0x92, 0, 1, 2),                # mul-int v0, v1, v2
+            i11x(0x0F, 0),
+        ), 3, 2, name='mul')
+        index = method_ref(self.parser, 'LTest;', 'mul', ['I', 'I'], 'I', code_off=callee['code_off'])
+        caller = make_method(self.parser, assemble(
+            i11n(0x12, 0, 6),
+            i11n(0x12, 1, 7),
+            invoke(0x71, index, [0, 1]),
+            i11x(0x0A, 0),
+            i11x(0x0F, 0),
+        ), 2)
+        self.assertEqual(self.vm.interpreter.interpret(caller, {}, self.parser), 42)
+        self.assertEqual(self.vm.interpreter.call_stack, [])
+
+    def test_native_method_fallback(self):
+        index = method_ref(self.parser, 'Landroid/util/Log;', 'd', [STRING, STRING], 'I')
+        calls = []
+        self.vm.register_native_method('android/util/Log.d', lambda vm, method, args: calls.append(args) or 1)
+        method = make_method(self.parser, assemble(
+            invoke(0x71, index, [0, 1]),
+            i11x(0x0A, 0),
+            i11x(0x0F, 0),
+        ), 2, 2)
+        self.assertEqual(self.vm.interpreter.interpret(method, {}, self.parser, ['tag', 'msg']), 1)
+        self.assertEqual(calls, [['tag', 'msg']])
+
+
+class TestStrings(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.parser.string_ids = ['hi', 'other']
+
+    def test_const_string_sites_share_interned_string(self):
+        intern = method_ref(self.parser, STRING, 'intern', [], STRING)
+        method = make_method(self.parser, assemble(
+            i21c(0x1A, 0, 0),                   # const-string v0, "hi"
+            i21c(0x1A, 1, 0),                   # 另一处 const-string v1, "hi"
+            i11n(0x12, 2, 0),
+            i22t(0x33, 0, 1, 2),                # if-ne v0, v1, +2 (按引用比较)
+            i11n(0x12, 2, 1),
+            invoke(0x6E, intern, [3]),          # 参数字符串驻留后得到同一引用
+            i11x(0x0C, 3),
+            i11x(0x0F, 2),
+        ), 4, 1)
+        interpret = self.vm.interpreter.interpret
+        self.assertEqual(interpret(method, {}, self.parser, [JavaString('hi')]), 1)
+        registers = self.vm.interpreter.registers
+        self.assertIs(registers[0], registers[1])
+        self.assertIs(registers[3], registers[0])
+
+        # 再次执行时直接加载缓存在指令上的引用
+        insn = self.parser.code_items[method['code_off']]['insns'][0]
+        cached = insn['string']
+        interpret(method, {}, self.parser, [JavaString('x')])
+        self.assertIs(self.vm.interpreter.registers[0], cached)
+        self.assertEqual(len(self.vm.strings), 2)
+
+    def test_hash_code_is_cached(self):
+        string = JavaString('hello')
+        self.assertEqual(string.hash_code(), 99162322)
+        string.value = 'changed'
+        self.assertEqual(string.hash_code(), 99162322)
+
+    def test_decode_mutf8(self):
+        # U+1F600 在MUTF-8中编码为两个3字节代理，对应两个UTF-16代码单元
+        self.assertEqual(len(decode_mutf8(b'a\xc0\x80\xed\xa0\xbd\xed\xb8\x80')), 4)
+
+
+class TestJavaFormatting(unittest.TestCase):
+
+    def test_string_hash_matches_java(self):
+        self.assertEqual(java_string_hash('hello'), 99162322)
+        self.assertEqual(java_string_hash('polygenelubricants'), -2147483648)
+
+    def test_float_to_string(self):
+        self.assertEqual(java_float_to_string(1.0), '1.0')
+        self.assertEqual(java_float_to_string(1e10), '1.0E10')
+        self.assertEqual(java_float_to_string(0.1, single=True), '0.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
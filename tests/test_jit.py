@@ -0,0 +1,813 @@
+# tests/test_jit.py
+import math
+import unittest
+
+from src.core.dalvik.intrinsics import JavaException
+from src.core.dalvik.vm import DalvikVM
+from src.core.dalvik.registers import WIDE_HIGH
+from tests.bytecode_helpers import (
+    assemble, field_ref, invoke, make_class, make_method, method_ref, new_parser, packed_switch_payload,
+    sparse_switch_payload, i10t, i10x, i11n, i11x, i12x, i21c, i21s, i21t, i22b, i22c, i22t, i23x, i31i, i31t,
+)
+
+
+class TestJITDifferential(unittest.TestCase):
+    """差分测试：同一方法分别解释执行和编译执行，比较返回值与异常"""
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        # 参照结果必须完全由解释器得出：关闭按调用次数和回边次数触发的编译
+        self.vm.jit.compilation_threshold = self.vm.jit.osr_threshold = math.inf
+        self.parser = new_parser()
+        self.parser.type_ids.extend(['LFoo;', '[I'])
+        self.foo = make_class(self.parser, 'LFoo;', static_fields=[('count', 'I')])
+        self.count_field = self.foo['static_fields'][0]['field_idx']
+        self.x_field = field_ref(self.parser, 'LFoo;', 'x', 'I')
+
+    def outcome(self, result):
+        exception = self.vm.interpreter.exception
+        if isinstance(exception, int):
+            exception = ('object', self.vm.get_object_type(exception))
+        if isinstance(result, float):
+            result = repr(result)  # 区分 -0.0 并让 NaN 可比较
+        return result, exception
+
+    def check(self, method, cases):
+        """逐个参数比较解释执行与编译执行的结果，返回编译后的函数"""
+        interpreter = self.vm.interpreter
+        expected = []
+        for args in cases:
+            interpreter.exception = None
+            expected.append(self.outcome(interpreter.interpret(method, {}, self.parser, list(args))))
+
+        function = self.vm.jit.compile_method(method, {}, self.parser)
+        self.assertIsNotNone(function, f"{method['name']} 未能编译")
+        for args, want in zip(cases, expected):
+            interpreter.exception = None
+            got = self.outcome(self.vm.jit.execute_compiled(function, list(args)))
+            self.assertEqual(got, want, f"{method['name']}{tuple(args)}\n{function.source}")
+        return function
+
+    def test_counted_loop(self):
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i11n(0x12, 1, 0),            # 1: const/4 v1, 0
+            i22t(0x35, 1, 2, 9),         # 2: if-ge v1, v2, +9 -> 11
+            i22b(0xDA, 0, 0, 31),        # 4: mul-int/lit8 v0, v0, 31
+            i23x(0x90, 0, 0, 1),         # 6: add-int v0, v0, v1
+            i22b(0xD8, 1, 1, 1),         # 8: add-int/lit8 v1, v1, 1
+            i10t(0x28, -8),              # 10: goto -> 2
+            i11x(0x0F, 0),               # 11: return v0
+        ), 3, ins_size=1, name='hash', return_type='I')
+        function = self.check(method, [[0], [5], [1000]])
+        self.assertIn('while True', function.source)
+
+    def test_nested_loops(self):
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i11n(0x12, 1, 0),            # 1: const/4 v1, 0
+            i22t(0x35, 1, 4, 13),        # 2: if-ge v1, v4, +13 -> 15
+            i11n(0x12, 2, 0),            # 4: const/4 v2, 0
+            i22t(0x35, 2, 4, 7),         # 5: if-ge v2, v4, +7 -> 12
+            i23x(0x90, 0, 0, 2),         # 7: add-int v0, v0, v2
+            i22b(0xD8, 2, 2, 1),         # 9: add-int/lit8 v2, v2, 1
+            i10t(0x28, -6),              # 11: goto -> 5
+            i22b(0xD8, 1, 1, 1),         # 12: add-int/lit8 v1, v1, 1
+            i10t(0x28, -12),             # 14: goto -> 2
+            i11x(0x0F, 0),               # 15: return v0
+        ), 5, ins_size=1, name='nested', return_type='I')
+        self.check(method, [[0], [1], [7]])
+
+    def test_int_arithmetic_and_division_by_zero(self):
+        method = make_method(self.parser, assemble(
+            i23x(0x93, 0, 2, 3),         # div-int v0, v2, v3
+            i23x(0x94, 1, 2, 3),         # rem-int v1, v2, v3
+            i23x(0x97, 0, 0, 1),         # xor-int v0, v0, v1
+            i23x(0x98, 1, 2, 3),         # shl-int v1, v2, v3
+            i23x(0x90, 0, 0, 1),         # add-int v0, v0, v1
+            i23x(0x9A, 1, 2, 3),         # ushr-int v1, v2, v3
+            i23x(0x90, 0, 0, 1),         # add-int v0, v0, v1
+            i12x(0x7B, 1, 0),            # neg-int v1, v0
+            i12x(0x8D, 1, 1),            # int-to-byte v1, v1
+            i23x(0x91, 0, 0, 1),         # sub-int v0, v0, v1
+            i11x(0x0F, 0),               # return v0
+        ), 4, ins_size=2, name='ints', return_type='I')
+        self.check(method, [[-7, 2], [0x7FFFFFFF, 3], [5, 0], [-0x80000000, -1]])
+
+    def test_long_arithmetic(self):
+        method = make_method(self.parser, assemble(
+            i23x(0x9D, 0, 2, 4),         # mul-long v0, v2, v4
+            i23x(0x9C, 0, 0, 4),         # sub-long v0, v0, v4
+            i23x(0x9E, 0, 0, 2),         # div-long v0, v0, v2
+            i11x(0x10, 0),               # return-wide v0
+        ), 6, ins_size=4, name='longs', parameters=['J', 'J'], return_type='J')
+        self.check(method, [[3, WIDE_HIGH, 0x7FFFFFFFFFFFFFFF, WIDE_HIGH], [0, WIDE_HIGH, 1, WIDE_HIGH],
+                            [-5, WIDE_HIGH, 12, WIDE_HIGH]])
+
+    def test_float_arithmetic(self):
+        method = make_method(self.parser, assemble(
+            i23x(0xA8, 0, 2, 3),         # mul-float v0, v2, v3
+            i23x(0xA9, 0, 0, 3),         # div-float v0, v0, v3
+            i12x(0x87, 1, 0),            # float-to-int v1, v0
+            i12x(0x82, 1, 1),            # int-to-float v1, v1
+            i23x(0xA6, 0, 0, 1),         # add-float v0, v0, v1
+            i11x(0x0F, 0),               # return v0
+        ), 4, ins_size=2, name='floats', parameters=['F', 'F'], return_type='F')
+        self.check(method, [[1.5, 0.1], [3.0, 0.0], [-0.0, 2.0], [math.nan, 1.0]])
+
+    def test_arrays_and_bounds(self):
+        method = make_method(self.parser, assemble(
+            i22c(0x23, 0, 4, 1),         # 0: new-array v0, v4, [I
+            i11n(0x12, 1, 0),            # 2: const/4 v1, 0
+            i22t(0x35, 1, 4, 7),         # 3: if-ge v1, v4, +7 -> 10
+            i23x(0x4B, 1, 0, 1),         # 5: aput v1, v0, v1
+            i22b(0xD8, 1, 1, 1),         # 7: add-int/lit8 v1, v1, 1
+            i10t(0x28, -6),              # 9: goto -> 3
+            i22b(0xD8, 1, 4, -1),        # 10: add-int/lit8 v1, v4, -1
+            i23x(0x44, 2, 0, 1),         # 12: aget v2, v0, v1
+            i12x(0x21, 3, 0),            # 14: array-length v3, v0
+            i23x(0x90, 2, 2, 3),         # 15: add-int v2, v2, v3
+            i11x(0x0F, 2),               # 17: return v2
+        ), 5, ins_size=1, name='arrays', return_type='I')
+        self.check(method, [[5], [0], [-1]])
+
+    def test_switches(self):
+        def method(name, switch_op, payload):
+            return make_method(self.parser, assemble(
+                i31t(switch_op, 1, 10),  # 0: switch v1 -> 10
+                i11n(0x12, 0, 1),        # 3: const/4 v0, 1
+                i11x(0x0F, 0),           # 4: return v0
+                i11n(0x12, 0, 2),        # 5: const/4 v0, 2
+                i11x(0x0F, 0),           # 6: return v0
+                i11n(0x12, 0, 3),        # 7: const/4 v0, 3
+                i11x(0x0F, 0),           # 8: return v0
+                i10x(0x00),              # 9: nop
+                payload,                 # 10: 负载
+            ), 2, ins_size=1, name=name, return_type='I')
+
+        self.check(method('packed', 0x2B, packed_switch_payload(10, [5, 7])), [[10], [11], [12], [-5]])
+        self.check(method('sparse', 0x2C, sparse_switch_payload({-100: 5, 1000: 7})), [[-100], [1000], [0]])
+
+    def test_fields_and_statics(self):
+        method = make_method(self.parser, assemble(
+            i21c(0x22, 0, 0),                    # new-instance v0, LFoo;
+            i22c(0x59, 2, 0, self.x_field),      # iput v2, v0, LFoo;->x
+            i22c(0x52, 1, 0, self.x_field),      # iget v1, v0, LFoo;->x
+            i21c(0x67, 1, self.count_field),     # sput v1, LFoo;->count
+            i21c(0x60, 1, self.count_field),     # sget v1, LFoo;->count
+            i22b(0xD8, 1, 1, 1),                 # add-int/lit8 v1, v1, 1
+            i11x(0x0F, 1),                       # return v1
+        ), 3, ins_size=1, name='fields', return_type='I')
+        self.check(method, [[41], [-1]])
+
+        null_field = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),                    # const/4 v0, 0
+            i22c(0x52, 1, 0, self.x_field),      # iget v1, v0, LFoo;->x
+            i11x(0x0F, 1),
+        ), 2, name='null_field', return_type='I')
+        self.check(null_field, [[]])
+
+    def test_throw_object(self):
+        method = make_method(self.parser, assemble(
+            i21c(0x22, 0, 0),            # new-instance v0, LFoo;
+            i11x(0x27, 0),               # throw v0
+        ), 1, name='throws')
+        self.check(method, [[]])
+
+    def test_recursive_invoke(self):
+        fib = method_ref(self.parser, 'LTest;', 'fib', ['I'], 'I', code_off=0x8000)
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 2),            # 0: const/4 v0, 2
+            i22t(0x34, 2, 0, 17),        # 1: if-lt v2, v0, +17 -> 18
+            i22b(0xD8, 0, 2, -1),        # 3: add-int/lit8 v0, v2, -1
+            invoke(0x71, fib, [0]),      # 5: invoke-static {v0}, fib
+            i11x(0x0A, 0),               # 8: move-result v0
+            i22b(0xD8, 1, 2, -2),        # 9: add-int/lit8 v1, v2, -2
+            invoke(0x71, fib, [1]),      # 11: invoke-static {v1}, fib
+            i11x(0x0A, 1),               # 14: move-result v1
+            i23x(0x90, 0, 0, 1),         # 15: add-int v0, v0, v1
+            i11x(0x0F, 0),               # 17: return v0
+            i11x(0x0F, 2),               # 18: return v2
+        ), 3, ins_size=1, name='fib', return_type='I', code_off=0x8000)
+        self.check(method, [[1], [12]])
+
+    def test_intrinsic_and_virtual_invoke(self):
+        abs_ref = method_ref(self.parser, 'Ljava/lang/Math;', 'abs', ['I'], 'I')
+        getter = make_method(self.parser, assemble(
+            i22c(0x52, 0, 1, self.x_field),      # iget v0, v1, LFoo;->x
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name='get', class_name='LFoo;', parameters=[], return_type='I')
+        get_ref = method_ref(self.parser, 'LFoo;', 'get', [], 'I', code_off=getter['code_off'])
+        method = make_method(self.parser, assemble(
+            i21c(0x22, 0, 0),                    # new-instance v0, LFoo;
+            i22c(0x59, 2, 0, self.x_field),      # iput v2, v0, LFoo;->x
+            invoke(0x6E, get_ref, [0]),          # invoke-virtual {v0}, LFoo;->get()I
+            i11x(0x0A, 1),                       # move-result v1
+            invoke(0x71, abs_ref, [1]),          # invoke-static {v1}, Math.abs
+            i11x(0x0A, 1),                       # move-result v1
+            i11x(0x0F, 1),
+        ), 3, ins_size=1, name='calls', return_type='I')
+        self.check(method, [[-9], [4]])
+
+        null_receiver = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),                    # const/4 v0, 0
+            invoke(0x6E, get_ref, [0]),          # invoke-virtual {v0}, get
+            i10x(0x0E),
+        ), 1, name='null_receiver')
+        self.check(null_receiver, [[]])
+
+    def test_empty_string_is_not_null(self):
+        self.parser.string_ids = ['']
+        method = make_method(self.parser, assemble(
+            i21c(0x1A, 0, 0),                    # pc0: const-string v0, ""
+            i11n(0x12, 1, 0),                    # pc2: const/4 v1, 0
+            i21t(0x38, 0, 4),                    # pc3: if-eqz v0, pc7
+            i22b(0xD8, 1, 1, 1),                 # pc5: add-int/lit8 v1, v1, 1
+            i21t(0x39, 0, 3),                    # pc7: if-nez v0, pc10
+            i11x(0x0F, 1),                       # pc9: return v1
+            i22b(0xD8, 1, 1, 2),                 # pc10: add-int/lit8 v1, v1, 2
+            i11x(0x0F, 1),                       # pc12: return v1
+        ), 2, name='empty', return_type='I')
+        self.check(method, [[]])
+        self.assertEqual(self.vm.interpreter.interpret(method, {}, self.parser, []), 3)
+
+    def test_string_check_cast_and_instance_of(self):
+        self.parser.string_ids = ['s']
+        self.parser.type_ids.append('Ljava/lang/String;')
+        string_type = len(self.parser.type_ids) - 1
+        method = make_method(self.parser, assemble(
+            i21c(0x1A, 0, 0),                    # const-string v0, "s"
+            i21c(0x1F, 0, string_type),          # check-cast v0, String
+            i22c(0x20, 1, 0, string_type),       # instance-of v1, v0, String
+            i22c(0x20, 2, 0, 0),                 # instance-of v2, v0, LFoo;
+            i23x(0x91, 1, 1, 2),                 # sub-int v1, v1, v2
+            i11x(0x0F, 1),
+        ), 3, name='string_type', return_type='I')
+        self.check(method, [[]])
+        self.assertEqual(self.vm.interpreter.interpret(method, {}, self.parser, []), 1)
+
+        bad_cast = make_method(self.parser, assemble(
+            i21c(0x1A, 0, 0),                    # const-string v0, "s"
+            i21c(0x1F, 0, 0),                    # check-cast v0, LFoo;
+            i11x(0x11, 0),
+        ), 1, name='bad_cast', return_type='LFoo;')
+        self.check(bad_cast, [[]])
+        self.vm.interpreter.exception = None
+        self.vm.interpreter.interpret(bad_cast, {}, self.parser, [])
+        self.assertEqual(self.vm.interpreter.exception,
+                         'ClassCastException: Ljava/lang/String; cannot be cast to LFoo;')
+
+    def test_allocating_intrinsic_is_gc_safepoint(self):
+        value_of = method_ref(self.parser, 'Ljava/lang/Integer;', 'valueOf', ['I'], 'Ljava/lang/Integer;')
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 1, 3),                    # const/4 v1, 3
+            i22c(0x23, 0, 1, 1),                 # new-array v0, v1, [I
+            i21s(0x13, 1, 1000),                 # const/16 v1, 1000（不在 Integer 缓存中）
+            invoke(0x71, value_of, [1]),         # invoke-static {v1}, Integer.valueOf
+            i11x(0x0C, 1),                       # move-result-object v1
+            i11x(0x11, 0),                       # return-object v0
+        ), 2, name='box', return_type='[I')
+        self.vm.gc.nursery_size = 1              # 每次分配前都做次要回收
+        interpreted = self.vm.interpreter.interpret(method, {}, self.parser, [])
+        function = self.vm.jit.compile_method(method, {}, self.parser)
+        compiled = self.vm.jit.execute_compiled(function, [])
+        # 数组在 valueOf 的分配中必须存活，否则其ID会被复用给 Integer 对象
+        for array_id in (interpreted, compiled):
+            self.assertEqual(self.vm.get_object_type(array_id), '[I', function.source)
+            self.assertEqual(self.vm.get_array_length(array_id), 3)
+
+
+class TestJITIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.vm.jit.background = False
+        self.parser = new_parser()
+
+    def test_hot_method_compiled_after_threshold(self):
+        method = make_method(self.parser, assemble(
+            i22b(0xD8, 0, 1, 1),         # add-int/lit8 v0, v1, 1
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, return_type='I')
+        code = self.parser.code_items[method['code_off']]
+        interpreter = self.vm.interpreter
+        for i in range(self.vm.jit.compilation_threshold + 2):
+            self.assertEqual(interpreter.invoke_method(method, self.parser, [i]), i + 1)
+        self.assertTrue(callable(code['jit']))
+        self.assertNotIn('while', code['jit'].source)
+        self.assertEqual(self.vm.jit.stats['compiled'], 1)
+        self.assertEqual(self.vm.jit.stats['compiled_calls'], 3)
+
+    def test_methods_with_try_blocks_stay_interpreted(self):
+        tries = [{'start_addr': 0, 'insn_count': 2, 'handler_off': 0, 'catch_all': 3, 'handlers': []}]
+        method = make_method(self.parser, assemble(
+            i23x(0x93, 0, 1, 2),         # 0: div-int v0, v1, v2
+            i11x(0x0F, 0),               # 2: return v0
+            i11x(0x0F, 1),               # 3: return v1
+        ), 3, ins_size=2, return_type='I', tries=tries)
+        self.assertIsNone(self.vm.jit.compile_method(method, {}, self.parser))
+        self.assertIs(self.parser.code_items[method['code_off']]['jit'], False)
+        self.assertEqual(self.vm.jit.stats['rejected'], 1)
+
+    def test_hot_loop_switches_to_osr_code(self):
+        # main 只调用一次，循环回边达到阈值后切换到以循环头为入口的编译代码
+        units = assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i11n(0x12, 1, 0),            # 1: const/4 v1, 0
+            i22t(0x35, 1, 3, 9),         # 2: if-ge v1, v3, +9 -> 11
+            i22b(0xDA, 0, 0, 31),        # 4: mul-int/lit8 v0, v0, 31
+            i23x(0x90, 0, 0, 1),         # 6: add-int v0, v0, v1
+            i22b(0xD8, 1, 1, 1),         # 8: add-int/lit8 v1, v1, 1
+            i10t(0x28, -8),              # 10: goto -> 2
+            i11x(0x0F, 0),               # 11: return v0
+        )
+        expected = 0
+        for i in range(500):
+            expected = ((expected * 31 + i + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+        method = make_method(self.parser, units, 4, ins_size=1, return_type='I')
+        code = self.parser.code_items[method['code_off']]
+        self.vm.jit.osr_threshold = 50
+        self.assertEqual(self.vm.interpreter.interpret(method, {}, self.parser, [500]), expected)
+        self.assertEqual(code['backedges'][2], 50)
+        self.assertEqual(self.vm.jit.stats['osr_entries'], 1)
+        # 只传入循环头处活跃的寄存器（v2 未使用）
+        source = code['osr'][2].source
+        self.assertIn('v3 = args[3]', source)
+        self.assertNotIn('args[2]', source)
+        self.assertNotIn('jit', code)
+
+    def test_osr_not_attempted_for_uncompilable_method(self):
+        tries = [{'start_addr': 0, 'insn_count': 1, 'handler_off': 0, 'catch_all': 4, 'handlers': []}]
+        method = make_method(self.parser, assemble(
+            i22b(0xD8, 1, 1, -1),        # 0: add-int/lit8 v1, v1, -1
+            i21t(0x39, 1, -2),           # 2: if-nez v1, -2 -> 0
+            i11x(0x0F, 1),               # 4: return v1
+        ), 2, ins_size=1, return_type='I', tries=tries)
+        self.vm.jit.osr_threshold = 5
+        self.assertEqual(self.vm.interpreter.interpret(method, {}, self.parser, [20]), 0)
+        code = self.parser.code_items[method['code_off']]
+        self.assertIs(code['jit'], False)
+        self.assertEqual(self.vm.jit.stats['osr_entries'], 0)
+
+    def test_live_references_survive_gc_in_compiled_code(self):
+        self.parser.type_ids.append('LFoo;')
+        make_class(self.parser, 'LFoo;')
+        next_field = field_ref(self.parser, 'LFoo;', 'next', 'LFoo;')
+        method = make_method(self.parser, assemble(
+            i21c(0x22, 0, 0),                    # new-instance v0, LFoo;
+            i21c(0x22, 1, 0),                    # new-instance v1, LFoo;（分配前触发GC）
+            i22c(0x5B, 1, 0, next_field),        # iput-object v1, v0, LFoo;->next
+            i11x(0x11, 0),                       # return-object v0
+        ), 2, return_type='LFoo;')
+        function = self.vm.jit.compile_method(method, {}, self.parser)
+        self.vm.gc.gc_threshold = 0.0            # 每次分配前都回收
+        head = self.vm.jit.execute_compiled(function, [])
+        self.assertIn(head, self.vm.heap)
+        self.assertEqual(self.vm.interpreter.call_stack, [])
+
+    def test_compiled_reference_stores_use_write_barrier(self):
+        self.parser.type_ids.append('LFoo;')
+        make_class(self.parser, 'LFoo;')
+        next_field = field_ref(self.parser, 'LFoo;', 'next', 'LFoo;')
+        method = make_method(self.parser, assemble(
+            i22c(0x5B, 1, 0, next_field),        # iput-object v1, v0, LFoo;->next
+            i10x(0x0E),                          # return-void
+        ), 2, ins_size=2, parameters=['LFoo;', 'LFoo;'], return_type='V')
+        function = self.vm.jit.compile_method(method, {}, self.parser)
+        holder, child = self.vm._create_object('LFoo;'), self.vm._create_object('LFoo;')
+        self.vm.interpreter.registers = [holder]
+        self.vm.gc.start_marking()
+        self.assertFalse(self.vm.gc.marks[child])
+        self.vm.jit.execute_compiled(function, [holder, child])
+        self.assertTrue(self.vm.gc.marks[child])
+        self.assertIn(child, self.vm.gc.mark_stack)
+
+
+
+class TestJITTiers(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.jit = self.vm.jit
+        self.jit.background = False
+        self.jit.compilation_threshold = 2
+        self.jit.optimize_threshold = 5
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def test_cold_branch_deoptimizes_to_interpreter(self):
+        method = make_method(self.parser, assemble(
+            i21t(0x3B, 1, 4),            # 0: if-gez v1, +4 -> 4
+            i11n(0x12, 0, -1),           # 2: const/4 v0, -1
+            i11x(0x0F, 0),               # 3: return v0
+            i22b(0xDA, 0, 1, 2),         # 4: mul-int/lit8 v0, v1, 2
+            i11x(0x0F, 0),               # 6: return v0
+        ), 2, ins_size=1, return_type='I')
+        code = self.parser.code_items[method['code_off']]
+        for i in range(8):
+            self.assertEqual(self.call(method, i), i * 2)
+        self.assertEqual(code['tier'], 2)
+        self.assertEqual(code['profile']['branches'][0], [0, 5])
+        self.assertIn('_deopt(', code['jit'].source)
+
+        # 从未执行过的分支：去优化后由解释器得出结果，并退回基线版本
+        self.assertEqual(self.call(method, -3), -1)
+        self.assertEqual(code['tier'], 1)
+        self.assertEqual(self.jit.stats['deoptimizations'], 1)
+        self.assertEqual(self.vm.interpreter.call_stack, [])
+
+    def test_monomorphic_call_guarded_on_receiver_type(self):
+        self.parser.type_ids.extend(['LFoo;', 'LBar;'])
+        foo = make_class(self.parser, 'LFoo;')
+        bar = make_class(self.parser, 'LBar;', superclass_name='LFoo;')
+        for class_def, value in ((foo, 1), (bar, 2)):
+            getter = make_method(self.parser, assemble(
+                i11n(0x12, 0, value),    # const/4 v0, value
+                i11x(0x0F, 0),
+            ), 2, ins_size=1, name='get', class_name=class_def['class_name'], parameters=[], return_type='I')
+            index = method_ref(self.parser, class_def['class_name'], 'get', [], 'I', code_off=getter['code_off'])
+            class_def['virtual_methods'].append({'method_idx': index, 'code_off': getter['code_off']})
+        foo_get = foo['virtual_methods'][0]['method_idx']
+        method = make_method(self.parser, assemble(
+            invoke(0x6E, foo_get, [1]),  # invoke-virtual {v1}, LFoo;->get()I
+            i11x(0x0A, 0),               # move-result v0
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, parameters=['LFoo;'], return_type='I')
+        code = self.parser.code_items[method['code_off']]
+
+        a_foo = self.vm._create_object('LFoo;')
+        for _ in range(8):
+            self.assertEqual(self.call(method, a_foo), 1)
+        self.assertEqual(code['tier'], 2)
+        self.assertEqual(code['profile']['receivers'][0], {'LFoo;': 5})
+        self.assertIn("!= 'LFoo;'", code['jit'].source)
+
+        self.assertEqual(self.call(method, self.vm._create_object('LBar;')), 2)
+        self.assertEqual(self.jit.stats['deoptimizations'], 1)
+
+    def test_tier_status_and_queue_depth(self):
+        method = make_method(self.parser, assemble(
+            i22b(0xD8, 0, 1, 1),         # add-int/lit8 v0, v1, 1
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, return_type='I')
+        code = self.parser.code_items[method['code_off']]
+        for i in range(6):               # 1 次解释执行后编译基线版本，基线版本第 5 次执行时请求优化
+            self.call(method, i)
+        status = self.jit.status()
+        self.assertEqual(status['thresholds'], {'baseline': 2, 'optimize': 5, 'osr': 1000})
+        self.assertEqual(status['queue_depth'], 1)
+        self.assertEqual(code['tier'], 1)
+
+        self.assertEqual(self.call(method, 41), 42)
+        self.assertEqual(self.jit.status()['queue_depth'], 0)
+        self.assertEqual(code['tier'], 2)
+
+
+class TestJITOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.jit = self.vm.jit
+        self.jit.background = False
+        self.jit.compilation_threshold = 2
+        self.jit.optimize_threshold = 5
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def optimized(self, method, *args):
+        """执行到优化版本安装，返回代码项"""
+        code = self.parser.code_items[method['code_off']]
+        for _ in range(8):
+            self.call(method, *args)
+        self.assertEqual(code['tier'], 2)
+        return code
+
+    def make_caller(self):
+        """run(foo, n) = foo.getX() + twice(n)"""
+        self.parser.type_ids.append('LFoo;')
+        foo = make_class(self.parser, 'LFoo;')
+        x = field_ref(self.parser, 'LFoo;', 'x', 'I')
+        get_x = make_method(self.parser, assemble(
+            i22c(0x52, 0, 1, x),         # iget v0, v1, LFoo;->x
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name='getX', class_name='LFoo;', parameters=[], return_type='I')
+        get_x_idx = method_ref(self.parser, 'LFoo;', 'getX', [], 'I', code_off=get_x['code_off'])
+        foo['virtual_methods'].append({'method_idx': get_x_idx, 'code_off': get_x['code_off']})
+        twice = make_method(self.parser, assemble(
+            i23x(0x90, 0, 1, 1),         # add-int v0, v1, v1
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name='twice', return_type='I')
+        twice_idx = method_ref(self.parser, 'LTest;', 'twice', ['I'], 'I', code_off=twice['code_off'])
+        method = make_method(self.parser, assemble(
+            invoke(0x6E, get_x_idx, [2]),    # 0: invoke-virtual {v2}, LFoo;->getX()I
+            i11x(0x0A, 0),                   # 3: move-result v0
+            invoke(0x71, twice_idx, [3]),    # 4: invoke-static {v3}, twice(I)I
+            i11x(0x0A, 1),                   # 7: move-result v1
+            i23x(0x90, 0, 0, 1),             # 8: add-int v0, v0, v1
+            i11x(0x0F, 0),                   # 10: return v0
+        ), 4, ins_size=2, parameters=['LFoo;', 'I'], return_type='I')
+        obj = self.vm._create_object('LFoo;')
+        self.vm.heap[obj]['fields']['x'] = 7
+        return method, obj
+
+    def test_small_callees_inlined(self):
+        method, obj = self.make_caller()
+        code = self.optimized(method, obj, 1)
+        source = code['jit'].source
+        self.assertNotIn('_jit.invoke', source)
+        self.assertIn("!= 'LFoo;'", source)      # 单态虚调用内联在类型检查之后
+        self.assertEqual(self.call(method, obj, 20), 47)
+        self.assertEqual(self.call(method, obj, -4), -1)
+
+        report = self.jit.inlining_report(self.parser)
+        self.assertEqual([(site['pc'], site['callee'], site['inlined']) for site in report],
+                         [(0, 'LFoo;->getX()I', True), (4, 'LTest;->twice(I)I', True)])
+        with self.assertRaises(JavaException):
+            self.jit.invoke(method, self.parser, [0, 1])
+
+    def test_inlining_budget(self):
+        method, obj = self.make_caller()
+        self.jit.inline_budget = 3
+        code = self.optimized(method, obj, 1)
+        self.assertEqual(self.call(method, obj, 5), 17)
+        sites = code['inlining']
+        self.assertTrue(sites[0]['inlined'])
+        self.assertEqual((sites[1]['inlined'], sites[1]['reason']), (False, '超出内联预算'))
+        self.assertEqual(code['jit'].source.count('_jit.invoke'), 1)
+
+    def test_constant_folding_copy_propagation_and_dead_stores(self):
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 3),            # 0: const/4 v0, 3
+            i11n(0x12, 1, 4),            # 1: const/4 v1, 4
+            i23x(0x92, 2, 0, 1),         # 2: mul-int v2, v0, v1   -> 12，之后被覆盖
+            i23x(0x90, 2, 2, 4),         # 4: add-int v2, v2, v4   -> add-int/lit16 v2, v4, 12
+            i12x(0x01, 3, 2),            # 6: move v3, v2
+            i11x(0x0F, 3),               # 7: return v3            -> return v2
+        ), 5, ins_size=1, return_type='I')
+        code = self.optimized(method, 1)
+        source = code['jit'].source
+        self.assertIn('v4 + 12', source)
+        self.assertIn('return v2', source)
+        for dead in ('v0 = 3', 'v1 = 4', 'v3 = v2', 'v2 = 12'):
+            self.assertNotIn(dead, source)
+        for n in (0, -12, 0x7FFFFFFF):
+            self.assertEqual(self.call(method, n), ((n + 12 + 0x80000000) & 0xFFFFFFFF) - 0x80000000)
+
+    def test_constant_branch_folded(self):
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 3),            # 0: const/4 v0, 3
+            i21t(0x38, 0, 3),            # 1: if-eqz v0, +3 -> 4
+            i11x(0x0F, 1),               # 3: return v1
+            i11n(0x12, 1, -1),           # 4: const/4 v1, -1
+            i11x(0x0F, 1),               # 5: return v1
+        ), 2, ins_size=1, return_type='I')
+        code = self.optimized(method, 9)
+        self.assertNotIn('if ', code['jit'].source)
+        self.assertEqual(self.call(method, 5), 5)
+
+
+class TestJITBackgroundCompilation(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.jit = self.vm.jit
+        self.jit.compilation_threshold = 2
+
+    def make(self, name):
+        return make_method(self.parser, assemble(
+            i22b(0xD8, 0, 1, 1),         # add-int/lit8 v0, v1, 1
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name=name, return_type='I')
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def test_interpreter_runs_until_code_is_installed(self):
+        method = self.make('inc')
+        code = self.parser.code_items[method['code_off']]
+        self.assertEqual(self.call(method, 1), 2)
+        self.assertEqual(self.call(method, 2), 3)   # 达到阈值：请求入队，本次仍解释执行
+        self.assertEqual(self.jit.stats['compiled_calls'], 0)
+        self.assertTrue(self.jit.wait_idle(5))
+
+        self.assertTrue(callable(code['jit']))
+        self.assertNotIn('baseline', code['requests'])
+        timing = self.jit.timings[code['method_id']]
+        self.assertEqual(timing['kind'], 'baseline')
+        self.assertGreaterEqual(timing['queue_latency'], 0)
+        self.assertGreater(timing['compile_time'], 0)
+        self.assertEqual(self.call(method, 3), 4)
+        self.assertEqual(self.jit.stats['compiled_calls'], 1)
+
+    def test_hotter_methods_compiled_first(self):
+        cold, hot = self.make('cold'), self.make('hot')
+        # 持有队列锁，编译线程在入队完成前无法取出请求
+        with self.jit._condition:
+            for _ in range(2):
+                self.call(cold, 0)
+            for _ in range(4):           # 排队期间热度翻倍，以更高优先级重新入队
+                self.call(hot, 0)
+            self.assertEqual(self.jit.status()['queue_depth'], 3)
+        self.assertTrue(self.jit.wait_idle(5))
+        ids = [self.parser.code_items[m['code_off']]['method_id'] for m in (hot, cold)]
+        self.assertEqual(list(self.jit.timings), ids)
+        self.assertEqual(self.jit.stats['compiled'], 2)
+
+
+
+class TestJITCodeSpace(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.jit = self.vm.jit
+        self.jit.background = False
+        self.jit.compilation_threshold = 2
+        self.methods = [make_method(self.parser, assemble(
+            i22b(0xD8, 0, 1, n),         # add-int/lit8 v0, v1, n
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name=f"m{n}", return_type='I') for n in range(3)]
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def code(self, method):
+        return self.parser.code_items[method['code_off']]
+
+    def test_size_and_hit_rate_reported(self):
+        method = self.methods[0]
+        for i in range(4):
+            self.assertEqual(self.call(method, i), i)
+        code = self.code(method)
+        self.assertIsInstance(code['method_id'], int)
+        report = self.jit.status()['code_space']
+        self.assertEqual(report['size'], code['code_size'])
+        self.assertGreater(report['size'], 0)
+        self.assertEqual((report['hits'], report['misses'], report['methods']), (3, 1, 1))
+        self.assertEqual(report['hit_rate'], 0.75)
+
+    def test_cold_methods_evicted_to_interpreter(self):
+        for method in self.methods[:2]:
+            self.call(method, 0)
+            self.call(method, 0)
+        first, second, third = (self.code(m) for m in self.methods)
+        self.assertTrue(callable(first['jit']) and callable(second['jit']))
+        # 预算只容纳两个方法；second 刚被调用过，带访问位，时钟指针越过它逐出 first
+        self.jit.code_space.budget = first['code_size'] + second['code_size']
+        first['referenced'] = False
+        self.call(self.methods[1], 0)
+        self.call(self.methods[2], 0)
+        self.call(self.methods[2], 0)
+
+        self.assertNotIn('jit', first)
+        self.assertEqual(first['invocations'], 0)
+        self.assertTrue(callable(second['jit']) and callable(third['jit']))
+        report = self.jit.code_space.report()
+        self.assertEqual(report['evictions'], 1)
+        self.assertLessEqual(report['size'], report['budget'])
+
+        # 被逐出的方法仍可调用，重新变热后再编译
+        self.assertEqual(self.call(self.methods[0], 5), 5)
+        self.assertEqual(self.call(self.methods[0], 5), 5)
+        self.assertTrue(callable(first['jit']))
+        self.assertEqual(self.jit.stats['compiled'], 4)
+
+
+class TestJITVectorizer(unittest.TestCase):
+    """计数循环的向量化路径与逐元素执行结果一致，守卫失败时执行原循环"""
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.vm.jit.compilation_threshold = self.vm.jit.osr_threshold = math.inf
+        self.parser = new_parser()
+        self.parser.type_ids.extend(['[I', '[F', '[B'])
+
+    def new_array(self, array_type, values):
+        array_id = self.vm._create_array(array_type, len(values))
+        self.vm.heap[array_id]['data'][:] = type(self.vm.heap[array_id]['data'])(
+            self.vm.heap[array_id]['data'].typecode, values)
+        return array_id
+
+    def data(self, array_id):
+        return self.vm.heap[array_id]['data'].tolist()
+
+    def run_both(self, method, array_type, *inputs, output=None):
+        """分别解释执行和编译执行，返回 (解释结果, 编译结果, 生成的函数)，结果为各数组内容与异常"""
+        outcomes = []
+        function = None
+        for compiled in (False, True):
+            arrays = [self.new_array(array_type, values) for values in inputs]
+            if output is not None:
+                arrays.append(self.new_array(array_type, output))
+            self.vm.interpreter.exception = None
+            if compiled:
+                function = self.vm.jit.compile_method(method, {}, self.parser)
+                self.assertIsNotNone(function)
+                self.vm.jit.execute_compiled(function, arrays)
+            else:
+                self.vm.interpreter.interpret(method, {}, self.parser, list(arrays))
+            exception = self.vm.interpreter.exception
+            outcomes.append(([self.data(a) for a in arrays], exception and exception.split(':')[0]))
+        return outcomes[0], outcomes[1], function
+
+    def scale_method(self):
+        """b[i] = a[i] * 3 + 1, i < a.length"""
+        return make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i12x(0x21, 1, 3),            # 1: array-length v1, v3
+            i22t(0x35, 0, 1, 13),        # 2: if-ge v0, v1, +13 -> 15
+            i23x(0x44, 2, 3, 0),         # 4: aget v2, v3, v0
+            i22b(0xDA, 2, 2, 3),         # 6: mul-int/lit8 v2, v2, 3
+            i22b(0xD8, 2, 2, 1),         # 8: add-int/lit8 v2, v2, 1
+            i23x(0x4B, 2, 4, 0),         # 10: aput v2, v4, v0
+            i22b(0xD8, 0, 0, 1),         # 12: add-int/lit8 v0, v0, 1
+            i10t(0x28, -12),             # 14: goto -> 2
+            i10x(0x0E),                  # 15: return-void
+        ), 5, ins_size=2, name='scale', parameters=['[I', '[I'])
+
+    def test_int_loop_vectorized_with_wraparound(self):
+        method = self.scale_method()
+        values = [i * 99991 - 2 ** 31 for i in range(200)] + [2 ** 31 - 1]
+        expected, got, function = self.run_both(method, '[I', values, output=[0] * len(values))
+        self.assertEqual(got, expected)
+        self.assertIn('_vector_views(', function.source)
+        self.assertEqual(self.vm.jit.stats['vectorized'], 1)
+
+    def test_float_loop_with_length_in_loop_header(self):
+        # c[i] = a[i] * 0.5f + b[i]，循环头每次重新读取 c.length
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i12x(0x21, 1, 6),            # 1: array-length v1, v6
+            i22t(0x35, 0, 1, 17),        # 2: if-ge v0, v1, +17 -> 19
+            i23x(0x44, 2, 4, 0),         # 4: aget v2, v4, v0
+            i31i(0x14, 3, 0x3F000000),   # 6: const v3, 0.5f
+            i23x(0xA8, 2, 2, 3),         # 9: mul-float v2, v2, v3
+            i23x(0x44, 3, 5, 0),         # 11: aget v3, v5, v0
+            i12x(0xC6, 2, 3),            # 13: add-float/2addr v2, v3
+            i23x(0x4B, 2, 6, 0),         # 14: aput v2, v6, v0
+            i22b(0xD8, 0, 0, 1),         # 16: add-int/lit8 v0, v0, 1
+            i10t(0x28, -17),             # 18: goto -> 1
+            i10x(0x0E),                  # 19: return-void
+        ), 7, ins_size=3, name='axpy', parameters=['[F', '[F', '[F'])
+        a = [i / 7.0 - 3.0 for i in range(64)] + [float('inf'), float('nan'), -0.0, 3.4e38]
+        b = [1.0 / (i + 1) for i in range(len(a))]
+        expected, got, function = self.run_both(method, '[F', a, b, output=[0.0] * len(a))
+        self.assertEqual(repr(got), repr(expected))
+        self.assertEqual(self.vm.jit.stats['vectorized'], 1)
+
+    def test_byte_loop_truncates_like_scalar_code(self):
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i12x(0x21, 1, 3),            # 1: array-length v1, v3
+            i22t(0x35, 0, 1, 12),        # 2: if-ge v0, v1, +12 -> 14
+            i23x(0x48, 2, 3, 0),         # 4: aget-byte v2, v3, v0
+            i22b(0xD8, 2, 2, 100),       # 6: add-int/lit8 v2, v2, 100
+            i12x(0x8D, 2, 2),            # 8: int-to-byte v2, v2
+            i23x(0x4F, 2, 4, 0),         # 9: aput-byte v2, v4, v0
+            i22b(0xD8, 0, 0, 1),         # 11: add-int/lit8 v0, v0, 1
+            i10t(0x28, -11),             # 13: goto -> 2
+            i10x(0x0E),                  # 14: return-void
+        ), 5, ins_size=2, name='brighten', parameters=['[B', '[B'])
+        values = [(i * 7) % 256 - 128 for i in range(100)]
+        expected, got, _ = self.run_both(method, '[B', values, output=[0] * len(values))
+        self.assertEqual(got, expected)
+        self.assertEqual(self.vm.jit.stats['vectorized'], 1)
+
+    def test_guard_failure_falls_back_to_scalar_loop(self):
+        method = self.scale_method()
+        values = list(range(40))
+        # 输出数组较短：逐元素执行写到越界处抛出异常，向量化路径的守卫不通过
+        expected, got, _ = self.run_both(method, '[I', values, output=[0] * 30)
+        self.assertEqual(expected[1], 'ArrayIndexOutOfBoundsException')
+        self.assertEqual(got, expected)
+        # 迭代数少于 vector_min_length 时同样执行原循环
+        self.assertEqual(*self.run_both(method, '[I', [1, 2, 3], output=[0] * 3)[:2])
+        self.assertEqual(self.vm.jit.stats['vectorized'], 0)
+
+    def test_loop_carried_dependency_not_vectorized(self):
+        # s += a[i]; a[i] = s：前缀和依赖上一次迭代
+        method = make_method(self.parser, assemble(
+            i11n(0x12, 0, 0),            # 0: const/4 v0, 0
+            i11n(0x12, 2, 0),            # 1: const/4 v2, 0
+            i12x(0x21, 1, 4),            # 2: array-length v1, v4
+            i22t(0x35, 0, 1, 10),        # 3: if-ge v0, v1, +10 -> 13
+            i23x(0x44, 3, 4, 0),         # 5: aget v3, v4, v0
+            i12x(0xB0, 2, 3),            # 7: add-int/2addr v2, v3
+            i23x(0x4B, 2, 4, 0),         # 8: aput v2, v4, v0
+            i22b(0xD8, 0, 0, 1),         # 10: add-int/lit8 v0, v0, 1
+            i10t(0x28, -9),              # 12: goto -> 3
+            i10x(0x0E),                  # 13: return-void
+        ), 5, ins_size=1, name='prefix', parameters=['[I'])
+        expected, got, function = self.run_both(method, '[I', list(range(50)))
+        self.assertEqual(got, expected)
+        self.assertNotIn('_vector_views(', function.source)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# tests/test_liveness.py
+import unittest
+
+from src.core.dalvik.vm import DalvikVM
+from src.core.dalvik.liveness import get_liveness
+from tests.bytecode_helpers import (
+    assemble, invoke, make_method, method_ref, new_parser, i11n, i11x, i21c, i23x,
+)
+
+
+class TestLiveness(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+        self.parser.type_ids.append('LFoo;')
+        use = method_ref(self.parser, 'LTest;', 'use', ['Ljava/lang/Object;'])
+        units = assemble(
+            i21c(0x22, 0, 0),            # 0: new-instance v0, LFoo;（之后不再使用）
+            i21c(0x22, 1, 0),            # 2: new-instance v1, LFoo;
+            i11n(0x12, 2, 3),            # 4: const/4 v2, 3
+            invoke(0x71, use, [1]),      # 5: invoke-static {v1}, use
+            i23x(0x90, 2, 2, 2),         # 8: add-int v2, v2, v2
+            i11x(0x11, 1),               # 10: return-object v1
+        )
+        self.method = make_method(self.parser, units, 3, return_type='Ljava/lang/Object;')
+        self.code = self.parser.code_items[self.method['code_off']]
+
+    def test_live_sets(self):
+        liveness = get_liveness(self.code)
+        self.assertEqual(liveness.live_in[5], frozenset([1, 2]))
+        self.assertEqual(liveness.live_out[0], frozenset())
+        self.assertIs(get_liveness(self.code), liveness)
+
+    def test_reference_maps_use_verified_types(self):
+        self.assertTrue(self.vm.verifier.verify_method(self.method, self.parser)['verified'])
+        liveness = get_liveness(self.code)
+        self.assertEqual(liveness.reference_map(5), (1,))
+        self.assertEqual(liveness.call_map(5), (1,))
+        self.assertEqual(liveness.reference_map(0), ())
+        self.assertEqual(liveness.reference_map(10), (1,))
+
+    def test_gc_scans_only_live_references(self):
+        self.vm.verifier.verify_method(self.method, self.parser)
+        dead, live, lookalike = (self.vm._create_object('LFoo;') for _ in range(3))
+        interpreter = self.vm.interpreter
+        # v2 保存的 int 恰好等于某个对象ID，不应被当作引用
+        interpreter.registers = [dead, live, lookalike]
+        interpreter.current_code = self.code
+        interpreter.pc = 5
+
+        self.vm.gc.collect()
+        self.assertEqual(set(self.vm.heap), {live})
+        self.assertEqual(self.vm.gc.root_stats, {'scanned_registers': 1, 'skipped_registers': 2})
+
+    def test_exception_handler_keeps_registers_live(self):
+        tries = [{'start_addr': 0, 'insn_count': 2, 'handler_off': 0, 'catch_all': 3, 'handlers': []}]
+        method = make_method(self.parser, assemble(
+            i23x(0x93, 0, 1, 2),         # 0: div-int v0, v1, v2
+            i11x(0x0F, 0),               # 2: return v0
+            i11x(0x0F, 0),               # 3: return v0（处理器读取 v0 的旧值）
+        ), 3, ins_size=2, return_type='I', tries=tries)
+        liveness = get_liveness(self.parser.code_items[method['code_off']])
+        self.assertEqual(liveness.live_in[0], frozenset([0, 1, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# tests/test_startup_profile.py
+import json
+import os
+import tempfile
+import unittest
+
+from src.core.dalvik.class_linker import UNINITIALIZED
+from src.core.dalvik.vm import DalvikVM
+from tests.bytecode_helpers import (
+    assemble, invoke, make_class, make_method, method_ref, new_parser, i11n, i11x, i21c, i22b, i23x,
+)
+
+
+class TestStartupProfile(unittest.TestCase):
+    """每次 launch 创建新的虚拟机和解析器，模拟同一个 APK 的再次启动"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def launch(self):
+        self.vm = DalvikVM()
+        self.jit = self.vm.jit
+        self.jit.background = False
+        self.jit.compilation_threshold = 3
+        self.jit.optimize_threshold = 5
+        self.profile = self.vm.enable_startup_profile(self.directory.name)
+        self.parser = parser = new_parser()
+        parser.type_ids.extend(['LFoo;', 'LBar;', 'LConfig;'])
+        config = make_class(parser, 'LConfig;', static_fields=[('scale', 'I')])
+        scale = config['static_fields'][0]['field_idx']
+        foo = make_class(parser, 'LFoo;')
+        bar = make_class(parser, 'LBar;', superclass_name='LFoo;')
+        for class_def, value in ((foo, 1), (bar, 2)):
+            self.register(class_def, make_method(parser, assemble(
+                i11n(0x12, 0, value),        # const/4 v0, value
+                i11x(0x0F, 0),
+            ), 2, ins_size=1, name='get', class_name=class_def['class_name'], parameters=[], return_type='I'))
+        self.read = self.register(None, make_method(parser, assemble(
+            invoke(0x6E, foo['virtual_methods'][0]['method_idx'], [1]),  # invoke-virtual {v1}, LFoo;->get()I
+            i11x(0x0A, 0),                   # move-result v0
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name='read', parameters=['LFoo;'], return_type='I'))
+        self.scaled = self.register(None, make_method(parser, assemble(
+            i21c(0x60, 0, scale),            # sget v0, LConfig;->scale
+            i23x(0x92, 0, 0, 1),             # mul-int v0, v0, v1
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name='scaled', return_type='I'))
+        self.cold = self.register(None, make_method(parser, assemble(
+            i22b(0xD8, 0, 1, 1),             # add-int/lit8 v0, v1, 1
+            i11x(0x0F, 0),
+        ), 2, ins_size=1, name='cold', return_type='I'))
+
+    def register(self, class_def, method):
+        """把方法登记到 method_ids，启动profile按签名查找"""
+        index = method_ref(self.parser, method['class_name'], method['name'], method['proto']['parameters'],
+                           method['proto']['return_type'], code_off=method['code_off'])
+        if class_def is not None:
+            class_def['virtual_methods'].append({'method_idx': index, 'code_off': method['code_off']})
+        return method
+
+    def call(self, method, *args):
+        return self.vm.interpreter.invoke_method(method, self.parser, list(args))
+
+    def code(self, method):
+        return self.parser.code_items[method['code_off']]
+
+    def first_run(self):
+        self.launch()
+        self.profile.begin(self.vm, self.parser)
+        a_foo = self.vm._create_object('LFoo;')
+        for i in range(8):
+            self.assertEqual(self.call(self.read, a_foo), 1)
+        for i in range(4):
+            self.call(self.scaled, i)
+        self.call(self.cold, 1)
+        self.assertTrue(self.profile.save(self.vm, self.parser))
+
+    def test_profile_records_hot_methods_receivers_and_startup_classes(self):
+        self.first_run()
+        with open(self.profile.path(self.parser), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        methods = {entry['method']: entry for entry in saved['methods']}
+        self.assertEqual(set(methods), {'LTest;->read(LFoo;)I', 'LTest;->scaled(I)I', 'LFoo;->get()I'})
+        self.assertEqual(methods['LTest;->read(LFoo;)I']['tier'], 2)
+        self.assertEqual(methods['LTest;->read(LFoo;)I']['receivers'], {'0': ['LFoo;']})
+        self.assertEqual(methods['LTest;->scaled(I)I']['tier'], 1)
+        hotness = [entry['hotness'] for entry in saved['methods']]
+        self.assertEqual(hotness, sorted(hotness, reverse=True))
+        self.assertEqual(saved['classes'], ['LConfig;'])
+
+    def test_next_launch_preloads_classes_and_compiles_before_first_call(self):
+        self.first_run()
+        self.launch()
+        self.assertTrue(self.profile.begin(self.vm, self.parser))
+        self.assertEqual(self.vm.classes.classes['LConfig;'].state, UNINITIALIZED)
+        self.assertEqual(self.profile.stats['classes'], 1)
+        self.assertEqual(self.profile.stats['methods'], 3)
+        self.assertTrue(self.jit.wait_idle())
+
+        # 方法第一次调用就执行编译版本；上次单态的调用点直接编译为带类型检查的优化版本
+        read, scaled = self.code(self.read), self.code(self.scaled)
+        self.assertEqual(read['tier'], 2)
+        self.assertIn("!= 'LFoo;'", read['jit'].source)
+        self.assertEqual(scaled['tier'], 1)
+        self.assertNotIn('jit', self.code(self.cold))
+        self.assertEqual(self.call(self.scaled, 5), 0)
+        self.assertEqual(self.call(self.read, self.vm._create_object('LFoo;')), 1)
+        self.assertNotIn('invocations', read)
+
+        # 推测错误时照常去优化
+        self.assertEqual(self.call(self.read, self.vm._create_object('LBar;')), 2)
+        self.assertEqual(self.jit.stats['deoptimizations'], 1)
+
+    def test_profile_of_other_dex_ignored(self):
+        self.first_run()
+        self.launch()
+        self.parser.header['signature'] = bytes(range(20))
+        self.assertFalse(self.profile.begin(self.vm, self.parser))
+        self.assertEqual(self.jit.status()['queue_depth'], 0)
+        self.assertFalse(os.path.exists(self.profile.path(self.parser)))
+
+
+if __name__ == '__main__':
+    unittest.main()
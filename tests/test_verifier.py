@@ -0,0 +1,115 @@
+# tests/test_verifier.py
+import unittest
+
+from src.core.dalvik.vm import DalvikVM
+from tests.bytecode_helpers import (
+    assemble, make_method, new_parser, float_bits, i10x, i11n, i11x, i20t, i23x, i31i,
+)
+
+
+class TestVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = DalvikVM()
+        self.parser = new_parser()
+
+    def run_method(self, method, args=None):
+        return self.vm.interpreter.interpret(method, {}, self.parser, args)
+
+    def test_float_constants_rewritten_and_unchecked(self):
+        units = assemble(
+            i31i(0x14, 0, float_bits(1.5)),     # const v0, 1.5f
+            i31i(0x14, 1, float_bits(2.25)),    # const v1, 2.25f
+            i23x(0xA6, 2, 0, 1),                # add-float v2, v0, v1
+            i11x(0x0F, 2),                      # return v2
+        )
+        method = make_method(self.parser, units, 3, return_type='F')
+        self.assertEqual(self.run_method(method), 3.75)
+
+        result = self.parser.verification[method['code_off']]
+        self.assertTrue(result['verified'])
+        self.assertTrue(result['unchecked'])
+        self.assertEqual(self.parser.code_items[method['code_off']]['insns'][0]['literal'], 1.5)
+
+    def test_constant_shared_by_int_and_float_stays_checked(self):
+        units = assemble(
+            i31i(0x14, 0, float_bits(1.0)),     # const v0, 0x3f800000
+            i23x(0x90, 1, 0, 0),                # add-int v1, v0, v0
+            i23x(0xA6, 2, 0, 0),                # add-float v2, v0, v0
+            i11x(0x0F, 2),                      # return v2
+        )
+        method = make_method(self.parser, units, 3, return_type='F')
+        self.assertEqual(self.run_method(method), 2.0)
+
+        result = self.parser.verification[method['code_off']]
+        self.assertTrue(result['verified'])
+        self.assertFalse(result['unchecked'])
+        self.assertIsInstance(self.parser.code_items[method['code_off']]['insns'][0]['literal'], int)
+
+    def test_constant_stored_to_int_array_and_used_as_float_stays_int(self):
+        units = assemble(
+            i11n(0x12, 0, 0),                   # const/4 v0, 0
+            i23x(0x4B, 0, 3, 4),                # aput v0, v3, v4（int[]）
+            i23x(0xA6, 1, 0, 0),                # add-float v1, v0, v0
+            i11x(0x0F, 1),                      # return v1
+        )
+        method = make_method(self.parser, units, 5, ins_size=2, parameters=['[I', 'I'], return_type='F')
+        array_id = self.vm._create_array('[I', 2)
+        self.assertEqual(self.run_method(method, [array_id, 1]), 0.0)
+        self.assertEqual(list(self.vm.heap[array_id]['data']), [0, 0])
+
+        result = self.parser.verification[method['code_off']]
+        self.assertTrue(result['verified'])
+        self.assertFalse(result['unchecked'])
+        self.assertIsInstance(self.parser.code_items[method['code_off']]['insns'][0]['literal'], int)
+
+    def test_unreachable_code_reported(self):
+        units = assemble(
+            i10x(0x0E),                         # return-void
+            i11n(0x12, 0, 1),                   # const/4 v0, 1（不可达）
+            i10x(0x0E),
+        )
+        method = make_method(self.parser, units, 1)
+        result = self.vm.verifier.verify_method(method, self.parser)
+        self.assertTrue(result['verified'])
+        self.assertEqual(result['unreachable'], [1, 2])
+
+    def test_type_error_falls_back_to_checked_handlers(self):
+        # 参数声明为 int 却当作 float 使用：校验失败，仍按位模式语义执行
+        units = assemble(
+            i23x(0xA6, 0, 1, 1),                # add-float v0, v1, v1
+            i11x(0x0F, 0),                      # return v0
+        )
+        method = make_method(self.parser, units, 2, ins_size=1, return_type='F')
+        self.assertEqual(self.run_method(method, [float_bits(1.5)]), 3.0)
+
+        result = self.parser.verification[method['code_off']]
+        self.assertFalse(result['verified'])
+        self.assertIn('add-float', result['error'])
+        self.assertEqual(self.vm.verifier.stats['failed'], 1)
+
+    def test_branch_outside_method_fails(self):
+        method = make_method(self.parser, assemble(i20t(0x29, 100), i10x(0x0E)), 1)
+        result = self.vm.verifier.verify_method(method, self.parser)
+        self.assertFalse(result['verified'])
+
+    def test_exception_handler_is_verified_and_taken(self):
+        units = assemble(
+            i23x(0x93, 0, 1, 2),                # div-int v0, v1, v2
+            i11x(0x0F, 0),                      # return v0
+            i11n(0x12, 0, -1),                  # const/4 v0, -1（处理器）
+            i11x(0x0F, 0),                      # return v0
+        )
+        tries = [{'start_addr': 0, 'insn_count': 2, 'handler_off': 0, 'catch_all': None,
+                  'handlers': [{'type': 'Ljava/lang/ArithmeticException;', 'addr': 3}]}]
+        method = make_method(self.parser, units, 3, ins_size=2, return_type='I', tries=tries)
+        self.assertEqual(self.run_method(method, [7, 0]), -1)
+        self.assertEqual(self.run_method(method, [7, 2]), 3)
+
+        result = self.parser.verification[method['code_off']]
+        self.assertTrue(result['verified'])
+        self.assertEqual(result['unreachable'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()